@@ -499,6 +499,43 @@ def plot_individual_client_boxplot():
     if SHOULD_SHOW:
         plt.show()
     plt.clf()
+def plot_resource_usage():
+    """
+    Mean resource use of the sim and of a client host per number of cars,
+    from the samples of the resource collectors.
+    """
+    resource_df_path = f'{CUMULATIVE_STATS_FOLDER_PATH}/df_resource_usage'
+    resource_df = get_stats_df(resource_df_path)
+    if resource_df is None or resource_df.empty:
+        print("no resource samples - set ecloud.resource_telemetry_enabled")
+        return
+
+    resource_metrics = { # column -> axis label
+        "cpu_percent": 'CPU Utilization (%)',
+        "rss_mb": 'Resident Memory (MB)',
+        "num_threads": 'Threads',
+        "gpu_mem_mb": 'GPU Memory (MB)',
+        "queue_depth": 'Tick Queue Depth',
+    }
+    # a run's mean per process first, so long runs & big hosts don't dominate
+    run_df = resource_df.groupby(['num_cars', 'run_timestamp', 'role', 'process'])[list(resource_metrics)].mean().reset_index()
+
+    sns.set_style('whitegrid')
+    for metric, ylabel in resource_metrics.items():
+        if run_df[metric].isna().all(): # e.g. no GPU
+            continue
+
+        plt.figure(figsize=(10, 6))
+        ax = sns.lineplot(data=run_df, x='num_cars', y=metric, hue='role', marker='o')
+        ax.set(xlabel='Number of Cars',
+               ylabel=ylabel,
+               title=f'eCloudSim: {ylabel} per Process \n per Number of Vehicles ({PERCEPTION_TITLE}) - {NODE_TITLE}')
+        save_file_path = f'{CUMULATIVE_STATS_FOLDER_PATH}/resource_{metric}_vs_scale.png'
+        save_ax(ax, save_file_path)
+        if SHOULD_SHOW:
+            plt.show()
+        plt.clf()
+
 # In[276]:
 
 
@@ -587,6 +624,8 @@ if __name__ == '__main__':
     
     plot_individual_client_boxplot()
 
+    plot_resource_usage()
+
 
    # Example DataFrame for comparison chart
     comparison_data = pd.DataFrame({
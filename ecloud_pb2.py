@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: ecloud.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'ecloud.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0c\x65\x63loud.proto\x12\x06\x65\x63loud\x1a\x1fgoogle/protobuf/timestamp.proto\"\x07\n\x05\x45mpty\"\x8d\x01\n\nTimestamps\x12\x0f\n\x07tick_id\x18\x01 \x01(\x05\x12\x37\n\x13\x63lient_start_tstamp\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x35\n\x11\x63lient_end_tstamp\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\xf9\x01\n\x04Tick\x12\x0f\n\x07tick_id\x18\x01 \x01(\x05\x12 \n\x07\x63ommand\x18\x02 \x01(\x0e\x32\x0f.ecloud.Command\x12\x1f\n\x17last_client_duration_ns\x18\x03 \x01(\x03\x12\x1c\n\x14server_tick_start_ns\x18\x04 \x01(\x03\x12\x1a\n\x12server_tick_end_ns\x18\x05 \x01(\x03\x12\x18\n\x10\x65victed_vehicles\x18\x06 \x03(\x05\x12.\n\rlate_vehicles\x18\x07 \x03(\x0b\x32\x17.ecloud.VehicleLateness\x12\x19\n\x11staleness_barrier\x18\x08 \x01(\x08\"T\n\x0fVehicleLateness\x12\x15\n\rvehicle_index\x18\x01 \x01(\x05\x12\x10\n\x08reply_ms\x18\x02 \x01(\x02\x12\x18\n\x10missed_deadlines\x18\x03 \x01(\x05\"d\n\tTraceSpan\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07tick_id\x18\x02 \x01(\x05\x12\x10\n\x08start_ns\x18\x03 \x01(\x03\x12\x13\n\x0b\x64uration_ns\x18\x04 \x01(\x03\x12\x11\n\tthread_id\x18\x05 \x01(\x03\"\xae\x01\n\x0eResourceSample\x12\x0f\n\x07tick_id\x18\x01 \x01(\x05\x12\x14\n\x0ctimestamp_ns\x18\x02 \x01(\x03\x12\x13\n\x0b\x63pu_percent\x18\x03 \x01(\x02\x12\x0e\n\x06rss_mb\x18\x04 \x01(\x02\x12\x13\n\x0bnum_threads\x18\x05 \x01(\x05\x12\x17\n\ngpu_mem_mb\x18\x06 \x01(\x02H\x00\x88\x01\x01\x12\x13\n\x0bqueue_depth\x18\x07 \x01(\x05\x42\r\n\x0b_gpu_mem_mb\":\n\x08WaitTime\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07tick_id\x18\x02 \x01(\x05\x12\x0f\n\x07wait_ms\x18\x03 \x01(\x02\"\xab\x02\n\x0eSimulationInfo\x12\x15\n\rvehicle_index\x18\x01 \x01(\x05\x12\x15\n\rtest_scenario\x18\x02 \x01(\t\x12\x13\n\x0b\x61pplication\x18\x03 \x01(\t\x12\x0f\n\x07version\x18\x04 \x01(\t\x12\x0f\n\x07is_edge\x18\x05 \x01(\x08\x12\x1a\n\x12vehicle_machine_ip\x18\x06 \x01(\t\x12\x10\n\x08\x63\x61rla_ip\x18\x07 \x01(\t\x12$\n\x06spawns\x18\x08 \x03(\x0b\x32\x14.ecloud.VehicleSpawn\x12\x18\n\x10tick_deadline_ms\x18\t \x01(\x05\x12\x18\n\x10max_missed_ticks\x18\n \x01(\x05\x12\x13\n\x0b\x61sync_ticks\x18\x0b \x01(\x08\x12\x17\n\x0fstaleness_bound\x18\x0c \x01(\x05\"\x84\x01\n\x0cVehicleSpawn\x12\x15\n\rvehicle_index\x18\x01 \x01(\x05\x12\x10\n\x08\x61\x63tor_id\x18\x02 \x01(\x05\x12$\n\ttransform\x18\x03 \x01(\x0b\x32\x11.ecloud.Transform\x12%\n\x0b\x64\x65stination\x18\x04 \x01(\x0b\x32\x10.ecloud.Location\"9\n\x0fWaypointRequest\x12\x15\n\rvehicle_index\x18\x01 \x01(\x05\x12\x0f\n\x07version\x18\x02 \x01(\r\"E\n\rEdgeWaypoints\x12\x34\n\x14\x61ll_waypoint_buffers\x18\x01 \x03(\x0b\x32\x16.ecloud.WaypointBuffer\"\xac\x01\n\x0eWaypointBuffer\x12\x15\n\rvehicle_index\x18\x01 \x01(\x05\x12)\n\x0fwaypoint_buffer\x18\x02 \x03(\x0b\x32\x10.ecloud.Waypoint\x12\x0f\n\x07version\x18\x03 \x01(\r\x12\x11\n\tunchanged\x18\x04 \x01(\x08\x12$\n\x05\x64\x65lta\x18\x05 \x01(\x0b\x32\x15.ecloud.WaypointDelta\x12\x0e\n\x06points\x18\x06 \x03(\x02\"\x8e\x01\n\rWaypointDelta\x12\x14\n\x0c\x62\x61se_version\x18\x01 \x01(\r\x12\x0f\n\x07\x64ropped\x18\x02 \x01(\r\x12\x0e\n\x06length\x18\x03 \x01(\r\x12\x15\n\rchanged_index\x18\x04 \x03(\r\x12\x16\n\x0e\x63hanged_points\x18\x05 \x03(\x02\x12\x17\n\x0f\x61ppended_points\x18\x06 \x03(\x02\"\x85\x02\n\x08Waypoint\x12\n\n\x02id\x18\x01 \x01(\t\x12$\n\ttransform\x18\x02 \x01(\x0b\x32\x11.ecloud.Transform\x12\x0f\n\x07road_id\x18\x03 \x01(\x05\x12\x12\n\nsection_id\x18\x04 \x01(\x05\x12\x0f\n\x07lane_id\x18\x05 \x01(\x05\x12\t\n\x01s\x18\x06 \x01(\x02\x12\x13\n\x0bis_junction\x18\x07 \x01(\x08\x12\x12\n\nlane_width\x18\x08 \x01(\x02\x12\x13\n\x0blane_change\x18\t \x01(\x05\x12\x11\n\tlane_type\x18\n \x01(\x05\x12\x1a\n\x12right_lane_marking\x18\x0b \x01(\x05\x12\x19\n\x11left_lane_marking\x18\x0c \x01(\x05\"S\n\tTransform\x12\"\n\x08location\x18\x01 \x01(\x0b\x32\x10.ecloud.Location\x12\"\n\x08rotation\x18\x02 \x01(\x0b\x32\x10.ecloud.Rotation\"+\n\x08Location\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\"4\n\x08Rotation\x12\x0b\n\x03yaw\x18\x01 \x01(\x02\x12\r\n\x05pitch\x18\x02 \x01(\x02\x12\x0c\n\x04roll\x18\x03 \x01(\x02\"+\n\x08Velocity\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\"\xdc\x01\n\x0eLocDebugHelper\x12\x0e\n\x06gnss_x\x18\x01 \x03(\x02\x12\x0e\n\x06gnss_y\x18\x02 \x03(\x02\x12\x10\n\x08gnss_yaw\x18\x03 \x03(\x02\x12\x10\n\x08gnss_spd\x18\x04 \x03(\x02\x12\x10\n\x08\x66ilter_x\x18\x05 \x03(\x02\x12\x10\n\x08\x66ilter_y\x18\x06 \x03(\x02\x12\x12\n\nfilter_yaw\x18\x07 \x03(\x02\x12\x12\n\nfilter_spd\x18\x08 \x03(\x02\x12\x0c\n\x04gt_x\x18\t \x03(\x02\x12\x0c\n\x04gt_y\x18\n \x03(\x02\x12\x0e\n\x06gt_yaw\x18\x0b \x03(\x02\x12\x0e\n\x06gt_spd\x18\x0c \x03(\x02\"%\n\x10\x41gentDebugHelper\x12\x11\n\ttime_list\x18\x01 \x03(\x02\"~\n\x11PlanerDebugHelper\x12\x12\n\nspeed_list\x18\x01 \x03(\x02\x12\x10\n\x08\x61\x63\x63_list\x18\x02 \x03(\x02\x12\x10\n\x08ttc_list\x18\x03 \x03(\x02\x12\x31\n\x0f\x61gent_step_list\x18\x04 \x03(\x0b\x32\x18.ecloud.AgentDebugHelper\"\x9a\x04\n\x11\x43lientDebugHelper\x12\x1c\n\x14perception_time_list\x18\x01 \x03(\x02\x12\x1e\n\x16localization_time_list\x18\x02 \x03(\x02\x12\x1d\n\x15update_info_time_list\x18\x03 \x03(\x02\x12#\n\x1b\x61gent_update_info_time_list\x18\x04 \x03(\x02\x12(\n controller_update_info_time_list\x18\x05 \x03(\x02\x12\x1c\n\x14\x61gent_step_time_list\x18\x06 \x03(\x02\x12\x1e\n\x16vehicle_step_time_list\x18\x07 \x03(\x02\x12!\n\x19\x63ontroller_step_time_list\x18\x08 \x03(\x02\x12\x19\n\x11\x63ontrol_time_list\x18\t \x03(\x02\x12+\n\x0ftimestamps_list\x18\n \x03(\x0b\x32\x12.ecloud.Timestamps\x12&\n\x0btrace_spans\x18\x0b \x03(\x0b\x32\x11.ecloud.TraceSpan\x12\x16\n\x0estaleness_list\x18\x0c \x03(\x05\x12(\n\x0ewait_time_list\x18\r \x03(\x0b\x32\x10.ecloud.WaitTime\x12\x30\n\x10resource_samples\x18\x0e \x03(\x0b\x32\x16.ecloud.ResourceSample\x12\x14\n\x0cprocess_name\x18\x0f \x01(\t\"\xb4\x01\n\x10RegistrationInfo\x12+\n\rvehicle_state\x18\x01 \x01(\x0e\x32\x14.ecloud.VehicleState\x12\x15\n\rvehicle_index\x18\x02 \x01(\x05\x12\x0b\n\x03vid\x18\x03 \x01(\t\x12\x10\n\x08\x61\x63tor_id\x18\x04 \x01(\x05\x12\x16\n\x0e\x63ontainer_name\x18\x05 \x01(\t\x12\x12\n\nvehicle_ip\x18\x06 \x01(\t\x12\x11\n\tpush_port\x18\x07 \x01(\x05\"\xe5\x02\n\rVehicleUpdate\x12\x0f\n\x07tick_id\x18\x01 \x01(\x05\x12\x15\n\rvehicle_index\x18\x02 \x01(\x05\x12+\n\rvehicle_state\x18\x03 \x01(\x0e\x32\x14.ecloud.VehicleState\x12\x30\n\x10loc_debug_helper\x18\x04 \x01(\x0b\x32\x16.ecloud.LocDebugHelper\x12\x36\n\x13planer_debug_helper\x18\x05 \x01(\x0b\x32\x19.ecloud.PlanerDebugHelper\x12\x36\n\x13\x63lient_debug_helper\x18\x06 \x01(\x0b\x32\x19.ecloud.ClientDebugHelper\x12$\n\ttransform\x18\x07 \x01(\x0b\x32\x11.ecloud.Transform\x12\"\n\x08velocity\x18\x08 \x01(\x0b\x32\x10.ecloud.Velocity\x12\x13\n\x0b\x64uration_ns\x18\t \x01(\x03\"P\n\x0e\x45\x63loudResponse\x12\x0f\n\x07tick_id\x18\x01 \x01(\x05\x12-\n\x0evehicle_update\x18\x02 \x03(\x0b\x32\x15.ecloud.VehicleUpdate*^\n\x07\x43ommand\x12\x08\n\x04TICK\x10\x00\x12\x07\n\x03\x45ND\x10\x01\x12\x16\n\x12REQUEST_DEBUG_INFO\x10\x02\x12\x1b\n\x17PULL_WAYPOINTS_AND_TICK\x10\x03\x12\x0b\n\x07\x45VICTED\x10\x04*\xa0\x01\n\x0cVehicleState\x12\x0f\n\x0bREGISTERING\x10\x00\x12\x10\n\x0c\x43\x41RLA_UPDATE\x10\x01\x12\x12\n\x0eUPDATE_INFO_OK\x10\x02\x12\x13\n\x0fGET_DESTINATION\x10\x03\x12\x0b\n\x07TICK_OK\x10\x04\x12\r\n\tTICK_DONE\x10\x05\x12\x06\n\x02OK\x10\x06\x12\t\n\x05\x45RROR\x10\x07\x12\x15\n\x11\x44\x45\x42UG_INFO_UPDATE\x10\x08\x32\xa6\x04\n\x06\x45\x63loud\x12\'\n\x08PushTick\x12\x0c.ecloud.Tick\x1a\r.ecloud.Empty\x12\x39\n\x11\x43lient_SendUpdate\x12\x15.ecloud.VehicleUpdate\x1a\r.ecloud.Empty\x12J\n\x16\x43lient_RegisterVehicle\x12\x18.ecloud.RegistrationInfo\x1a\x16.ecloud.SimulationInfo\x12\x46\n\x13\x43lient_GetWaypoints\x12\x17.ecloud.WaypointRequest\x1a\x16.ecloud.WaypointBuffer\x12,\n\rServer_DoTick\x12\x0c.ecloud.Tick\x1a\r.ecloud.Empty\x12=\n\x14Server_StartScenario\x12\x16.ecloud.SimulationInfo\x1a\r.ecloud.Empty\x12\x32\n\x12Server_EndScenario\x12\r.ecloud.Empty\x1a\r.ecloud.Empty\x12\x41\n\x18Server_GetVehicleUpdates\x12\r.ecloud.Empty\x1a\x16.ecloud.EcloudResponse\x12@\n\x18Server_PushEdgeWaypoints\x12\x15.ecloud.EdgeWaypoints\x1a\r.ecloud.Emptyb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ecloud_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_COMMAND']._serialized_start=3823
+  _globals['_COMMAND']._serialized_end=3917
+  _globals['_VEHICLESTATE']._serialized_start=3920
+  _globals['_VEHICLESTATE']._serialized_end=4080
+  _globals['_EMPTY']._serialized_start=57
+  _globals['_EMPTY']._serialized_end=64
+  _globals['_TIMESTAMPS']._serialized_start=67
+  _globals['_TIMESTAMPS']._serialized_end=208
+  _globals['_TICK']._serialized_start=211
+  _globals['_TICK']._serialized_end=460
+  _globals['_VEHICLELATENESS']._serialized_start=462
+  _globals['_VEHICLELATENESS']._serialized_end=546
+  _globals['_TRACESPAN']._serialized_start=548
+  _globals['_TRACESPAN']._serialized_end=648
+  _globals['_RESOURCESAMPLE']._serialized_start=651
+  _globals['_RESOURCESAMPLE']._serialized_end=825
+  _globals['_WAITTIME']._serialized_start=827
+  _globals['_WAITTIME']._serialized_end=885
+  _globals['_SIMULATIONINFO']._serialized_start=888
+  _globals['_SIMULATIONINFO']._serialized_end=1187
+  _globals['_VEHICLESPAWN']._serialized_start=1190
+  _globals['_VEHICLESPAWN']._serialized_end=1322
+  _globals['_WAYPOINTREQUEST']._serialized_start=1324
+  _globals['_WAYPOINTREQUEST']._serialized_end=1381
+  _globals['_EDGEWAYPOINTS']._serialized_start=1383
+  _globals['_EDGEWAYPOINTS']._serialized_end=1452
+  _globals['_WAYPOINTBUFFER']._serialized_start=1455
+  _globals['_WAYPOINTBUFFER']._serialized_end=1627
+  _globals['_WAYPOINTDELTA']._serialized_start=1630
+  _globals['_WAYPOINTDELTA']._serialized_end=1772
+  _globals['_WAYPOINT']._serialized_start=1775
+  _globals['_WAYPOINT']._serialized_end=2036
+  _globals['_TRANSFORM']._serialized_start=2038
+  _globals['_TRANSFORM']._serialized_end=2121
+  _globals['_LOCATION']._serialized_start=2123
+  _globals['_LOCATION']._serialized_end=2166
+  _globals['_ROTATION']._serialized_start=2168
+  _globals['_ROTATION']._serialized_end=2220
+  _globals['_VELOCITY']._serialized_start=2222
+  _globals['_VELOCITY']._serialized_end=2265
+  _globals['_LOCDEBUGHELPER']._serialized_start=2268
+  _globals['_LOCDEBUGHELPER']._serialized_end=2488
+  _globals['_AGENTDEBUGHELPER']._serialized_start=2490
+  _globals['_AGENTDEBUGHELPER']._serialized_end=2527
+  _globals['_PLANERDEBUGHELPER']._serialized_start=2529
+  _globals['_PLANERDEBUGHELPER']._serialized_end=2655
+  _globals['_CLIENTDEBUGHELPER']._serialized_start=2658
+  _globals['_CLIENTDEBUGHELPER']._serialized_end=3196
+  _globals['_REGISTRATIONINFO']._serialized_start=3199
+  _globals['_REGISTRATIONINFO']._serialized_end=3379
+  _globals['_VEHICLEUPDATE']._serialized_start=3382
+  _globals['_VEHICLEUPDATE']._serialized_end=3739
+  _globals['_ECLOUDRESPONSE']._serialized_start=3741
+  _globals['_ECLOUDRESPONSE']._serialized_end=3821
+  _globals['_ECLOUD']._serialized_start=4083
+  _globals['_ECLOUD']._serialized_end=4633
+# @@protoc_insertion_point(module_scope)
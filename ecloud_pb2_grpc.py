@@ -0,0 +1,444 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import ecloud_pb2 as ecloud__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in ecloud_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class EcloudStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.PushTick = channel.unary_unary(
+                '/ecloud.Ecloud/PushTick',
+                request_serializer=ecloud__pb2.Tick.SerializeToString,
+                response_deserializer=ecloud__pb2.Empty.FromString,
+                _registered_method=True)
+        self.Client_SendUpdate = channel.unary_unary(
+                '/ecloud.Ecloud/Client_SendUpdate',
+                request_serializer=ecloud__pb2.VehicleUpdate.SerializeToString,
+                response_deserializer=ecloud__pb2.Empty.FromString,
+                _registered_method=True)
+        self.Client_RegisterVehicle = channel.unary_unary(
+                '/ecloud.Ecloud/Client_RegisterVehicle',
+                request_serializer=ecloud__pb2.RegistrationInfo.SerializeToString,
+                response_deserializer=ecloud__pb2.SimulationInfo.FromString,
+                _registered_method=True)
+        self.Client_GetWaypoints = channel.unary_unary(
+                '/ecloud.Ecloud/Client_GetWaypoints',
+                request_serializer=ecloud__pb2.WaypointRequest.SerializeToString,
+                response_deserializer=ecloud__pb2.WaypointBuffer.FromString,
+                _registered_method=True)
+        self.Server_DoTick = channel.unary_unary(
+                '/ecloud.Ecloud/Server_DoTick',
+                request_serializer=ecloud__pb2.Tick.SerializeToString,
+                response_deserializer=ecloud__pb2.Empty.FromString,
+                _registered_method=True)
+        self.Server_StartScenario = channel.unary_unary(
+                '/ecloud.Ecloud/Server_StartScenario',
+                request_serializer=ecloud__pb2.SimulationInfo.SerializeToString,
+                response_deserializer=ecloud__pb2.Empty.FromString,
+                _registered_method=True)
+        self.Server_EndScenario = channel.unary_unary(
+                '/ecloud.Ecloud/Server_EndScenario',
+                request_serializer=ecloud__pb2.Empty.SerializeToString,
+                response_deserializer=ecloud__pb2.Empty.FromString,
+                _registered_method=True)
+        self.Server_GetVehicleUpdates = channel.unary_unary(
+                '/ecloud.Ecloud/Server_GetVehicleUpdates',
+                request_serializer=ecloud__pb2.Empty.SerializeToString,
+                response_deserializer=ecloud__pb2.EcloudResponse.FromString,
+                _registered_method=True)
+        self.Server_PushEdgeWaypoints = channel.unary_unary(
+                '/ecloud.Ecloud/Server_PushEdgeWaypoints',
+                request_serializer=ecloud__pb2.EdgeWaypoints.SerializeToString,
+                response_deserializer=ecloud__pb2.Empty.FromString,
+                _registered_method=True)
+
+
+class EcloudServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def PushTick(self, request, context):
+        """PUSH
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Client_SendUpdate(self, request, context):
+        """CLIENT
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Client_RegisterVehicle(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Client_GetWaypoints(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Server_DoTick(self, request, context):
+        """SERVER
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Server_StartScenario(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Server_EndScenario(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Server_GetVehicleUpdates(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Server_PushEdgeWaypoints(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_EcloudServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'PushTick': grpc.unary_unary_rpc_method_handler(
+                    servicer.PushTick,
+                    request_deserializer=ecloud__pb2.Tick.FromString,
+                    response_serializer=ecloud__pb2.Empty.SerializeToString,
+            ),
+            'Client_SendUpdate': grpc.unary_unary_rpc_method_handler(
+                    servicer.Client_SendUpdate,
+                    request_deserializer=ecloud__pb2.VehicleUpdate.FromString,
+                    response_serializer=ecloud__pb2.Empty.SerializeToString,
+            ),
+            'Client_RegisterVehicle': grpc.unary_unary_rpc_method_handler(
+                    servicer.Client_RegisterVehicle,
+                    request_deserializer=ecloud__pb2.RegistrationInfo.FromString,
+                    response_serializer=ecloud__pb2.SimulationInfo.SerializeToString,
+            ),
+            'Client_GetWaypoints': grpc.unary_unary_rpc_method_handler(
+                    servicer.Client_GetWaypoints,
+                    request_deserializer=ecloud__pb2.WaypointRequest.FromString,
+                    response_serializer=ecloud__pb2.WaypointBuffer.SerializeToString,
+            ),
+            'Server_DoTick': grpc.unary_unary_rpc_method_handler(
+                    servicer.Server_DoTick,
+                    request_deserializer=ecloud__pb2.Tick.FromString,
+                    response_serializer=ecloud__pb2.Empty.SerializeToString,
+            ),
+            'Server_StartScenario': grpc.unary_unary_rpc_method_handler(
+                    servicer.Server_StartScenario,
+                    request_deserializer=ecloud__pb2.SimulationInfo.FromString,
+                    response_serializer=ecloud__pb2.Empty.SerializeToString,
+            ),
+            'Server_EndScenario': grpc.unary_unary_rpc_method_handler(
+                    servicer.Server_EndScenario,
+                    request_deserializer=ecloud__pb2.Empty.FromString,
+                    response_serializer=ecloud__pb2.Empty.SerializeToString,
+            ),
+            'Server_GetVehicleUpdates': grpc.unary_unary_rpc_method_handler(
+                    servicer.Server_GetVehicleUpdates,
+                    request_deserializer=ecloud__pb2.Empty.FromString,
+                    response_serializer=ecloud__pb2.EcloudResponse.SerializeToString,
+            ),
+            'Server_PushEdgeWaypoints': grpc.unary_unary_rpc_method_handler(
+                    servicer.Server_PushEdgeWaypoints,
+                    request_deserializer=ecloud__pb2.EdgeWaypoints.FromString,
+                    response_serializer=ecloud__pb2.Empty.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'ecloud.Ecloud', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('ecloud.Ecloud', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Ecloud:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def PushTick(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/PushTick',
+            ecloud__pb2.Tick.SerializeToString,
+            ecloud__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Client_SendUpdate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Client_SendUpdate',
+            ecloud__pb2.VehicleUpdate.SerializeToString,
+            ecloud__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Client_RegisterVehicle(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Client_RegisterVehicle',
+            ecloud__pb2.RegistrationInfo.SerializeToString,
+            ecloud__pb2.SimulationInfo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Client_GetWaypoints(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Client_GetWaypoints',
+            ecloud__pb2.WaypointRequest.SerializeToString,
+            ecloud__pb2.WaypointBuffer.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Server_DoTick(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Server_DoTick',
+            ecloud__pb2.Tick.SerializeToString,
+            ecloud__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Server_StartScenario(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Server_StartScenario',
+            ecloud__pb2.SimulationInfo.SerializeToString,
+            ecloud__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Server_EndScenario(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Server_EndScenario',
+            ecloud__pb2.Empty.SerializeToString,
+            ecloud__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Server_GetVehicleUpdates(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Server_GetVehicleUpdates',
+            ecloud__pb2.Empty.SerializeToString,
+            ecloud__pb2.EcloudResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Server_PushEdgeWaypoints(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ecloud.Ecloud/Server_PushEdgeWaypoints',
+            ecloud__pb2.EdgeWaypoints.SerializeToString,
+            ecloud__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Script to benchmark the sharded edge planner without a simulator.
+
+Prints the edge step time versus the number of cars for every shard count,
+either on a null world of randomly spawned cars or on the edge traffic of
+recordings made with ecloud.record_enabled.
+"""
+
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import logging
+
+import coloredlogs
+
+from opencda.core.common.replay import load_recording
+from opencda.scenario_testing.utils.replay_api import benchmark_sharding
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger)
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="eCloud edge sharding benchmark.")
+    parser.add_argument("-n", "--cars", nargs='+', type=int, default=[16, 32, 64, 128],
+                        help="Null world car counts")
+    parser.add_argument("-s", "--shards", nargs='+', type=int, default=[1, 2, 4],
+                        help="Shard counts to compare")
+    parser.add_argument("--steps", type=int, default=20,
+                        help="Null world steps per run")
+    parser.add_argument("-e", "--executor", type=str, default='serial',
+                        help="Shard executor: serial, thread or process")
+    parser.add_argument("-p", "--partitioner", type=str, default=None,
+                        help="Slice partitioner of the shards")
+    parser.add_argument("-r", "--recordings", nargs='+', type=str, default=None,
+                        help="Use the edge traffic of these recordings instead of a null world")
+    opt = parser.parse_args()
+    return opt
+
+
+def main():
+    opt = arg_parse()
+    # the planner logs every A* search
+    logging.getLogger('opencda').setLevel(logging.ERROR)
+
+    runs = []
+    if opt.recordings:
+        for file_path in opt.recordings:
+            recording = load_recording(file_path)
+            snapshots = [inputs for _, event, inputs, _ in recording['events'].get('edge', [])
+                         if event == "update"]
+            if snapshots:
+                runs.append((f"{file_path} ({snapshots[0]['numcars']} cars)", 0, snapshots))
+    else:
+        runs = [(f"{num_cars} cars", num_cars, None) for num_cars in opt.cars]
+
+    for name, num_cars, snapshots in runs:
+        for num_shards in opt.shards:
+            stats = benchmark_sharding(num_cars, num_shards, opt.steps, snapshots,
+                                       opt.executor, opt.partitioner)
+            logger.info(f"{name}, {num_shards} shard(s): edge step "
+                        f"{stats['step_ms']['mean']:.1f}ms mean / {stats['step_ms']['p95']:.1f}ms p95, "
+                        f"slowest shard {stats['max_shard_ms']:.1f}ms, "
+                        f"{stats['handoffs']} handoffs, {stats['conflicts']} conflicts")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info(' - Exited by user.')
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Script to launch and supervise the vehicle clients of a distributed scenario.
+
+Splits the scenario's vehicles over a number of client hosts - local
+processes, containers of the vehicle-sim image, or null hosts that run the
+scenario's vehicles without CARLA against a stand-in sim - and waits for
+them to finish.
+"""
+
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import coloredlogs, logging
+
+from opencda.core.common.ecloud_config import EcloudConfig, eTransport
+from opencda.scenario_testing.utils.yaml_utils import load_yaml
+from opencda.scenario_testing.utils.launcher_api import BACKENDS, \
+    DOCKER_IMAGE, PUSH_BASE_PORT, ClientLauncher, gpu_count, plan_hosts, \
+    run_null_scenario
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger)
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="eCloud vehicle client launcher.")
+    parser.add_argument('-t', "--test_scenario", type=str, default=None,
+                        help="Scenario yaml in opencda/scenario_testing/config_yaml, "
+                             "for the number of vehicles")
+    parser.add_argument('-n', "--num_vehicles", type=int, default=None,
+                        help="Number of vehicles, overrides the scenario's num_cars")
+    parser.add_argument('-k', "--num_hosts", type=int, default=1,
+                        help="Number of client hosts the vehicles are split over")
+    parser.add_argument('-b', "--backend", type=str, default='process', choices=BACKENDS,
+                        help="Run the hosts as local processes, vehicle-sim containers "
+                             "or null hosts without CARLA, ticked by a stand-in sim over shm")
+    parser.add_argument("--apply_ml", action='store_true',
+                        help="Run the vehicles with ML, hosts are pinned to the GPUs round robin")
+    parser.add_argument('-p', "--port", type=int, default=50051,
+                        help="ecloud server port. [Default: 50051]")
+    parser.add_argument("--num_shards", type=int, default=None,
+                        help="Number of ecloud server shards, on port, port + 1, ... "
+                             "[Default: the scenario's ecloud.num_shards, else 1]")
+    parser.add_argument("--transport", type=str, default=None, choices=["grpc", "shm"],
+                        help="grpc, or shm for vehicles on the sim's machine "
+                             "[Default: the scenario's ecloud.transport, else grpc]")
+    parser.add_argument("--push_base_port", type=int, default=PUSH_BASE_PORT,
+                        help=f"Push port of the first vehicle. [Default: {PUSH_BASE_PORT}]")
+    parser.add_argument("--max_restarts", type=int, default=0,
+                        help="Restarts of a crashed host before it is reported as failed")
+    parser.add_argument("--timeout_s", type=float, default=None,
+                        help="Stop the hosts after this long")
+    parser.add_argument("--docker_cmd", type=str, default='sudo docker',
+                        help="Docker command of the docker backend")
+    parser.add_argument("--rebuild", action='store_true',
+                        help="Rebuild the vehicle-sim image first (docker backend)")
+    parser.add_argument("--null_ticks", type=int, default=100,
+                        help="Ticks the stand-in sim of the null backend runs")
+    opt = parser.parse_args()
+    return opt
+
+
+def main():
+    opt = arg_parse()
+
+    num_vehicles = opt.num_vehicles
+    num_shards = opt.num_shards
+    transport = opt.transport
+    scenario_params = None
+    if opt.test_scenario is not None:
+        config_yaml = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                   'opencda/scenario_testing/config_yaml/%s.yaml' % opt.test_scenario)
+        if not os.path.isfile(config_yaml):
+            sys.exit("opencda/scenario_testing/config_yaml/%s.yaml not found!" % opt.test_scenario)
+        scenario_params = load_yaml(config_yaml)
+
+    if num_vehicles is None or num_shards is None or transport is None:
+        if scenario_params is None:
+            if num_vehicles is None:
+                sys.exit("either --test_scenario or --num_vehicles is required")
+            num_shards = 1 if num_shards is None else num_shards
+            transport = EcloudConfig.GRPC if transport is None else transport
+        else:
+            ecloud_config = EcloudConfig(scenario_params, logger)
+            if num_vehicles is None:
+                num_vehicles = ecloud_config.get_num_cars()
+            if num_shards is None:
+                num_shards = ecloud_config.get_num_shards()
+            if transport is None:
+                transport = EcloudConfig.SHM if ecloud_config.get_transport() == eTransport.SHM else EcloudConfig.GRPC
+
+    if opt.backend == 'null':
+        if scenario_params is None:
+            sys.exit("the null backend needs --test_scenario, its vehicles are configured by the scenario")
+        # the stand-in sim serves the shm transport
+        num_shards = 1
+        transport = EcloudConfig.SHM
+
+    cloud_config = load_yaml("cloud_config.yaml")
+    logger.info(f"launching {num_vehicles} vehicles on {opt.num_hosts} {opt.backend} hosts, "
+                f"ecloud server {cloud_config['ecloud_server_public_ip']}:{opt.port} ({num_shards} shard(s), {transport})")
+
+    if opt.backend == 'docker' and opt.rebuild:
+        subprocess.run(opt.docker_cmd.split() + ['build', '-f', 'Dockerfile', '-t', f'{DOCKER_IMAGE}:latest', '.'],
+                       check=True)
+
+    num_gpus = gpu_count() if opt.apply_ml else 0
+    hosts = plan_hosts(num_vehicles, opt.num_hosts, opt.push_base_port, num_gpus)
+    for host in hosts:
+        logger.info(f"{host}")
+
+    launcher = ClientLauncher(hosts, opt.backend, opt.max_restarts, ecloud_port=opt.port,
+                              apply_ml=opt.apply_ml, docker_cmd=opt.docker_cmd,
+                              num_shards=num_shards, transport=transport)
+    try:
+        if opt.backend == 'null':
+            ok, _ = asyncio.run(run_null_scenario(launcher, json.dumps(scenario_params), opt.null_ticks,
+                                                  timeout_s=opt.timeout_s))
+        else:
+            launcher.start()
+            ok = launcher.supervise(timeout_s=opt.timeout_s)
+    except KeyboardInterrupt:
+        logger.info(' - Exited by user.')
+        ok = False
+    finally:
+        launcher.stop()
+
+    logger.info(f"{launcher.report()}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -40,6 +40,11 @@ class ClientDebugHelper(PlanDebugHelper):
         self.vehicle_step_time_list = []
         self.control_time_list = []
         self.timestamps_list = []
+        self.trace_spans_list = []
+        self.staleness_list = [] # async ticks: ticks skipped before each step
+        self.wait_time_list = [] # (wait point, tick_id, wait_ms), see wait_points.py
+        self.resource_samples_list = [] # the host process' samples, see resource_monitor.SAMPLE_FIELDS
+        self.process_name = ''
 
         self.debug_data = {
             "client_control_time" : self.control_time_list,
@@ -152,6 +157,43 @@ class ClientDebugHelper(PlanDebugHelper):
         t.CopyFrom(timestamps)
         self.timestamps_list.append(t)
 
+    def update_staleness(self, skipped_ticks):
+        """
+        Record how many ticks arrived while the vehicle was busy with the
+        previous one - how stale its control was in the asynchronous tick
+        mode.
+
+        Parameters
+        ----------
+        skipped_ticks : int
+        """
+        self.staleness_list.append(skipped_ticks)
+
+    def update_trace_spans(self, spans):
+        """
+        Store the spans recorded by this client's tracer.
+
+        Parameters
+        ----------
+        spans : list
+            List of (name, tick_id, start_ns, duration_ns, thread_id) tuples.
+        """
+        self.trace_spans_list = list(spans)
+
+    def update_resource_samples(self, process_name, samples):
+        """
+        Store the samples of this client's host process.
+
+        Parameters
+        ----------
+        process_name : str
+
+        samples : list
+            Tuples laid out as resource_monitor.SAMPLE_FIELDS.
+        """
+        self.process_name = process_name
+        self.resource_samples_list = list(samples)
+
 
     def serialize_debug_info(self, proto_debug_helper):
         # TODO: extend instead of append? or [:] = ?
@@ -188,6 +230,22 @@ class ClientDebugHelper(PlanDebugHelper):
             t.CopyFrom(obj)
             proto_debug_helper.timestamps_list.append(t)
 
+        for name, tick_id, start_ns, duration_ns, thread_id in self.trace_spans_list:
+            proto_debug_helper.trace_spans.append(ecloud.TraceSpan(name=name, tick_id=tick_id, start_ns=start_ns,
+                                                                   duration_ns=duration_ns, thread_id=thread_id))
+
+        proto_debug_helper.staleness_list.extend(self.staleness_list)
+
+        for name, tick_id, wait_ms in self.wait_time_list:
+            proto_debug_helper.wait_time_list.append(ecloud.WaitTime(name=name, tick_id=tick_id, wait_ms=wait_ms))
+
+        proto_debug_helper.process_name = self.process_name
+        for tick_id, timestamp_ns, cpu_percent, rss_mb, num_threads, gpu_mem_mb, queue_depth in self.resource_samples_list:
+            sample = proto_debug_helper.resource_samples.add(tick_id=tick_id, timestamp_ns=timestamp_ns, cpu_percent=cpu_percent,
+                                                             rss_mb=rss_mb, num_threads=num_threads, queue_depth=queue_depth)
+            if gpu_mem_mb is not None:
+                sample.gpu_mem_mb = gpu_mem_mb
+
 
     def deserialize_debug_info(self, proto_debug_helper):
         # call from Sim API to populate locally
@@ -233,4 +291,20 @@ class ClientDebugHelper(PlanDebugHelper):
             t = ecloud.Timestamps()
             t.CopyFrom(obj)
             self.timestamps_list.append(t)
-  
\ No newline at end of file
+
+        self.trace_spans_list.clear()
+        for obj in proto_debug_helper.trace_spans:
+            self.trace_spans_list.append((obj.name, obj.tick_id, obj.start_ns, obj.duration_ns, obj.thread_id))
+
+        self.staleness_list.clear()
+        self.staleness_list.extend(proto_debug_helper.staleness_list)
+
+        self.wait_time_list.clear()
+        for obj in proto_debug_helper.wait_time_list:
+            self.wait_time_list.append((obj.name, obj.tick_id, obj.wait_ms))
+
+        self.process_name = proto_debug_helper.process_name
+        self.resource_samples_list.clear()
+        for obj in proto_debug_helper.resource_samples:
+            self.resource_samples_list.append((obj.tick_id, obj.timestamp_ns, obj.cpu_percent, obj.rss_mb, obj.num_threads,
+                                               obj.gpu_mem_mb if obj.HasField('gpu_mem_mb') else None, obj.queue_depth))
@@ -44,3 +44,29 @@ class ControlManager(object):
         """
         control_command = self.controller.run_step(target_speed, waypoint)
         return control_command
+
+    def stage(self, target_speed, waypoint):
+        """
+        Store the target of the current step. A fleet controller steps all
+        staged vehicles at once before get_control, other controllers step
+        in get_control.
+        """
+        if hasattr(self.controller, 'stage'):
+            self.controller.stage(target_speed, waypoint)
+        else:
+            self._staged = (target_speed, waypoint)
+
+    def get_control(self):
+        """
+        Retrieve the control command of the staged step.
+        """
+        if hasattr(self.controller, 'stage'):
+            return self.controller.get_control()
+        return self.controller.run_step(*self._staged)
+
+    def destroy(self):
+        """
+        Free the vehicle's slot in a fleet controller.
+        """
+        if hasattr(self.controller, 'release'):
+            self.controller.release()
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized PID Control for all vehicles hosted by one process.
+
+FleetController keeps the state of every vehicle (pose, speed, past
+steering and the PID error buffers) in stacked arrays and computes the
+longitudinal and lateral commands of the whole fleet in one call.
+carla.VehicleControl objects are only built when a vehicle asks for its
+command.
+
+The Controller class is a per-vehicle view into the process wide fleet, so
+`type: fleet_pid_controller` can be used in the controller yaml config as a
+drop-in replacement of pid_controller.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import numpy as np
+
+import carla
+
+INITIAL_CAPACITY = 16
+ERROR_BUFFER_LEN = 10
+MAX_STEERING_CHANGE = 0.2
+
+
+class FleetController(object):
+    """
+    PID Controller for many vehicles at once. The control law is the same
+    as pid_controller.Controller.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of vehicle slots allocated up front; grows on demand.
+
+    buffer_len : int
+        Length of the error ring buffers.
+
+    Attributes
+    ----------
+    speed_ebuffer : numpy.array
+        Ring buffers of speed errors, shape (capacity, buffer_len).
+
+    angle_ebuffer : numpy.array
+        Ring buffers of heading errors, shape (capacity, buffer_len).
+
+    target_speed : numpy.array
+        Staged target speed per slot; nan if nothing is staged.
+
+    target_location : numpy.array
+        Staged target x, y per slot; nan if there is no waypoint.
+
+    throttle, steer, brake : numpy.array
+        Commands computed by the last run_step per slot.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY,
+                 buffer_len=ERROR_BUFFER_LEN):
+        self.buffer_len = buffer_len
+        self._capacity = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """
+        Add capacity vehicle slots to every state array.
+        """
+        def extend(name, shape, fill, dtype=float):
+            new = np.full((capacity,) + shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            setattr(self, name,
+                    new if old is None else np.concatenate([old, new]))
+
+        # gains and limits
+        for name in ('lon_k_p', 'lon_k_d', 'lon_k_i',
+                     'lat_k_p', 'lat_k_d', 'lat_k_i',
+                     'max_brake', 'max_throttle', 'max_steering'):
+            extend(name, (), 0.0)
+        extend('dt', (), 1.0)
+        extend('dynamic', (), False, bool)
+
+        # current speed and localization retrieved from sensing layer
+        extend('x', (), 0.0)
+        extend('y', (), 0.0)
+        extend('yaw', (), 0.0)
+        extend('current_speed', (), 0.0)
+        extend('past_steering', (), 0.0)
+
+        # error ring buffers
+        extend('speed_ebuffer', (self.buffer_len,), 0.0)
+        extend('angle_ebuffer', (self.buffer_len,), 0.0)
+        extend('ebuffer_count', (), 0, int)
+        extend('ebuffer_head', (), -1, int)
+
+        # staged targets
+        extend('target_speed', (), np.nan)
+        extend('target_location', (2,), np.nan)
+
+        # outputs
+        extend('throttle', (), 0.0)
+        extend('steer', (), 0.0)
+        extend('brake', (), 0.0)
+
+        extend('_used', (), False, bool)
+        self._capacity += capacity
+
+    def add_vehicle(self, args):
+        """
+        Reserve a slot for a new vehicle.
+
+        Parameters
+        ----------
+        args : dict
+            The pid controller configuration dictionary parsed from yaml.
+
+        Returns
+        -------
+        index : int
+            The slot of the vehicle in the stacked arrays.
+        """
+        free = np.flatnonzero(~self._used)
+        if len(free) == 0:
+            self._grow(self._capacity)
+            free = np.flatnonzero(~self._used)
+        index = int(free[0])
+
+        self.max_brake[index] = args['max_brake']
+        self.max_throttle[index] = args['max_throttle']
+        self.max_steering[index] = args['max_steering']
+        self.lon_k_p[index] = args['lon']['k_p']
+        self.lon_k_d[index] = args['lon']['k_d']
+        self.lon_k_i[index] = args['lon']['k_i']
+        self.lat_k_p[index] = args['lat']['k_p']
+        self.lat_k_d[index] = args['lat']['k_d']
+        self.lat_k_i[index] = args['lat']['k_i']
+        self.dt[index] = args['dt']
+        self.dynamic[index] = args['dynamic']
+
+        self.current_speed[index] = 0.
+        self.past_steering[index] = 0.
+        self.speed_ebuffer[index] = 0.
+        self.angle_ebuffer[index] = 0.
+        self.ebuffer_count[index] = 0
+        self.ebuffer_head[index] = -1
+        self.target_speed[index] = np.nan
+        self._used[index] = True
+
+        return index
+
+    def remove_vehicle(self, index):
+        """
+        Release the slot of a destroyed vehicle.
+        """
+        self._used[index] = False
+        self.target_speed[index] = np.nan
+
+    def dynamic_pid(self, indices):
+        """
+        Compute kp, kd, ki based on current speed for the given slots.
+        """
+        pass
+
+    def update_info(self, index, ego_pos, ego_spd):
+        """
+        Update ego position and speed of one vehicle.
+
+        Parameters
+        ----------
+        index : int
+            The slot of the vehicle.
+
+        ego_pos : carla.Transform
+            Position of the ego vehicle.
+
+        ego_spd : float
+            Speed of the ego vehicle
+        """
+        self.x[index] = ego_pos.location.x
+        self.y[index] = ego_pos.location.y
+        self.yaw[index] = ego_pos.rotation.yaw
+        self.current_speed[index] = ego_spd
+
+    def stage(self, index, target_speed, waypoint):
+        """
+        Store the target of one vehicle for the next run_step.
+
+        Parameters
+        ----------
+        index : int
+            The slot of the vehicle.
+
+        target_speed : float
+            Target speed of the ego vehicle.
+
+        waypoint : carla.location
+            Target location; None triggers an emergency stop.
+        """
+        self.target_speed[index] = target_speed
+        if waypoint is None:
+            self.target_location[index] = np.nan
+        else:
+            self.target_location[index] = (waypoint.x, waypoint.y)
+
+    def run_step(self, indices=None):
+        """
+        Execute one step of control for all staged vehicles, invoking both
+        lateral and longitudinal PID controllers.
+
+        Parameters
+        ----------
+        indices : numpy.array
+            Only step these slots; defaults to every staged slot.
+
+        Returns
+        -------
+        indices : numpy.array
+            The slots that were stepped.
+        """
+        if indices is None:
+            indices = np.flatnonzero(~np.isnan(self.target_speed))
+        else:
+            indices = np.asarray(indices, dtype=int).reshape(-1)
+
+        target_speed = self.target_speed[indices]
+        target_location = self.target_location[indices]
+        self.target_speed[indices] = np.nan
+
+        # emergency stop
+        stop = (target_speed == 0) | np.isnan(target_location[:, 0])
+        self.throttle[indices[stop]] = 0.0
+        self.steer[indices[stop]] = 0.0
+        self.brake[indices[stop]] = 1.0
+
+        rows = indices[~stop]
+        if len(rows) == 0:
+            return indices
+        target_speed = target_speed[~stop]
+        target_location = target_location[~stop]
+
+        dynamic_rows = rows[self.dynamic[rows]]
+        if len(dynamic_rows):
+            self.dynamic_pid(dynamic_rows)
+
+        dt = self.dt[rows]
+        k_p = self.lat_k_p[rows]
+        k_d = self.lat_k_d[rows]
+        k_i = self.lat_k_i[rows]
+
+        head = (self.ebuffer_head[rows] + 1) % self.buffer_len
+        previous = (head - 1) % self.buffer_len
+        self.ebuffer_head[rows] = head
+        self.ebuffer_count[rows] = np.minimum(self.ebuffer_count[rows] + 1,
+                                              self.buffer_len)
+        has_history = self.ebuffer_count[rows] >= 2
+
+        # longitudinal, like the single vehicle controller it uses the
+        # lateral gains
+        error = target_speed - self.current_speed[rows]
+        self.speed_ebuffer[rows, head] = error
+        _de = np.where(has_history,
+                       (error - self.speed_ebuffer[rows, previous]) / dt, 0.0)
+        _ie = np.where(has_history,
+                       self.speed_ebuffer[rows].sum(axis=1) * dt, 0.0)
+        acceleration = np.clip(k_p * error + k_d * _de + k_i * _ie,
+                               -1.0, 1.0)
+
+        # lateral
+        yaw = np.radians(self.yaw[rows])
+        v_x, v_y = np.cos(yaw), np.sin(yaw)
+        w_x = target_location[:, 0] - self.x[rows]
+        w_y = target_location[:, 1] - self.y[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _dot = np.arccos(np.clip(
+                (w_x * v_x + w_y * v_y) /
+                (np.hypot(w_x, w_y) * np.hypot(v_x, v_y)), -1.0, 1.0))
+        _dot = np.where(v_x * w_y - v_y * w_x < 0, -_dot, _dot)
+
+        self.angle_ebuffer[rows, head] = _dot
+        _de = np.where(has_history,
+                       (_dot - self.angle_ebuffer[rows, previous]) / dt, 0.0)
+        _ie = np.where(has_history,
+                       self.angle_ebuffer[rows].sum(axis=1) * dt, 0.0)
+        current_steering = np.clip(k_p * _dot + k_d * _de + k_i * _ie,
+                                   -1.0, 1.0)
+
+        accelerate = acceleration >= 0.0
+        self.throttle[rows] = np.where(
+            accelerate, np.minimum(acceleration, self.max_throttle[rows]), 0.0)
+        self.brake[rows] = np.where(
+            accelerate, 0.0,
+            np.minimum(np.abs(acceleration), self.max_brake[rows]))
+
+        # Steering regulation: changes cannot happen abruptly, can't steer too
+        # much.
+        past_steering = self.past_steering[rows]
+        max_steering = self.max_steering[rows]
+        current_steering = np.clip(current_steering,
+                                   past_steering - MAX_STEERING_CHANGE,
+                                   past_steering + MAX_STEERING_CHANGE)
+        steering = np.clip(current_steering, -max_steering, max_steering)
+        # an undefined heading error falls back to full negative lock
+        steering = np.where(np.isnan(steering), -max_steering, steering)
+
+        self.steer[rows] = steering
+        self.past_steering[rows] = steering
+
+        return indices
+
+    def get_control(self, index):
+        """
+        Build the carla.VehicleControl of one vehicle from the last step.
+        """
+        control = carla.VehicleControl()
+        control.throttle = float(self.throttle[index])
+        control.steer = float(self.steer[index])
+        control.brake = float(self.brake[index])
+        control.hand_brake = False
+        control.manual_gear_shift = False
+        return control
+
+
+_fleet_controller = FleetController()
+
+
+def get_fleet_controller():
+    """
+    Return the process wide fleet controller.
+    """
+    return _fleet_controller
+
+
+class Controller(object):
+    """
+    Per-vehicle view into a FleetController with the pid_controller
+    Controller interface.
+
+    Parameters
+    ----------
+    args : dict
+        The configuration dictionary parsed from yaml file.
+
+    fleet : FleetController
+        The fleet to join; defaults to the process wide fleet.
+
+    Attributes
+    ----------
+    index : int
+        The slot of this vehicle in the fleet.
+    """
+
+    def __init__(self, args, fleet=None):
+        self.fleet = fleet if fleet is not None else get_fleet_controller()
+        self.index = self.fleet.add_vehicle(args)
+
+    @property
+    def past_steering(self):
+        return self.fleet.past_steering[self.index]
+
+    def update_info(self, ego_pos, ego_spd):
+        """
+        Update ego position and speed to controller.
+        """
+        self.fleet.update_info(self.index, ego_pos, ego_spd)
+
+    def stage(self, target_speed, waypoint):
+        """
+        Store the target for the next fleet wide run_step.
+        """
+        self.fleet.stage(self.index, target_speed, waypoint)
+
+    def get_control(self):
+        """
+        Retrieve the control command of the last fleet wide run_step. A
+        target the fleet was not stepped for yet is stepped alone.
+        """
+        if not np.isnan(self.fleet.target_speed[self.index]):
+            self.fleet.run_step([self.index])
+        return self.fleet.get_control(self.index)
+
+    def run_step(self, target_speed, waypoint):
+        """
+        Execute one step of control for this vehicle only.
+
+        Returns
+        -------
+        control : carla.VehicleControl
+            Desired vehicle control command for the current step.
+        """
+        self.stage(target_speed, waypoint)
+        return self.get_control()
+
+    def release(self):
+        """
+        Free the slot in the fleet.
+        """
+        self.fleet.remove_vehicle(self.index)
@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 
 from opencda.core.application.edge.collab_sandbox import Traffic
 from opencda.core.application.edge.collab_sandbox import Car
+from opencda.core.application.edge.occupancy_index import ObstacleIndex
 
 import numpy as np 
 import itertools
@@ -17,7 +18,8 @@ import timeit
 from sklearn.cluster import AgglomerativeClustering
 # from pypapi import events, papi_high as high 
 
-from k_means_constrained import KMeansConstrained
+from opencda.core.application.edge.slice_partitioner import get_partitioner, \
+    num_slices
 
 from opencda.core.application.edge.transform_utils import transform_processor
 
@@ -123,13 +125,17 @@ logger = logging.getLogger(__name__)
 #
 class AStarPlanner:
 
-    def __init__(self, cars, ov, oy, resolution, rr=1, cars_on_road=None, slicenum=0):
+    def __init__(self, cars, ov, oy, resolution, rr=1, cars_on_road=None, slicenum=0,
+                 time_budget=None, expansion_budget=None, heuristic_weight=1.0):
         """
         Initialize grid map for a star planning
         ox: x position list of Obstacles [m]
         oy: y position list of Obstacles [m]
         resolution: grid resolution [m]
         rr: robot radius[m]
+        time_budget: stop searching after this many seconds (None: no limit)
+        expansion_budget: stop searching after this many expansions (None: no limit)
+        heuristic_weight: weight of the heuristic in the open set order, > 1 is greedier
         """
 
         v = []
@@ -159,6 +165,22 @@ class AStarPlanner:
 
         self.cars_on_road = cars_on_road
         self.slicenum=slicenum
+        # cars outside of this slice, indexed by lane for verify_node
+        self.obstacles = ObstacleIndex(cars_on_road, slicenum) \
+            if cars_on_road is not None else None
+        # cost of the last path found by planning
+        self.path_cost = None
+
+        # anytime search, see planning
+        self.time_budget = time_budget
+        self.expansion_budget = expansion_budget
+        self.heuristic_weight = heuristic_weight
+        self.expansions = 0
+        self.search_time = 0.0
+        self.path_length = 0
+        self.budget_hit = False
+        self.fallback = False
+        self.seeded = 0
 
     class Node:
         def __init__(self, sv, sy, x_start, vt, cost, parent_index):
@@ -184,10 +206,12 @@ class AStarPlanner:
                 pathlen += 1
                 return node_set[self.parent_index].length_of_path(node_set=node_set,pathlen=pathlen)
 
-    def planning(self):
+    def planning(self, seed=None):
         """
         A star path search
         input:
+            seed: optional plan to start from, see follow_plan. The search
+                continues from the end of its longest valid prefix.
             s_v: start v position [m/s]
             s_y: start y position [m]
             gv: goal v position [m]
@@ -195,23 +219,37 @@ class AStarPlanner:
         output:
             rx: x position list of the final path
             ry: y position list of the final path
+
+        When the time or expansion budget runs out the search stops and
+        returns the path to the deepest (then cheapest) node found so far.
+        If no node beyond the start was reached, the fallback plan keeps
+        every car in its lane at its current velocity.
         """
-        sv = self.v 
-        sy = self.y 
+        start_time = time.perf_counter()
         gy = self.y 
         gv = self.vt
 
-        start_node = self.Node(self.calc_xy_index(sv, self.min_v),
-                               self.calc_xy_index(sy, self.min_y), self.x_start, self.vt, 0.0, -1)
+        start_node = self.start_node()
         goal_node = self.Node(self.calc_xy_index(gv, self.min_v),
                               self.calc_xy_index(gy, self.min_y), self.x_start, self.vt, 0.0, -1)
 
-        start_node.x_tracked = self.x_start
-
         open_set, closed_set = dict(), dict()
         open_set[self.calc_grid_index(start_node)] = start_node
 
+        self.seeded = 0
+        if seed:
+            seeded_nodes = self.follow_plan(start_node, seed)
+            if seeded_nodes:
+                # the seeded path is taken as is, search on from its end
+                closed_set[self.calc_grid_index(start_node)] = start_node
+                for node in seeded_nodes[:-1]:
+                    closed_set[self.calc_grid_index(node)] = node
+                open_set = {self.calc_grid_index(seeded_nodes[-1]): seeded_nodes[-1]}
+                self.seeded = len(seeded_nodes)
+
         empty_flag = 0
+        path_length = 1
+        best_node, best_key = None, None
 
         while 1:
             if len(open_set) == 0:
@@ -226,9 +264,10 @@ class AStarPlanner:
 
             c_id = min(
                 open_set,
-                key=lambda o: open_set[o].cost + self.calc_heuristic(open_set[
+                key=lambda o: open_set[o].cost + self.heuristic_weight * self.calc_heuristic(open_set[
                                                                          o],goal_node))
             current = open_set[c_id]
+            path_length = current.length_of_path(node_set=closed_set)
 
             # show graph
             # if show_animation:  # pragma: no cover
@@ -241,7 +280,7 @@ class AStarPlanner:
             #     if len(closed_set.keys()) % 10 == 0:
             #         plt.pause(0.001)
 
-            if (current.length_of_path(node_set=closed_set) >= 4): #Was 4 #current.x == goal_node.x and current.y == goal_node.y:
+            if (path_length >= 4): #Was 4 #current.x == goal_node.x and current.y == goal_node.y:
                 logger.warning("Find goal")
                 goal_node.parent_index = current.parent_index
                 goal_node.cost = current.cost
@@ -250,11 +289,29 @@ class AStarPlanner:
                 goal_node.x_tracked = current.x_tracked
                 break
 
+            # best so far: deepest, then cheapest
+            if best_key is None or (path_length, -current.cost) > best_key:
+                best_node, best_key = current, (path_length, -current.cost)
+
+            if self.out_of_budget(start_time):
+                logger.warning("Search budget exhausted after %d expansions" % self.expansions)
+                self.budget_hit = True
+                if best_key[0] < 2:
+                    return self.fallback_plan(start_node)
+                goal_node.parent_index = best_node.parent_index
+                goal_node.cost = best_node.cost
+                goal_node.v = best_node.v
+                goal_node.y = best_node.y
+                goal_node.x_tracked = best_node.x_tracked
+                path_length = best_key[0]
+                break
+
             # Remove the item from the open set
             del open_set[c_id]
 
             # Add it to the closed set
             closed_set[c_id] = current
+            self.expansions += 1
 
             # expand_grid search grid based on motion model
             # for i, _ in enumerate(self.motion):
@@ -287,10 +344,98 @@ class AStarPlanner:
                             # This path is the best until now. record it
                             open_set[n_id] = node
 
+        self.path_cost = goal_node.cost
+        self.path_length = path_length
         rv, ry, rx = self.calc_final_path(goal_node, closed_set)
+        self.search_time = time.perf_counter() - start_time
 
         return rv, ry, rx
 
+    def start_node(self):
+        """
+        Search node of the current state of the slice.
+        """
+        start_node = self.Node(self.calc_xy_index(np.array(self.v), self.min_v),
+                               self.calc_xy_index(np.array(self.y), self.min_y), self.x_start, self.vt, 0.0, -1)
+        start_node.x_tracked = self.x_start
+        return start_node
+
+    def follow_plan(self, start_node, steps):
+        """
+        Walk a given plan from the start node the way the search expands
+        nodes, checking the motion model and verify_node on every step.
+
+        Parameters
+        ----------
+        start_node : Node
+            See start_node.
+
+        steps : list
+            (v, y) grid positions of the cars for every plan step, first
+            step first, in the format of calc_final_path.
+
+        Returns
+        -------
+        nodes : list
+            Search nodes of the longest valid prefix of the plan.
+        """
+        nodes = []
+        current = start_node
+        for v, y in steps:
+            node = self.Node(self.calc_xy_index(np.array(v, dtype=float), self.min_v),
+                             self.calc_xy_index(np.array(y, dtype=float), self.min_y), self.x_start, self.vt,
+                             current.cost, self.calc_grid_index(current))
+            if node.v.shape != current.v.shape or np.any(np.abs(node.v - current.v) > 1) or \
+                    np.any(np.abs(node.y - current.y) > 1):
+                break
+            node.cost = self.calc_heuristic(node, current)
+            node.x_tracked = current.x_tracked + (node.v * 0.2)
+            node.x_tracked = node.x_tracked.astype(int)
+            if not self.verify_node(node, current):
+                break
+            nodes.append(node)
+            current = node
+        return nodes
+
+    def out_of_budget(self, start_time):
+        """
+        Whether the time or expansion budget of the search is used up.
+        """
+        if self.expansion_budget is not None and \
+                self.expansions >= self.expansion_budget:
+            return True
+        return self.time_budget is not None and \
+            time.perf_counter() - start_time >= self.time_budget
+
+    def fallback_plan(self, start_node):
+        """
+        Safe plan for an exhausted search: keep lane, hold velocity.
+        Returned in the format of calc_final_path, one step long.
+        """
+        self.fallback = True
+        self.path_cost = start_node.cost
+        self.path_length = 1
+        rv = [self.calc_grid_position(start_node.v, self.min_v)] * 2
+        ry = [self.calc_grid_position(start_node.y, self.min_y)] * 2
+        return rv, ry, [start_node.x_tracked]
+
+    def search_stats(self):
+        """
+        Statistics of the last planning call.
+
+        Returns
+        -------
+        stats : dict
+            time_ms, expansions, budget_hit, fallback, path_cost and
+            path_length (nodes on the returned path).
+        """
+        return {'time_ms': self.search_time * 1000,
+                'expansions': self.expansions,
+                'budget_hit': self.budget_hit,
+                'fallback': self.fallback,
+                'path_cost': self.path_cost,
+                'path_length': self.path_length}
+
     def calc_final_path(self, goal_node, closed_set):
         # generate final course
         rv, ry = [self.calc_grid_position(goal_node.v, self.min_v)], [
@@ -367,16 +512,10 @@ class AStarPlanner:
                         return False
 
         # collision check: Other cars: For every vehicle in slice (i in range), check all other non slice vehicles (j + j.slice condition)
-        if self.cars_on_road is not None:
-            for i in range(0,len(node.v)):
-                for j in self.cars_on_road:
-                    if j.slice != self.slicenum:
-                        if node.y[i] == j.lane and abs(node.x_tracked[i]-j.pos_x) <= 10:
-                            return False
-                        if (j.intentions == "Lane Change -1" and node.y[i] == j.lane-1) and abs(node.x_tracked[i]-j.pos_x) <= 10:
-                            return False
-                        if (j.intentions == "Lane Change 1" and node.y[i] == j.lane+1) and abs(node.x_tracked[i]-j.pos_x) <= 10:
-                            return False                   
+        # vehicles changing lanes also block their target lane
+        if self.obstacles is not None and \
+                self.obstacles.blocked(node.y, node.x_tracked):
+            return False
 
         return True
 
@@ -502,7 +641,24 @@ def generate_limits_grid(v_min=0.0, v_max=25.0, lane_num=4.0): #Used to generate
 
     return ov, oy  
 
-def get_slices_clustered(Traffic_Tracker,numcars):
+def get_slices_clustered(Traffic_Tracker,numcars,partitioner=None):
+    """
+    Group the cars into slices of at most two cars for the A* planner.
+
+    Parameters
+    ----------
+    Traffic_Tracker : Traffic
+        The grid traffic model holding all edge vehicles.
+
+    numcars : int
+        Number of vehicles under control of the edge.
+
+    partitioner : SlicePartitioner
+        Slice partitioner to use; defaults to the constrained k-means.
+    """
+    if partitioner is None:
+        partitioner = get_partitioner()
+
     slice_list = []
     vel_array = []
     lanechange_command = []
@@ -520,7 +676,7 @@ def get_slices_clustered(Traffic_Tracker,numcars):
     argsort_indices = np.argsort(np.array(carlist_posx))
     argsort_indices = argsort_indices.tolist()
 
-    cluster_list = KMeansConstrained(n_clusters=int(numcars/2 + 1), size_min=None, size_max=2,random_state=0).fit_predict(position_features)
+    cluster_list = partitioner.partition(position_features, num_slices(numcars))
     group_number = np.amax(cluster_list)+1
 
     for i in range(0,group_number):
@@ -536,6 +692,83 @@ def get_slices_clustered(Traffic_Tracker,numcars):
     # print("Slices", slice_list)
     return slice_list, vel_array, lanechange_command
 
+def plan_slices(Traffic_Tracker, slice_list, vel_array, lanechange_command, ov, oy, grid_size, robot_radius,
+                astar_args=None, plan_cache=None):
+    """
+    Run the A* planner on every slice with more than one car and relay the
+    resulting lane changes and velocities to the cars.
+
+    Parameters
+    ----------
+    Traffic_Tracker : Traffic
+        The grid traffic model; all of its cars are obstacles for the
+        slices they are not part of.
+
+    slice_list, vel_array, lanechange_command : list
+        As returned by get_slices_clustered.
+
+    ov, oy : list
+        Grid limits from generate_limits_grid.
+
+    grid_size : float
+        A* grid resolution.
+
+    robot_radius : float
+        A* robot radius.
+
+    astar_args : dict
+        Extra AStarPlanner arguments: time_budget, expansion_budget and
+        heuristic_weight.
+
+    plan_cache : PlanCache
+        Reuses earlier plans of the same slice state and warm starts the
+        searches from the previous plans, if given.
+
+    Returns
+    -------
+    stats : list
+        AStarPlanner.search_stats of every planned slice.
+    """
+    astar_args = astar_args or {}
+    stats = []
+    if plan_cache is not None:
+        plan_cache.new_step()
+    for i in range(len(slice_list)-1,-1,-1): #Iterate through all slices
+        if len(slice_list[i]) >= 2: #If the slice has more than one vehicle, run the graph planner. Else it'll move using existing
+        #responses - slow down on seeing a vehicle ahead that has slower velocities, else hit target velocity. 
+        #Somewhat suboptimal, ideally the other vehicle would be
+        #folded into existing groups. No easy way to do that yet.
+            #print("Slicing")
+            a_star = AStarPlanner(slice_list[i], ov, oy, grid_size, robot_radius, Traffic_Tracker.cars_on_road, i,
+                                  **astar_args)
+            if plan_cache is not None:
+                seed, context = plan_cache.lookup(a_star, slice_list[i])
+                rv, ry, rx_tracked = a_star.planning(seed)
+                plan_cache.store(a_star, slice_list[i], rv, ry, context)
+            else:
+                rv, ry, rx_tracked = a_star.planning()
+            stats.append(a_star.search_stats())
+            if len(ry) >= 2: #If there is some planner result, then we move ahead on using it
+                lanechange_command[i] = ry[-2]
+                vel_array[i] = rv[-2]
+            else: #If the planner returns an empty list, continue as before - use emergency responses.
+                lanechange_command[i] = ry[0]
+                vel_array[i] = ry[0]
+
+    #print("Sliced")
+    for i in range(len(slice_list)-1,-1,-1): #Relay lane change commands and new velocities to vehicles where needed
+        if len(slice_list[i]) >= 1 and len(lanechange_command[i]) >= 1:
+            carnum = 0
+            for car in slice_list[i]:
+                if lanechange_command[i][carnum] > car.lane:
+                    car.intentions = "Lane Change 1"
+                elif lanechange_command[i][carnum] < car.lane:
+                    car.intentions = "Lane Change -1"
+                car.v = vel_array[i][carnum]
+                carnum += 1
+
+    return stats
+
 
 #def main(): #Example scenario test for CARLA waypoints
 #    print(__file__ + " start!!")
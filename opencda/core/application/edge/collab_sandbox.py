@@ -14,6 +14,8 @@ import copy
 from sklearn.cluster import KMeans
 import logging
 
+from opencda.core.application.edge.occupancy_index import OccupancyIndex
+
 logger = logging.getLogger(__name__)
 
 # class Car():
@@ -251,9 +253,15 @@ class Traffic():
 	def time_tick(self,mode='Auto'):
 		margin_safety = 10
 
+		#The grid only changes at the end of the tick, so look up all cars at once
+		occupancy = OccupancyIndex(self.lane_vehicles)
+		pos_x = [cars.pos_x for cars in self.cars_on_road]
+		lanes = [cars.lane for cars in self.cars_on_road]
+
 		if mode == 'Graph':
-			for cars in self.cars_on_road:
-				vehicle_ahead = self.check_ahead(cars,10)
+			vehicles_ahead = occupancy.vehicles_ahead(pos_x,lanes,10)
+			for carnum, cars in enumerate(self.cars_on_road):
+				vehicle_ahead = int(vehicles_ahead[carnum]) if vehicles_ahead[carnum] >= 0 else None
 
 				if cars.intentions == 'Lane Change 1':
 					print("Lane Changed")
@@ -279,10 +287,12 @@ class Traffic():
 			self.update_grid_occupancies()
 			self.time += self.dt
 		else:
-			for cars in self.cars_on_road:
-				occupied_below, occupied_above = self.check_adjacent_occupancies(cars)
+			vehicles_ahead = occupancy.vehicles_ahead(pos_x,lanes)
+			occupied_below_all, occupied_above_all = occupancy.adjacent_occupancies(pos_x,lanes)
+			for carnum, cars in enumerate(self.cars_on_road):
+				occupied_below, occupied_above = occupied_below_all[carnum], occupied_above_all[carnum]
 
-				vehicle_ahead = self.check_ahead(cars)
+				vehicle_ahead = int(vehicles_ahead[carnum]) if vehicles_ahead[carnum] >= 0 else None
 
 				if cars.target_lane is None and mode == 'Manual':
 					if vehicle_ahead is not None:
@@ -24,6 +24,21 @@ class EdgeDebugHelper(PlanDebugHelper):
 
     dist_gap_list : list
         The list containing distance gap(s) of all time-steps.
+
+    search_time_list : list
+        A* search time (ms) of every planned slice.
+
+    budget_hit_count : int
+        Number of slice searches stopped by their budget.
+
+    fallback_count : int
+        Number of those that fell back to keep lane, hold velocity.
+
+    plan_cache_stats : dict
+        Plan cache counters summed over all steps, see PlanCache.
+
+    plan_cache_hit_list : list
+        Plan cache hit rate of every step.
     """
 
     def __init__(self, actor_id):
@@ -32,7 +47,18 @@ class EdgeDebugHelper(PlanDebugHelper):
         self.time_gap_list = [[]]
         self.dist_gap_list = [[]]
         self.algorithm_time_list = [[]]
-        
+
+        self.search_time_list = []
+        self.search_expansions_list = []
+        self.path_cost_list = []
+        self.path_length_list = []
+        self.search_count = 0
+        self.budget_hit_count = 0
+        self.fallback_count = 0
+
+        self.plan_cache_stats = {'hits': 0, 'misses': 0, 'rejected': 0,
+                                 'warm_starts': 0, 'time_saved_ms': 0.0}
+        self.plan_cache_hit_list = []
 
     def update(self, ego_speed, ttc, time_gap=None, dist_gap=None, algorithm_time_step=None):
         """
@@ -70,3 +96,44 @@ class EdgeDebugHelper(PlanDebugHelper):
         """
         self.algorithm_time_list[0].append(algorithm_time_step)
 
+    def update_search(self, search_stats):
+        """
+        Record the A* search statistics of one planning step.
+
+        Parameters
+        ----------
+        search_stats : list
+            AStarPlanner.search_stats of every planned slice.
+        """
+        for stats in search_stats:
+            self.search_time_list.append(stats['time_ms'])
+            self.search_expansions_list.append(stats['expansions'])
+            self.path_cost_list.append(stats['path_cost'])
+            self.path_length_list.append(stats['path_length'])
+            self.search_count += 1
+            self.budget_hit_count += int(stats['budget_hit'])
+            self.fallback_count += int(stats['fallback'])
+
+    def update_plan_cache(self, step_stats):
+        """
+        Record the plan cache counters of one planning step.
+
+        Parameters
+        ----------
+        step_stats : dict
+            PlanCache.step_stats.
+        """
+        for key in self.plan_cache_stats:
+            self.plan_cache_stats[key] += step_stats[key]
+        lookups = step_stats['hits'] + step_stats['misses'] + \
+            step_stats['warm_starts']
+        if lookups > 0:
+            self.plan_cache_hit_list.append(step_stats['hits'] / lookups)
+
+    def plan_cache_hit_rate(self):
+        """
+        Share of the slice searches answered from the plan cache.
+        """
+        stats = self.plan_cache_stats
+        lookups = stats['hits'] + stats['misses'] + stats['warm_starts']
+        return stats['hits'] / lookups if lookups > 0 else 0.0
@@ -36,17 +36,90 @@ sys.path.append("/home/chattsgpu/Documents/Carla_opencda/TrafficSimulator_eCloud
 
 import opencda.core.plan.drive_profile_plotting as open_plt
 from opencda.core.application.edge.astar_test_groupcaps_transform import *
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+from opencda.core.application.edge.slice_partitioner import get_partitioner
+from opencda.core.application.edge.road_model import get_road_model, \
+    DEFAULT_MAP_LENGTH
+from opencda.core.application.edge.edge_sharding import ShardedEdgePlanner, \
+    DEFAULT_SHARD_OVERLAP
+from opencda.core.application.edge.plan_cache import PlanCache
 from opencda.core.plan.global_route_planner import GlobalRoutePlanner
 from opencda.core.plan.global_route_planner_dao import GlobalRoutePlannerDAO
 from opencda.core.plan.local_planner_behavior import RoadOption
 from opencda.core.application.edge.transform_utils import *
 from opencda.core.application.edge.edge_debug_helper import \
     EdgeDebugHelper
+from opencda.core.common.tracing import get_tracer
+from opencda.core.common.replay import get_recorder
 
 import grpc
 import ecloud_pb2 as ecloud
 import ecloud_pb2_grpc as rpc
 
+tracer = get_tracer()
+recorder = get_recorder()
+
+def plan_edge_step(Traffic_Tracker, numcars, ov, oy, grid_size, robot_radius,
+                   partitioner=None, astar_args=None, debug_helper=None,
+                   plan_cache=None):
+    """
+    Run one slicing + A* planning step over the tracked traffic and tick it.
+
+    This is the CARLA independent part of the edge algorithm; it is shared
+    by EdgeManager.algorithm_step and the offline replay harness.
+
+    Parameters
+    ----------
+    Traffic_Tracker : Traffic
+        The grid traffic model holding all edge vehicles.
+
+    numcars : int
+        Number of vehicles under control of the edge.
+
+    ov, oy : list
+        Grid limits from generate_limits_grid.
+
+    grid_size : float
+        A* grid resolution.
+
+    robot_radius : float
+        A* robot radius.
+
+    partitioner : SlicePartitioner
+        Slice partitioner; defaults to the constrained k-means.
+
+    astar_args : dict
+        Search budget and heuristic weight of the A* planners, see
+        plan_slices.
+
+    debug_helper : EdgeDebugHelper
+        Records the search statistics of every slice if given.
+
+    plan_cache : PlanCache
+        Plan cache of the edge, see plan_slices.
+
+    Returns
+    -------
+    x_states, y_states, tv, v : np.ndarray
+        Planned positions, target velocities and velocities of all cars.
+    """
+    with tracer.span("edge.slicing"):
+        slice_list, vel_array, lanechange_command = get_slices_clustered(Traffic_Tracker, numcars, partitioner)
+
+    stats = plan_slices(Traffic_Tracker, slice_list, vel_array, lanechange_command, ov, oy, grid_size, robot_radius,
+                        astar_args, plan_cache)
+    if debug_helper is not None:
+        debug_helper.update_search(stats)
+        if plan_cache is not None:
+            debug_helper.update_plan_cache(plan_cache.step_stats)
+
+    Traffic_Tracker.time_tick(mode='Graph') #Tick the simulation
+
+    #print("Success capsule")
+
+    #Recording location and state
+    return Traffic_Tracker.ret_car_locations()
+
 class EdgeManager(object):
     """
     Edge manager. Used to manage all vehicle managers under control of the edge
@@ -105,13 +178,46 @@ class EdgeManager(object):
 
         self.search_dt = config_yaml['search_dt'] if 'search_dt' in config_yaml else 2.00
         self.numlanes = config_yaml['num_lanes'] if 'num_lanes' in config_yaml else 4
+        self.slice_partitioner = config_yaml.get('slice_partitioner', 'kmeans_constrained')
+        self.partitioner = get_partitioner(self.slice_partitioner)
+        # without a road section the legacy four lane Indices_*.npy routes are used
+        self.road_config = config_yaml.get('road')
+        self.road_model = None
+        self.map_length = config_yaml.get('map_length', DEFAULT_MAP_LENGTH)
+        # more than one shard splits the corridor between several planners
+        self.num_shards = config_yaml.get('num_shards', 1)
+        self.shard_overlap = config_yaml.get('shard_overlap', DEFAULT_SHARD_OVERLAP)
+        self.shard_executor = config_yaml.get('shard_executor', 'serial')
+        self.sharded_planner = None
+        # per slice A* search budget, exhausted searches return their best
+        # partial plan or keep lane and hold velocity
+        time_budget_ms = config_yaml.get('astar_time_budget_ms')
+        self.astar_args = {
+            'time_budget': None if time_budget_ms is None else time_budget_ms / 1000,
+            'expansion_budget': config_yaml.get('astar_expansion_budget'),
+            'heuristic_weight': config_yaml.get('astar_heuristic_weight', 1.0)}
+        # reuse the plans of recurring slice states, 0 disables the cache
+        self.plan_cache_size = config_yaml.get('plan_cache_size', 0)
+        self.plan_warm_start = config_yaml.get('plan_warm_start', True)
+        self.plan_cache = PlanCache(self.plan_cache_size, self.plan_warm_start) \
+            if self.plan_cache_size > 0 else None
 
     def start_edge(self):
-      self.get_four_lane_waypoints_dict()
-      self.processor = transform_processor(self.waypoints_dict)
-      _, _ = self.processor.process_waypoints_bidirectional(0)
-      inverted = self.processor.process_forward(0)
-      logger.debug(len(inverted))
+      if self.road_config is not None:
+        carla_map = self.carla_client.get_world().get_map()
+        self._dao = GlobalRoutePlannerDAO(carla_map, 2)
+        self.road_model = get_road_model(carla_map, self.road_config)
+        self.processor = self.road_model
+        self.map_length = self.road_model.map_length
+        self.numlanes = self.road_model.numlanes
+        self.ov, self.oy = generate_limits_grid(lane_num=self.numlanes)
+        logger.info(f"edge road model: {self.numlanes} lanes, {self.map_length} cells of {self.road_model.resolution}m")
+      else:
+        self.get_four_lane_waypoints_dict()
+        self.processor = transform_processor(self.waypoints_dict)
+        _, _ = self.processor.process_waypoints_bidirectional(0)
+        inverted = self.processor.process_forward(0)
+        logger.debug(len(inverted))
       i = 0
 
       # for k in inverted:
@@ -119,11 +225,10 @@ class EdgeManager(object):
       #       print("Current indice is: ", k[0,0])
       #       self.secondary_offset = -k[0,0]
 
+      spawn_locations = [vehicle_manager.vehicle.get_location() for vehicle_manager in self.vehicle_manager_list]
+      spawn_grid = self.processor.process_waypoints_forward([[location.x, location.y] for location in spawn_locations])
       for vehicle_manager in self.vehicle_manager_list:
-          spawn_coords = vehicle_manager.vehicle.get_location()
-          spawn_coords = np.array([spawn_coords.x,spawn_coords.y]).reshape((2,1))
-          # print(spawn_coords)
-          spawn_coords = self.processor.process_single_waypoint_forward(spawn_coords[0,0],spawn_coords[1,0])
+          spawn_coords = spawn_grid[i]
           # print(spawn_coords)
           # sys.exit()
           # self.spawn_x.append(vehicle_manager.vehicle.get_location().x)
@@ -140,7 +245,13 @@ class EdgeManager(object):
 
           # TODO: DIST --> do we need to clear at start in containers?  
           #vehicle_manager.agent.get_local_planner().get_waypoint_buffer().clear() # clear waypoint buffer at start
-      self.Traffic_Tracker = Traffic(self.search_dt,self.numlanes,numcars=self.numcars,map_length=200,x_initial=self.spawn_x,y_initial=self.spawn_y,v_initial=self.spawn_v)
+      self.Traffic_Tracker = TrafficTracker(self.search_dt,self.numlanes,map_length=self.map_length)
+      self.Traffic_Tracker.update([vm.vid for vm in self.vehicle_manager_list],self.spawn_x,self.spawn_y,self.spawn_v)
+      if self.num_shards > 1:
+        self.sharded_planner = ShardedEdgePlanner(self.search_dt, self.numlanes, self.map_length,
+                                                  self.num_shards, self.shard_overlap, self.slice_partitioner,
+                                                  self.shard_executor, self.grid_size, self.robot_radius,
+                                                  self.astar_args, self.plan_cache_size, self.plan_warm_start)
     
     def get_four_lane_waypoints_dict(self):
       world = self.carla_client.get_world()
@@ -335,8 +446,10 @@ class EdgeManager(object):
         # end_time = time.time()
         # logger.debug("Vehicle Manager Update Info Time: %s" %(end_time - start_time))
         start_time = time.time()
+        locations = [vehicle_manager.vehicle.get_location() for vehicle_manager in self.vehicle_manager_list]
+        grid = self.processor.process_waypoints_forward([[location.x, location.y] for location in locations])
         for i in range(len(self.vehicle_manager_list)):
-            x,y = self.processor.process_single_waypoint_forward(self.vehicle_manager_list[i].vehicle.get_location().x, self.vehicle_manager_list[i].vehicle.get_location().y)
+            x,y = int(grid[i,0]), int(grid[i,1])
             v = self.vehicle_manager_list[i].vehicle.get_velocity()
             v_scalar = math.sqrt(v.x**2 + v.y**2 + v.z**2)
             self.spawn_x.append(x)
@@ -352,12 +465,35 @@ class EdgeManager(object):
         start_time = time.time()
         #Added in to check if traffic tracker updating would fix waypoint deque issue
         # TODO: data drive num cars
-        self.Traffic_Tracker = Traffic(self.search_dt,self.numlanes,numcars=self.numcars,map_length=200,x_initial=self.spawn_x,y_initial=self.spawn_y,v_initial=self.spawn_v)
+        with tracer.span("edge.traffic_tracker"):
+            if self.sharded_planner is not None:
+                self.sharded_planner.update([vm.vid for vm in self.vehicle_manager_list],self.spawn_x,self.spawn_y,self.spawn_v,self.traffic_velocity)
+            else:
+                self.Traffic_Tracker.update([vm.vid for vm in self.vehicle_manager_list],self.spawn_x,self.spawn_y,self.spawn_v)
+                # sharded: the shards' trackers get traffic_velocity with their update
+                for car in self.Traffic_Tracker.cars_on_road:
+                    car.target_velocity = self.traffic_velocity
         end_time = time.time()
         logger.debug("Traffic Tracker Time: %s" %(end_time - start_time))        
 
-        for car in self.Traffic_Tracker.cars_on_road:
-            car.target_velocity = self.traffic_velocity
+        if recorder.enabled:
+            recorder.record("edge", "update", inputs={
+                "x": list(self.spawn_x),
+                "y": list(self.spawn_y),
+                "v": list(self.spawn_v),
+                "traffic_velocity": self.traffic_velocity,
+                "search_dt": self.search_dt,
+                "numlanes": self.numlanes,
+                "map_length": self.map_length,
+                "numcars": self.numcars,
+                "grid_size": self.grid_size,
+                "robot_radius": self.robot_radius,
+                "slice_partitioner": self.slice_partitioner,
+                "num_shards": self.num_shards,
+                "shard_overlap": self.shard_overlap,
+                "astar_args": self.astar_args,
+                "plan_cache_size": self.plan_cache_size,
+                "plan_warm_start": self.plan_warm_start})
         # sys.exit()
 
         #print("Updated Info")
@@ -369,41 +505,16 @@ class EdgeManager(object):
         #DEBUGGING: Bypass algo and simply move cars forward to solve synch and transform issues
         #Bypassed as of 14/3/2022
 
-        slice_list, vel_array, lanechange_command = get_slices_clustered(self.Traffic_Tracker, self.numcars)
-
-        for i in range(len(slice_list)-1,-1,-1): #Iterate through all slices
-            if len(slice_list[i]) >= 2: #If the slice has more than one vehicle, run the graph planner. Else it'll move using existing
-            #responses - slow down on seeing a vehicle ahead that has slower velocities, else hit target velocity. 
-            #Somewhat suboptimal, ideally the other vehicle would be
-            #folded into existing groups. No easy way to do that yet.
-                #print("Slicing")
-                a_star = AStarPlanner(slice_list[i], self.ov, self.oy, self.grid_size, self.robot_radius, self.Traffic_Tracker.cars_on_road, i)
-                rv, ry, rx_tracked = a_star.planning()
-                if len(ry) >= 2: #If there is some planner result, then we move ahead on using it
-                    lanechange_command[i] = ry[-2]
-                    vel_array[i] = rv[-2]
-                else: #If the planner returns an empty list, continue as before - use emergency responses.
-                    lanechange_command[i] = ry[0]
-                    vel_array[i] = ry[0]
-
-        #print("Sliced")
-        for i in range(len(slice_list)-1,-1,-1): #Relay lane change commands and new velocities to vehicles where needed
-            if len(slice_list[i]) >= 1 and len(lanechange_command[i]) >= 1:
-                carnum = 0
-                for car in slice_list[i]:
-                    if lanechange_command[i][carnum] > car.lane:
-                        car.intentions = "Lane Change 1"
-                    elif lanechange_command[i][carnum] < car.lane:
-                        car.intentions = "Lane Change -1"
-                    car.v = vel_array[i][carnum]
-                    carnum += 1
-
-        self.Traffic_Tracker.time_tick(mode='Graph') #Tick the simulation
-
-        #print("Success capsule")
-
-        #Recording location and state
-        x_states, y_states, tv, v = self.Traffic_Tracker.ret_car_locations() # Commented out for bypassing algo
+        if self.sharded_planner is not None:
+            x_states, y_states, tv, v = self.sharded_planner.step()
+            self.debug_helper.update_search(self.sharded_planner.search_stats)
+            if self.plan_cache_size > 0:
+                self.debug_helper.update_plan_cache(self.sharded_planner.plan_cache_stats)
+        else:
+            x_states, y_states, tv, v = plan_edge_step(self.Traffic_Tracker, self.numcars, self.ov, self.oy, self.grid_size, self.robot_radius, self.partitioner,
+                                                       self.astar_args, self.debug_helper, self.plan_cache)
+        if recorder.enabled:
+            recorder.record("edge", "plan", outputs={"x_states": x_states, "y_states": y_states, "tv": tv, "v": v})
         # x_states, y_states, v = [], [], [] #Algo bypass begins
         self.xcars = np.empty((self.numcars, 0))
         self.ycars = np.empty((self.numcars, 0)) 
@@ -449,31 +560,11 @@ class EdgeManager(object):
         #   waypoints_rev[7] = np.hstack((waypoints_rev[7],back[6]))
         #   waypoints_rev[8] = np.hstack((waypoints_rev[8],back[7]))
 
+        # all planned steps of all cars back to world coordinates at once
+        trajectories = self.processor.process_trajectories_back(self.xcars, self.ycars)
         waypoints_rev = {}
-        car_locations = {}
-        for cars in range(1,self.numcars+1):
-            waypoints_rev[str(cars)] = np.empty((2,0))
-            car_locations[str(cars)] = []
-
-        for i in range(0,self.xcars.shape[1]):
-          processed_array = []
-          for j in range(0,self.numcars):
-            x_res = self.xcars[j,i]
-            y_res = self.ycars[j,i]
-            processed_array.append(np.array([[x_res],[y_res]]))
-            #print("Appending to waypoints_rev")
-          #print(processed_array)
-          back = self.processor.process_back(processed_array)
-
-          #print(waypoints_rev)
-          #print(waypoints_rev.keys())
-          for j in range(0,self.numcars):
-            #print(len(back))
-            #print(j)
-            # print(waypoints_rev[str(j+1)])
-            # print(back[str(j)])
-            # print(np.hstack((waypoints_rev[str(j+1)],back[str(j)])))
-            waypoints_rev[str(j+1)] = np.hstack((waypoints_rev[str(j+1)],back[j]))
+        for j in range(0,self.numcars):
+            waypoints_rev[str(j+1)] = trajectories[j]
 
         # processed_array = []
         # for k in range(0,4): #Added 16/03 outer loop to check if waypoint horizon influenced things, it did not seem to.
@@ -517,7 +608,8 @@ class EdgeManager(object):
 
         # run algorithm
         pre_algo_time = time.time()
-        self.algorithm_step()
+        with tracer.span("edge.algorithm_step"):
+            self.algorithm_step()
         post_algo_time = time.time()
         logger.debug("Algorithm completion time: %s" %(post_algo_time - pre_algo_time))
         self.debug_helper.update_edge((post_algo_time - pre_algo_time)*1000)
@@ -624,6 +716,16 @@ class EdgeManager(object):
 
         perform_txt += 'Algorithm time mean: %f, std: %f \n' % (
                 np.mean(algorithm_time_list_tmp), np.std(algorithm_time_list_tmp))
+
+        if self.debug_helper.search_count > 0:
+            perform_txt += 'A* search time mean: %f, max: %f \n' % (
+                np.mean(self.debug_helper.search_time_list), np.max(self.debug_helper.search_time_list))
+            perform_txt += 'A* budget hits: %d, fallbacks: %d of %d searches \n' % (
+                self.debug_helper.budget_hit_count, self.debug_helper.fallback_count, self.debug_helper.search_count)
+        if self.plan_cache_size > 0:
+            perform_txt += 'Plan cache hit rate: %f, warm starts: %d, time saved: %f ms \n' % (
+                self.debug_helper.plan_cache_hit_rate(), self.debug_helper.plan_cache_stats['warm_starts'],
+                self.debug_helper.plan_cache_stats['time_saved_ms'])
  
 
         figure = plt.figure()
@@ -650,3 +752,6 @@ class EdgeManager(object):
         """
         for vm in self.vehicle_manager_list:
             vm.destroy()
+        if self.sharded_planner is not None:
+            logger.info(f"edge shards: {self.sharded_planner.handoffs} handoffs, {self.sharded_planner.conflicts} conflicts")
+            self.sharded_planner.close()
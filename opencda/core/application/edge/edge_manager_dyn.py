@@ -25,6 +25,9 @@ sys.path.append("/home/chattsgpu/Documents/Carla_opencda/TrafficSimulator_eCloud
 
 import opencda.core.plan.drive_profile_plotting as open_plt
 from opencda.core.application.edge.astar_test_groupcaps_transform import *
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+from opencda.core.application.edge.slice_partitioner import get_partitioner
+from opencda.core.application.edge.road_model import DEFAULT_MAP_LENGTH
 from opencda.core.plan.global_route_planner import GlobalRoutePlanner
 from opencda.core.plan.global_route_planner_dao import GlobalRoutePlannerDAO
 from opencda.core.plan.local_planner_behavior import RoadOption
@@ -61,6 +64,8 @@ class EdgeManager(object):
         self.edgeid = str(uuid.uuid1())
         self.vehicle_manager_list = []
         self.target_speed = config_yaml['target_speed']
+        self.partitioner = get_partitioner(config_yaml.get('slice_partitioner', 'kmeans_constrained'))
+        self.map_length = config_yaml.get('map_length', DEFAULT_MAP_LENGTH)
         self.numcars = 8
         # len(config_yaml['members'])
         logger.error("Num Cars: %d" %(self.numcars))  # TODO - set edge_index
@@ -123,7 +128,8 @@ class EdgeManager(object):
           #vehicle_manager.agent.get_local_planner().get_waypoint_buffer().clear() # clear waypoint buffer at start
       self.dt = .200
       self.numlanes = 4
-      self.Traffic_Tracker = Traffic(self.dt,self.numlanes,numcars=int(self.numcars),map_length=200,x_initial=self.spawn_x,y_initial=self.spawn_y,v_initial=self.spawn_v)
+      self.Traffic_Tracker = TrafficTracker(self.dt,self.numlanes,map_length=self.map_length)
+      self.Traffic_Tracker.update([vm.vid for vm in self.vehicle_manager_list],self.spawn_x,self.spawn_y,self.spawn_v)
     
     def get_four_lane_waypoints_dict(self):
       world = self.vehicle_manager_list[0].vehicle.get_world()
@@ -301,8 +307,10 @@ class EdgeManager(object):
         end_time = time.time()
         logger.debug("Vehicle Manager Update Info Time: %s" %(end_time - start_time))
         start_time = time.time()
+        locations = [vehicle_manager.vehicle.get_location() for vehicle_manager in self.vehicle_manager_list]
+        grid = self.processor.process_waypoints_forward([[location.x, location.y] for location in locations])
         for i in range(len(self.vehicle_manager_list)):
-            x,y = self.processor.process_single_waypoint_forward(self.vehicle_manager_list[i].vehicle.get_location().x, self.vehicle_manager_list[i].vehicle.get_location().y)
+            x,y = int(grid[i,0]), int(grid[i,1])
             v = self.vehicle_manager_list[i].vehicle.get_velocity()
             v_scalar = math.sqrt(v.x**2 + v.y**2 + v.z**2)
             self.spawn_x.append(x)
@@ -318,7 +326,7 @@ class EdgeManager(object):
         start_time = time.time()
         #Added in to check if traffic tracker updating would fix waypoint deque issue
         # TODO: data drive num cars
-        self.Traffic_Tracker = Traffic(self.dt,self.numlanes,numcars=int(self.numcars),map_length=200,x_initial=self.spawn_x,y_initial=self.spawn_y,v_initial=self.spawn_v)
+        self.Traffic_Tracker.update([vm.vid for vm in self.vehicle_manager_list],self.spawn_x,self.spawn_y,self.spawn_v)
         end_time = time.time()
         logger.debug("Traffic Tracker Time: %s" %(end_time - start_time))        
 
@@ -335,7 +343,7 @@ class EdgeManager(object):
         #DEBUGGING: Bypass algo and simply move cars forward to solve synch and transform issues
         #Bypassed as of 14/3/2022
 
-        slice_list, vel_array, lanechange_command = get_slices_clustered(self.Traffic_Tracker, int(self.numcars))
+        slice_list, vel_array, lanechange_command = get_slices_clustered(self.Traffic_Tracker, int(self.numcars), self.partitioner)
 
         for i in range(len(slice_list)-1,-1,-1): #Iterate through all slices
             if len(slice_list[i]) >= 2: #If the slice has more than one vehicle, run the graph planner. Else it'll move using existing
@@ -415,31 +423,11 @@ class EdgeManager(object):
         #   waypoints_rev[7] = np.hstack((waypoints_rev[7],back[6]))
         #   waypoints_rev[8] = np.hstack((waypoints_rev[8],back[7]))
 
+        # all planned steps of all cars back to world coordinates at once
+        trajectories = self.processor.process_trajectories_back(self.xcars, self.ycars)
         waypoints_rev = {}
-        car_locations = {}
-        for cars in range(1,self.numcars+1):
-            waypoints_rev[str(cars)] = np.empty((2,0))
-            car_locations[str(cars)] = []
-
-        for i in range(0,self.xcars.shape[1]):
-          processed_array = []
-          for j in range(0,self.numcars):
-            x_res = self.xcars[j,i]
-            y_res = self.ycars[j,i]
-            processed_array.append(np.array([[x_res],[y_res]]))
-            #print("Appending to waypoints_rev")
-          #print(processed_array)
-          back = self.processor.process_back(processed_array)
-
-          #print(waypoints_rev)
-          #print(waypoints_rev.keys())
-          for j in range(0,self.numcars):
-            #print(len(back))
-            #print(j)
-            # print(waypoints_rev[str(j+1)])
-            # print(back[str(j)])
-            # print(np.hstack((waypoints_rev[str(j+1)],back[str(j)])))
-            waypoints_rev[str(j+1)] = np.hstack((waypoints_rev[str(j+1)],back[j]))
+        for j in range(0,int(self.numcars)):
+            waypoints_rev[str(j+1)] = trajectories[j]
 
         # processed_array = []
         # for k in range(0,4): #Added 16/03 outer loop to check if waypoint horizon influenced things, it did not seem to.
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial sharding of the edge planner.
+
+One edge plans every car of the corridor in a single traffic grid, so the
+planning step grows superlinearly with the number of cars. ShardedEdgePlanner
+cuts the (circular) corridor into num_shards segments. Every EdgeShard keeps
+its own traffic tracker and slice partitioner and plans the cars it owns.
+Each step starts from one read-only snapshot of all cars:
+
+    * ownership is a pure function of the snapshot position, so a car is
+      handed off to the next shard deterministically when it crosses a
+      segment boundary;
+    * the cars of the neighbouring shards within `overlap` cells of a
+      segment are copied into its tracker as obstacles, so the A* slices
+      and the car following near the boundary see them;
+    * when two shards still move cars into the same cell, the lane change
+      of one of them is undone, see ShardedEdgePlanner.resolve_conflicts.
+
+The shards can be stepped serially, in threads or in worker processes.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from opencda.core.application.edge.astar_test_groupcaps_transform import \
+    generate_limits_grid, get_slices_clustered, plan_slices
+from opencda.core.application.edge.plan_cache import PlanCache
+from opencda.core.application.edge.slice_partitioner import get_partitioner
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+DEFAULT_SHARD_OVERLAP = 20
+SHARD_EXECUTORS = ('serial', 'thread', 'process')
+SEC_TO_MSEC = 1000
+
+
+class _OwnedCars(object):
+    """
+    The cars of a shard in the shape get_slices_clustered expects.
+    """
+
+    def __init__(self, cars_on_road):
+        self.cars_on_road = cars_on_road
+
+
+class EdgeShard(object):
+    """
+    Planner of one corridor segment.
+
+    Parameters
+    ----------
+    index : int
+        Index of the shard.
+
+    start, end : int
+        The segment owns the grid cells [start, end).
+
+    overlap : int
+        Cells around the segment whose foreign cars are obstacles.
+
+    search_dt, numlanes, map_length :
+        Traffic grid parameters, see TrafficTracker.
+
+    slice_partitioner : str
+        Name of the slice partitioner.
+
+    grid_size, robot_radius : float
+        A* parameters.
+
+    astar_args : dict
+        A* search budget and heuristic weight, see plan_slices.
+
+    plan_cache_size : int
+        Size of the plan cache of the shard, 0 disables it.
+
+    plan_warm_start : bool
+        Whether to warm start the searches, see PlanCache.
+    """
+
+    def __init__(self, index, start, end, overlap, search_dt, numlanes,
+                 map_length, slice_partitioner=None, grid_size=1.0,
+                 robot_radius=1.0, astar_args=None, plan_cache_size=0,
+                 plan_warm_start=True):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.overlap = overlap
+        self.map_length = map_length
+        self.grid_size = grid_size
+        self.robot_radius = robot_radius
+        self.astar_args = astar_args
+        self.plan_cache = PlanCache(plan_cache_size, plan_warm_start) \
+            if plan_cache_size > 0 else None
+        self.ov, self.oy = generate_limits_grid(lane_num=numlanes)
+        self.tracker = TrafficTracker(search_dt, numlanes, map_length)
+        self.partitioner = get_partitioner(slice_partitioner)
+
+    def near(self, x):
+        """
+        Whether positions are within overlap cells of the segment, taking
+        the wrap around of the corridor into account.
+        """
+        x = np.mod(x, self.map_length)
+        before = np.mod(self.start - x, self.map_length)
+        after = np.mod(x - (self.end - 1), self.map_length)
+        inside = (x >= self.start) & (x < self.end)
+        return inside | (before <= self.overlap) | (after <= self.overlap)
+
+    def step(self, snapshot):
+        """
+        Plan and tick the owned cars of one edge step.
+
+        Parameters
+        ----------
+        snapshot : dict
+            The read-only step snapshot of ShardedEdgePlanner.
+
+        Returns
+        -------
+        rows : numpy.array
+            Snapshot rows of the owned cars.
+
+        x, y, tv, v : numpy.array
+            Planned state of the owned cars.
+
+        stats : list
+            Search statistics of the planned slices.
+
+        cache_stats : dict
+            PlanCache.step_stats, None without a plan cache.
+        """
+        owned = np.flatnonzero(snapshot['owner'] == self.index)
+        ghosts = np.flatnonzero((snapshot['owner'] != self.index) &
+                                self.near(snapshot['x']))
+        rows = np.concatenate([owned, ghosts])
+
+        ids = [snapshot['ids'][row] for row in rows]
+        self.tracker.update(ids, snapshot['x'][rows], snapshot['y'][rows],
+                            snapshot['v'][rows])
+        for car in self.tracker.cars_on_road:
+            car.target_velocity = snapshot['target_velocity']
+
+        owned_cars = _OwnedCars(self.tracker.cars_on_road[:len(owned)])
+        stats, cache_stats = [], None
+        # the constrained k-means needs at least two cars
+        if len(owned) >= 2:
+            slice_list, vel_array, lanechange_command = \
+                get_slices_clustered(owned_cars, len(owned),
+                                     self.partitioner)
+            stats = plan_slices(self.tracker, slice_list, vel_array,
+                                lanechange_command, self.ov, self.oy,
+                                self.grid_size, self.robot_radius,
+                                self.astar_args, self.plan_cache)
+            if self.plan_cache is not None:
+                cache_stats = self.plan_cache.step_stats
+        self.tracker.time_tick(mode='Graph')
+
+        x, y, tv, v = self.tracker.ret_car_locations()
+        return owned, x[:len(owned)], y[:len(owned)], tv[:len(owned)], \
+            v[:len(owned)], stats, cache_stats
+
+
+def _step_shard(shard, snapshot):
+    """
+    Process pool entry point; the shard travels to and from the worker.
+    """
+    return shard, shard.step(snapshot)
+
+
+class ShardedEdgePlanner(object):
+    """
+    Edge planner split into corridor segments.
+
+    Parameters
+    ----------
+    search_dt : float
+        Planner time step.
+
+    numlanes : int
+        Number of lanes.
+
+    map_length : int
+        Length of the grid in cells.
+
+    num_shards : int
+        Number of segments.
+
+    overlap : int
+        Cells of the neighbouring segments every shard sees.
+
+    slice_partitioner : str
+        Name of the slice partitioner of every shard.
+
+    executor : str
+        'serial', 'thread' or 'process'.
+
+    astar_args : dict
+        A* search budget and heuristic weight of every shard.
+
+    plan_cache_size : int
+        Plan cache size of every shard, 0 disables the caches.
+
+    plan_warm_start : bool
+        Whether the shards warm start their searches.
+
+    Attributes
+    ----------
+    handoffs : int
+        Number of times a car changed its owning shard.
+
+    conflicts : int
+        Number of cross shard cell conflicts that were resolved.
+
+    shard_ms : list
+        Per step list of the step time of every shard; with the process
+        executor the time waited for its result.
+
+    search_stats : list
+        A* search statistics of all slices of the last step.
+
+    plan_cache_stats : dict
+        Plan cache counters of the last step summed over the shards.
+    """
+
+    def __init__(self, search_dt, numlanes, map_length, num_shards=1,
+                 overlap=DEFAULT_SHARD_OVERLAP, slice_partitioner=None,
+                 executor='serial', grid_size=1.0, robot_radius=1.0,
+                 astar_args=None, plan_cache_size=0, plan_warm_start=True):
+        if executor not in SHARD_EXECUTORS:
+            raise ValueError(f"unknown shard executor {executor}, "
+                             f"expected one of {SHARD_EXECUTORS}")
+
+        self.map_length = map_length
+        self.boundaries = np.linspace(0, map_length, num_shards + 1) \
+            .astype(int)
+        self.shards = [EdgeShard(i, self.boundaries[i],
+                                 self.boundaries[i + 1], overlap, search_dt,
+                                 numlanes, map_length, slice_partitioner,
+                                 grid_size, robot_radius, astar_args,
+                                 plan_cache_size, plan_warm_start)
+                       for i in range(num_shards)]
+
+        self.executor = executor
+        self._pool = None
+        if executor == 'thread':
+            self._pool = ThreadPoolExecutor(max_workers=num_shards)
+        elif executor == 'process':
+            self._pool = ProcessPoolExecutor(max_workers=num_shards)
+
+        self.snapshot = None
+        self._owners = {}
+        self.handoffs = 0
+        self.conflicts = 0
+        self.shard_ms = []
+        self.search_stats = []
+        self.plan_cache_stats = None
+
+    def owner_of(self, x):
+        """
+        Shard owning each grid position.
+        """
+        x = np.mod(np.asarray(x, dtype=float), self.map_length)
+        return np.searchsorted(self.boundaries, x, side='right') - 1
+
+    def update(self, vehicle_ids, x, y, v, target_velocity):
+        """
+        Take the read-only snapshot of all cars for the next step.
+
+        Parameters
+        ----------
+        vehicle_ids : list
+            Id of every vehicle, in planner order.
+
+        x, y, v : list
+            Grid x position, lane and speed of every vehicle.
+
+        target_velocity : float
+            Target velocity of every vehicle.
+        """
+        snapshot = {'ids': list(vehicle_ids),
+                    'x': np.array(x, dtype=float),
+                    'y': np.array(y, dtype=float),
+                    'v': np.array(v, dtype=float),
+                    'target_velocity': target_velocity}
+        snapshot['owner'] = self.owner_of(snapshot['x'])
+        for key in ('x', 'y', 'v', 'owner'):
+            snapshot[key].setflags(write=False)
+
+        for vehicle_id, owner in zip(snapshot['ids'], snapshot['owner']):
+            if vehicle_id in self._owners and \
+                    self._owners[vehicle_id] != owner:
+                self.handoffs += 1
+            self._owners[vehicle_id] = owner
+        self.snapshot = snapshot
+
+    def step(self):
+        """
+        Plan one edge step in every shard.
+
+        Returns
+        -------
+        x_states, y_states, tv, v : np.ndarray
+            Planned positions, target velocities and velocities of all
+            cars in snapshot order, like plan_edge_step.
+        """
+        numcars = len(self.snapshot['ids'])
+        results = np.zeros((4, numcars, 1))
+        times = []
+
+        if self.executor == 'process':
+            futures = [self._pool.submit(_step_shard, shard, self.snapshot)
+                       for shard in self.shards]
+            outputs = []
+            for i, future in enumerate(futures):
+                start_time = time.perf_counter()
+                self.shards[i], output = future.result()
+                outputs.append(output)
+                times.append((time.perf_counter() - start_time) *
+                             SEC_TO_MSEC)
+        else:
+            def timed_step(shard):
+                start_time = time.perf_counter()
+                output = shard.step(self.snapshot)
+                times.append((time.perf_counter() - start_time) *
+                             SEC_TO_MSEC)
+                return output
+
+            if self.executor == 'thread':
+                outputs = list(self._pool.map(timed_step, self.shards))
+            else:
+                outputs = [timed_step(shard) for shard in self.shards]
+
+        self.search_stats = []
+        self.plan_cache_stats = None
+        for rows, x, y, tv, v, stats, cache_stats in outputs:
+            results[:, rows] = np.stack([x, y, tv, v])
+            self.search_stats += stats
+            if cache_stats is not None:
+                if self.plan_cache_stats is None:
+                    self.plan_cache_stats = dict.fromkeys(cache_stats, 0)
+                for key in cache_stats:
+                    self.plan_cache_stats[key] += cache_stats[key]
+        self.shard_ms.append(times)
+
+        self.resolve_conflicts(results[0], results[1])
+        return results[0], results[1], results[2], results[3]
+
+    def resolve_conflicts(self, x_states, y_states):
+        """
+        Undo lane changes that put cars of different shards into the same
+        grid cell. The car that changed lanes goes back to its snapshot
+        lane; if both (or neither) did, the later car in snapshot order
+        does. Changes x_states / y_states in place.
+        """
+        owner = self.snapshot['owner']
+        snapshot_lanes = self.snapshot['y']
+
+        reverted = True
+        while reverted:
+            reverted = False
+            cells = {}
+            for row in range(len(owner)):
+                cell = (int(x_states[row, 0]), int(y_states[row, 0]))
+                other = cells.setdefault(cell, row)
+                if other == row or owner[other] == owner[row]:
+                    continue
+
+                changed = [y_states[i, 0] != snapshot_lanes[i]
+                           for i in (other, row)]
+                undo = other if changed[0] and not changed[1] else row
+                if y_states[undo, 0] == snapshot_lanes[undo]:
+                    # nothing to undo, the cars just follow each other
+                    continue
+                y_states[undo, 0] = snapshot_lanes[undo]
+                self.conflicts += 1
+                reverted = True
+
+    def close(self):
+        """
+        Shut the worker pool down.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
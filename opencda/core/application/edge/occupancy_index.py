@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Per-lane sorted position index for the edge traffic model.
+
+Traffic.check_ahead / check_adjacent_occupancies scan dense slices of the
+map_length x numlanes occupancy grid and AStarPlanner.verify_node loops over
+every car on the road for every candidate node. The classes here keep the
+positions of each lane in a sorted array, so "first car in a window" and
+"any car in a window" become two searchsorted calls, and can be answered for
+all cars of a step in one batched query.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import numpy as np
+
+ADJACENT_MARGIN = 15
+AHEAD_MARGIN = 15
+NODE_CLEARANCE = 10
+
+FREE = 0
+OCCUPIED = 1
+NO_LANE = 2
+
+
+class LaneIndex(object):
+    """
+    Sorted positions per lane.
+
+    Parameters
+    ----------
+    lanes : array_like
+        Lane of every entry.
+
+    positions : array_like
+        Position of every entry.
+
+    values : array_like
+        Value returned for every entry by first_in; defaults to the entry
+        index.
+
+    Attributes
+    ----------
+    positions : dict
+        lane -> sorted positions.
+
+    values : dict
+        lane -> values in the same order.
+    """
+
+    def __init__(self, lanes, positions, values=None):
+        lanes = np.asarray(lanes, dtype=int).reshape(-1)
+        positions = np.asarray(positions, dtype=float).reshape(-1)
+        if values is None:
+            values = np.arange(len(lanes))
+        values = np.asarray(values).reshape(-1)
+
+        order = np.lexsort((positions, lanes))
+        lanes, positions, values = \
+            lanes[order], positions[order], values[order]
+        splits = np.flatnonzero(np.diff(lanes)) + 1
+
+        self.positions = {}
+        self.values = {}
+        for lane_positions, lane_values, lane in zip(
+                np.split(positions, splits), np.split(values, splits),
+                lanes[np.r_[0, splits]] if len(lanes) else []):
+            self.positions[int(lane)] = lane_positions
+            self.values[int(lane)] = lane_values
+
+    def _bounds(self, lanes, lo, hi, closed):
+        """
+        Per query searchsorted bounds of [lo, hi) (or [lo, hi] if closed).
+        """
+        lanes = np.asarray(lanes, dtype=int).reshape(-1)
+        lo = np.broadcast_to(np.asarray(lo, dtype=float), lanes.shape)
+        hi = np.broadcast_to(np.asarray(hi, dtype=float), lanes.shape)
+        left = np.zeros(len(lanes), dtype=int)
+        right = np.zeros(len(lanes), dtype=int)
+
+        for lane, lane_positions in self.positions.items():
+            mask = lanes == lane
+            if not mask.any():
+                continue
+            left[mask] = np.searchsorted(lane_positions, lo[mask], 'left')
+            right[mask] = np.searchsorted(lane_positions, hi[mask],
+                                          'right' if closed else 'left')
+
+        return lanes, left, right
+
+    def any_in(self, lanes, lo, hi, closed=False):
+        """
+        Whether a lane holds an entry in [lo, hi) (or [lo, hi] if closed).
+
+        Parameters
+        ----------
+        lanes, lo, hi : array_like
+            One query per element.
+
+        Returns
+        -------
+        occupied : numpy.array
+            Boolean per query.
+        """
+        _, left, right = self._bounds(lanes, lo, hi, closed)
+        return right > left
+
+    def entries_in(self, lo, hi):
+        """
+        All entries with a position in [lo, hi], over every lane.
+
+        Returns
+        -------
+        entries : list
+            (lane, position) pairs sorted by lane, then position.
+        """
+        entries = []
+        for lane, lane_positions in sorted(self.positions.items()):
+            left = np.searchsorted(lane_positions, lo, 'left')
+            right = np.searchsorted(lane_positions, hi, 'right')
+            entries += [(lane, position) for position
+                        in lane_positions[left:right]]
+        return entries
+
+    def first_in(self, lanes, lo, hi, closed=False):
+        """
+        Value of the entry with the smallest position in [lo, hi) (or
+        [lo, hi] if closed) of a lane.
+
+        Returns
+        -------
+        values : numpy.array
+            Value per query, -1 where the window is empty.
+        """
+        lanes, left, right = self._bounds(lanes, lo, hi, closed)
+        result = np.full(len(lanes), -1, dtype=int)
+        for lane, lane_values in self.values.items():
+            mask = (lanes == lane) & (right > left)
+            result[mask] = lane_values[left[mask]]
+        return result
+
+
+class OccupancyIndex(LaneIndex):
+    """
+    LaneIndex over the occupied cells of a Traffic occupancy grid. The
+    queries mirror Traffic.check_ahead and
+    Traffic.check_adjacent_occupancies, including their wrap-around
+    handling.
+
+    Parameters
+    ----------
+    lane_vehicles : numpy.array
+        The (map_length, numlanes) grid; cell value is car number + 1.
+    """
+
+    def __init__(self, lane_vehicles):
+        self.map_length, self.numlanes = lane_vehicles.shape
+        cells, lanes = np.nonzero(lane_vehicles)
+        super(OccupancyIndex, self).__init__(
+            lanes, cells, lane_vehicles[cells, lanes].astype(int) - 1)
+
+    def vehicles_ahead(self, pos_x, lanes, margin=AHEAD_MARGIN):
+        """
+        Batched Traffic.check_ahead.
+
+        Parameters
+        ----------
+        pos_x : array_like
+            Position of every querying car.
+
+        lanes : array_like
+            Lane of every querying car.
+
+        margin : int
+            Look ahead distance in cells.
+
+        Returns
+        -------
+        vehicles_ahead : numpy.array
+            Car number of the first car ahead per query, -1 for none.
+        """
+        pos_x = np.asarray(pos_x, dtype=float).reshape(-1)
+        lanes = np.asarray(lanes).reshape(-1).astype(int)
+        length = self.map_length
+
+        ahead = np.trunc(np.minimum(pos_x + margin, length - 1))
+        result = self.first_in(lanes, np.trunc(pos_x + 1), ahead)
+
+        # wrap around the end of the map
+        wrap = (pos_x + margin > length - 1) & (result < 0)
+        if wrap.any():
+            ahead = np.trunc(np.mod(pos_x[wrap] + margin, length))
+            result[wrap] = self.first_in(lanes[wrap], 0, ahead + 1)
+
+        return result
+
+    def adjacent_occupancies(self, pos_x, lanes, margin=ADJACENT_MARGIN):
+        """
+        Batched Traffic.check_adjacent_occupancies.
+
+        Returns
+        -------
+        occupied_below, occupied_above : numpy.array
+            Per query FREE (0), OCCUPIED (1) or NO_LANE (2).
+        """
+        pos_x = np.asarray(pos_x, dtype=float).reshape(-1)
+        lanes = np.asarray(lanes).reshape(-1).astype(int)
+        length = self.map_length
+
+        rear = np.trunc(pos_x - np.minimum(margin, pos_x))
+        forward = np.trunc(np.minimum(pos_x + margin, length - 1))
+        wrap_forward = pos_x + margin > length - 1
+        forward_wrapped = np.trunc(np.mod(pos_x + margin, length))
+        wrap_rear = pos_x < margin
+        rear_wrapped = np.trunc(length - (margin - pos_x))
+
+        def occupied(lane, rear):
+            # the wrapped rear window stops before the last cell, as in
+            # check_adjacent_occupancies
+            return self.any_in(lane, rear, forward) | \
+                (wrap_forward & self.any_in(lane, 0, forward_wrapped + 1)) | \
+                (wrap_rear & self.any_in(lane, rear_wrapped, length - 1))
+
+        has_above = lanes < self.numlanes - 1
+        occupied_above = np.where(
+            has_above, occupied(lanes + 1, rear).astype(int), NO_LANE)
+
+        # check_adjacent_occupancies reuses the wrapped rear index of the
+        # upper lane check for the lower lane
+        rear = np.where(has_above & wrap_rear, rear_wrapped, rear)
+        occupied_below = np.where(
+            lanes > 0, occupied(lanes - 1, rear).astype(int), NO_LANE)
+
+        return occupied_below, occupied_above
+
+
+class ObstacleIndex(LaneIndex):
+    """
+    LaneIndex of the cars outside a planning slice, as checked by
+    AStarPlanner.verify_node. A car that intends to change lanes also
+    blocks its target lane.
+
+    Parameters
+    ----------
+    cars_on_road : list
+        All cars of the traffic model.
+
+    slicenum : int
+        The slice being planned; its cars are skipped.
+    """
+
+    def __init__(self, cars_on_road, slicenum):
+        lanes = []
+        positions = []
+        for car in cars_on_road:
+            if car.slice == slicenum:
+                continue
+            lanes.append(car.lane)
+            positions.append(car.pos_x)
+            if car.intentions == "Lane Change -1":
+                lanes.append(car.lane - 1)
+                positions.append(car.pos_x)
+            elif car.intentions == "Lane Change 1":
+                lanes.append(car.lane + 1)
+                positions.append(car.pos_x)
+        super(ObstacleIndex, self).__init__(lanes, positions)
+
+    def blocked(self, lanes, pos_x, clearance=NODE_CLEARANCE):
+        """
+        Whether any car is within clearance of the given positions.
+
+        Returns
+        -------
+        blocked : bool
+        """
+        pos_x = np.asarray(pos_x, dtype=float)
+        return bool(self.any_in(lanes, pos_x - clearance, pos_x + clearance,
+                                closed=True).any())
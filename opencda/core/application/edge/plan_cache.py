@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Plan cache and warm starts for the edge A* planner.
+
+Every edge step re-plans all slices from scratch, although the traffic
+barely changes within one step and many slices repeat the same relative
+configuration. PlanCache keeps the plans of earlier searches keyed by the
+canonical state of a slice: the positions of its cars relative to the
+rearmost one, their lanes and quantized velocities, and the cars of other
+slices the search could run into. Slices that are planned again (same cars)
+are seeded with the rest of their previous plan instead. Either way the
+reused plan is walked with AStarPlanner.follow_plan against the current
+snapshot first, so only collision free plans are taken over.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+from collections import OrderedDict
+
+import numpy as np
+
+from opencda.core.application.edge.occupancy_index import NODE_CLEARANCE
+
+DEFAULT_PLAN_CACHE_SIZE = 512
+# AStarPlanner.planning searches paths of four nodes, x advances v * 0.2
+# per step
+PLAN_STEPS = 3
+STEP_DT = 0.2
+
+
+class PlanCache(object):
+    """
+    LRU cache of slice plans plus the previous plan of every slice.
+
+    Parameters
+    ----------
+    max_size : int
+        Number of cached plans.
+
+    warm_start : bool
+        Whether to seed searches with the previous plan of their slice.
+
+    Attributes
+    ----------
+    step_stats : dict
+        Counters of the current step: hits, misses, rejected (cached plans
+        that failed validation), warm_starts and time_saved_ms (estimated
+        from the mean time of the unseeded searches).
+    """
+
+    def __init__(self, max_size=DEFAULT_PLAN_CACHE_SIZE, warm_start=True):
+        self.max_size = max_size
+        self.warm_start = warm_start
+        self._plans = OrderedDict()
+        # slice cars -> (lanes after the first step, remaining steps)
+        self._previous = {}
+        self._current = {}
+        self._search_ms = 0.0
+        self._searches = 0
+        self.step_stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats():
+        return {'hits': 0, 'misses': 0, 'rejected': 0, 'warm_starts': 0,
+                'time_saved_ms': 0.0}
+
+    def __len__(self):
+        return len(self._plans)
+
+    def new_step(self):
+        """
+        Start a planning step: the plans of the last step become the warm
+        start candidates and the step counters are reset.
+        """
+        self._previous, self._current = self._current, {}
+        self.step_stats = self._empty_stats()
+
+    def key(self, a_star, cars):
+        """
+        Canonical state of a slice.
+
+        Parameters
+        ----------
+        a_star : AStarPlanner
+            The planner of the slice, for its obstacles and resolution.
+
+        cars : list
+            The cars of the slice.
+
+        Returns
+        -------
+        key : tuple
+            Hashable slice state.
+
+        order : list
+            Car index of every canonical position.
+        """
+        pos_x = [int(car.pos_x) for car in cars]
+        origin = min(pos_x)
+        order = sorted(range(len(cars)),
+                       key=lambda i: (pos_x[i], cars[i].lane, i))
+        state = tuple((pos_x[i] - origin, int(cars[i].lane),
+                       int(round(cars[i].v / a_star.resolution)),
+                       round(float(cars[i].target_velocity), 3))
+                      for i in order)
+
+        surrounding = ()
+        if a_star.obstacles is not None:
+            reach = PLAN_STEPS * a_star.max_v * STEP_DT
+            surrounding = tuple(
+                (lane, int(position) - origin) for lane, position in
+                a_star.obstacles.entries_in(origin - NODE_CLEARANCE,
+                                            max(pos_x) + reach +
+                                            NODE_CLEARANCE))
+        return (state, surrounding), order
+
+    def lookup(self, a_star, cars):
+        """
+        Plan to seed the search of a slice with.
+
+        Parameters
+        ----------
+        a_star : AStarPlanner
+            The planner of the slice.
+
+        cars : list
+            The cars of the slice.
+
+        Returns
+        -------
+        seed : list
+            Plan steps for AStarPlanner.planning, or None.
+
+        context : tuple
+            Pass to store after planning.
+        """
+        key, order = self.key(a_star, cars)
+        start_node = a_star.start_node()
+
+        if key in self._plans:
+            self._plans.move_to_end(key)
+            inverse = np.argsort(order)
+            seed = [(v[inverse], y[inverse]) for v, y in self._plans[key]]
+            if len(a_star.follow_plan(start_node, seed)) == len(seed):
+                return seed, (key, order, 'cache')
+            self.step_stats['rejected'] += 1
+
+        previous = self._previous.get(tuple(cars))
+        if self.warm_start and previous is not None:
+            lanes, seed = previous
+            if seed and np.array_equal(lanes, [car.lane for car in cars]) \
+                    and a_star.follow_plan(start_node, seed[:1]):
+                return seed, (key, order, 'warm')
+
+        return None, (key, order, None)
+
+    def store(self, a_star, cars, rv, ry, context):
+        """
+        Record the result of a slice search.
+
+        Parameters
+        ----------
+        a_star : AStarPlanner
+            The planner after planning.
+
+        cars : list
+            The cars of the slice.
+
+        rv, ry : list
+            The plan returned by planning.
+
+        context : tuple
+            As returned by lookup.
+        """
+        key, order, source = context
+        stats = a_star.search_stats()
+        steps = [(np.array(v), np.array(y))
+                 for v, y in zip(rv[::-1][1:], ry[::-1][1:])]
+
+        if source == 'cache' and a_star.seeded == len(steps):
+            self.step_stats['hits'] += 1
+        elif source == 'warm' and a_star.seeded > 0:
+            self.step_stats['warm_starts'] += 1
+        else:
+            self.step_stats['misses'] += 1
+            self._searches += 1
+            self._search_ms += (stats['time_ms'] - self._search_ms) / \
+                self._searches
+        if a_star.seeded > 0 and self._searches > 0:
+            self.step_stats['time_saved_ms'] += self._search_ms - \
+                stats['time_ms']
+
+        complete = len(steps) == PLAN_STEPS and not stats['budget_hit']
+        if complete and key not in self._plans:
+            self._plans[key] = [(v[order], y[order]) for v, y in steps]
+            if len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+        if steps:
+            self._current[tuple(cars)] = (steps[0][1], steps[1:])
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Data driven road model for the edge planner.
+
+The edge planner works on a (map_length, numlanes) occupancy grid. The
+original setup hard codes map_length=200 and builds the grid transform from
+routes between the waypoint indices stored in Indices_start.npy /
+Indices_dest.npy, which only fit one straight four lane map. RoadModel
+instead samples the lane center lines of a multi-lane corridor (straight or
+curved) from the CARLA map topology every `resolution` meters. Grid cell i of
+lane k is the i-th sample of lane k, so the forward transform is a nearest
+sample lookup and the inverse transform an interpolation in the sample
+table. The tables can be cached to disk so the map does not have to be
+walked again.
+
+RoadModel has the same processing interface as
+transform_utils.transform_processor and can be used in its place.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import logging
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import carla
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAP_LENGTH = 200
+DEFAULT_RESOLUTION = 1.0
+
+
+class RoadModel(object):
+    """
+    Lane sample tables of a multi-lane corridor.
+
+    Parameters
+    ----------
+    lanes : list
+        Center line of every lane as an (M, 2) array of world x, y sampled
+        every `resolution` meters, ordered from grid lane 0 up. Lanes are
+        cut to the shortest one.
+
+    resolution : float
+        Meters per grid cell. The planner velocities are in cells per
+        second, so values other than 1.0 also scale the speeds.
+
+    Attributes
+    ----------
+    table : numpy.array
+        (numlanes, map_length, 2) world x, y of every grid cell.
+
+    map_length : int
+        Number of grid cells along the corridor.
+
+    numlanes : int
+        Number of lanes.
+    """
+
+    def __init__(self, lanes, resolution=DEFAULT_RESOLUTION):
+        length = min(len(lane) for lane in lanes)
+        if any(len(lane) != length for lane in lanes):
+            logger.warning(f"road model lanes have different lengths, "
+                           f"cutting all of them to {length} cells")
+
+        self.resolution = resolution
+        self.table = np.stack([np.asarray(lane, dtype=float)[:length, :2]
+                               for lane in lanes])
+        self.numlanes, self.map_length = self.table.shape[:2]
+        self._tree = cKDTree(self.table.reshape(-1, 2))
+
+    @classmethod
+    def from_carla_map(cls, carla_map, start_location,
+                       length=DEFAULT_MAP_LENGTH,
+                       resolution=DEFAULT_RESOLUTION, num_lanes=None):
+        """
+        Sample the driving lanes next to start_location along the road.
+
+        Parameters
+        ----------
+        carla_map : carla.Map
+            The HD map.
+
+        start_location : carla.Location
+            Any point in the first cells of the corridor.
+
+        length : float
+            Length of the corridor in meters.
+
+        resolution : float
+            Meters per grid cell.
+
+        num_lanes : int
+            Only keep this many lanes, counted from the rightmost one.
+
+        Returns
+        -------
+        road_model : RoadModel
+        """
+        waypoint = carla_map.get_waypoint(start_location)
+
+        def same_direction(other):
+            return other is not None and \
+                other.lane_type == carla.LaneType.Driving and \
+                np.sign(other.lane_id) == np.sign(waypoint.lane_id)
+
+        # grid lane 0 is the rightmost lane in the driving direction
+        while same_direction(waypoint.get_right_lane()):
+            waypoint = waypoint.get_right_lane()
+        starts = [waypoint]
+        while same_direction(starts[-1].get_left_lane()):
+            starts.append(starts[-1].get_left_lane())
+        if num_lanes is not None:
+            starts = starts[:num_lanes]
+
+        cells = int(length / resolution)
+        lanes = []
+        for waypoint in starts:
+            samples = []
+            while waypoint is not None and len(samples) < cells:
+                location = waypoint.transform.location
+                samples.append((location.x, location.y))
+                successors = waypoint.next(resolution)
+                waypoint = successors[0] if successors else None
+            lanes.append(np.array(samples))
+
+        return cls(lanes, resolution)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Load a road model saved with save.
+        """
+        data = np.load(file_path)
+        return cls(list(data['table']), float(data['resolution']))
+
+    def save(self, file_path):
+        """
+        Cache the lane tables, see load.
+        """
+        np.savez(file_path, table=self.table, resolution=self.resolution)
+
+    @property
+    def waypoints(self):
+        """
+        Lane center lines in the waypoints dict format of
+        transform_utils.transform_processor.
+        """
+        return {lane + 1: {'x': list(self.table[lane, :, 0]),
+                           'y': list(self.table[lane, :, 1])}
+                for lane in range(self.numlanes)}
+
+    def process_waypoints_forward(self, points):
+        """
+        World x, y to grid cells.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            (N,2) array of world x, y.
+
+        Returns
+        -------
+        processed : np.ndarray
+            (N,2) int array of grid x and lane number.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        _, nearest = self._tree.query(points)
+        lanes, cells = np.divmod(nearest, self.map_length)
+        return np.stack([cells, lanes], axis=1).astype(int)
+
+    def process_single_waypoint_forward(self, waypoint_x, waypoint_y):
+        """
+        World x, y of one point to grid x and lane number.
+        """
+        processed = self.process_waypoints_forward([[waypoint_x, waypoint_y]])
+        return processed[0, 0], processed[0, 1]
+
+    def process_back_batch(self, points):
+        """
+        Grid x and lane to world x, y. Fractional cells and lanes are
+        interpolated, cells wrap around like the traffic grid.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            (N,2) array of grid x and lane.
+
+        Returns
+        -------
+        inverted : np.ndarray
+            (N,2) array of world x, y.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cells = np.mod(points[:, 0], self.map_length)
+        lanes = np.clip(points[:, 1], 0, self.numlanes - 1)
+
+        cell_0 = np.floor(cells).astype(int)
+        cell_1 = (cell_0 + 1) % self.map_length
+        lane_0 = np.floor(lanes).astype(int)
+        lane_1 = np.minimum(lane_0 + 1, self.numlanes - 1)
+        cell_t = (cells - cell_0)[:, None]
+        lane_t = (lanes - lane_0)[:, None]
+
+        def along(lane):
+            return (1 - cell_t) * self.table[lane, cell_0] + \
+                cell_t * self.table[lane, cell_1]
+
+        return (1 - lane_t) * along(lane_0) + lane_t * along(lane_1)
+
+    def process_back(self, processed_forward_array):
+        """
+        process_back_batch for a list of (2,1) arrays, returning a list of
+        (2,1) arrays like transform_processor.process_back.
+        """
+        points = np.array([point[:, 0] for point in processed_forward_array])
+        return [point.reshape(2, 1)
+                for point in self.process_back_batch(points)]
+
+    def process_trajectories_back(self, xcars, ycars):
+        """
+        Convert the planned trajectories of all vehicles back to world
+        coordinates at once.
+
+        Parameters
+        ----------
+        xcars, ycars : np.ndarray
+            (numcars, steps) planned grid x and lane.
+
+        Returns
+        -------
+        trajectories : np.ndarray
+            (numcars, 2, steps) world x, y of every vehicle.
+        """
+        xcars = np.asarray(xcars, dtype=float)
+        ycars = np.asarray(ycars, dtype=float)
+        points = np.stack([xcars.reshape(-1), ycars.reshape(-1)], axis=1)
+        inverted = self.process_back_batch(points)
+        return inverted.T.reshape(2, xcars.shape[0], xcars.shape[1]) \
+            .transpose(1, 0, 2)
+
+
+def get_road_model(carla_map, road_config):
+    """
+    Build (or load from its cache) the road model of an edge.
+
+    Parameters
+    ----------
+    carla_map : carla.Map
+        The HD map.
+
+    road_config : dict
+        The `road` section of the edge config: start ([x, y, z]), length
+        (meters), resolution (meters per cell), num_lanes and cache (npz
+        file path), all but start optional.
+
+    Returns
+    -------
+    road_model : RoadModel
+    """
+    cache = road_config.get('cache')
+    if cache is not None and os.path.exists(cache):
+        logger.info(f"loading cached road model {cache}")
+        return RoadModel.load(cache)
+
+    start = road_config['start']
+    road_model = RoadModel.from_carla_map(
+        carla_map, carla.Location(x=start[0], y=start[1], z=start[2]),
+        road_config.get('length', DEFAULT_MAP_LENGTH),
+        road_config.get('resolution', DEFAULT_RESOLUTION),
+        road_config.get('num_lanes'))
+
+    if cache is not None:
+        road_model.save(cache)
+    return road_model
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Slice partitioners for the edge planner.
+
+get_slices_clustered splits the cars of an edge into slices of at most two
+cars that are planned together by the A* planner. The original partition is
+a KMeansConstrained fit, which solves a min cost flow problem from scratch
+every edge step. The partitioners here share one interface so a cheaper
+grouping can be selected with the `slice_partitioner` key of the edge
+config:
+
+    kmeans_constrained : the original constrained k-means (default).
+    sweep              : sort along the road and greedily pair neighbours.
+    kmeans_warm        : k-means started from the previous step's slices.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import numpy as np
+
+from k_means_constrained import KMeansConstrained
+
+SLICE_SIZE_MAX = 2
+# the sweep pairs a car with one of the next SWEEP_WINDOW cars along the road
+SWEEP_WINDOW = 3
+WARM_MAX_ITER = 10
+
+
+def num_slices(numcars):
+    """
+    Number of slices get_slices_clustered asks for.
+    """
+    return int(numcars / 2 + 1)
+
+
+def compact_labels(labels):
+    """
+    Renumber slice labels to 0..n-1 in order of first appearance.
+    """
+    _, first, inverse = np.unique(labels, return_index=True,
+                                  return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return order[inverse.reshape(-1)]
+
+
+def intra_slice_distance(features, labels):
+    """
+    Sum of the distances between the cars of a slice and the slice centroid,
+    the objective of the k-means partitioners.
+
+    Parameters
+    ----------
+    features : numpy.array
+        (numcars, 2) array of [pos_x, lane_weight * lane].
+
+    labels : numpy.array
+        Slice of every car.
+
+    Returns
+    -------
+    distance : float
+    """
+    features = np.asarray(features, dtype=float)
+    labels = np.asarray(labels)
+    distance = 0.0
+    for label in np.unique(labels):
+        members = features[labels == label]
+        distance += np.linalg.norm(members - members.mean(axis=0),
+                                   axis=1).sum()
+    return float(distance)
+
+
+class SlicePartitioner(object):
+    """
+    Base class of the slice partitioners.
+
+    Parameters
+    ----------
+    size_max : int
+        Maximum number of cars in a slice.
+    """
+
+    name = None
+
+    def __init__(self, size_max=SLICE_SIZE_MAX):
+        self.size_max = size_max
+
+    def partition(self, features, n_clusters):
+        """
+        Assign every car to a slice.
+
+        Parameters
+        ----------
+        features : numpy.array
+            (numcars, 2) array of [pos_x, lane_weight * lane].
+
+        n_clusters : int
+            Number of slices requested.
+
+        Returns
+        -------
+        labels : numpy.array
+            Slice of every car.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """
+        Forget any state kept between edge steps.
+        """
+        pass
+
+
+class ConstrainedKMeansPartitioner(SlicePartitioner):
+    """
+    The KMeansConstrained fit get_slices_clustered always used.
+    """
+
+    name = 'kmeans_constrained'
+
+    def partition(self, features, n_clusters):
+        return KMeansConstrained(n_clusters=n_clusters, size_min=None,
+                                 size_max=self.size_max,
+                                 random_state=0).fit_predict(features)
+
+
+class SweepPartitioner(SlicePartitioner):
+    """
+    Sort the cars along the road axis and pair every car with the closest
+    (lane changes included in the distance) of the next few unpaired cars.
+    The pairs are then taken closest first, and the widest pairs are split
+    again until there are n_clusters slices, like the constrained k-means
+    leaves its extra cars alone. O(n log n).
+
+    Only slices of two cars are built, larger size_max values are not
+    used.
+    """
+
+    name = 'sweep'
+
+    def __init__(self, size_max=SLICE_SIZE_MAX, window=SWEEP_WINDOW):
+        super(SweepPartitioner, self).__init__(size_max)
+        self.window = window
+
+    def partition(self, features, n_clusters):
+        features = np.asarray(features, dtype=float)
+        numcars = len(features)
+        order = np.lexsort((features[:, 1], features[:, 0]))
+
+        # candidate pairs between neighbours along the road
+        candidates = []
+        for offset in range(1, self.window + 1):
+            first, second = order[:-offset], order[offset:]
+            distance = np.linalg.norm(features[first] - features[second],
+                                      axis=1)
+            candidates.append(np.stack([distance, first, second], axis=1))
+        candidates = np.concatenate(candidates) if numcars > 1 \
+            else np.zeros((0, 3))
+        candidates = candidates[np.argsort(candidates[:, 0], kind='stable')]
+
+        labels = np.full(numcars, -1, dtype=int)
+        distances = []
+        for distance, first, second in candidates:
+            first, second = int(first), int(second)
+            if labels[first] >= 0 or labels[second] >= 0:
+                continue
+            labels[first] = labels[second] = len(distances)
+            distances.append(distance)
+
+        # split the widest pairs until there are n_clusters slices
+        num_pairs = len(distances)
+        split = max(0, min(num_pairs,
+                           n_clusters - (numcars - num_pairs)))
+        for pair in np.argsort(distances)[::-1][:split]:
+            members = np.flatnonzero(labels == pair)
+            labels[members[1]] = -1
+
+        # the remaining cars get a slice of their own
+        single = np.flatnonzero(labels < 0)
+        labels[single] = num_pairs + np.arange(len(single))
+
+        return compact_labels(labels)
+
+
+class WarmKMeansPartitioner(SlicePartitioner):
+    """
+    Size constrained k-means that starts from the slices of the previous
+    edge step. The assignment step greedily gives every car the closest
+    centroid that still has room, instead of solving the min cost flow
+    problem. Cars barely move between edge steps, so it usually converges
+    in one or two iterations. The first step (or a step after the number of
+    cars changed) starts from the sweep partition.
+
+    Parameters
+    ----------
+    size_max : int
+        Maximum number of cars in a slice.
+
+    max_iter : int
+        Maximum number of k-means iterations per step.
+    """
+
+    name = 'kmeans_warm'
+
+    def __init__(self, size_max=SLICE_SIZE_MAX, max_iter=WARM_MAX_ITER):
+        super(WarmKMeansPartitioner, self).__init__(size_max)
+        self.max_iter = max_iter
+        self.sweep = SweepPartitioner(size_max)
+        self.labels = None
+        self.iterations = 0
+
+    def reset(self):
+        self.labels = None
+
+    def partition(self, features, n_clusters):
+        features = np.asarray(features, dtype=float)
+        numcars = len(features)
+
+        labels = self.labels
+        if labels is None or len(labels) != numcars or \
+                labels.max() >= n_clusters:
+            labels = self.sweep.partition(features, n_clusters)
+
+        centroids = np.zeros((n_clusters, features.shape[1]))
+        for iteration in range(self.max_iter):
+            for label in range(n_clusters):
+                members = features[labels == label]
+                if len(members):
+                    centroids[label] = members.mean(axis=0)
+            new_labels = self._assign(features, centroids)
+            self.iterations += 1
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        self.labels = labels
+        return labels
+
+    def _assign(self, features, centroids):
+        """
+        Give every car its closest centroid that still has room.
+        """
+        numcars = len(features)
+        distance = np.linalg.norm(features[:, None, :] - centroids[None],
+                                  axis=2)
+        labels = np.full(numcars, -1, dtype=int)
+        room = np.full(len(centroids), self.size_max)
+        assigned = 0
+        for flat in np.argsort(distance, axis=None, kind='stable'):
+            car, label = divmod(int(flat), len(centroids))
+            if labels[car] >= 0 or room[label] == 0:
+                continue
+            labels[car] = label
+            room[label] -= 1
+            assigned += 1
+            if assigned == numcars:
+                break
+        return labels
+
+
+PARTITIONERS = {partitioner.name: partitioner for partitioner in
+                (ConstrainedKMeansPartitioner, SweepPartitioner,
+                 WarmKMeansPartitioner)}
+
+
+def get_partitioner(name=None, **kwargs):
+    """
+    Create a slice partitioner by its config name.
+
+    Parameters
+    ----------
+    name : str
+        One of PARTITIONERS; None selects kmeans_constrained.
+
+    Returns
+    -------
+    partitioner : SlicePartitioner
+    """
+    if name is None:
+        name = ConstrainedKMeansPartitioner.name
+    if name not in PARTITIONERS:
+        raise ValueError(f"unknown slice partitioner {name}, "
+                         f"expected one of {sorted(PARTITIONERS)}")
+    return PARTITIONERS[name](**kwargs)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent traffic tracker for the edge planner.
+
+EdgeManager used to build a brand new collab_sandbox.Traffic every edge
+step. TrafficTracker keeps the Car objects keyed by vehicle id, moves them
+in place and only rewrites the occupancy cells that changed. The spawn
+constraint repair only runs when two cars are actually too close in a lane,
+and then only visits those close pairs. The resulting planner inputs are the
+same as the ones of a freshly built Traffic.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import numpy as np
+
+from opencda.core.application.edge.collab_sandbox import Traffic, Car
+
+# minimum spacing (in grid cells) enforced by Traffic.check_spawn_constraints
+SPAWN_SPACING = 3
+
+
+class TrafficTracker(Traffic):
+    """
+    Traffic model updated in place from the vehicle states of each step.
+
+    Parameters
+    ----------
+    dt : float
+        Planner time step.
+
+    numlanes : int
+        Number of lanes.
+
+    map_length : int
+        Length of the grid in cells.
+
+    Attributes
+    ----------
+    car_ids : list
+        Vehicle id of every car in cars_on_road, in order.
+
+    repairs : int
+        Number of updates that needed the spawn constraint repair.
+    """
+
+    def __init__(self, dt, numlanes, map_length):
+        # Traffic.__init__ would spawn random cars, so set up the state here
+        self.numlanes = numlanes
+        self.dt = dt
+        self.numcars = 0
+        self.cars_on_road = []
+        self.time = 0
+        self.map_length = map_length
+        self.lane_vehicles = np.zeros((self.map_length, self.numlanes))
+
+        self.car_ids = []
+        self.repairs = 0
+        self._cars = {}
+        # cells written to lane_vehicles, one per car
+        self._cell_x = np.zeros(0, dtype=int)
+        self._cell_lane = np.zeros(0, dtype=int)
+
+    def update(self, vehicle_ids, x, y, v):
+        """
+        Move the tracked cars to the given states, adding cars for new
+        vehicle ids and dropping the ones that left.
+
+        Parameters
+        ----------
+        vehicle_ids : list
+            Id of every vehicle, in planner order.
+
+        x : list
+            Grid x position of every vehicle.
+
+        y : list
+            Lane of every vehicle.
+
+        v : list
+            Speed of every vehicle.
+        """
+        vehicle_ids = list(vehicle_ids)
+        if vehicle_ids != self.car_ids:
+            for vehicle_id in set(self._cars) - set(vehicle_ids):
+                del self._cars[vehicle_id]
+            for i, vehicle_id in enumerate(vehicle_ids):
+                if vehicle_id not in self._cars:
+                    self._cars[vehicle_id] = Car(self.dt, self.numlanes,
+                                                 int(x[i]), int(y[i]), v[i])
+            self.car_ids = vehicle_ids
+            self.cars_on_road = [self._cars[i] for i in vehicle_ids]
+            self.numcars = len(self.cars_on_road)
+            # the car numbers in the grid changed, start over
+            self._cell_x = np.full(self.numcars, -1, dtype=int)
+            self._cell_lane = np.full(self.numcars, -1, dtype=int)
+            self.lane_vehicles[:] = 0
+
+        # reset everything the planner changes during a step
+        for i, car in enumerate(self.cars_on_road):
+            car.pos_x = int(x[i])
+            car.lane = int(y[i])
+            car.v = v[i]
+            car.target_velocity = v[i]
+            car.intentions = 'None'
+            car.target_lane = None
+            car.changed_roads = False
+            car.scrolled = False
+            car.slice = None
+        self.time = 0
+
+        self.update_grid_occupancies()
+
+        if self.has_spawn_conflicts():
+            self.repairs += 1
+            self.repair_spawn_constraints()
+
+    def update_grid_occupancies(self):
+        """
+        Rewrite the occupancy cells of the cars that moved.
+        """
+        cell_x = np.fromiter((int(car.pos_x) for car in self.cars_on_road),
+                             dtype=int, count=self.numcars)
+        cell_lane = np.fromiter((int(car.lane) for car in self.cars_on_road),
+                                dtype=int, count=self.numcars)
+
+        if len(self._cell_x) != self.numcars or \
+                self._has_shared_cells(self._cell_x, self._cell_lane) or \
+                self._has_shared_cells(cell_x, cell_lane):
+            # several cars in one cell: the last car wins, like Traffic
+            Traffic.update_grid_occupancies(self)
+        else:
+            moved = (cell_x != self._cell_x) | (cell_lane != self._cell_lane)
+            old = moved & (self._cell_x >= 0)
+            self.lane_vehicles[self._cell_x[old], self._cell_lane[old]] = 0
+            self.lane_vehicles[cell_x[moved], cell_lane[moved]] = \
+                np.flatnonzero(moved) + 1
+
+        self._cell_x = cell_x
+        self._cell_lane = cell_lane
+
+    def _has_shared_cells(self, cell_x, cell_lane):
+        """
+        Whether two cars occupy the same grid cell.
+        """
+        cells = cell_x[cell_x >= 0] * self.numlanes + cell_lane[cell_x >= 0]
+        return len(np.unique(cells)) != len(cells)
+
+    def repair_spawn_constraints(self):
+        """
+        Same result as Traffic.check_spawn_constraints, but only visits
+        cell pairs closer than SPAWN_SPACING (all other pairs are no-ops
+        there) and moves single cars in the grid instead of rebuilding it
+        after every pair.
+        """
+        # cell -> car numbers in it; the grid shows the highest one
+        occupants = {}
+        for carnum, car in enumerate(self.cars_on_road):
+            occupants.setdefault((int(car.pos_x), int(car.lane)),
+                                 set()).add(carnum)
+
+        def move(carnum, pos_x):
+            car = self.cars_on_road[carnum]
+            old = (int(car.pos_x), int(car.lane))
+            occupants[old].discard(carnum)
+            self.lane_vehicles[old] = \
+                max(occupants[old]) + 1 if occupants[old] else 0
+            car.pos_x = pos_x
+            new = (int(car.pos_x), int(car.lane))
+            occupants.setdefault(new, set()).add(carnum)
+            self.lane_vehicles[new] = max(occupants[new]) + 1
+
+        for i in range(self.numlanes):
+            # like the original, the cells of interest are not refreshed
+            # while cars of this lane are moved
+            indices_of_interest = np.flatnonzero(self.lane_vehicles[:, i])
+            for j in range(len(indices_of_interest)):
+                for k in range(j + 1, min(j + SPAWN_SPACING,
+                                          len(indices_of_interest))):
+                    if indices_of_interest[k] - indices_of_interest[j] >= \
+                            SPAWN_SPACING:
+                        break
+                    # an emptied cell reads as car -1, i.e. the last car
+                    coord_k = int(self.lane_vehicles[
+                        indices_of_interest[k], i] - 1) % self.numcars
+                    move(coord_k,
+                         (self.cars_on_road[coord_k].pos_x + SPAWN_SPACING)
+                         % self.map_length)
+
+        self._cell_x = np.fromiter(
+            (int(car.pos_x) for car in self.cars_on_road),
+            dtype=int, count=self.numcars)
+        self._cell_lane = np.fromiter(
+            (int(car.lane) for car in self.cars_on_road),
+            dtype=int, count=self.numcars)
+
+    def has_spawn_conflicts(self):
+        """
+        Whether check_spawn_constraints would move any car, i.e. two
+        occupied cells of a lane are closer than SPAWN_SPACING.
+        """
+        for lane in range(self.numlanes):
+            occupied = np.flatnonzero(self.lane_vehicles[:, lane])
+            if len(occupied) > 1 and \
+                    np.min(np.diff(occupied)) < SPAWN_SPACING:
+                return True
+        return False
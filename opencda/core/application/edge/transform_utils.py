@@ -39,6 +39,30 @@ def inverse_transform(waypoint_x,waypoint_y,rotation_mat,offset):
     point_vec = np.array([[waypoint_x],[waypoint_y]])
     return np.matmul(rotation_mat,point_vec+offset)
 
+def transform_batch(points,rotation_mat,offset):
+    """
+    transform for many points at once.
+
+    Parameters
+    ----------
+    points : np.ndarray
+        (N,2) array of x, y.
+
+    Returns
+    -------
+    transformed : np.ndarray
+        (N,2) int array.
+    """
+    points = np.asarray(points,dtype=float).reshape(-1,2)
+    return (np.matmul(rotation_mat,points.T) + offset).T.astype(int)
+
+def inverse_transform_batch(points,rotation_mat,offset):
+    """
+    inverse_transform for many points at once, (N,2) in and out.
+    """
+    points = np.asarray(points,dtype=float).reshape(-1,2)
+    return np.matmul(rotation_mat,points.T+offset).T
+
 def get_scaling(waypoints):
     count = 0
     rotation_mat, inverse_rotation_mat = get_rotation_mat(waypoints[1]['x'][0],waypoints[1]['y'][0],waypoints[1]['x'][-1],waypoints[1]['y'][-1])
@@ -80,8 +104,8 @@ def serialize_waypoint(waypoint):
     serialized_waypoint.s           = waypoint.s
     serialized_waypoint.is_junction = waypoint.is_junction
     serialized_waypoint.lane_width  = waypoint.lane_width
+    serialized_waypoint.lane_change = int(waypoint.lane_change)
 
-    # int32 lane_change = 9; // unused - enum if needed
     # int32 lane_type = 10; // unused - enum if needed
     # int32 right_lane_marking = 11; // unused - enum if needed
     # int32 left_lane_marking = 12; // unused - enum if needed
@@ -142,6 +166,66 @@ class transform_processor():
         # sys.exit()
         return (np_waypoint[0,0], np_waypoint[1,0])
 
+    def process_waypoints_forward(self, points):
+        """
+        process_single_waypoint_forward for many points in one matmul.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            (N,2) array of world x, y.
+
+        Returns
+        -------
+        processed : np.ndarray
+            (N,2) int array of grid x and lane number.
+        """
+        processed = transform_batch(points, self.rotation_mat, self.offset)
+        processed[:,1] = np.clip(-(processed[:,1]/self.lanewidth).astype(int),0,3)
+        return processed
+
+    def process_back_batch(self, points):
+        """
+        process_back for many points in one matmul. Unlike process_back the
+        input is not modified.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            (N,2) array of grid x and lane.
+
+        Returns
+        -------
+        inverted : np.ndarray
+            (N,2) array of world x, y.
+        """
+        points = np.array(points,dtype=float).reshape(-1,2)
+        lanes = points[:,1]
+        scaled = lanes != 0
+        lanes[scaled] = (lanes[scaled]+1)/np.take(self.scaling,lanes[scaled].astype(int))
+        return inverse_transform_batch(points, self.inverse_rotation_mat, -self.offset)
+
+    def process_trajectories_back(self, xcars, ycars):
+        """
+        Convert the planned trajectories of all vehicles back to world
+        coordinates at once.
+
+        Parameters
+        ----------
+        xcars, ycars : np.ndarray
+            (numcars, steps) planned grid x and lane.
+
+        Returns
+        -------
+        trajectories : np.ndarray
+            (numcars, 2, steps) world x, y of every vehicle.
+        """
+        xcars = np.asarray(xcars,dtype=float)
+        ycars = np.asarray(ycars,dtype=float)
+        points = np.stack([xcars.reshape(-1),ycars.reshape(-1)],axis=1)
+        inverted = self.process_back_batch(points)
+        return inverted.T.reshape(2,xcars.shape[0],xcars.shape[1]).transpose(1,0,2)
+
     def process_waypoints_bidirectional(self,indice): #Present for test purposes mainly
         initial_compute_flag = 0
         counter = 0
@@ -11,12 +11,26 @@ class eDoneBehavior(Enum):
     CONTROL = 1
     COUNT = 2 
 
+class eTickMode(Enum):
+    SYNC = 0 # the world advances once every vehicle replied
+    ASYNC = 1 # the world advances at a fixed rate, bounded by staleness_bound
+    COUNT = 2
+
+class eTransport(Enum):
+    GRPC = 0 # ticks & updates through the ecloud server
+    SHM = 1 # co-located runs: shared-memory rings hosted by the sim, see ecloud_shm
+    COUNT = 2
+
 class EcloudConfig(object):  
 
     RANDOM = "random"
     EXPLICIT = "explicit"
     DESTROY = "destroy"
     CONTROL = "control"
+    SYNC = "sync"
+    ASYNC = "async"
+    GRPC = "grpc"
+    SHM = "shm"
 
     location_types = { RANDOM : eLocationType.RANDOM, 
                        EXPLICIT : eLocationType.EXPLICIT }
@@ -24,6 +38,12 @@ class EcloudConfig(object):
     done_behavior_types = { DESTROY : eDoneBehavior.DESTROY,
                             CONTROL : eDoneBehavior.CONTROL }
 
+    tick_modes = { SYNC : eTickMode.SYNC,
+                   ASYNC : eTickMode.ASYNC }
+
+    transports = { GRPC : eTransport.GRPC,
+                   SHM : eTransport.SHM }
+
 
     def __init__(self, config_json, logger=None):
 
@@ -35,9 +55,25 @@ class EcloudConfig(object):
             "num_servers" : 2, # % num_cars to choose which port to connect to. 2nd - nth server port: p = 50053 + ( n - 1 ) - really # of server THREADS
             "num_ports" : 32,
             "server_ping_time_s" : 0.005, # 5ms
-            "client_world_time_factor" : 0.9, # what percentage of last world time to wait initially
-            "client_ping_spawn_s" : 0.05, # sleep to wait between pings after spawn
-            "client_ping_tick_s" : 0.01, # minimum sleep to wait between pings after spawn
+            "client_world_time_factor" : 0.9, # unused - ticks are pushed, vehicles no longer sleep a share of the world time
+            "client_ping_spawn_s" : 0.05, # ceiling of the backoff between polls, e.g. looking up the spawned actor
+            "client_ping_tick_s" : 0.01, # first backoff delay between polls
+            "trace_enabled" : False, # record per-tick spans in every process & merge them into a Chrome trace at the end
+            "trace_buffer_size" : 65536, # spans kept per process; oldest are overwritten
+            "trace_report_size" : 16384, # newest spans a client host sends back with its debug info, keeps the reply ~1MB
+            "record_enabled" : False, # record per-tick component inputs/outputs for offline replay
+            "record_folder" : "./evaluation_outputs/recordings",
+            "waypoint_delta_enabled" : True, # push versioned, delta encoded edge waypoint buffers
+            "spawn_cache_folder" : "./evaluation_outputs/spawn_cache", # lane snapped background spawn candidates per map & range spec
+            "tick_deadline_ms" : 10000, # per-tick barrier deadline on the ecloud server; 0 waits forever
+            "max_missed_ticks" : 3, # consecutive missed deadlines before a vehicle is evicted from the barrier
+            "tick_mode" : self.SYNC, # async: tick at a fixed rate, vehicles act on the latest tick they see
+            "async_tick_period_s" : 0.0, # async wall-clock period between ticks; 0 - the world's fixed_delta_seconds (real time)
+            "staleness_bound" : 5, # async: ticks a vehicle may fall behind before the sim waits for it
+            "num_shards" : 1, # ecloud server processes; vehicle i is served by shard i % num_shards on port 50051 + shard
+            "transport" : self.GRPC, # shm: sim & vehicles on one machine exchange ticks through shared memory instead (sync, 1 shard)
+            "resource_telemetry_enabled" : False, # sample CPU, RSS, threads, GPU memory & queue depths of the sim & every client host
+            "resource_sample_period_s" : 0.5,
         }
 
         self.ecloud_scenario = {
@@ -45,6 +81,7 @@ class EcloudConfig(object):
            "location_type" : self.EXPLICIT,
            "done_behavior" : self.DESTROY,
            "step_count" : 250, # number of steps to take before breaking
+           "min_destination_distance_m" : 500, # random destinations: drawn this far from the spawn, halved every 10 draws
         }
 
         if 'ecloud' in config_json:
@@ -92,7 +129,71 @@ class EcloudConfig(object):
     def get_client_world_tick_factor(self):
         self.logger.debug(f"client_world_time_factor: {self.ecloud_base['client_world_time_factor']}")
         return self.ecloud_base['client_world_time_factor']
-    
+
+    def get_trace_enabled(self):
+        self.logger.debug(f"trace_enabled: {self.ecloud_base['trace_enabled']}")
+        return self.ecloud_base['trace_enabled']
+
+    def get_trace_buffer_size(self):
+        self.logger.debug(f"trace_buffer_size: {self.ecloud_base['trace_buffer_size']}")
+        return self.ecloud_base['trace_buffer_size']
+
+    def get_trace_report_size(self):
+        self.logger.debug(f"trace_report_size: {self.ecloud_base['trace_report_size']}")
+        return self.ecloud_base['trace_report_size']
+
+    def get_record_enabled(self):
+        self.logger.debug(f"record_enabled: {self.ecloud_base['record_enabled']}")
+        return self.ecloud_base['record_enabled']
+
+    def get_record_folder(self):
+        self.logger.debug(f"record_folder: {self.ecloud_base['record_folder']}")
+        return self.ecloud_base['record_folder']
+
+    def get_waypoint_delta_enabled(self):
+        self.logger.debug(f"waypoint_delta_enabled: {self.ecloud_base['waypoint_delta_enabled']}")
+        return self.ecloud_base['waypoint_delta_enabled']
+
+    def get_spawn_cache_folder(self):
+        self.logger.debug(f"spawn_cache_folder: {self.ecloud_base['spawn_cache_folder']}")
+        return self.ecloud_base['spawn_cache_folder']
+
+    def get_tick_deadline_ms(self):
+        self.logger.debug(f"tick_deadline_ms: {self.ecloud_base['tick_deadline_ms']}")
+        return self.ecloud_base['tick_deadline_ms']
+
+    def get_max_missed_ticks(self):
+        self.logger.debug(f"max_missed_ticks: {self.ecloud_base['max_missed_ticks']}")
+        return self.ecloud_base['max_missed_ticks']
+
+    def get_tick_mode(self):
+        self.logger.debug(f"tick_mode: {self.ecloud_base['tick_mode']}")
+        return EcloudConfig.tick_modes[self.ecloud_base['tick_mode']]
+
+    def get_async_tick_period_s(self):
+        self.logger.debug(f"async_tick_period_s: {self.ecloud_base['async_tick_period_s']}")
+        return self.ecloud_base['async_tick_period_s']
+
+    def get_staleness_bound(self):
+        self.logger.debug(f"staleness_bound: {self.ecloud_base['staleness_bound']}")
+        return self.ecloud_base['staleness_bound']
+
+    def get_num_shards(self):
+        self.logger.debug(f"num_shards: {self.ecloud_base['num_shards']}")
+        return self.ecloud_base['num_shards']
+
+    def get_transport(self):
+        self.logger.debug(f"transport: {self.ecloud_base['transport']}")
+        return EcloudConfig.transports[self.ecloud_base['transport']]
+
+    def get_resource_telemetry_enabled(self):
+        self.logger.debug(f"resource_telemetry_enabled: {self.ecloud_base['resource_telemetry_enabled']}")
+        return self.ecloud_base['resource_telemetry_enabled']
+
+    def get_resource_sample_period_s(self):
+        self.logger.debug(f"resource_sample_period_s: {self.ecloud_base['resource_sample_period_s']}")
+        return self.ecloud_base['resource_sample_period_s']
+
     def get_num_cars(self):
         self.logger.debug(f"num_cars: {self.ecloud_scenario['num_cars'] if self.ecloud_scenario['num_cars'] != 0 else len(self.config_json['scenario']['single_cav_list'])}")
         return self.ecloud_scenario['num_cars'] if self.ecloud_scenario['num_cars'] != 0 else \
@@ -102,6 +203,10 @@ class EcloudConfig(object):
         self.logger.debug(f"location_type: {self.ecloud_scenario['location_type']}")
         return EcloudConfig.location_types[self.ecloud_scenario['location_type']]
     
+    def get_min_destination_distance_m(self):
+        self.logger.debug(f"min_destination_distance_m: {self.ecloud_scenario['min_destination_distance_m']}")
+        return self.ecloud_scenario['min_destination_distance_m']
+
     def get_done_behavior(self):
         self.logger.debug(f"done_behavior: {self.ecloud_scenario['done_behavior']}")
         return EcloudConfig.done_behavior_types[self.ecloud_scenario['done_behavior']]
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+One batched step per tick for the vehicles of a multi-vehicle host.
+
+The vehicles of a host share a FleetKalmanFilter and a FleetController,
+but each runs as its own coroutine. A FleetBarrier lines them up once per
+tick: every vehicle stages its inputs and arrives, the last one to arrive
+runs the batched step for the whole host and releases the others, which
+then read their slot's result.
+
+Only for sync ticks - the sim pushes every tick to every vehicle, so every
+member arrives once per tick. With async ticks the vehicles do not share a
+tick and each steps its own slot instead.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import asyncio
+import time
+
+from opencda.core.actuation.fleet_pid_controller import get_fleet_controller
+from opencda.core.sensing.localization.fleet_kalman_filter import \
+    FleetKalmanFilter
+
+
+class FleetBarrier(object):
+    """
+    Runs a batched step once all member vehicles of a host arrived.
+
+    Parameters
+    ----------
+    run_step : callable
+        The batched step, e.g. FleetKalmanFilter.run_step.
+
+    Attributes
+    ----------
+    members : int
+        Vehicles that arrive every tick.
+
+    steps : int
+        Batched steps run so far.
+
+    step_ms : float
+        Duration of the last batched step.
+
+    share_ms : float
+        step_ms split across the vehicles that arrived for it, what each
+        of them spent on the step.
+    """
+
+    def __init__(self, run_step):
+        self.run_step = run_step
+        self.members = 0
+        self.steps = 0
+        self.step_ms = 0.0
+        self.share_ms = 0.0
+
+        self._arrived = 0
+        self._stepped = asyncio.Event()
+
+    def join(self):
+        self.members += 1
+
+    def leave(self):
+        """
+        A vehicle is done - the others no longer wait for it.
+        """
+        self.members -= 1
+        if self._arrived and self._arrived >= self.members:
+            self._step()
+
+    def _step(self):
+        start_time = time.time()
+        self.run_step()
+        self.step_ms = (time.time() - start_time) * 1000
+        self.share_ms = self.step_ms / max(self._arrived, 1)
+        self.steps += 1
+        self._arrived = 0
+        stepped = self._stepped
+        self._stepped = asyncio.Event()
+        stepped.set()
+
+    async def arrive(self):
+        """
+        Wait until every member staged its inputs of this tick and the
+        batched step ran. Members with nothing staged arrive all the same.
+        """
+        self._arrived += 1
+        if self._arrived >= self.members:
+            self._step()
+            return
+
+        await self._stepped.wait()
+
+
+class HostFleet(object):
+    """
+    The fleet state and barriers shared by the vehicles of one host.
+
+    Attributes
+    ----------
+    fleet_filter : FleetKalmanFilter
+        Created for the localization dt of the first vehicle.
+
+    localize : FleetBarrier
+        Steps fleet_filter once per tick.
+
+    control : FleetBarrier
+        Steps the process wide FleetController once per tick, for the
+        vehicles configured with fleet_pid_controller.
+    """
+
+    def __init__(self):
+        self.fleet_filter = None
+        self.localize = FleetBarrier(self._localize_step)
+        self.control = FleetBarrier(self._control_step)
+
+    def get_fleet_filter(self, dt):
+        """
+        The host's FleetKalmanFilter, all vehicles filter with the same dt.
+        """
+        if self.fleet_filter is None:
+            self.fleet_filter = FleetKalmanFilter(dt)
+        assert self.fleet_filter.time_step == dt, \
+            "vehicles of a host have to localize with the same dt"
+        return self.fleet_filter
+
+    def _localize_step(self):
+        if self.fleet_filter is not None:
+            self.fleet_filter.run_step()
+
+    def _control_step(self):
+        get_fleet_controller().run_step()
+
+    def join(self):
+        self.localize.join()
+        self.control.join()
+
+    def leave(self):
+        self.localize.leave()
+        self.control.leave()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight waypoints rebuilt from the edge waypoint buffers.
+
+The edge already resolves every planned point to a map waypoint before it
+serializes it, so the client does not need another carla_map.get_waypoint
+round trip per point and tick just to hand the points to the LocalPlanner.
+LocalWaypoint carries the fields the planner and behavior agent read from
+the waypoint buffer - transform, road/section/lane ids, s, junction flag,
+lane width and lane change - and only falls back to the map waypoint (one
+lookup, through the long lived map handle of the vehicle) for anything else,
+e.g. next() or the lane markings.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import carla
+
+from opencda.core.plan.global_route_planner_dao import GlobalRoutePlannerDAO
+
+
+class LocalWaypoint(object):
+    """
+    Stand-in for carla.Waypoint in the local planner's waypoint buffer.
+
+    Parameters
+    ----------
+    transform : carla.Transform
+        Waypoint transform.
+
+    road_id, section_id, lane_id : int
+        OpenDRIVE ids of the waypoint.
+
+    s : float
+        OpenDRIVE s of the waypoint.
+
+    is_junction : bool
+        Whether the waypoint is in a junction.
+
+    lane_width : float
+        Width of the lane.
+
+    lane_change : carla.LaneChange
+        Permitted lane changes.
+
+    resolver : LocalWaypointResolver
+        Map handle for the attributes not carried locally, optional.
+    """
+
+    __slots__ = ('transform', 'road_id', 'section_id', 'lane_id', 's',
+                 'is_junction', 'lane_width', 'lane_change', '_resolver',
+                 '_map_waypoint')
+
+    def __init__(self, transform, road_id=0, section_id=0, lane_id=0, s=0.0,
+                 is_junction=False, lane_width=0.0,
+                 lane_change=carla.LaneChange.NONE, resolver=None):
+        self.transform = transform
+        self.road_id = road_id
+        self.section_id = section_id
+        self.lane_id = lane_id
+        self.s = s
+        self.is_junction = is_junction
+        self.lane_width = lane_width
+        self.lane_change = lane_change
+        self._resolver = resolver
+        self._map_waypoint = None
+
+    def map_waypoint(self):
+        """
+        The carla.Waypoint at this location, looked up once on demand.
+        """
+        if self._map_waypoint is None:
+            if self._resolver is None:
+                raise AttributeError('LocalWaypoint without a map handle')
+            self._map_waypoint = \
+                self._resolver.get_waypoint(self.transform.location)
+        return self._map_waypoint
+
+    def __getattr__(self, name):
+        # id, next(), previous(), get_left_lane(), lane markings, ...
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.map_waypoint(), name)
+
+    def __repr__(self):
+        return f"LocalWaypoint(road_id={self.road_id}, " \
+               f"lane_id={self.lane_id}, s={self.s}, {self.transform})"
+
+
+class LocalWaypointResolver(object):
+    """
+    Builds LocalWaypoints for one vehicle and holds its map handle.
+
+    Parameters
+    ----------
+    carla_map : carla.Map
+        The map of the vehicle's world, fetched once.
+
+    sampling_resolution : float
+        See GlobalRoutePlannerDAO.
+
+    Attributes
+    ----------
+    map_lookups : int
+        Number of fallbacks to the map.
+    """
+
+    def __init__(self, carla_map, sampling_resolution=2):
+        self.dao = GlobalRoutePlannerDAO(carla_map, sampling_resolution)
+        self.map_lookups = 0
+
+    def get_waypoint(self, location):
+        """
+        Map waypoint of a location.
+
+        Parameters
+        ----------
+        location : carla.Location
+
+        Returns
+        -------
+        waypoint : carla.Waypoint
+        """
+        self.map_lookups += 1
+        return self.dao.get_waypoint(location)
+
+    def from_point(self, x, y, z, roll, pitch, yaw, road_id, section_id,
+                   lane_id, s, is_junction, lane_width, lane_change):
+        """
+        LocalWaypoint of a packed point, see waypoint_delta.POINT_FIELDS.
+
+        Returns
+        -------
+        waypoint : LocalWaypoint
+        """
+        return LocalWaypoint(
+            carla.Transform(carla.Location(x=x, y=y, z=z),
+                            carla.Rotation(pitch=pitch, yaw=yaw, roll=roll)),
+            int(road_id), int(section_id), int(lane_id), s,
+            bool(is_junction), lane_width, carla.LaneChange(int(lane_change)),
+            self)
+
+    def from_proto(self, serialized_waypoint):
+        """
+        LocalWaypoint of a serialized ecloud.Waypoint.
+
+        Returns
+        -------
+        waypoint : LocalWaypoint
+        """
+        location = serialized_waypoint.transform.location
+        rotation = serialized_waypoint.transform.rotation
+        return self.from_point(
+            location.x, location.y, location.z, rotation.roll, rotation.pitch,
+            rotation.yaw, serialized_waypoint.road_id,
+            serialized_waypoint.section_id, serialized_waypoint.lane_id,
+            serialized_waypoint.s, serialized_waypoint.is_junction,
+            serialized_waypoint.lane_width, serialized_waypoint.lane_change)
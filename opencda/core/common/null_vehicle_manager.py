@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+CARLA-free stand-in for VehicleManager.
+
+A null vehicle drives a point mass instead of a CARLA actor: no world, no
+sensors and no map. It still runs the per-vehicle flow of vehiclesim.py -
+localization through the Kalman filter (the host's FleetKalmanFilter on a
+multi-vehicle host), a planner that heads straight for the destination and
+the configured controller, fleet controllers included - so client hosts,
+the launcher and the transports can be exercised end to end without a sim
+world. Edge scenarios need the map and are not supported.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import logging
+import time
+import uuid
+
+import carla
+import numpy as np
+
+from opencda.client_debug_helper import ClientDebugHelper
+from opencda.core.actuation.control_manager import ControlManager
+from opencda.core.common.ecloud_config import EcloudConfig, eLocationType
+from opencda.core.common.misc import compute_distance, get_speed
+from opencda.core.common.spawn_utils import proto_to_location, \
+    proto_to_transform
+from opencda.core.common.vehicle_manager_proxy import ActorProxy
+from opencda.core.plan.planer_debug_helper import PlanDebugHelper
+from opencda.core.sensing.localization.fleet_kalman_filter import \
+    FleetKalmanFilterView
+from opencda.core.sensing.localization.kalman_filter import KalmanFilter
+from opencda.core.sensing.localization.localization_debug_helper import \
+    LocDebugHelper
+
+logger = logging.getLogger(__name__)
+
+MAX_ACCELERATION = 3.0 # m/s^2 at full throttle
+MAX_DECELERATION = 8.0 # m/s^2 at full brake
+MAX_STEER_ANGLE = np.deg2rad(70.0) # front wheel angle at full steer
+WHEELBASE_M = 2.9
+LANE_WIDTH_M = 3.5 # lateral spacing of randomly placed null vehicles
+LOOKAHEAD_M = 10.0 # distance of the planner's target point
+DESTINATION_RADIUS_M = 10.0 # same as is_close_to_scenario_destination
+
+
+class NullActor(ActorProxy):
+    """
+    Kinematic bicycle in place of a CARLA actor, moved one sim step by
+    every control applied to it.
+
+    Parameters
+    ----------
+    id : int
+
+    transform : carla.Transform
+        Spawn transform.
+
+    dt : float
+        Sim step in seconds.
+
+    Attributes
+    ----------
+    yaw_rate : float
+        Yaw rate of the last step in rad/s, read like the IMU's gyroscope.
+    """
+
+    def __init__(self, id, transform, dt):
+        super(NullActor, self).__init__(id)
+        self.transform = transform
+        self.dt = dt
+        self.yaw_rate = 0.0
+
+    def apply_control(self, control):
+        speed = np.hypot(self.velocity.x, self.velocity.y)
+        speed = max(0.0, speed + (control.throttle * MAX_ACCELERATION -
+                                  control.brake * MAX_DECELERATION) * self.dt)
+        self.yaw_rate = speed * np.tan(control.steer * MAX_STEER_ANGLE) / \
+            WHEELBASE_M
+        yaw = np.deg2rad(self.transform.rotation.yaw) + self.yaw_rate * self.dt
+
+        location = self.transform.location
+        self.velocity = carla.Vector3D(x=speed * np.cos(yaw),
+                                       y=speed * np.sin(yaw), z=0)
+        self.transform = carla.Transform(
+            carla.Location(x=location.x + self.velocity.x * self.dt,
+                           y=location.y + self.velocity.y * self.dt,
+                           z=location.z),
+            carla.Rotation(yaw=np.rad2deg(yaw)))
+
+    def destroy(self):
+        pass
+
+
+class NullLocalizer(object):
+    """
+    Stand-in for LocalizationManager that measures the actor's true pose
+    and filters it like the GNSS & IMU readings.
+
+    Parameters
+    ----------
+    vehicle : NullActor
+
+    config_yaml : dict
+        The localization configuration.
+
+    fleet_filter : FleetKalmanFilter
+        The host's filter, the vehicle localizes in a slot of it.
+    """
+
+    def __init__(self, vehicle, config_yaml, fleet_filter=None):
+        self.vehicle = vehicle
+        self.activate = config_yaml['activate']
+        self.kf = fleet_filter.view() if fleet_filter is not None else \
+            KalmanFilter(config_yaml['dt'])
+        self.debug_helper = LocDebugHelper(config_yaml['debug_helper'],
+                                           vehicle.id)
+
+        self._initialized = False
+        self._measurement = None
+        self._ego_pos = vehicle.get_transform()
+        self._speed = 0
+
+    def localize_collect(self):
+        if not self.activate:
+            return
+
+        transform = self.vehicle.get_transform()
+        speed = get_speed(self.vehicle)
+        x, y = transform.location.x, transform.location.y
+        heading = np.deg2rad(transform.rotation.yaw)
+        if not self._initialized:
+            self.kf.run_step_init(x, y, heading, speed / 3.6)
+        elif isinstance(self.kf, FleetKalmanFilterView):
+            self.kf.stage(x, y, heading, speed / 3.6, self.vehicle.yaw_rate)
+        self._measurement = (transform, speed)
+
+    def localize_apply(self):
+        if not self.activate:
+            self._ego_pos = self.vehicle.get_transform()
+            self._speed = get_speed(self.vehicle)
+            return
+
+        transform, speed = self._measurement
+        x, y = transform.location.x, transform.location.y
+        heading = np.deg2rad(transform.rotation.yaw)
+        if not self._initialized:
+            x_kf, y_kf, heading_kf, speed_kf = x, y, heading, speed / 3.6
+            self._initialized = True
+        elif isinstance(self.kf, FleetKalmanFilterView):
+            # no-op if the fleet was already stepped this tick
+            if self.kf.fleet.staged[self.kf.index]:
+                self.kf.fleet.run_step([self.kf.index])
+            x_kf, y_kf, heading_kf, speed_kf = self.kf.get_estimate()
+        else:
+            x_kf, y_kf, heading_kf, speed_kf = self.kf.run_step(
+                x, y, heading, speed / 3.6, self.vehicle.yaw_rate)
+
+        self._speed = speed_kf * 3.6
+        self._ego_pos = carla.Transform(
+            carla.Location(x=x_kf, y=y_kf, z=transform.location.z),
+            carla.Rotation(yaw=np.rad2deg(heading_kf)))
+        self.debug_helper.run_step(x, y, transform.rotation.yaw, speed,
+                                   x_kf, y_kf, np.rad2deg(heading_kf),
+                                   self._speed, x, y,
+                                   transform.rotation.yaw, speed)
+
+    def get_ego_pos(self):
+        return self._ego_pos
+
+    def get_ego_spd(self):
+        return self._speed
+
+    def destroy(self):
+        if isinstance(self.kf, FleetKalmanFilterView):
+            self.kf.release()
+
+
+class NullAgent(object):
+    """
+    Stand-in for BehaviorAgent that heads straight for the destination at
+    the configured speed and stops there.
+
+    Parameters
+    ----------
+    config_yaml : dict
+        The behavior configuration.
+    """
+
+    def __init__(self, vehicle, config_yaml):
+        self.max_speed = config_yaml['max_speed']
+        self.speed_lim_dist = config_yaml['speed_lim_dist']
+        self.debug_helper = PlanDebugHelper(vehicle.id)
+        self.end_location = None
+
+        self._ego_pos = None
+        self._ego_speed = 0
+
+    def set_destination(self, start_location, end_location, clean=False,
+                        end_reset=True):
+        self.end_location = end_location
+
+    def update_information(self, ego_pos, ego_speed, objects=None):
+        self._ego_pos = ego_pos
+        self._ego_speed = ego_speed
+        self.debug_helper.update(ego_speed, 1000)
+
+    def run_step(self, target_speed=None):
+        """
+        Returns
+        -------
+        target_speed : float
+            km/h, 0 within reach of the destination.
+
+        target_pos : carla.Location
+            LOOKAHEAD_M ahead on the line to the destination.
+        """
+        if target_speed is None:
+            target_speed = self.max_speed - self.speed_lim_dist
+
+        ego_location = self._ego_pos.location
+        distance = compute_distance(self.end_location, ego_location)
+        if distance <= LOOKAHEAD_M:
+            return 0, self.end_location
+
+        ratio = LOOKAHEAD_M / distance
+        return target_speed, carla.Location(
+            x=ego_location.x + (self.end_location.x - ego_location.x) * ratio,
+            y=ego_location.y + (self.end_location.y - ego_location.y) * ratio,
+            z=ego_location.z)
+
+
+class NullVehicleManager(object):
+    """
+    VehicleManager on a NullActor, takes the arguments vehiclesim.py
+    creates a VehicleManager with.
+
+    Parameters
+    ----------
+    config_yaml : dict
+        The scenario configuration, the vehicle's entry of
+        single_cav_list configures it.
+
+    spawn : ecloud.VehicleSpawn
+        Spawn transform and destination when the sim planned them;
+        otherwise they come from the scenario, or a lane of their own with
+        a random location_type.
+
+    host_fleet : HostFleet
+        The vehicle localizes in a slot of the host's FleetKalmanFilter.
+    """
+
+    def __init__(
+            self,
+            config_yaml=None,
+            vehicle_index=None,
+            application=['single'],
+            cav_world=None,
+            carla_version='0.9.12',
+            location_type=eLocationType.EXPLICIT,
+            run_distributed=True,
+            is_edge=False,
+            spawn=None,
+            host_fleet=None):
+        assert not is_edge, "null vehicles do not support edge scenarios"
+
+        self.vid = str(uuid.uuid1())
+        self.vehicle_index = vehicle_index
+        self.scenario_params = config_yaml
+        self.run_distributed = run_distributed
+
+        cav_list = config_yaml['scenario']['single_cav_list']
+        cav_config = cav_list[vehicle_index] \
+            if location_type == eLocationType.EXPLICIT else cav_list[0]
+
+        actor_id = vehicle_index + 1
+        if spawn is not None and spawn.actor_id:
+            actor_id = spawn.actor_id
+            spawn_transform = proto_to_transform(spawn.transform)
+            self.destination_location = proto_to_location(spawn.destination)
+        elif location_type == eLocationType.EXPLICIT:
+            spawn_position = cav_config['spawn_position']
+            spawn_transform = carla.Transform(
+                carla.Location(x=spawn_position[0], y=spawn_position[1],
+                               z=spawn_position[2]),
+                carla.Rotation(pitch=spawn_position[5],
+                               yaw=spawn_position[4],
+                               roll=spawn_position[3]))
+            self.destination_location = carla.Location(
+                *cav_config['destination'])
+        else:
+            distance = EcloudConfig(config_yaml, logger)\
+                .get_min_destination_distance_m()
+            lane_y = LANE_WIDTH_M * vehicle_index
+            spawn_transform = carla.Transform(carla.Location(x=0, y=lane_y))
+            self.destination_location = carla.Location(x=distance, y=lane_y)
+        self.destination = {'x': self.destination_location.x,
+                            'y': self.destination_location.y,
+                            'z': self.destination_location.z}
+
+        self.vehicle = NullActor(actor_id, spawn_transform,
+                                 config_yaml['world']['fixed_delta_seconds'])
+        self.debug_helper = ClientDebugHelper(0)
+
+        localization_config = cav_config['sensing']['localization']
+        fleet_filter = host_fleet.get_fleet_filter(
+            localization_config['dt']) if host_fleet is not None else None
+        self.localizer = NullLocalizer(self.vehicle, localization_config,
+                                       fleet_filter)
+        self.perception_manager = None
+        self.agent = NullAgent(self.vehicle, cav_config['behavior'])
+        self.controller = ControlManager(cav_config['controller'])
+
+        self._staged_step = None
+
+        if cav_world is not None:
+            cav_world.update_vehicle_manager(self)
+
+    @classmethod
+    async def create(cls, attach_backoff=None, **kwargs):
+        """
+        Same signature as VehicleManager.create - there is no world to
+        wait for the actor in.
+        """
+        return cls(**kwargs)
+
+    def is_close_to_scenario_destination(self):
+        ego_pos = self.vehicle.get_location()
+        return abs(ego_pos.x - self.destination['x']) <= DESTINATION_RADIUS_M \
+            and abs(ego_pos.y - self.destination['y']) <= DESTINATION_RADIUS_M
+
+    def set_destination(self, start_location, end_location, clean=False,
+                        end_reset=True):
+        self.agent.set_destination(start_location, end_location, clean,
+                                   end_reset)
+
+    def localize_collect(self):
+        self.localizer.localize_collect()
+
+    def update_info(self, collected=False):
+        start_time = time.time()
+        if not collected:
+            self.localizer.localize_collect()
+        self.localizer.localize_apply()
+        self.debug_helper.update_localization_time(
+            (time.time() - start_time) * 1000)
+
+        ego_pos = self.localizer.get_ego_pos()
+        ego_spd = self.localizer.get_ego_spd()
+        self.agent.update_information(ego_pos, ego_spd)
+        self.controller.update_info(ego_pos, ego_spd)
+
+    def run_step(self, target_speed=None):
+        if not self.stage_step(target_speed):
+            return None
+
+        return self.finish_step()
+
+    def stage_step(self, target_speed=None):
+        if target_speed == -1 and self.run_distributed:
+            return False
+
+        start_time = time.time()
+        target_speed, target_pos = self.agent.run_step(target_speed)
+        end_time = time.time()
+        self.debug_helper.update_agent_step_time((end_time - start_time) * 1000)
+
+        self.controller.stage(target_speed, target_pos)
+        self._staged_step = (start_time, end_time)
+        return True
+
+    def finish_step(self, fleet_step_ms=0.0):
+        start_time, end_time = self._staged_step
+        control_start_time = time.time()
+        control = self.controller.get_control()
+        control_end_time = time.time()
+        controller_step_ms = (control_end_time - control_start_time) * 1000 \
+            + fleet_step_ms
+        self.debug_helper.update_controller_step_time(controller_step_ms)
+        self.debug_helper.update_vehicle_step_time(
+            controller_step_ms + (end_time - start_time) * 1000)
+        return control
+
+    def apply_control(self, control):
+        start_time = time.time()
+        self.vehicle.apply_control(control)
+        self.debug_helper.update_control_time((time.time() - start_time) * 1000)
+
+    def destroy(self):
+        self.localizer.destroy()
+        self.controller.destroy()
+        self.vehicle.destroy()
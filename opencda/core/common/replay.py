@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic record/replay of the per-tick inputs each component sees.
+
+While a run is recorded, every component (agent, controller, edge, comms)
+appends (tick_id, event, inputs, outputs) tuples of plain python data to
+its own event list. After the run the recording is pickled per process.
+The vehicles of a process share its recorder, so the components of a
+vehicle are recorded per vehicle, e.g. 'agent/3', each tagged with the
+tick that vehicle is working on.
+
+The ReplayHarness feeds the recorded inputs back into fresh components
+offline, diffs their outputs against the recorded ones and reports the
+per-component timing, so hot-path changes can be benchmarked locally
+without CARLA or a vehicle fleet.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import math
+import os
+import pickle
+import time
+
+import numpy as np
+
+DEFAULT_RECORDING_FOLDER = './evaluation_outputs/recordings'
+SEC_TO_MSEC = 1000
+VEHICLE_SEPARATOR = '/'
+
+
+def vehicle_component(component, vehicle_index=None):
+    """
+    Event list key of a component, of one vehicle if vehicle_index is set.
+    """
+    if vehicle_index is None:
+        return component
+    return '%s%s%d' % (component, VEHICLE_SEPARATOR, vehicle_index)
+
+
+def split_component(key):
+    """
+    Inverse of vehicle_component.
+
+    Returns
+    -------
+    component : str
+
+    vehicle_index : int
+        None for components that do not belong to a vehicle.
+    """
+    component, _, vehicle_index = key.partition(VEHICLE_SEPARATOR)
+    return component, int(vehicle_index) if vehicle_index else None
+
+
+class TickRecorder(object):
+    """
+    Per-process recorder of component inputs and outputs.
+
+    Parameters
+    ----------
+    process_name : str
+        Name of the recording process, e.g. 'sim' or 'vehicle_3'.
+
+    folder : str
+        Folder the recording is saved to.
+
+    enabled : bool
+        Whether events are recorded at all.
+
+    Attributes
+    ----------
+    tick_id : int
+        The tick currently being processed. Events recorded without an
+        explicit tick id are tagged with it.
+
+    vehicle_ticks : dict
+        vehicle_index -> the tick that vehicle is processing; tags the
+        events of the vehicle instead of tick_id.
+
+    events : dict
+        component (see vehicle_component) -> list of
+        (tick_id, event, inputs, outputs) tuples.
+    """
+
+    def __init__(self, process_name='opencda',
+                 folder=DEFAULT_RECORDING_FOLDER, enabled=False):
+        self.process_name = process_name
+        self.folder = folder
+        self.enabled = enabled
+        self.tick_id = -1
+        self.vehicle_ticks = {}
+        self.events = {}
+
+    def set_tick(self, tick_id, vehicle_index=None):
+        """
+        Tag all following events (of the vehicle) with tick_id.
+        """
+        if vehicle_index is None:
+            self.tick_id = tick_id
+        else:
+            self.vehicle_ticks[vehicle_index] = tick_id
+
+    def record(self, component, event, inputs=None, outputs=None,
+               tick_id=None, vehicle_index=None):
+        """
+        Record a single component event.
+
+        Parameters
+        ----------
+        component : str
+            Component name, e.g. 'agent' or 'edge'.
+
+        event : str
+            Event kind understood by the component's replayer.
+
+        inputs : object
+            Plain python / numpy data fed to the component.
+
+        outputs : object
+            Plain python / numpy data the component produced; None if the
+            event has no output to compare.
+
+        tick_id : int
+            Tick to attribute the event to; defaults to the current tick
+            (of the vehicle).
+
+        vehicle_index : int
+            The vehicle the component belongs to, if any.
+        """
+        if not self.enabled:
+            return
+
+        if tick_id is None:
+            tick_id = self.vehicle_ticks.get(vehicle_index, self.tick_id)
+        self.events.setdefault(vehicle_component(component, vehicle_index),
+                               []).append((tick_id, event, inputs, outputs))
+
+    def save(self, file_path=None):
+        """
+        Pickle the recording.
+
+        Parameters
+        ----------
+        file_path : str
+            Output file; defaults to <folder>/<process_name>_<time>.pkl.
+
+        Returns
+        -------
+        file_path : str
+            The file the recording was written to.
+        """
+        if file_path is None:
+            file_path = os.path.join(
+                self.folder, '%s_%s.pkl' %
+                (self.process_name, time.strftime('%Y_%m_%d_%H_%M_%S')))
+
+        folder = os.path.dirname(file_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        with open(file_path, 'wb') as f:
+            pickle.dump({'process_name': self.process_name,
+                         'events': self.events}, f)
+
+        return file_path
+
+
+_recorder = TickRecorder()
+
+
+def get_recorder():
+    """
+    Return the process wide recorder.
+    """
+    return _recorder
+
+
+def configure_recorder(process_name, enabled,
+                       folder=DEFAULT_RECORDING_FOLDER):
+    """
+    Configure the process wide recorder. Existing events are dropped.
+
+    Returns
+    -------
+    recorder : TickRecorder
+        The process wide recorder.
+    """
+    _recorder.process_name = process_name
+    _recorder.enabled = enabled
+    _recorder.folder = folder
+    _recorder.tick_id = -1
+    _recorder.vehicle_ticks = {}
+    _recorder.events = {}
+
+    return _recorder
+
+
+def load_recording(file_path):
+    """
+    Load a recording saved by TickRecorder.save.
+
+    Returns
+    -------
+    recording : dict
+        Dictionary with 'process_name' and 'events'.
+    """
+    with open(file_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def location_to_tuple(location):
+    """
+    Convert a carla.Location (or anything with x/y/z) to a tuple.
+    """
+    if location is None:
+        return None
+    return (location.x, location.y, location.z)
+
+
+def transform_to_tuple(transform):
+    """
+    Convert a carla.Transform to (x, y, z, roll, pitch, yaw).
+    """
+    if transform is None:
+        return None
+    return (transform.location.x, transform.location.y,
+            transform.location.z, transform.rotation.roll,
+            transform.rotation.pitch, transform.rotation.yaw)
+
+
+def bounding_box_to_tuple(bounding_box):
+    """
+    Convert a carla.BoundingBox to ((x, y, z), (ext_x, ext_y, ext_z)).
+    """
+    return (location_to_tuple(bounding_box.location),
+            location_to_tuple(bounding_box.extent))
+
+
+def obstacle_to_dict(obstacle):
+    """
+    Convert a carla.Vehicle or ObstacleVehicle to plain data.
+    """
+    return {'id': getattr(obstacle, 'carla_id', getattr(obstacle, 'id', -1)),
+            'location': location_to_tuple(obstacle.get_location()),
+            'transform': transform_to_tuple(obstacle.get_transform()),
+            'velocity': location_to_tuple(obstacle.get_velocity()),
+            'bounding_box': bounding_box_to_tuple(obstacle.bounding_box)}
+
+
+def control_to_tuple(control):
+    """
+    Convert a carla.VehicleControl to (throttle, steer, brake, hand_brake,
+    reverse).
+    """
+    if control is None:
+        return None
+    return (control.throttle, control.steer, control.brake,
+            control.hand_brake, control.reverse)
+
+
+def diff_outputs(expected, actual):
+    """
+    Largest absolute difference between two nested outputs.
+
+    Parameters
+    ----------
+    expected : object
+        Recorded output: nested dict / list / tuple / ndarray / scalar.
+
+    actual : object
+        Replayed output of the same structure.
+
+    Returns
+    -------
+    diff : float
+        0 for identical outputs, inf if the structure or a non-numeric
+        value differs.
+    """
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict) or expected.keys() != actual.keys():
+            return math.inf
+        return max((diff_outputs(expected[k], actual[k]) for k in expected),
+                   default=0.0)
+
+    if expected is None or actual is None:
+        return 0.0 if expected is None and actual is None else math.inf
+
+    if isinstance(expected, (str, bytes, bool)):
+        return 0.0 if expected == actual else math.inf
+
+    if isinstance(expected, (list, tuple)) and \
+            any(not np.isscalar(e) for e in expected):
+        if not isinstance(actual, (list, tuple)) or \
+                len(expected) != len(actual):
+            return math.inf
+        return max((diff_outputs(e, a) for e, a in zip(expected, actual)),
+                   default=0.0)
+
+    try:
+        expected = np.asarray(expected, dtype=float)
+        actual = np.asarray(actual, dtype=float)
+    except (TypeError, ValueError):
+        return math.inf
+
+    if expected.shape != actual.shape:
+        return math.inf
+    if expected.size == 0:
+        return 0.0
+
+    both_nan = np.isnan(expected) & np.isnan(actual)
+    diff = np.where(both_nan, 0.0, np.abs(expected - actual))
+    return float(np.nan_to_num(np.max(diff), nan=math.inf))
+
+
+class ReplayHarness(object):
+    """
+    Feed recorded events back into components and compare the results.
+
+    Parameters
+    ----------
+    recording : dict
+        A recording returned by load_recording.
+
+    atol : float
+        Largest absolute output difference still counted as a match.
+
+    Attributes
+    ----------
+    replayers : dict
+        component -> replayer. A replayer exposes
+        replay(event, tick_id, inputs) and returns the outputs to compare
+        (or None when the event has nothing to compare).
+    """
+
+    def __init__(self, recording, atol=1e-6):
+        self.recording = recording
+        self.atol = atol
+        self.replayers = {}
+
+    def add_component(self, component, replayer):
+        """
+        Register the replayer for a recorded component.
+        """
+        self.replayers[component] = replayer
+
+    def run(self):
+        """
+        Replay all registered components.
+
+        Returns
+        -------
+        report : dict
+            component -> {'events', 'compared', 'mismatches', 'max_diff',
+            'first_mismatch_tick', 'timing_ms'}; timing_ms maps each
+            event kind to its mean, 95th percentile and total time.
+        """
+        report = {}
+        for component, replayer in self.replayers.items():
+            events = self.recording['events'].get(component, [])
+            times = {}
+            compared = 0
+            mismatches = 0
+            max_diff = 0.0
+            first_mismatch_tick = None
+
+            for tick_id, event, inputs, outputs in events:
+                start_time = time.perf_counter()
+                result = replayer.replay(event, tick_id, inputs)
+                end_time = time.perf_counter()
+                times.setdefault(event, []).append(
+                    (end_time - start_time) * SEC_TO_MSEC)
+
+                if outputs is None:
+                    continue
+
+                compared += 1
+                diff = diff_outputs(outputs, result)
+                max_diff = max(max_diff, diff)
+                if diff > self.atol:
+                    mismatches += 1
+                    if first_mismatch_tick is None:
+                        first_mismatch_tick = tick_id
+
+            report[component] = {
+                'events': len(events),
+                'compared': compared,
+                'mismatches': mismatches,
+                'max_diff': max_diff,
+                'first_mismatch_tick': first_mismatch_tick,
+                'timing_ms': {event: {'mean': np.mean(t),
+                                      'p95': np.percentile(t, 95),
+                                      'total': np.sum(t)}
+                              for event, t in times.items()}}
+
+        return report
+
+
+def format_report(report):
+    """
+    Format a replay report as a human readable table.
+    """
+    lines = []
+    for component, stats in report.items():
+        lines.append('%s: %d events, %d compared, %d mismatches, '
+                     'max diff %g' % (component, stats['events'],
+                                      stats['compared'], stats['mismatches'],
+                                      stats['max_diff']))
+        if stats['first_mismatch_tick'] is not None:
+            lines.append('    first mismatch at tick %d' %
+                         stats['first_mismatch_tick'])
+        for event, timing in stats['timing_ms'].items():
+            lines.append('    %-12s mean %.3fms | p95 %.3fms | total %.1fms'
+                         % (event, timing['mean'], timing['p95'],
+                            timing['total']))
+
+    return '\n'.join(lines)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Per-process resource telemetry aligned to ticks.
+
+A ResourceCollector samples its process on a background thread at a fixed
+period: CPU utilization, resident memory, thread count, GPU memory and the
+depth of the queues the process waits on for ticks. Every sample is tagged
+with the tick the process is working on, so resource use can be lined up
+with the per-tick timings of the same run.
+
+The sim and every client host run one collector each - the process wide
+one. A host's first vehicle reports the host's samples with its debug info
+at the end of the scenario, the sim stores them with its own in the
+evaluation outputs.
+
+GPU memory is read through NVML when pynvml is installed and a GPU is
+present; otherwise it is not sampled.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import os
+import threading
+import time
+
+import psutil
+
+BYTES_TO_MB = 1.0 / (1024 * 1024)
+DEFAULT_SAMPLE_PERIOD_S = 0.5
+
+# sample tuple layout
+SAMPLE_FIELDS = ('tick_id', 'timestamp_ns', 'cpu_percent', 'rss_mb',
+                 'num_threads', 'gpu_mem_mb', 'queue_depth')
+
+
+class GpuMemoryProbe(object):
+    """
+    GPU memory used by one process, summed over the GPUs it runs on.
+
+    Attributes
+    ----------
+    available : bool
+        False without pynvml or without a GPU - sample then returns None.
+    """
+
+    def __init__(self, pid=None):
+        self.pid = os.getpid() if pid is None else pid
+        self.available = False
+        self._nvml = None
+        self._handles = []
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            self._handles = [pynvml.nvmlDeviceGetHandleByIndex(i)
+                             for i in range(pynvml.nvmlDeviceGetCount())]
+        except Exception: # no pynvml, no driver or no device
+            return
+        self._nvml = pynvml
+        self.available = len(self._handles) > 0
+
+    def sample(self):
+        """
+        Returns
+        -------
+        gpu_mem_mb : float
+            None if no GPU can be sampled.
+        """
+        if not self.available:
+            return None
+        used_bytes = 0
+        for handle in self._handles:
+            try:
+                processes = self._nvml.nvmlDeviceGetComputeRunningProcesses(handle)
+            except self._nvml.NVMLError:
+                continue
+            used_bytes += sum(p.usedGpuMemory or 0 for p in processes
+                              if p.pid == self.pid)
+        return used_bytes * BYTES_TO_MB
+
+
+class ResourceCollector(object):
+    """
+    Samples this process' resource use on a background thread.
+
+    Parameters
+    ----------
+    process_name : str
+        e.g. 'sim' or 'host_2'.
+
+    period_s : float
+        Time between samples.
+
+    enabled : bool
+        Whether start() samples at all.
+
+    Attributes
+    ----------
+    tick_id : int
+        Tick the process is working on, samples are tagged with it.
+
+    queues : dict
+        Name -> queue whose depth is sampled, e.g. the push queues the
+        ticks arrive on.
+    """
+
+    def __init__(self, process_name='opencda', period_s=DEFAULT_SAMPLE_PERIOD_S,
+                 enabled=False):
+        self.process_name = process_name
+        self.period_s = period_s
+        self.enabled = enabled
+        self.tick_id = -1
+        self.queues = {}
+
+        self._samples = []
+        self._process = psutil.Process()
+        self._gpu = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_tick(self, tick_id):
+        self.tick_id = tick_id
+
+    def add_queue(self, name, queue):
+        """
+        Sample the depth of queue, anything with a qsize().
+        """
+        self.queues[name] = queue
+
+    def sample(self):
+        """
+        Take one sample now.
+
+        Returns
+        -------
+        sample : tuple
+            Laid out as SAMPLE_FIELDS; gpu_mem_mb is None without a GPU.
+        """
+        if self._gpu is None:
+            self._gpu = GpuMemoryProbe(self._process.pid)
+        with self._process.oneshot():
+            cpu_percent = self._process.cpu_percent(None) # since the last sample
+            rss_mb = self._process.memory_info().rss * BYTES_TO_MB
+            num_threads = self._process.num_threads()
+        queue_depth = sum(q.qsize() for q in list(self.queues.values()))
+        sample = (self.tick_id, time.time_ns(), cpu_percent, rss_mb,
+                  num_threads, self._gpu.sample(), queue_depth)
+        self._samples.append(sample)
+        return sample
+
+    def _run(self):
+        while not self._stop.wait(self.period_s):
+            self.sample()
+
+    def start(self):
+        """
+        Sample every period_s until stop, if enabled.
+        """
+        if not self.enabled or self._thread is not None:
+            return
+        self._process.cpu_percent(None) # the first reading is meaningless
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='resource_collector')
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def samples(self):
+        """
+        Returns
+        -------
+        samples : list
+            Every sample so far, oldest first.
+        """
+        return list(self._samples)
+
+    def clear(self):
+        self._samples = []
+        self.tick_id = -1
+
+
+_collector = ResourceCollector()
+
+
+def get_resource_collector():
+    """
+    Return the process wide resource collector.
+    """
+    return _collector
+
+
+def configure_resource_collector(process_name, enabled,
+                                 period_s=DEFAULT_SAMPLE_PERIOD_S):
+    """
+    Configure the process wide collector. Existing samples are dropped,
+    queues added before stay sampled.
+
+    Returns
+    -------
+    collector : ResourceCollector
+        The process wide collector, not started yet.
+    """
+    _collector.stop()
+    _collector.process_name = process_name
+    _collector.enabled = enabled
+    _collector.period_s = period_s
+    _collector.clear()
+
+    return _collector
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+CAV spawn helpers shared by the sim, which spawns the distributed fleet
+(see scenario_testing.utils.spawn_api), and the vehicles, which attach to
+their actor or spawn it themselves.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import carla
+
+COLLISION_ERROR = "Spawn failed because of collision at spawn position"
+
+
+def cav_blueprint(world, carla_version):
+    """
+    Blueprint of the CAV model, lincoln by default.
+    """
+    default_model = 'vehicle.lincoln.mkz2017' \
+        if carla_version == '0.9.11' else 'vehicle.lincoln.mkz_2017'
+    blueprint = world.get_blueprint_library().find(default_model)
+    blueprint.set_attribute('color', '0, 0, 255')
+    return blueprint
+
+
+def transform_to_proto(transform, proto):
+    proto.location.x = transform.location.x
+    proto.location.y = transform.location.y
+    proto.location.z = transform.location.z
+    proto.rotation.yaw = transform.rotation.yaw
+    proto.rotation.pitch = transform.rotation.pitch
+    proto.rotation.roll = transform.rotation.roll
+
+
+def proto_to_transform(proto):
+    return carla.Transform(
+        carla.Location(x=proto.location.x, y=proto.location.y,
+                       z=proto.location.z),
+        carla.Rotation(yaw=proto.rotation.yaw, pitch=proto.rotation.pitch,
+                       roll=proto.rotation.roll))
+
+
+def proto_to_location(proto):
+    return carla.Location(x=proto.x, y=proto.y, z=proto.z)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Tick barrier with per-tick deadlines and straggler eviction.
+
+The ecloud server completes a tick once every vehicle replied. Without a
+deadline, one crashed or hung vehicle blocks the whole simulation forever.
+TickBarrier gives every tick a deadline: each deadline that passes while a
+vehicle has not replied counts as a missed deadline, and a vehicle that
+misses max_missed consecutive deadlines is evicted - it is no longer pushed
+ticks and no longer counted by the barrier, so the rest of the fleet keeps
+running. A reply in time resets the count. The evicted vehicle may only be
+slow, it is pushed EVICTED and leaves the scenario.
+
+In the asynchronous tick mode the world does not wait for the fleet: the
+sim ticks at a fixed rate and vehicles act on the latest tick they see,
+skipping the ones that arrived while they were busy. StalenessBarrier only
+holds the sim back once a vehicle's last reply is more than staleness_bound
+ticks old.
+
+The ecloud server (ecloud_server.cc) implements the same barriers, this is
+the reference it follows and that the tests run against.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import ecloud_pb2 as ecloud
+
+NSEC_TO_MSEC = 1e-6
+MSEC_TO_NSEC = 1000000
+
+
+def sim_tick_timeout_s(deadline_ms, max_missed, slack_s=5.0):
+    """
+    How long the sim waits for a tick barrier before giving up on the
+    ecloud server: a hung vehicle is evicted after max_missed deadlines.
+
+    Returns
+    -------
+    timeout_s : float
+        None to wait forever when the barrier has no deadline.
+    """
+    if not deadline_ms:
+        return None
+    return deadline_ms * max_missed / 1000 + slack_s
+
+
+class TickBarrier(object):
+    """
+    Barrier of one fleet's ticks.
+
+    Parameters
+    ----------
+    num_vehicles : int
+
+    deadline_ms : float
+        Per-tick deadline, 0 to wait forever.
+
+    max_missed : int
+        Consecutive missed deadlines after which a vehicle is evicted.
+
+    Attributes
+    ----------
+    evicted : dict
+        Tick id at which every evicted vehicle was evicted.
+
+    late_replies : dict
+        Per vehicle, the reply times in ms of the replies that came after
+        the deadline.
+
+    reply_ms : dict
+        Per vehicle, the reply times in ms of every tick.
+    """
+
+    def __init__(self, num_vehicles, deadline_ms=0, max_missed=3):
+        self.num_vehicles = num_vehicles
+        self.deadline_ns = int(deadline_ms * MSEC_TO_NSEC)
+        self.max_missed = max_missed
+
+        self.tick_id = None
+        self.tick_start_ns = 0
+        self.deadlines_passed = 0
+        self.replied = set()
+        self.done = set() # vehicles that reported TICK_DONE no longer reply
+        self.missed = {i: 0 for i in range(num_vehicles)}
+        self.evicted = {}
+        self.new_evictions = []
+        self.late_replies = {i: [] for i in range(num_vehicles)}
+        self.reply_ms = {i: [] for i in range(num_vehicles)}
+        self.complete = False
+
+    def active(self):
+        """
+        Vehicles the tick is pushed to.
+        """
+        return [i for i in range(self.num_vehicles)
+                if i not in self.evicted and i not in self.done]
+
+    def start_tick(self, tick_id, now_ns):
+        """
+        Start a tick.
+
+        Returns
+        -------
+        active : list
+            Vehicles to push the tick to.
+        """
+        self.tick_id = tick_id
+        self.tick_start_ns = now_ns
+        self.deadlines_passed = 0
+        self.replied = set()
+        self.complete = False
+        return self.active()
+
+    def next_deadline_ns(self):
+        """
+        When check_deadline has to run next, None without a deadline.
+        """
+        if self.deadline_ns == 0:
+            return None
+        return self.tick_start_ns + (self.deadlines_passed + 1) * \
+            self.deadline_ns
+
+    def reply(self, vehicle_index, now_ns, done=False):
+        """
+        A vehicle's update for the current tick.
+
+        Returns
+        -------
+        complete : bool
+            Whether this reply completed the tick.
+        """
+        if vehicle_index in self.evicted or vehicle_index in self.replied:
+            return False # too late, or a duplicate
+
+        reply_ms = (now_ns - self.tick_start_ns) * NSEC_TO_MSEC
+        self.reply_ms[vehicle_index].append(reply_ms)
+        if self.deadlines_passed > 0:
+            self.late_replies[vehicle_index].append(reply_ms)
+        else:
+            self.missed[vehicle_index] = 0
+
+        self.replied.add(vehicle_index)
+        if done:
+            self.done.add(vehicle_index)
+        return self._check_complete()
+
+    def check_deadline(self, now_ns):
+        """
+        Count a missed deadline for every vehicle that has not replied yet
+        and evict the ones that missed max_missed in a row.
+
+        Returns
+        -------
+        complete : bool
+            Whether evictions completed the tick.
+        """
+        deadline = self.next_deadline_ns()
+        if self.complete or deadline is None or now_ns < deadline:
+            return False
+
+        self.deadlines_passed += 1
+        for vehicle_index in self.active():
+            if vehicle_index in self.replied:
+                continue
+            self.missed[vehicle_index] += 1
+            if self.missed[vehicle_index] >= self.max_missed:
+                self.evicted[vehicle_index] = self.tick_id
+                self.new_evictions.append(vehicle_index)
+        return self._check_complete()
+
+    def pop_evictions(self):
+        """
+        Vehicles evicted since the last call.
+        """
+        evictions, self.new_evictions = self.new_evictions, []
+        return evictions
+
+    def _check_complete(self):
+        if self.complete:
+            return False
+        if all(i in self.replied for i in self.active()):
+            self.complete = True
+            return True
+        return False
+
+
+class StalenessBarrier(object):
+    """
+    Barrier of the asynchronous tick mode.
+
+    Parameters
+    ----------
+    num_vehicles : int
+
+    staleness_bound : int
+        Ticks a vehicle's last reply may lag behind the current tick.
+
+    Attributes
+    ----------
+    last_reply : dict
+        Per vehicle, the tick of its last reply.
+
+    evicted : set
+        Vehicles the tick deadlines evicted, they no longer hold the sim
+        back.
+
+    forced : int
+        Ticks the sim had to wait for a vehicle.
+    """
+
+    def __init__(self, num_vehicles, staleness_bound):
+        self.num_vehicles = num_vehicles
+        self.staleness_bound = staleness_bound
+        self.tick_id = 0
+        self.last_reply = {i: 0 for i in range(num_vehicles)}
+        self.done = set()
+        self.evicted = set()
+        self.waiting = False
+        self.forced = 0
+
+    def staleness(self):
+        """
+        Ticks every active vehicle's last reply lags behind.
+        """
+        return {i: self.tick_id - tick_id
+                for i, tick_id in self.last_reply.items()
+                if i not in self.done and i not in self.evicted}
+
+    def within_bound(self):
+        return all(staleness <= self.staleness_bound
+                   for staleness in self.staleness().values())
+
+    def start_tick(self, tick_id):
+        """
+        Start a tick.
+
+        Returns
+        -------
+        complete : bool
+            Whether the sim can go on right away, otherwise it waits until
+            a reply brings the fleet back within the bound.
+        """
+        self.tick_id = tick_id
+        self.waiting = not self.within_bound()
+        if self.waiting:
+            self.forced += 1
+        return not self.waiting
+
+    def reply(self, vehicle_index, tick_id, done=False):
+        """
+        A vehicle's update for the tick it last acted on.
+
+        Returns
+        -------
+        complete : bool
+            Whether this reply released a waiting sim.
+        """
+        self.last_reply[vehicle_index] = max(self.last_reply[vehicle_index],
+                                             tick_id)
+        if done:
+            self.done.add(vehicle_index)
+        return self._release()
+
+    def evict(self, vehicle_index):
+        """
+        A vehicle the tick deadlines evicted.
+
+        Returns
+        -------
+        complete : bool
+            Whether the eviction released a waiting sim.
+        """
+        self.evicted.add(vehicle_index)
+        return self._release()
+
+    def _release(self):
+        if self.waiting and self.within_bound():
+            self.waiting = False
+            return True
+        return False
+
+
+def latest_tick(ticks):
+    """
+    The tick a vehicle acts on when several arrived while it was busy: END,
+    evictions and debug requests are never skipped, otherwise the newest
+    tick wins -
+    pulling the edge waypoints if any of the skipped ticks asked to.
+
+    Parameters
+    ----------
+    ticks : list
+        ecloud.Tick in arrival order.
+
+    Returns
+    -------
+    tick : ecloud.Tick
+
+    skipped : int
+        Ticks dropped.
+    """
+    for command in (ecloud.Command.END, ecloud.Command.EVICTED,
+                    ecloud.Command.REQUEST_DEBUG_INFO):
+        for tick in ticks:
+            if tick.command == command:
+                return tick, len(ticks) - 1
+
+    tick = ticks[-1]
+    if any(t.command == ecloud.Command.PULL_WAYPOINTS_AND_TICK
+           for t in ticks):
+        tick = ecloud.Tick()
+        tick.CopyFrom(ticks[-1])
+        tick.command = ecloud.Command.PULL_WAYPOINTS_AND_TICK
+    return tick, len(ticks) - 1
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Low-overhead span tracing for the eCloud tick pipeline.
+
+Every process (sim, vehicle clients, edge) owns a single Tracer that
+records (name, tick_id, start, duration, thread) spans into a fixed size
+ring buffer. Nothing is formatted or written while the simulation runs;
+the buffers are merged into a single Chrome-trace / Perfetto JSON file
+after the run so a tick can be followed across processes by its tick_id.
+
+When tracing is disabled, span() returns a shared no-op context manager,
+so instrumented code only pays for an attribute lookup and a call.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_TRACE_BUFFER_SIZE = 65536
+DEFAULT_TRACE_REPORT_SIZE = 16384 # spans a client sends back in its debug reply, ~1MB
+NSEC_TO_USEC = 1 / 1000
+
+
+class _NullSpan(object):
+    """
+    Context manager returned when tracing is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    """
+    Context manager recording a single span into its tracer on exit.
+    """
+    __slots__ = ('_tracer', '_name', '_tick_id', '_start_ns')
+
+    def __init__(self, tracer, name, tick_id):
+        self._tracer = tracer
+        self._name = name
+        self._tick_id = tick_id
+        self._start_ns = 0
+
+    def __enter__(self):
+        self._start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        start_ns = self._start_ns
+        self._tracer.record(self._name, start_ns, time.time_ns() - start_ns,
+                            self._tick_id)
+        return False
+
+
+class Tracer(object):
+    """
+    Per-process span recorder backed by a fixed size ring buffer.
+
+    Parameters
+    ----------
+    process_name : str
+        Name of the process lane in the merged trace, e.g. 'sim' or
+        'vehicle_3'.
+
+    capacity : int
+        Maximum number of spans kept; the oldest spans are overwritten.
+
+    enabled : bool
+        Whether spans are recorded at all.
+
+    Attributes
+    ----------
+    tick_id : int
+        The tick currently being processed. Spans opened without an
+        explicit tick id are tagged with it.
+
+    dropped : int
+        Number of spans overwritten because the buffer wrapped.
+    """
+
+    def __init__(self, process_name='opencda',
+                 capacity=DEFAULT_TRACE_BUFFER_SIZE, enabled=False):
+        assert capacity > 0
+        self.process_name = process_name
+        self.capacity = capacity
+        self.enabled = enabled
+        self.tick_id = -1
+        self.dropped = 0
+
+        self._buffer = [None] * capacity
+        self._head = 0
+        self._count = 0
+
+    def set_tick(self, tick_id):
+        """
+        Tag all following spans with tick_id.
+
+        Parameters
+        ----------
+        tick_id : int
+            Tick id received from the ecloud server.
+        """
+        self.tick_id = tick_id
+
+    def span(self, name, tick_id=None):
+        """
+        Create a context manager timing the enclosed block.
+
+        Parameters
+        ----------
+        name : str
+            Span name, dotted by component, e.g. 'client.update_info'.
+
+        tick_id : int
+            Tick to attribute the span to; defaults to the current tick.
+
+        Returns
+        -------
+        span : context manager
+            A recording span, or NULL_SPAN when tracing is disabled.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+
+        return _Span(self, name, self.tick_id if tick_id is None else tick_id)
+
+    def record(self, name, start_ns, duration_ns, tick_id=None,
+               thread_id=None):
+        """
+        Record a span whose timing was measured elsewhere.
+
+        Parameters
+        ----------
+        name : str
+            Span name.
+
+        start_ns : int
+            Wall clock start time in nanoseconds (time.time_ns()).
+
+        duration_ns : int
+            Span duration in nanoseconds.
+
+        tick_id : int
+            Tick to attribute the span to; defaults to the current tick.
+
+        thread_id : int
+            Thread lane of the span; defaults to the calling thread.
+        """
+        if not self.enabled:
+            return
+
+        if self._count == self.capacity:
+            self.dropped += 1
+        else:
+            self._count += 1
+
+        self._buffer[self._head] = (
+            name,
+            self.tick_id if tick_id is None else tick_id,
+            start_ns,
+            duration_ns,
+            threading.get_ident() if thread_id is None else thread_id)
+        self._head = (self._head + 1) % self.capacity
+
+    def spans(self, limit=None):
+        """
+        Return the recorded spans, oldest first.
+
+        Parameters
+        ----------
+        limit : int
+            Only return the newest limit spans; None returns all.
+
+        Returns
+        -------
+        spans : list
+            List of (name, tick_id, start_ns, duration_ns, thread_id) tuples.
+        """
+        if self._count < self.capacity:
+            spans = self._buffer[:self._count]
+        else:
+            spans = self._buffer[self._head:] + self._buffer[:self._head]
+
+        if limit is not None and len(spans) > limit:
+            return spans[len(spans) - limit:]
+        return spans
+
+    def clear(self):
+        """
+        Drop all recorded spans.
+        """
+        self._buffer = [None] * self.capacity
+        self._head = 0
+        self._count = 0
+        self.dropped = 0
+
+    def to_trace_events(self, pid=None):
+        """
+        Convert the recorded spans to Chrome trace events.
+
+        Parameters
+        ----------
+        pid : int
+            Process id used in the trace; defaults to os.getpid().
+
+        Returns
+        -------
+        events : list
+            Trace event dictionaries.
+        """
+        return spans_to_trace_events(self.spans(), self.process_name,
+                                     os.getpid() if pid is None else pid)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """
+    Return the process wide tracer.
+    """
+    return _tracer
+
+
+def configure_tracer(process_name, enabled,
+                     capacity=DEFAULT_TRACE_BUFFER_SIZE):
+    """
+    Configure the process wide tracer. Existing spans are dropped.
+
+    Parameters
+    ----------
+    process_name : str
+        Name of the process lane in the merged trace.
+
+    enabled : bool
+        Whether spans are recorded.
+
+    capacity : int
+        Ring buffer size in spans.
+
+    Returns
+    -------
+    tracer : Tracer
+        The process wide tracer.
+    """
+    _tracer.process_name = process_name
+    _tracer.enabled = enabled
+    _tracer.capacity = capacity
+    _tracer.clear()
+
+    return _tracer
+
+
+def spans_to_trace_events(spans, process_name, pid):
+    """
+    Convert span tuples to Chrome trace 'complete' events.
+
+    Parameters
+    ----------
+    spans : list
+        List of (name, tick_id, start_ns, duration_ns, thread_id) tuples.
+
+    process_name : str
+        Name shown for the process lane.
+
+    pid : int
+        Process id used in the trace.
+
+    Returns
+    -------
+    events : list
+        Trace event dictionaries, starting with the process name metadata.
+    """
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+               "args": {"name": process_name}}]
+
+    for name, tick_id, start_ns, duration_ns, thread_id in spans:
+        events.append({"name": name,
+                       "cat": name.split('.', 1)[0],
+                       "ph": "X",
+                       "ts": start_ns * NSEC_TO_USEC,
+                       "dur": duration_ns * NSEC_TO_USEC,
+                       "pid": pid,
+                       "tid": thread_id,
+                       "args": {"tick_id": tick_id}})
+
+    return events
+
+
+def merge_traces(span_sets, file_path=None):
+    """
+    Merge spans from several processes into a single Chrome trace.
+
+    Parameters
+    ----------
+    span_sets : dict
+        process_name -> list of span tuples. Each process gets its own
+        lane; pids are assigned in order since the processes may live on
+        different machines.
+
+    file_path : str
+        If given, the trace is written there as JSON.
+
+    Returns
+    -------
+    trace : dict
+        The Chrome trace, loadable in chrome://tracing or ui.perfetto.dev.
+    """
+    events = []
+    for pid, (process_name, spans) in enumerate(span_sets.items()):
+        events.extend(spans_to_trace_events(spans, process_name, pid + 1))
+
+    trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    if file_path is not None:
+        folder = os.path.dirname(file_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(file_path, 'w') as f:
+            json.dump(trace, f)
+
+    return trace
@@ -32,7 +32,14 @@ from opencda.core.common.data_dumper import DataDumper
 from opencda.core.common.misc import compute_distance
 from opencda.scenario_testing.utils.yaml_utils import load_yaml
 from opencda.client_debug_helper import ClientDebugHelper
-from opencda.core.common.ecloud_config import eLocationType
+from opencda.core.common.ecloud_config import EcloudConfig, eLocationType
+from opencda.core.common.tracing import get_tracer
+from opencda.core.common.wait_points import CLIENT_ATTACH, wait_until
+from opencda.core.common.replay import get_recorder, location_to_tuple, \
+    transform_to_tuple, bounding_box_to_tuple, obstacle_to_dict, \
+    control_to_tuple
+from opencda.core.common.spawn_utils import COLLISION_ERROR, \
+    cav_blueprint, proto_to_transform, proto_to_location
 
 import coloredlogs, logging
 logger = logging.getLogger(__name__)
@@ -40,8 +47,19 @@ coloredlogs.install(level='DEBUG', logger=logger)
 
 cloud_config = load_yaml("cloud_config.yaml")
 CARLA_IP = cloud_config["carla_server_public_ip"]
-MIN_DESTINATION_DISTANCE_M = 500 # TODO: config?
-COLLISION_ERROR = "Spawn failed because of collision at spawn position"
+tracer = get_tracer()
+ATTACH_TIMEOUT_S = 10.0 # how long a vehicle looks for the actor the sim spawned
+recorder = get_recorder()
+
+
+def carla_client(scenario_params):
+    """
+    Client of the scenario's CARLA server.
+    """
+    client = carla.Client(CARLA_IP, scenario_params['world']['client_port'])
+    client.set_timeout(10.0)
+    return client
+
 
 class VehicleManager(object):
     """
@@ -70,6 +88,18 @@ class VehicleManager(object):
     data_dumping : bool
         Indicates whether to dump sensor data during simulation.
 
+    spawn : ecloud.VehicleSpawn
+        Actor, spawn transform and destination when the sim spawned the
+        vehicle, see spawn_api.CavSpawnPlanner. Distributed only.
+
+    client : carla.Client
+        Client to reuse, e.g. the one create waited for the actor with.
+        Distributed only.
+
+    host_fleet : opencda object
+        HostFleet shared by the vehicles of a multi-vehicle host; the
+        vehicle then localizes in a slot of the host's FleetKalmanFilter.
+
     Attributes
     ----------
     v2x_manager : opencda object
@@ -107,7 +137,10 @@ class VehicleManager(object):
             location_type=eLocationType.EXPLICIT,
             run_distributed=False,
             map_helper=None,
-            is_edge=False):
+            is_edge=False,
+            spawn=None,
+            client=None,
+            host_fleet=None):
 
         # an unique uuid for this vehicle
         self.vid = str(uuid.uuid1())
@@ -146,7 +179,7 @@ class VehicleManager(object):
 
         else: # run_distributed == True
 
-            self.initialize_process() # get world & map info
+            self.initialize_process(client) # get world & map info
             self.carla_version = carla_version
 
             # if the spawn position is a single scalar, we need to use map
@@ -163,6 +196,10 @@ class VehicleManager(object):
                 assert(False, "no known vehicle indexing format found")
             
         spawned = False
+        if spawn is not None and spawn.actor_id:
+            self.attach_vehicle(spawn)
+            spawned = True
+
         while not spawned:
             try:
                 if 'spawn_special' in cav_config:
@@ -203,18 +240,14 @@ class VehicleManager(object):
                             z=self.spawn_transform.location.z)
                 
                 # By default, we use lincoln as our cav model.
-                default_model = 'vehicle.lincoln.mkz2017' \
-                    if self.carla_version == '0.9.11' else 'vehicle.lincoln.mkz_2017'
-
-                cav_vehicle_bp = self.world.get_blueprint_library().find(default_model)
-                cav_vehicle_bp.set_attribute('color', '0, 0, 255')
+                cav_vehicle_bp = cav_blueprint(self.world, self.carla_version)
                 self.vehicle = self.world.spawn_actor(cav_vehicle_bp, self.spawn_transform)
 
                 logger.debug(f"spawned @ {self.spawn_transform}")
 
                 if location_type == eLocationType.RANDOM:
                     dist = 0
-                    min_dist = MIN_DESTINATION_DISTANCE_M
+                    min_dist = EcloudConfig(self.scenario_params, logger).get_min_destination_distance_m()
                     count = 0
                     while dist < min_dist: 
                         destination_transform = spawn_points[random.randint(0, len(spawn_points) - 1)]
@@ -260,8 +293,12 @@ class VehicleManager(object):
         # v2x module
         self.v2x_manager = V2XManager(cav_world, v2x_config, self.vid)
         # localization module
+        fleet_filter = host_fleet.get_fleet_filter(
+            sensing_config['localization']['dt']) \
+            if host_fleet is not None else None
         self.localizer = LocalizationManager(
-            self.vehicle, sensing_config['localization'], self.carla_map)
+            self.vehicle, sensing_config['localization'], self.carla_map,
+            fleet_filter)
         # perception module
         self.perception_manager = PerceptionManager(
             self.vehicle, sensing_config['perception'], cav_world,
@@ -284,6 +321,16 @@ class VehicleManager(object):
         # Control module
         self.controller = ControlManager(control_config)
 
+        if recorder.enabled:
+            recorder.record("agent", "setup", inputs={
+                "vehicle_id": self.vehicle.id,
+                "bounding_box": bounding_box_to_tuple(self.vehicle.bounding_box),
+                "config": behavior_config,
+                "is_dist": self.run_distributed,
+                "map_name": self.carla_map.name,
+                "opendrive": self.carla_map.to_opendrive()}, vehicle_index=self.vehicle_index)
+            recorder.record("controller", "setup", inputs={"config": control_config}, vehicle_index=self.vehicle_index)
+
         if data_dumping:
             self.data_dumper = DataDumper(self.perception_manager,
                                           self.vehicle.id,
@@ -293,6 +340,59 @@ class VehicleManager(object):
 
         cav_world.update_vehicle_manager(self)
 
+    @classmethod
+    async def create(cls, spawn=None, attach_backoff=None, **kwargs):
+        """
+        Build a distributed vehicle's manager on the host's event loop.
+
+        The actor the sim spawned can take a moment to show up in our
+        world. Polling for it awaits the backoff, so the host's other
+        vehicles keep running, and the manager is built once the actor is
+        visible.
+
+        Parameters
+        ----------
+        spawn : ecloud.VehicleSpawn
+
+        attach_backoff : AdaptiveBackoff
+            Polls for the actor until ATTACH_TIMEOUT_S. None looks once.
+
+        kwargs : dict
+            Passed on to the constructor.
+        """
+        client = None
+        attach_wait_ms = None
+        if spawn is not None and spawn.actor_id and attach_backoff is not None:
+            client = carla_client(kwargs['config_yaml'])
+            world = client.get_world()
+            attach_start_time = time.time()
+            await wait_until(lambda: world.get_actor(spawn.actor_id), attach_backoff, ATTACH_TIMEOUT_S)
+            attach_wait_ms = (time.time() - attach_start_time) * 1000
+
+        vehicle_manager = cls(spawn=spawn, client=client, **kwargs)
+        if attach_wait_ms is not None:
+            vehicle_manager.debug_helper.wait_time_list.append((CLIENT_ATTACH, 0, attach_wait_ms))
+        return vehicle_manager
+
+    def attach_vehicle(self, spawn):
+        """
+        Attach to the actor the sim spawned for this vehicle.
+
+        Parameters
+        ----------
+        spawn : ecloud.VehicleSpawn
+        """
+        self.vehicle = self.world.get_actor(spawn.actor_id)
+        if self.vehicle is None:
+            raise RuntimeError(f"vehicle {self.vehicle_index}: actor {spawn.actor_id} not found")
+
+        self.spawn_transform = proto_to_transform(spawn.transform)
+        self.destination_location = proto_to_location(spawn.destination)
+        self.destination = {'x': self.destination_location.x,
+                            'y': self.destination_location.y,
+                            'z': self.destination_location.z}
+        logger.debug(f"attached to actor {spawn.actor_id} @ {self.spawn_transform}, destination {self.destination}")
+
     def is_close_to_scenario_destination(self):
         """
         Check if the current ego vehicle's position is close to destination
@@ -308,12 +408,9 @@ class VehicleManager(object):
             abs(ego_pos.y - self.destination['y']) <= 10
         return flag
 
-    def initialize_process(self):
-        simulation_config = self.scenario_params['world']
-
-        self.client = \
-            carla.Client(CARLA_IP, simulation_config['client_port'])
-        self.client.set_timeout(10.0)
+    def initialize_process(self, client=None):
+        self.client = client if client is not None \
+            else carla_client(self.scenario_params)
         self.world = self.client.get_world()
         self.carla_map = self.world.get_map()
 
@@ -344,17 +441,40 @@ class VehicleManager(object):
         -------
         """
 
+        if recorder.enabled:
+            recorder.record("agent", "destination", inputs={
+                "start": location_to_tuple(start_location),
+                "end": location_to_tuple(end_location),
+                "clean": clean,
+                "end_reset": end_reset}, vehicle_index=self.vehicle_index)
+
         self.agent.set_destination(
             start_location, end_location, clean, end_reset)
 
-    def update_info(self):
+    def localize_collect(self):
+        """
+        Read the localization sensors of this tick. With a host fleet the
+        whole host is then corrected in one batched filter step before
+        update_info(collected=True).
+        """
+        self.localizer.localize_collect()
+
+    def update_info(self, collected=False):
         """
         Call perception and localization module to
         retrieve surrounding info an ego position.
+
+        Parameters
+        ----------
+        collected : bool
+            The sensors of this tick were already read by localize_collect.
         """
         # localization
         start_time = time.time()
-        self.localizer.localize()
+        with tracer.span("client.localize"):
+            if not collected:
+                self.localizer.localize_collect()
+            self.localizer.localize_apply()
 
         ego_pos = self.localizer.get_ego_pos()
         ego_spd = self.localizer.get_ego_spd()
@@ -364,7 +484,8 @@ class VehicleManager(object):
 
         # object detection
         start_time = time.time()
-        objects = self.perception_manager.detect(ego_pos)
+        with tracer.span("client.perception"):
+            objects = self.perception_manager.detect(ego_pos)
         end_time = time.time()
         logging.debug("Perception time: %s" %(end_time - start_time))
         self.debug_helper.update_perception_time((end_time-start_time)*1000)
@@ -377,11 +498,22 @@ class VehicleManager(object):
         logging.debug("v2x manager update info time: %s" %(end_time - start_time)) 
 
         start_time = time.time()
-        self.agent.update_information(ego_pos, ego_spd, objects)
+        with tracer.span("client.agent_update_info"):
+            self.agent.update_information(ego_pos, ego_spd, objects)
         end_time = time.time()
         logging.debug("Agent Update info time: %s" %(end_time - start_time))
         self.debug_helper.update_agent_update_info_time((end_time-start_time)*1000)
 
+        if recorder.enabled:
+            recorder.record("agent", "update", inputs={
+                "ego_pos": transform_to_tuple(ego_pos),
+                "ego_spd": ego_spd,
+                "obstacles": [obstacle_to_dict(o) for o in objects['vehicles']],
+                "light_state": self.agent.light_state}, vehicle_index=self.vehicle_index)
+            recorder.record("controller", "update", inputs={
+                "ego_pos": transform_to_tuple(ego_pos),
+                "ego_spd": ego_spd}, vehicle_index=self.vehicle_index)
+
         # pass position and speed info to controller
         start_time = time.time()
         self.controller.update_info(ego_pos, ego_spd)
@@ -393,15 +525,33 @@ class VehicleManager(object):
         """
         Execute one step of navigation.
         """
+        if not self.stage_step(target_speed):
+            return None # -1 indicates the simulation is over. TODO Need a const here.
+
+        return self.finish_step()
+
+    def stage_step(self, target_speed=None):
+        """
+        Plan the step and stage its target with the controller. With a
+        fleet controller the whole host is then stepped at once before
+        finish_step.
+
+        Returns
+        -------
+        staged : bool
+            False if the simulation is over and there is nothing to step.
+        """
 
         # eCLOUD - must check FIRST to ensure sim doesn't try to progress a DONE vehicle
         if target_speed == -1 and self.run_distributed:
             logger.info("run_step: simulation is over")
-            return None # -1 indicates the simulation is over. TODO Need a const here.
+            return False
 
+        requested_speed = target_speed
         pre_vehicle_step_time = time.time()
         try:
-            target_speed, target_pos = self.agent.run_step(target_speed)
+            with tracer.span("client.agent_step"):
+                target_speed, target_pos = self.agent.run_step(target_speed)
         except Exception as e:
             logger.error(f"can't successfully _trace_route; setting to done.")
             target_speed = 0
@@ -409,14 +559,49 @@ class VehicleManager(object):
             target_pos = ego_pos.location    
         end_time = time.time()
         logging.debug("Agent step time: %s" %(end_time - pre_vehicle_step_time))
+        self.debug_helper.update_agent_step_time((end_time - pre_vehicle_step_time)*1000)
+
+        self.controller.stage(target_speed, target_pos)
+        self._staged_step = (requested_speed, target_speed, target_pos, pre_vehicle_step_time, end_time)
+        return True
+
+    def finish_step(self, fleet_step_ms=0.0):
+        """
+        Retrieve the control command of the staged step.
 
-        control = self.controller.run_step(target_speed, target_pos)
+        Parameters
+        ----------
+        fleet_step_ms : float
+            This vehicle's share of the host's batched controller step,
+            which ran before finish_step - see FleetBarrier.share_ms.
+
+        Returns
+        -------
+        control : carla.VehicleControl
+        """
+        requested_speed, target_speed, target_pos, pre_vehicle_step_time, end_time = self._staged_step
+        control_start_time = time.time()
+        with tracer.span("client.controller_step"):
+            control = self.controller.get_control()
         post_vehicle_step_time = time.time()
-        logging.debug("Controller step time: %s" %(post_vehicle_step_time - end_time))
+        logging.debug("Controller step time: %s" %(post_vehicle_step_time - control_start_time))
         logging.debug("Vehicle step time: %s" %(post_vehicle_step_time - pre_vehicle_step_time))
-        self.debug_helper.update_controller_step_time((post_vehicle_step_time - end_time)*1000)
-        self.debug_helper.update_vehicle_step_time((post_vehicle_step_time - pre_vehicle_step_time)*1000)
-        self.debug_helper.update_agent_step_time((end_time - pre_vehicle_step_time)*1000)        
+        # a host stepping its fleet controller at once: the wait for the other vehicles is not ours, our share of the step is
+        controller_step_ms = (post_vehicle_step_time - control_start_time)*1000 + fleet_step_ms
+        self.debug_helper.update_controller_step_time(controller_step_ms)
+        self.debug_helper.update_vehicle_step_time(controller_step_ms + (end_time - pre_vehicle_step_time)*1000)
+
+        if recorder.enabled:
+            recorder.record("agent", "step",
+                            inputs={"target_speed": requested_speed},
+                            outputs={"target_speed": target_speed,
+                                     "target_pos": location_to_tuple(target_pos)},
+                            vehicle_index=self.vehicle_index)
+            recorder.record("controller", "step",
+                            inputs={"target_speed": target_speed,
+                                    "target_pos": location_to_tuple(target_pos)},
+                            outputs=control_to_tuple(control),
+                            vehicle_index=self.vehicle_index)
  
         # dump data
         if self.data_dumper:
@@ -441,4 +626,5 @@ class VehicleManager(object):
         """
         self.perception_manager.destroy()
         self.localizer.destroy()
+        self.controller.destroy()
         self.vehicle.destroy()
@@ -15,19 +15,11 @@ import psutil
 import carla
 import numpy as np
 
-from opencda.core.actuation.control_manager \
-    import ControlManager
-from opencda.core.application.platooning.platoon_behavior_agent\
-    import PlatooningBehaviorAgent
 from opencda.core.common.v2x_manager \
     import V2XManager
-from opencda.core.sensing.localization.localization_manager \
-    import LocalizationManager
-from opencda.core.sensing.perception.perception_manager \
-    import PerceptionManager
-from opencda.core.plan.behavior_agent \
-    import BehaviorAgent
-from opencda.core.common.data_dumper import DataDumper
+from opencda.core.plan.planer_debug_helper import PlanDebugHelper
+from opencda.core.sensing.localization.localization_debug_helper \
+    import LocDebugHelper
 from opencda.scenario_testing.utils.yaml_utils import load_yaml
 from opencda.client_debug_helper import ClientDebugHelper
 from opencda.core.common.ecloud_config import eLocationType
@@ -39,6 +31,27 @@ RESULT_END = 2 # Step resulted in the vehicle simulation ending
 cloud_config = load_yaml("cloud_config.yaml")
 CARLA_IP = cloud_config["carla_server_public_ip"]
 
+# applications whose sim side managers drive the proxy's planning stack,
+# e.g. PlatooningManager calls into the members' agents
+FULL_STACK_APPLICATIONS = ['platooning']
+
+
+def requires_full_stack(application):
+    """
+    Whether the proxies of an application need the full localization,
+    perception, planning and control stack on the sim side.
+
+    Parameters
+    ----------
+    application : list
+        The application purpose, a list, eg. ['single'], ['platoon'].
+
+    Returns
+    -------
+    full_stack : bool
+    """
+    return any(app in application for app in FULL_STACK_APPLICATIONS)
+
 # once we have all methods, we no longer need any reference to the actual actor in ecloud
 class ActorProxy(object):
     def __init__(self,
@@ -78,6 +91,36 @@ class ActorProxy(object):
     def set_velocity(self, velocity):
         self.velocity = velocity
 
+class LocalizerProxy(object):
+    """
+    Sim side stand-in for LocalizationManager: the vehicle containers
+    localize, the sim only keeps their debug data and the latest pose from
+    the VehicleUpdates.
+    """
+
+    def __init__(self, vehicle, config_yaml):
+        self.vehicle = vehicle
+        self.debug_helper = LocDebugHelper(config_yaml['debug_helper'],
+                                           vehicle.id)
+
+    def get_ego_pos(self):
+        return self.vehicle.get_transform()
+
+    def get_ego_spd(self):
+        # km/h like LocalizationManager
+        velocity = self.vehicle.get_velocity()
+        return 3.6 * np.sqrt(velocity.x ** 2 + velocity.y ** 2 +
+                             velocity.z ** 2)
+
+class AgentProxy(object):
+    """
+    Sim side stand-in for BehaviorAgent that only keeps the planner debug
+    data sent by the vehicle container.
+    """
+
+    def __init__(self, vehicle):
+        self.debug_helper = PlanDebugHelper(vehicle.id)
+
 class VehicleManagerProxy(object):
     """
     TODO: update
@@ -126,13 +169,46 @@ class VehicleManagerProxy(object):
         # print("eCloud debug | actor_id: " + str(actor_id))
         self.vehicle = ActorProxy(self.vehicle_index)
 
+        # v2x module
+        self.v2x_manager = V2XManager(self.cav_world, self.cav_config['v2x'], self.vehicle_index)
+
+        # the planning stacks run in the vehicle containers, only build
+        # them here if the sim side drives them
+        if requires_full_stack(self.application):
+            self.start_full_stack()
+        else:
+            self.localizer = LocalizerProxy(
+                self.vehicle, self.cav_config['sensing']['localization'])
+            self.agent = AgentProxy(self.vehicle)
+            self.perception_manager = None
+            self.controller = None
+            self.data_dumper = None
+
+        self.cav_world.update_vehicle_manager(self)
+
+    def start_full_stack(self):
+        """
+        Build the localization, perception, behavior and control modules
+        like VehicleManager does.
+        """
+        # we import in this way so slim proxies don't load the planning
+        # stack (and open3d through perception)
+        from opencda.core.actuation.control_manager \
+            import ControlManager
+        from opencda.core.application.platooning.platoon_behavior_agent\
+            import PlatooningBehaviorAgent
+        from opencda.core.sensing.localization.localization_manager \
+            import LocalizationManager
+        from opencda.core.sensing.perception.perception_manager \
+            import PerceptionManager
+        from opencda.core.plan.behavior_agent \
+            import BehaviorAgent
+        from opencda.core.common.data_dumper import DataDumper
+
         # retrieve the configure for different modules
         sensing_config = self.cav_config['sensing']
         behavior_config = self.cav_config['behavior']
         control_config = self.cav_config['controller']
-        v2x_config = self.cav_config['v2x']
-        # v2x module
-        self.v2x_manager = V2XManager(self.cav_world, v2x_config, self.vehicle_index)
         # localization module
         self.localizer = LocalizationManager(
             self.vehicle, sensing_config['localization'], self.carla_map)
@@ -168,4 +244,8 @@ class VehicleManagerProxy(object):
         else:
             self.data_dumper = None
 
-        self.cav_world.update_vehicle_manager(self)
+    def destroy(self):
+        """
+        Nothing to destroy, the actors belong to the vehicle containers.
+        """
+        pass
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Wait points of the sim and the vehicles, and adaptive backoff for the few
+that still have to poll.
+
+The sim and the vehicles wait on each other at a handful of points - the
+registration and tick barriers, the next pushed tick, edge waypoints. All of
+them wait on a notification (a push, an eventfd, a reply) rather than a
+fixed ping sleep, so nothing is rounded up to a sleep quantum. The time
+spent at each point is recorded as a wait record, the breakdown per wait
+point shows where the idle time of a run goes.
+
+Where there is no notification to wait on - a CARLA actor the sim spawned
+showing up in the vehicle's world - AdaptiveBackoff polls: the first retries
+come quickly, later ones back off up to a ceiling.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+NSEC_TO_MSEC = 1e-6
+
+# the sim
+SIM_REGISTRATION = "sim.registration" # until every vehicle registered
+SIM_TICK_BARRIER = "sim.tick_barrier" # until the fleet completed the tick
+SIM_ASYNC_PACING = "sim.async_pacing" # async ticks: until the next tick is due
+# the vehicles
+CLIENT_ATTACH = "client.attach" # until the sim's actor is visible
+CLIENT_READINESS = "client.readiness" # until the first tick after registration
+CLIENT_TICK = "client.tick" # from the reply until the next tick
+CLIENT_WAYPOINTS = "client.waypoints" # edge waypoint round trip
+
+
+class AdaptiveBackoff(object):
+    """
+    Exponential backoff between polls.
+
+    Parameters
+    ----------
+    initial_s : float
+        First delay.
+
+    max_s : float
+        Ceiling of the delay.
+
+    factor : float
+        Growth of the delay per poll.
+
+    Attributes
+    ----------
+    polls : int
+        Delays handed out since the last reset.
+    """
+
+    def __init__(self, initial_s, max_s, factor=2.0):
+        self.initial_s = initial_s
+        self.max_s = max(max_s, initial_s)
+        self.factor = factor
+        self.delay_s = initial_s
+        self.polls = 0
+
+    def reset(self):
+        self.delay_s = self.initial_s
+        self.polls = 0
+
+    def next_delay(self):
+        delay_s = self.delay_s
+        self.delay_s = min(self.delay_s * self.factor, self.max_s)
+        self.polls += 1
+        return delay_s
+
+    def sleep(self):
+        time.sleep(self.next_delay())
+
+    async def wait(self, max_s=None):
+        delay_s = self.next_delay()
+        await asyncio.sleep(delay_s if max_s is None else min(delay_s, max_s))
+
+
+async def wait_until(check, backoff, timeout_s):
+    """
+    Call check until it returns something other than None, awaiting the
+    backoff in between - the other coroutines of the loop run meanwhile.
+
+    Returns
+    -------
+    result : object
+        What check returned, None if timeout_s passed first.
+    """
+    deadline = time.time() + timeout_s
+    backoff.reset()
+    while True:
+        result = check()
+        if result is not None or time.time() >= deadline:
+            return result
+        await backoff.wait(max(deadline - time.time(), 0))
+
+
+@contextmanager
+def waiting(wait_list, name, tick_id=0):
+    """
+    Record the time spent in the block as a wait at the named point.
+
+    Parameters
+    ----------
+    wait_list : list
+        Gets a (name, tick_id, wait_ms) record appended.
+    """
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        wait_list.append((name, tick_id,
+                          (time.perf_counter_ns() - start_ns) * NSEC_TO_MSEC))
+
+
+def wait_breakdown(wait_records):
+    """
+    Idle time per wait point.
+
+    Parameters
+    ----------
+    wait_records : list
+        (name, tick_id, wait_ms) records, of any number of processes.
+
+    Returns
+    -------
+    breakdown : dict
+        Wait point -> count, total, mean & 95th percentile in ms and the
+        point's share of the total wait time.
+    """
+    by_name = {}
+    for name, _, wait_ms in wait_records:
+        by_name.setdefault(name, []).append(wait_ms)
+
+    total_ms = sum(sum(waits) for waits in by_name.values())
+    breakdown = {}
+    for name, waits in sorted(by_name.items()):
+        breakdown[name] = {'count': len(waits),
+                           'total_ms': float(np.sum(waits)),
+                           'mean_ms': float(np.mean(waits)),
+                           'p95_ms': float(np.percentile(waits, 95)),
+                           'share': float(np.sum(waits) / total_ms) if total_ms else 0.0}
+    return breakdown
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned, delta encoded edge waypoint buffers.
+
+The edge plans a new WaypointBuffer for every vehicle every edge step, but
+most of each buffer is the same as in the step before. The sim side keeps
+the last buffer of every vehicle in a WaypointDeltaEncoder and only ships
+what changed:
+
+    * nothing but the version when the buffer is unchanged;
+    * a WaypointDelta - points dropped from the front, changed points and
+      appended points as packed point arrays - against the last version;
+    * the full buffer as packed points when that is smaller.
+
+The ecloud server applies the deltas to its copy of every buffer and
+answers Client_GetWaypoints with whatever brings the version the client
+holds up to date. WaypointDeltaDecoder on the client applies it and only
+resolves the new points, the unchanged ones are reused.
+
+A point packs the fields of the edge's map waypoint that the local planner
+reads (POINT_FIELDS), so the client rebuilds LocalWaypoints from them
+without a map lookup.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import logging
+import time
+
+import numpy as np
+
+import ecloud_pb2 as ecloud
+
+logger = logging.getLogger(__name__)
+
+POINT_FIELDS = ('x', 'y', 'z', 'roll', 'pitch', 'yaw', 'road_id',
+                'section_id', 'lane_id', 's', 'is_junction', 'lane_width',
+                'lane_change')
+POINT_SIZE = len(POINT_FIELDS)
+FLOAT_BYTES = 4
+SEC_TO_MSEC = 1000
+
+
+def waypoint_point(waypoint):
+    """
+    Packed point of a serialized ecloud.Waypoint, in POINT_FIELDS order.
+    """
+    location = waypoint.transform.location
+    rotation = waypoint.transform.rotation
+    return (location.x, location.y, location.z, rotation.roll,
+            rotation.pitch, rotation.yaw, waypoint.road_id,
+            waypoint.section_id, waypoint.lane_id, waypoint.s,
+            waypoint.is_junction, waypoint.lane_width, waypoint.lane_change)
+
+
+def buffer_points(waypoint_buffer):
+    """
+    Points of a full WaypointBuffer.
+
+    Returns
+    -------
+    points : np.ndarray
+        (N,POINT_SIZE) float32.
+    """
+    return np.array([waypoint_point(wp)
+                     for wp in waypoint_buffer.waypoint_buffer],
+                    dtype=np.float32).reshape(-1, POINT_SIZE)
+
+
+def unpack_points(packed):
+    """
+    Packed proto field to an (N,POINT_SIZE) float32 array.
+    """
+    return np.array(packed, dtype=np.float32).reshape(-1, POINT_SIZE)
+
+
+def encode_delta(base, points):
+    """
+    Delta that turns the base buffer into points.
+
+    The dropped prefix is the first position of the new first point in the
+    base buffer, the rest is compared point by point.
+
+    Parameters
+    ----------
+    base, points : np.ndarray
+        (N,POINT_SIZE) old and new points.
+
+    Returns
+    -------
+    delta : ecloud.WaypointDelta
+        Without base_version.
+    """
+    delta = ecloud.WaypointDelta()
+    delta.length = len(points)
+
+    dropped = 0
+    if len(points) > 0:
+        matches = np.flatnonzero(np.all(base == points[0], axis=1))
+        dropped = int(matches[0]) if len(matches) else 0
+    delta.dropped = dropped
+
+    kept = min(len(base) - dropped, len(points))
+    changed = np.flatnonzero(np.any(base[dropped:dropped + kept] !=
+                                    points[:kept], axis=1))
+    delta.changed_index.extend(changed.tolist())
+    delta.changed_points.extend(points[changed].reshape(-1).tolist())
+    delta.appended_points.extend(points[kept:].reshape(-1).tolist())
+    return delta
+
+
+def apply_delta(base, delta):
+    """
+    Inverse of encode_delta.
+
+    Returns
+    -------
+    points : np.ndarray
+        (N,POINT_SIZE) new points.
+
+    fresh : np.ndarray
+        Indices of the points that are not in the base buffer.
+    """
+    kept = min(len(base) - delta.dropped, delta.length)
+    points = np.empty((delta.length, POINT_SIZE), dtype=np.float32)
+    points[:kept] = base[delta.dropped:delta.dropped + kept]
+    changed = np.array(delta.changed_index, dtype=int)
+    points[changed] = unpack_points(delta.changed_points)
+    points[kept:] = unpack_points(delta.appended_points)
+    fresh = np.concatenate([changed, np.arange(kept, delta.length)])
+    return points, fresh
+
+
+class WaypointDeltaEncoder(object):
+    """
+    Sim side encoder of the edge waypoint buffers of all vehicles.
+
+    Attributes
+    ----------
+    step_bytes : list
+        (unencoded, encoded) serialized size of every push.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._points = {}
+        self.step_bytes = []
+
+    def encode(self, waypoint_buffer):
+        """
+        Versioned encoding of one full, unversioned WaypointBuffer.
+
+        Returns
+        -------
+        encoded : ecloud.WaypointBuffer
+        """
+        vehicle_index = waypoint_buffer.vehicle_index
+        points = buffer_points(waypoint_buffer)
+        base = self._points.get(vehicle_index)
+
+        encoded = ecloud.WaypointBuffer()
+        encoded.vehicle_index = vehicle_index
+        if base is not None and np.array_equal(base, points):
+            encoded.version = self._versions[vehicle_index]
+            encoded.unchanged = True
+            return encoded
+
+        encoded.version = self._versions.get(vehicle_index, 0) + 1
+        full_size = len(points) * POINT_SIZE
+        if base is not None:
+            delta = encode_delta(base, points)
+            delta.base_version = self._versions[vehicle_index]
+            if delta.ByteSize() < full_size * FLOAT_BYTES:
+                encoded.delta.CopyFrom(delta)
+        if not encoded.HasField('delta'):
+            encoded.points.extend(points.reshape(-1).tolist())
+
+        self._versions[vehicle_index] = encoded.version
+        self._points[vehicle_index] = points
+        return encoded
+
+    def encode_all(self, waypoint_buffers):
+        """
+        Encode the buffers of one edge push and record their sizes.
+
+        Parameters
+        ----------
+        waypoint_buffers : list
+            Full WaypointBuffer of every vehicle, see EdgeManager.run_step.
+
+        Returns
+        -------
+        encoded : list
+            Versioned WaypointBuffer of every vehicle.
+        """
+        encoded = [self.encode(buffer) for buffer in waypoint_buffers]
+        self.step_bytes.append(
+            (sum(buffer.ByteSize() for buffer in waypoint_buffers),
+             sum(buffer.ByteSize() for buffer in encoded)))
+        return encoded
+
+
+class WaypointDeltaDecoder(object):
+    """
+    Client side decoder of the waypoint buffer of one vehicle.
+
+    Parameters
+    ----------
+    resolve : callable
+        Maps the fields of a point (POINT_FIELDS) to the waypoint object
+        kept for it, e.g. LocalWaypointResolver.from_point.
+
+    Attributes
+    ----------
+    version : int
+        Buffer version held, 0 if none; send it with the WaypointRequest.
+
+    waypoints : list
+        Resolved waypoint of every point of the buffer.
+
+    decode_ms : list
+        Decode time (including resolving) of every buffer.
+
+    bytes_received : int
+        Serialized size of all decoded buffers.
+    """
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.version = 0
+        self.points = np.empty((0, POINT_SIZE), dtype=np.float32)
+        self.waypoints = []
+        self.decode_ms = []
+        self.bytes_received = 0
+
+    def decode(self, waypoint_buffer):
+        """
+        Apply a WaypointBuffer from Client_GetWaypoints.
+
+        Returns
+        -------
+        waypoints : list
+            The resolved waypoints of the current buffer, None if the
+            buffer could not be applied (it is requested in full next time).
+        """
+        start_time = time.perf_counter()
+        self.bytes_received += waypoint_buffer.ByteSize()
+
+        if waypoint_buffer.version == 0:
+            # unversioned full buffer
+            points = buffer_points(waypoint_buffer)
+            fresh = np.arange(len(points))
+        elif waypoint_buffer.unchanged:
+            if waypoint_buffer.version != self.version:
+                return self._reset(f"unchanged buffer {waypoint_buffer.version}"
+                                   f" while holding {self.version}")
+            points, fresh = self.points, np.arange(0)
+        elif waypoint_buffer.HasField('delta'):
+            if waypoint_buffer.delta.base_version != self.version:
+                return self._reset(f"delta on {waypoint_buffer.delta.base_version}"
+                                   f" while holding {self.version}")
+            points, fresh = apply_delta(self.points, waypoint_buffer.delta)
+        else:
+            points = unpack_points(waypoint_buffer.points)
+            fresh = np.arange(len(points))
+
+        if len(fresh) == len(points):
+            waypoints = [None] * len(points)
+        else:
+            # unchanged points keep their resolved waypoints
+            waypoints = self._shifted_waypoints(waypoint_buffer, len(points))
+        for i in fresh:
+            waypoints[i] = self.resolve(*(float(c) for c in points[i]))
+
+        self.version = waypoint_buffer.version
+        self.points = points
+        self.waypoints = waypoints
+        self.decode_ms.append((time.perf_counter() - start_time) *
+                              SEC_TO_MSEC)
+        return waypoints
+
+    def _shifted_waypoints(self, waypoint_buffer, length):
+        """
+        The held waypoints moved to their place in the new buffer.
+        """
+        dropped = waypoint_buffer.delta.dropped \
+            if waypoint_buffer.HasField('delta') else 0
+        waypoints = self.waypoints[dropped:dropped + length]
+        return waypoints + [None] * (length - len(waypoints))
+
+    def _reset(self, reason):
+        logger.error(f"cannot apply waypoint buffer: {reason}")
+        self.version = 0
+        return None
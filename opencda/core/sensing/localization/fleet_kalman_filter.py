@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Batched Kalman Filter on GPS + IMU for all vehicles hosted by one process.
+
+The math is the same as in kalman_filter.KalmanFilter, but the states and
+covariances of every vehicle are stacked in (N, 4) / (N, 4, 4) arrays so a
+whole fleet is corrected with a handful of vectorized numpy calls instead of
+a dozen small matrix products per vehicle.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import numpy as np
+
+INITIAL_CAPACITY = 16
+
+
+class FleetKalmanFilter(object):
+    """
+    Kalman Filter for gps and imu holding the state of many vehicles.
+
+    Parameters
+    ----------
+    dt : float
+        The step time for kalman filter calculation.
+
+    capacity : int
+        Number of vehicle slots allocated up front; grows on demand.
+
+    Attributes
+    ----------
+    Q : numpy.array
+        predict state covariance.
+
+    R : numpy.array
+        Observation x,y position covariance.
+
+    time_step : float
+        The step time for kalman filter calculation.
+
+    xEst : numpy.array
+        Estimated [x, y, yaw, v] per vehicle slot, shape (capacity, 4).
+
+    PEst : numpy.array
+        The estimated P values per vehicle slot, shape (capacity, 4, 4).
+
+    z : numpy.array
+        Staged gnss observations [x, y, heading], shape (capacity, 3).
+
+    u : numpy.array
+        Staged [velocity, imu_yaw_rate] inputs, shape (capacity, 2).
+
+    staged : numpy.array
+        Whether a slot has a measurement waiting for the next run_step.
+    """
+
+    def __init__(self, dt, capacity=INITIAL_CAPACITY):
+        self.Q = np.diag([
+            0.2,  # variance of location on x-axis
+            0.2,  # variance of location on y-axis
+            np.deg2rad(0.1),  # variance of yaw angle
+            0.001  # variance of velocity
+        ]) ** 2  # predict state covariance
+
+        # Observation x,y position covariance
+        self.R = np.diag([0.5, 0.5, 0.2]) ** 2
+
+        self.time_step = dt
+
+        self.xEst = np.zeros((capacity, 4))
+        self.PEst = np.tile(np.eye(4), (capacity, 1, 1))
+        self.z = np.zeros((capacity, 3))
+        self.u = np.zeros((capacity, 2))
+        self.staged = np.zeros(capacity, dtype=bool)
+
+        self._used = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        """
+        Double the number of vehicle slots.
+        """
+        capacity = len(self.xEst)
+        self.xEst = np.concatenate([self.xEst, np.zeros((capacity, 4))])
+        self.PEst = np.concatenate(
+            [self.PEst, np.tile(np.eye(4), (capacity, 1, 1))])
+        self.z = np.concatenate([self.z, np.zeros((capacity, 3))])
+        self.u = np.concatenate([self.u, np.zeros((capacity, 2))])
+        self.staged = np.concatenate(
+            [self.staged, np.zeros(capacity, dtype=bool)])
+        self._used = np.concatenate(
+            [self._used, np.zeros(capacity, dtype=bool)])
+
+    def add_vehicle(self):
+        """
+        Reserve a slot for a new vehicle.
+
+        Returns
+        -------
+        index : int
+            The slot of the vehicle in the stacked arrays.
+        """
+        free = np.flatnonzero(~self._used)
+        if len(free) == 0:
+            self._grow()
+            free = np.flatnonzero(~self._used)
+
+        index = int(free[0])
+        self._used[index] = True
+        self.xEst[index] = 0.0
+        self.PEst[index] = np.eye(4)
+        self.staged[index] = False
+
+        return index
+
+    def remove_vehicle(self, index):
+        """
+        Release the slot of a destroyed vehicle.
+        """
+        self._used[index] = False
+        self.staged[index] = False
+
+    def view(self, index=None):
+        """
+        Return a per-vehicle adapter with the KalmanFilter interface.
+
+        Parameters
+        ----------
+        index : int
+            Existing slot to wrap; a new slot is reserved if None.
+
+        Returns
+        -------
+        view : FleetKalmanFilterView
+        """
+        if index is None:
+            index = self.add_vehicle()
+        return FleetKalmanFilterView(self, index)
+
+    def run_step_init(self, index, x, y, heading, velocity):
+        """
+        Initial state filling of one vehicle.
+
+        Parameters
+        ----------
+        index : int
+            The slot of the vehicle.
+
+        x : float
+            The x coordinate.
+
+        y : float
+            The y coordinate.
+
+        heading : float
+            The heading direction.
+
+        velocity : float
+            The velocity speed.
+        """
+        self.xEst[index] = (x, y, heading, velocity)
+
+    def stage(self, index, x, y, heading, velocity, yaw_rate_imu):
+        """
+        Store the current measurement of one vehicle for the next run_step.
+
+        Parameters
+        ----------
+        index : int
+            The slot of the vehicle.
+
+        x : float
+            x(esu) coordinate from gnss sensor at current timestamp
+
+        y : float
+            y(esu) coordinate from gnss sensor at current timestamp
+
+        heading : float
+            heading direction at current timestamp.
+
+        velocity : float
+            current speed.
+
+        yaw_rate_imu : float
+            yaw rate rad/s from IMU sensor.
+        """
+        self.z[index] = (x, y, heading)
+        self.u[index] = (velocity, yaw_rate_imu)
+        self.staged[index] = True
+
+    def run_step(self, indices=None):
+        """
+        Apply KF on the staged measurements and previous predictions of
+        all staged vehicles at once.
+
+        Parameters
+        ----------
+        indices : numpy.array
+            Only step these slots; defaults to every staged slot.
+
+        Returns
+        -------
+        indices : numpy.array
+            The slots that were corrected.
+        """
+        if indices is None:
+            indices = np.flatnonzero(self.staged)
+        else:
+            indices = np.asarray(indices, dtype=int).reshape(-1)
+        if len(indices) == 0:
+            return indices
+
+        x = self.xEst[indices]
+        P = self.PEst[indices]
+        z = self.z[indices]
+        velocity = self.u[indices, 0]
+        yaw_rate = self.u[indices, 1]
+
+        # state prediction: X = F * X_prev + B * u, F = diag(1, 1, 1, 0)
+        xPred = np.empty_like(x)
+        xPred[:, 0] = x[:, 0] + self.time_step * np.cos(x[:, 2]) * velocity
+        xPred[:, 1] = x[:, 1] + self.time_step * np.sin(x[:, 2]) * velocity
+        xPred[:, 2] = x[:, 2] + self.time_step * yaw_rate
+        xPred[:, 3] = velocity
+
+        # sensor measurement prediction, H selects [x, y, yaw]
+        y = z - xPred[:, :3]
+
+        # F * P * F^T drops the velocity row and column
+        PPred = P.copy()
+        PPred[:, 3, :] = 0.0
+        PPred[:, :, 3] = 0.0
+        PPred += self.Q
+
+        # K = P * H^T * S^-1  <=>  S^T * K^T = H * P^T
+        S = PPred[:, :3, :3] + self.R
+        K = np.linalg.solve(S.transpose(0, 2, 1),
+                            PPred[:, :, :3].transpose(0, 2, 1)) \
+            .transpose(0, 2, 1)
+
+        self.xEst[indices] = xPred + np.einsum('nij,nj->ni', K, y)
+        self.PEst[indices] = np.einsum('nij,njk->nik', K, PPred[:, :3, :])
+        self.staged[indices] = False
+
+        return indices
+
+    def get_estimate(self, index):
+        """
+        Retrieve the corrected x, y, heading, and velocity of one vehicle.
+        """
+        x_est = self.xEst[index]
+        return x_est[0], x_est[1], x_est[2], x_est[3]
+
+
+class FleetKalmanFilterView(object):
+    """
+    Adapter exposing one slot of a FleetKalmanFilter with the
+    KalmanFilter interface.
+
+    Parameters
+    ----------
+    fleet : FleetKalmanFilter
+        The shared fleet filter.
+
+    index : int
+        The slot of this vehicle.
+    """
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+        self.time_step = fleet.time_step
+
+    @property
+    def xEst(self):
+        return self.fleet.xEst[self.index].reshape(4, 1)
+
+    @property
+    def PEst(self):
+        return self.fleet.PEst[self.index]
+
+    def run_step_init(self, x, y, heading, velocity):
+        """
+        Initial state filling.
+        """
+        self.fleet.run_step_init(self.index, x, y, heading, velocity)
+
+    def stage(self, x, y, heading, velocity, yaw_rate_imu):
+        """
+        Store the current measurement for the next fleet wide run_step.
+        """
+        self.fleet.stage(self.index, x, y, heading, velocity, yaw_rate_imu)
+
+    def get_estimate(self):
+        """
+        Retrieve the corrected x, y, heading, and velocity.
+        """
+        return self.fleet.get_estimate(self.index)
+
+    def run_step(self, x, y, heading, velocity, yaw_rate_imu):
+        """
+        Apply KF on this vehicle only, same as KalmanFilter.run_step.
+        """
+        self.stage(x, y, heading, velocity, yaw_rate_imu)
+        self.fleet.run_step([self.index])
+        return self.get_estimate()
+
+    def release(self):
+        """
+        Free the slot in the fleet filter.
+        """
+        self.fleet.remove_vehicle(self.index)
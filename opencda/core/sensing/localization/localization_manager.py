@@ -15,6 +15,8 @@ from opencda.core.common.misc import get_speed
 from opencda.core.sensing.localization.localization_debug_helper \
     import LocDebugHelper
 from opencda.core.sensing.localization.kalman_filter import KalmanFilter
+from opencda.core.sensing.localization.fleet_kalman_filter import \
+    FleetKalmanFilterView
 from opencda.core.sensing.localization.coordinate_transform \
     import geo_to_transform
 
@@ -158,6 +160,10 @@ class LocalizationManager(object):
     carla_map : carla.Map
         The carla HDMap. We need this to find the map origin to
         convert wg84 to enu coordinate system.
+    fleet_filter : opencda object
+        Optional FleetKalmanFilter shared by all vehicles of this process.
+        The vehicle then filters in its own slot and the fleet is
+        corrected in one batch, see fleet_step.HostFleet.
 
     Attributes
     gnss : opencda object
@@ -173,7 +179,7 @@ class LocalizationManager(object):
         the localization and provide evaluation functions.
     """
 
-    def __init__(self, vehicle, config_yaml, carla_map):
+    def __init__(self, vehicle, config_yaml, carla_map, fleet_filter=None):
 
         self.vehicle = vehicle
 
@@ -201,7 +207,15 @@ class LocalizationManager(object):
 
             self.dt = config_yaml['dt']
             # Kalman Filter
-            self.kf = KalmanFilter(self.dt)
+            if fleet_filter is not None:
+                assert fleet_filter.time_step == self.dt, \
+                    "fleet filter dt differs from the localization dt"
+                self.kf = fleet_filter.view()
+            else:
+                self.kf = KalmanFilter(self.dt)
+
+            # measurement of the current tick, see localize_collect
+            self._measurement = None
 
         # DebugHelper
         self.debug_helper = LocDebugHelper(
@@ -211,65 +225,103 @@ class LocalizationManager(object):
         """
         Currently implemented in a naive way.
         """
+        self.localize_collect()
+        self.localize_apply()
 
+    def localize_collect(self):
+        """
+        Read the sensors of the current tick. With a fleet filter the
+        measurement is staged in the vehicle's slot, so the whole fleet
+        can be corrected in one FleetKalmanFilter.run_step before
+        localize_apply.
+        """
+        if not self.activate:
+            return
+
+        speed_true = get_speed(self.vehicle)
+        speed_noise = self.add_speed_noise(speed_true)
+
+        # gnss coordinates under ESU(Unreal coordinate system)
+        x, y, z = geo_to_transform(self.gnss.lat,
+                                   self.gnss.lon,
+                                   self.gnss.alt,
+                                   self.geo_ref.latitude,
+                                   self.geo_ref.longitude, 0.0)
+
+        # only use this for debugging purpose
+        transform = self.vehicle.get_transform()
+
+        # We add synthetic noise to the heading direction
+        heading_angle = self.add_heading_direction_noise(
+            transform.rotation.yaw)
+
+        # assume the initial position is accurate
+        if len(self._ego_pos_history) == 0:
+            self.kf.run_step_init(
+                x, y, np.deg2rad(heading_angle), speed_true / 3.6)
+        elif isinstance(self.kf, FleetKalmanFilterView):
+            self.kf.stage(x, y, np.deg2rad(heading_angle),
+                          speed_noise / 3.6,
+                          self.imu.gyroscope[2])
+
+        self._measurement = (x, y, z, heading_angle, speed_noise,
+                             speed_true, transform)
+
+    def localize_apply(self):
+        """
+        Fuse the collected measurement into the final ego pose.
+        """
         if not self.activate:
             self._ego_pos = self.vehicle.get_transform()
             self._speed = get_speed(self.vehicle)
+            return
+
+        x, y, z, heading_angle, speed_noise, speed_true, transform = \
+            self._measurement
+        location = transform.location
+        rotation = transform.rotation
+
+        if len(self._ego_pos_history) == 0:
+            x_kf, y_kf, heading_angle_kf = x, y, heading_angle
+            self._speed = speed_true
         else:
-            speed_true = get_speed(self.vehicle)
-            speed_noise = self.add_speed_noise(speed_true)
-
-            # gnss coordinates under ESU(Unreal coordinate system)
-            x, y, z = geo_to_transform(self.gnss.lat,
-                                       self.gnss.lon,
-                                       self.gnss.alt,
-                                       self.geo_ref.latitude,
-                                       self.geo_ref.longitude, 0.0)
-
-            # only use this for debugging purpose
-            location = self.vehicle.get_transform().location
-
-            # We add synthetic noise to the heading direction
-            rotation = self.vehicle.get_transform().rotation
-            heading_angle = self.add_heading_direction_noise(rotation.yaw)
-
-            # assume the initial position is accurate
-            if len(self._ego_pos_history) == 0:
-                x_kf, y_kf, heading_angle_kf = x, y, heading_angle
-                self._speed = speed_true
-                self.kf.run_step_init(
-                    x, y, np.deg2rad(heading_angle), self._speed / 3.6)
+            if isinstance(self.kf, FleetKalmanFilterView):
+                # no-op if the fleet was already stepped this tick
+                if self.kf.fleet.staged[self.kf.index]:
+                    self.kf.fleet.run_step([self.kf.index])
+                x_kf, y_kf, heading_angle_kf, speed_kf = \
+                    self.kf.get_estimate()
             else:
                 x_kf, y_kf, heading_angle_kf, speed_kf = self.kf.run_step(
                     x, y, np.deg2rad(heading_angle),
                     speed_noise / 3.6,
                     self.imu.gyroscope[2])
-                self._speed = speed_kf * 3.6
-                heading_angle_kf = np.rad2deg(heading_angle_kf)
-
-            # add data to debug helper
-            self.debug_helper.run_step(x,
-                                       y,
-                                       heading_angle,
-                                       speed_noise,
-                                       x_kf,
-                                       y_kf,
-                                       heading_angle_kf,
-                                       self._speed,
-                                       location.x,
-                                       location.y,
-                                       rotation.yaw,
-                                       speed_true)
-
-            # the final pose of the vehicle
-            self._ego_pos = carla.Transform(
-                carla.Location(
-                    x=x_kf, y=y_kf, z=z), carla.Rotation(
-                    pitch=0, yaw=heading_angle_kf, roll=0))
-
-            # save the track for future use
-            self._ego_pos_history.append(self._ego_pos)
-            self._timestamp_history.append(self.gnss.timestamp)
+            self._speed = speed_kf * 3.6
+            heading_angle_kf = np.rad2deg(heading_angle_kf)
+
+        # add data to debug helper
+        self.debug_helper.run_step(x,
+                                   y,
+                                   heading_angle,
+                                   speed_noise,
+                                   x_kf,
+                                   y_kf,
+                                   heading_angle_kf,
+                                   self._speed,
+                                   location.x,
+                                   location.y,
+                                   rotation.yaw,
+                                   speed_true)
+
+        # the final pose of the vehicle
+        self._ego_pos = carla.Transform(
+            carla.Location(
+                x=x_kf, y=y_kf, z=z), carla.Rotation(
+                pitch=0, yaw=heading_angle_kf, roll=0))
+
+        # save the track for future use
+        self._ego_pos_history.append(self._ego_pos)
+        self._timestamp_history.append(self.gnss.timestamp)
 
     def add_heading_direction_noise(self, heading_direction):
         """
@@ -321,3 +373,6 @@ class LocalizationManager(object):
         """
         self.gnss.sensor.destroy()
         self.imu.sensor.destroy()
+        if isinstance(getattr(self, 'kf', None), FleetKalmanFilterView):
+            self.kf.release()
+
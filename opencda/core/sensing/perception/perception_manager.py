@@ -6,6 +6,7 @@ Perception module
 # Author: Runsheng Xu <rxx3386@ucla.edu>
 # License: TDG-Attribution-NonCommercial-NoDistrib
 
+import logging
 import weakref
 import sys
 import time
@@ -21,11 +22,15 @@ from opencda.core.common.misc import \
 from opencda.core.sensing.perception.obstacle_vehicle import \
     ObstacleVehicle
 from opencda.core.sensing.perception.static_obstacle import TrafficLight
+from opencda.core.sensing.perception.sensor_hub import SensorHub, \
+    SENSOR_TIMEOUT_S
 from opencda.core.sensing.perception.o3d_lidar_libs import \
     o3d_visualizer_init, o3d_pointcloud_encode, o3d_visualizer_show,\
     o3d_camera_lidar_fusion
 from opencda.client_debug_helper import ClientDebugHelper
 
+logger = logging.getLogger(__name__)
+
 class CameraSensor:
     """
     Camera manager.
@@ -45,6 +50,8 @@ class CameraSensor:
         Current received rgb image.
     sensor : carla.sensor
         The carla sensor that mounts at the vehicle.
+    ring : opencda object
+        Optional SensorRing every received image is also written to.
 
     """
     def __init__(self, vehicle, position='front'):
@@ -90,6 +97,7 @@ class CameraSensor:
             self.image = None
             self.timstamp = None
             self.frame = 0
+            self.ring = None
             weak_self = weakref.ref(self)
             self.sensor.listen(
                 lambda event: CameraSensor._on_rgb_image_event(
@@ -115,6 +123,8 @@ class CameraSensor:
         self.image = image
         self.frame = event.frame
         self.timestamp = event.timestamp
+        if self.ring is not None:
+            self.ring.put(event.frame, event.timestamp, image)
 
 
 class LidarSensor:
@@ -137,6 +147,9 @@ class LidarSensor:
     sensor : carla.sensor
         Lidar sensor that will be attached to the vehicle.
 
+    ring : opencda object
+        Optional SensorRing every received point cloud is also written to.
+
     """
 
     def __init__(self, vehicle, config_yaml):
@@ -177,6 +190,7 @@ class LidarSensor:
             self.data = None
             self.timestamp = None
             self.frame = 0
+            self.ring = None
             # open3d point cloud object
             self.o3d_pointcloud = o3d.geometry.PointCloud()
 
@@ -202,6 +216,8 @@ class LidarSensor:
         self.data = data
         self.frame = event.frame
         self.timestamp = event.timestamp
+        if self.ring is not None:
+            self.ring.put(event.frame, event.timestamp, data)
 
 
 class SemanticLidarSensor:
@@ -321,6 +337,10 @@ class PerceptionManager:
 
     o3d_vis : o3d object
         Open3d point cloud visualizer.
+
+    sensor_hub : opencda object
+        Frame tagged ring buffers of the camera and lidar data; perception
+        blocks on it until the frame of the current world tick arrived.
     """
 
     def __init__(self, vehicle, config_yaml, cav_world, data_dump=False):
@@ -345,15 +365,22 @@ class PerceptionManager:
                 'the argument parser to load the detection DL model.')
         self.ml_manager = ml_manager
 
+        self.sensor_hub = SensorHub(
+            config_yaml.get('sensor_timeout', SENSOR_TIMEOUT_S))
+
         # we only spawn the camera when perception module is activated or
         # camera visualization is needed
         if self.activate or self.camera_visualize:
             self.rgb_camera = []
             mount_position = ['front', 'right', 'left', 'back']
             for i in range(self.camera_num):
-                self.rgb_camera.append(
-                    CameraSensor(
-                        vehicle, mount_position[i]))
+                camera = CameraSensor(vehicle, mount_position[i])
+                if hasattr(camera, 'sensor'):
+                    camera.ring = self.sensor_hub.add_sensor(
+                        'camera_%d' % i,
+                        shape=(camera.image_height, camera.image_width, 3),
+                        dtype=np.uint8)
+                self.rgb_camera.append(camera)
 
         else:
             self.rgb_camera = None
@@ -362,6 +389,8 @@ class PerceptionManager:
         # visualization is needed
         if self.activate or self.lidar_visualize:
             self.lidar = LidarSensor(vehicle, config_yaml['lidar'])
+            if hasattr(self.lidar, 'sensor'):
+                self.lidar.ring = self.sensor_hub.add_sensor('lidar')
             if self.lidar_visualize:
                 self.o3d_vis = o3d_visualizer_init(vehicle.id)
         else:
@@ -420,6 +449,10 @@ class PerceptionManager:
         objects = {'vehicles': [],
                    'traffic_lights': []}
 
+        if self.sensor_hub.rings:
+            self.sensor_hub.set_frame(
+                self.vehicle.get_world().get_snapshot().frame)
+
         if not self.activate:
             objects = self.deactivate_mode(objects)
 
@@ -449,14 +482,15 @@ class PerceptionManager:
         # retrieve current cameras and lidar data
         
         rgb_images = []
-        for rgb_camera in self.rgb_camera:
-            while rgb_camera.image is None:
-                continue
+        camera_images = []
+        for i in range(len(self.rgb_camera)):
+            camera_images.append(
+                np.array(self.sensor_hub.wait_data('camera_%d' % i)))
             rgb_images.append(
                 cv2.cvtColor(
-                    np.array(
-                        rgb_camera.image),
+                    camera_images[i],
                     cv2.COLOR_BGR2RGB))
+        lidar_data = self.sensor_hub.wait_data('lidar')
 
         # yolo detection
         yolo_detection = self.ml_manager.object_detector(rgb_images)
@@ -467,15 +501,14 @@ class PerceptionManager:
             # lidar projection
             rgb_image, projected_lidar = st.project_lidar_to_camera(
                 self.lidar.sensor,
-                rgb_camera.sensor, self.lidar.data, np.array(
-                    rgb_camera.image))
+                rgb_camera.sensor, lidar_data, camera_images[i])
             rgb_draw_images.append(rgb_image)
 
             # camera lidar fusion
             objects = o3d_camera_lidar_fusion(
                 objects,
                 yolo_detection.xyxy[i],
-                self.lidar.data,
+                lidar_data,
                 projected_lidar,
                 self.lidar.sensor)
 
@@ -497,9 +530,7 @@ class PerceptionManager:
             cv2.waitKey(1)
 
         if self.lidar_visualize:
-            while self.lidar.data is None:
-                continue
-            o3d_pointcloud_encode(self.lidar.data, self.lidar.o3d_pointcloud)
+            o3d_pointcloud_encode(lidar_data, self.lidar.o3d_pointcloud)
             o3d_visualizer_show(
                 self.o3d_vis,
                 self.count,
@@ -562,10 +593,8 @@ class PerceptionManager:
         objects.update({'vehicles': vehicle_list})
 
         if self.camera_visualize:
-            while self.rgb_camera[0].image is None:
-                continue
             # we only visualiz the frontal camera
-            rgb_image = np.array(self.rgb_camera[0].image)
+            rgb_image = np.array(self.sensor_hub.wait_data('camera_0'))
             # draw the ground truth bbx on the camera image
             rgb_image = self.visualize_3d_bbx_front_camera(objects, rgb_image)
             # resize to make it fittable to the screen
@@ -578,9 +607,8 @@ class PerceptionManager:
             cv2.waitKey(1)
 
         if self.lidar_visualize:
-            while self.lidar.data is None:
-                continue
-            o3d_pointcloud_encode(self.lidar.data, self.lidar.o3d_pointcloud)
+            o3d_pointcloud_encode(self.sensor_hub.wait_data('lidar'),
+                                  self.lidar.o3d_pointcloud)
             # render the raw lidar
             o3d_visualizer_show(
                 self.o3d_vis,
@@ -733,10 +761,30 @@ class PerceptionManager:
                 objects['traffic_lights'].append(traffic_light)
         return objects
 
+    def get_sensor_stats(self):
+        """
+        Retrieve the latency, wait time and dropped frame statistics of
+        every camera and lidar.
+
+        Returns
+        -------
+        stats : dict
+            sensor name -> statistics, see SensorRing.stats.
+        """
+        return self.sensor_hub.stats()
+
     def destroy(self):
         """
         Destroy sensors.
         """
+        for name, stats in self.get_sensor_stats().items():
+            logger.info(f"vehicle {self.vehicle.id} {name}: "
+                        f"{stats['received']} frames, "
+                        f"{stats['dropped']} dropped, "
+                        f"{stats['timeouts']} timeouts, "
+                        f"latency p95 {stats['latency_ms']['p95']:.2f}ms, "
+                        f"wait p95 {stats['wait_ms']['p95']:.2f}ms")
+
         if self.rgb_camera:
             for rgb_camera in self.rgb_camera:
                 rgb_camera.sensor.destroy()
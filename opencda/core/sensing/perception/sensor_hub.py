@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Event driven sensor hub.
+
+Sensor callbacks write into small, preallocated ring buffers tagged with the
+CARLA frame id. Consumers block on a condition variable (with a timeout)
+until the frame of the current world tick has arrived instead of spinning on
+`while sensor.data is None`. Each ring keeps latency, wait time and dropped
+frame statistics.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import threading
+import time
+
+import numpy as np
+
+SENSOR_RING_SIZE = 4
+SENSOR_TIMEOUT_S = 1.0
+SEC_TO_MSEC = 1000
+
+
+class SensorRing(object):
+    """
+    Frame id tagged ring buffer for a single sensor.
+
+    Parameters
+    ----------
+    name : str
+        Name of the sensor, e.g. 'camera_0' or 'lidar'.
+
+    capacity : int
+        Number of frames kept.
+
+    shape : tuple
+        Shape of a frame. If given (together with dtype) the slots are
+        preallocated and frames are copied into them; otherwise the ring
+        keeps references to the received arrays (e.g. for lidar, whose
+        point count changes per frame).
+
+    dtype : numpy.dtype
+        Data type of a preallocated frame.
+
+    Attributes
+    ----------
+    frames : numpy.array
+        Frame id per slot; -1 for an empty slot.
+
+    dropped : int
+        Frames overwritten before anyone read them.
+
+    timeouts : int
+        Waits that gave up before the requested frame arrived.
+    """
+
+    def __init__(self, name, capacity=SENSOR_RING_SIZE, shape=None,
+                 dtype=None):
+        self.name = name
+        self.capacity = capacity
+
+        if shape is not None:
+            self.slots = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        else:
+            self.slots = [None] * capacity
+
+        self.frames = np.full(capacity, -1, dtype=np.int64)
+        self.timestamps = np.zeros(capacity)
+        self.arrival_times = np.zeros(capacity)
+        self.read = np.ones(capacity, dtype=bool)
+        self.latest = -1
+
+        self.received = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.latency_ms = []
+        self.wait_ms = []
+
+        self.condition = threading.Condition()
+
+    def put(self, frame, timestamp, data):
+        """
+        Store a frame; called from the sensor callback thread.
+
+        Parameters
+        ----------
+        frame : int
+            CARLA frame id of the measurement.
+
+        timestamp : float
+            Simulation timestamp of the measurement.
+
+        data : numpy.array
+            The measurement.
+        """
+        with self.condition:
+            slot = (self.latest + 1) % self.capacity
+            if not self.read[slot]:
+                self.dropped += 1
+
+            if isinstance(self.slots, np.ndarray) and \
+                    np.shape(data) == self.slots.shape[1:]:
+                np.copyto(self.slots[slot], data)
+            else:
+                if isinstance(self.slots, np.ndarray):
+                    # frame shape changed, fall back to keeping references
+                    self.slots = list(self.slots)
+                self.slots[slot] = data
+
+            self.frames[slot] = frame
+            self.timestamps[slot] = timestamp
+            self.arrival_times[slot] = time.perf_counter()
+            self.read[slot] = False
+            self.latest = slot
+            self.received += 1
+
+            self.condition.notify_all()
+
+    def _find(self, frame):
+        """
+        Slot holding frame, or the oldest newer frame; -1 if neither.
+        """
+        if frame is None:
+            return self.latest
+
+        newer = np.flatnonzero(self.frames >= frame)
+        if len(newer) == 0:
+            return -1
+        return int(newer[np.argmin(self.frames[newer])])
+
+    def wait(self, frame=None, timeout=SENSOR_TIMEOUT_S, tick_time=None):
+        """
+        Block until the given frame (or a newer one) has arrived.
+
+        Parameters
+        ----------
+        frame : int
+            Frame id to wait for; None waits for any frame.
+
+        timeout : float
+            Seconds to wait before falling back to the latest frame.
+
+        tick_time : float
+            time.perf_counter() of the world tick, used for the latency
+            statistics.
+
+        Returns
+        -------
+        frame, timestamp, data : tuple
+            The returned frame id, its timestamp and data. data is None if
+            nothing has been received yet.
+        """
+        start_time = time.perf_counter()
+        with self.condition:
+            found = self.condition.wait_for(
+                lambda: self._find(frame) >= 0, timeout)
+            slot = self._find(frame) if found else self.latest
+            if not found:
+                self.timeouts += 1
+
+            self.wait_ms.append((time.perf_counter() - start_time) *
+                                SEC_TO_MSEC)
+            if slot < 0:
+                return -1, None, None
+
+            if found and tick_time is not None:
+                self.latency_ms.append(
+                    (self.arrival_times[slot] - tick_time) * SEC_TO_MSEC)
+            self.read[slot] = True
+
+            return int(self.frames[slot]), self.timestamps[slot], \
+                self.slots[slot]
+
+    def stats(self):
+        """
+        Summary statistics of this sensor.
+
+        Returns
+        -------
+        stats : dict
+        """
+        def summary(values):
+            if len(values) == 0:
+                return {'mean': 0.0, 'p95': 0.0, 'max': 0.0}
+            return {'mean': float(np.mean(values)),
+                    'p95': float(np.percentile(values, 95)),
+                    'max': float(np.max(values))}
+
+        return {'received': self.received,
+                'dropped': self.dropped,
+                'timeouts': self.timeouts,
+                'latency_ms': summary(self.latency_ms),
+                'wait_ms': summary(self.wait_ms)}
+
+
+class SensorHub(object):
+    """
+    Collection of the sensor rings of one vehicle.
+
+    Parameters
+    ----------
+    timeout : float
+        Default seconds to wait for a frame.
+
+    Attributes
+    ----------
+    rings : dict
+        sensor name -> SensorRing.
+
+    frame : int
+        Frame id of the current world tick; None if unknown.
+    """
+
+    def __init__(self, timeout=SENSOR_TIMEOUT_S):
+        self.timeout = timeout
+        self.rings = {}
+        self.frame = None
+        self.tick_time = None
+
+    def add_sensor(self, name, capacity=SENSOR_RING_SIZE, shape=None,
+                   dtype=None):
+        """
+        Create the ring buffer of a sensor.
+
+        Returns
+        -------
+        ring : SensorRing
+        """
+        ring = SensorRing(name, capacity, shape, dtype)
+        self.rings[name] = ring
+        return ring
+
+    def set_frame(self, frame):
+        """
+        Set the frame id of the current world tick.
+        """
+        self.frame = frame
+        self.tick_time = time.perf_counter()
+
+    def wait(self, name, timeout=None):
+        """
+        Wait for the current frame of a sensor.
+
+        Returns
+        -------
+        frame, timestamp, data : tuple
+            See SensorRing.wait.
+        """
+        return self.rings[name].wait(
+            self.frame, self.timeout if timeout is None else timeout,
+            self.tick_time)
+
+    def wait_data(self, name):
+        """
+        Like wait, but keeps waiting until the sensor has sent its first
+        frame, so the returned data is never None.
+        """
+        _, _, data = self.wait(name)
+        while data is None:
+            _, _, data = self.rings[name].wait(None, self.timeout)
+        return data
+
+    def stats(self):
+        """
+        Per sensor statistics, see SensorRing.stats.
+        """
+        return {name: ring.stats() for name, ring in self.rings.items()}
@@ -18,6 +18,9 @@ from google.protobuf.timestamp_pb2 import Timestamp
 import ecloud_pb2 as ecloud
 import ecloud_pb2_grpc as ecloud_rpc
 
+# debug replies carry every vehicle's timings & spans; the sim fetches them in batches
+ECLOUD_MAX_MESSAGE_BYTES = 64 * 1024 * 1024 # same as MAX_MESSAGE_BYTES in ecloud_server.cc
+
 logger = logging.getLogger(__name__)
 coloredlogs.install(level='DEBUG', logger=logger)
 logger.setLevel(logging.DEBUG)
@@ -49,6 +52,9 @@ class EcloudClient:
                         },
                     }]})
 
+    message_size_opts = [("grpc.max_send_message_length", ECLOUD_MAX_MESSAGE_BYTES),
+                         ("grpc.max_receive_message_length", ECLOUD_MAX_MESSAGE_BYTES)]
+
     def __init__(self, channel: grpc.Channel) -> None:
         self.channel = channel
         self.stub = ecloud_rpc.EcloudStub(self.channel)     
@@ -115,7 +121,11 @@ class EcloudPushServer(ecloud_rpc.EcloudServicer):
         return ecloud.Empty()     
 
 async def ecloud_run_push_server(port, 
-                       q: asyncio.Queue) -> None:
+                       q: asyncio.Queue,
+                       ready: asyncio.Event = None) -> None:
+    '''
+    Run the push server; ready is set once it accepts connections.
+    '''
     
     logger.info("spinning up eCloud push server")
     server = grpc.aio.server()
@@ -125,4 +135,6 @@ async def ecloud_run_push_server(port,
     print(f"starting eCloud push server on {listen_addr}")
     
     await server.start()
+    if ready is not None:
+        ready.set()
     await server.wait_for_termination()
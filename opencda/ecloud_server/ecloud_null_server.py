@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Python stand-in for the ecloud server binary, for the transport baseline.
+
+NullEcloudServer serves the tick barrier over gRPC the way ecloud_server.cc
+does - ticks are pushed to every vehicle's push server, completions to the
+sim's push port - but in an asyncio process with tick_barrier.TickBarrier,
+like ShmEcloudServer does over shared memory. Next to the shm transport it
+measures what loopback gRPC and protobuf cost with the same Python barrier
+on both sides, independent of the C++ server.
+
+It takes the binary's flags, so ecloud_shards.ecloud_server_command and
+benchmark_shards run it in place of the binary with
+binary=ecloud_shards.NULL_SERVER. Only registration and the synchronous
+tick barrier are served: no deadlines, asynchronous ticks or edge
+waypoints.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import asyncio
+import logging
+import time
+
+import grpc
+
+import ecloud_pb2 as ecloud
+import ecloud_pb2_grpc as ecloud_rpc
+
+from opencda.core.common.tick_barrier import TickBarrier
+from opencda.ecloud_server.ecloud_shards import ECLOUD_BASE_PORT, \
+    ECLOUD_PUSH_API_PORT, shard_vehicle_count
+
+logger = logging.getLogger(__name__)
+
+TICK_ID_INVALID = -1
+
+
+class NullEcloudServer(ecloud_rpc.EcloudServicer):
+    """
+    The ecloud server's registration and tick barrier over gRPC.
+
+    Parameters
+    ----------
+    shard_id : int
+
+    num_shards : int
+        Shard of the server, it serves the vehicles with
+        index % num_shards == shard_id.
+
+    sim_ip : str
+        Host of the sim's push server.
+    """
+
+    def __init__(self, shard_id=0, num_shards=1, sim_ip='localhost'):
+        self.shard_id = shard_id
+        self.num_shards = num_shards
+        self.sim = ecloud_rpc.EcloudStub(grpc.aio.insecure_channel(
+            f"{sim_ip}:{ECLOUD_PUSH_API_PORT}"))
+        self.sim_info = ecloud.SimulationInfo()
+        self.num_cars = 0
+        self.barrier = None
+        self.command = ecloud.Command.TICK
+        self.tick_start_ns = 0
+        self.last_duration_ns = 0
+        self.vehicles = [] # EcloudStub of every vehicle's push server, by local index
+        self.num_carla_updates = 0
+        self.pending_replies = []
+        self.pushes = set() # keeps the fire and forget pushes alive
+
+    def global_index(self, vehicle_index):
+        return self.shard_id + self.num_shards * vehicle_index
+
+    def local_index(self, vehicle_index):
+        return (vehicle_index - self.shard_id) // self.num_shards
+
+    def _push(self, stub, tick):
+        # like the binary's detached push threads, nobody waits for the push
+        push = asyncio.ensure_future(stub.PushTick(tick))
+        self.pushes.add(push)
+        push.add_done_callback(self.pushes.discard)
+
+    def _complete(self):
+        tick = ecloud.Tick()
+        tick.tick_id = self.barrier.tick_id
+        tick.command = self.command
+        tick.last_client_duration_ns = self.last_duration_ns
+        tick.server_tick_start_ns = self.tick_start_ns
+        tick.server_tick_end_ns = time.time_ns()
+        self._push(self.sim, tick)
+
+    async def Server_StartScenario(self, request, context):
+        assert not request.async_ticks, "the null server ticks synchronously"
+        self.sim_info.CopyFrom(request)
+        self.num_cars = shard_vehicle_count(request.vehicle_index, # fleet size
+                                            self.shard_id, self.num_shards)
+        self.barrier = TickBarrier(self.num_cars)
+        if self.num_cars == 0: # nothing to register
+            self._push(self.sim, ecloud.Tick(tick_id=TICK_ID_INVALID,
+                                             command=self.command))
+        return ecloud.Empty()
+
+    async def Client_RegisterVehicle(self, request, context):
+        reply = ecloud.SimulationInfo()
+        if request.vehicle_state == ecloud.VehicleState.CARLA_UPDATE:
+            reply.vehicle_index = request.vehicle_index
+            self.pending_replies.append(request.SerializeToString())
+            self.num_carla_updates += 1
+            if self.num_carla_updates == self.num_cars:
+                logger.info("REGISTRATION COMPLETE")
+                self._push(self.sim, ecloud.Tick(tick_id=TICK_ID_INVALID,
+                                                 command=self.command))
+            return reply
+
+        assert self.sim_info.test_scenario != ''
+        reply.vehicle_index = self.global_index(len(self.vehicles))
+        self.vehicles.append(ecloud_rpc.EcloudStub(grpc.aio.insecure_channel(
+            f"{request.vehicle_ip}:{request.push_port}")))
+        reply.test_scenario = self.sim_info.test_scenario
+        reply.application = self.sim_info.application
+        reply.version = self.sim_info.version
+        if reply.vehicle_index < len(self.sim_info.spawns):
+            reply.spawns.append(self.sim_info.spawns[reply.vehicle_index])
+        return reply
+
+    async def Client_SendUpdate(self, request, context):
+        done = request.vehicle_state in (ecloud.VehicleState.TICK_DONE,
+                                         ecloud.VehicleState.DEBUG_INFO_UPDATE)
+        if done:
+            self.pending_replies.append(request.SerializeToString())
+        self.last_duration_ns = request.duration_ns
+        if self.barrier.reply(self.local_index(request.vehicle_index),
+                              time.time_ns(), done):
+            self._complete()
+        return ecloud.Empty()
+
+    async def Server_DoTick(self, request, context):
+        self.command = request.command
+        self.tick_start_ns = time.time_ns()
+        active = self.barrier.start_tick(request.tick_id, self.tick_start_ns)
+        tick = ecloud.Tick(tick_id=request.tick_id, command=request.command)
+        for vehicle_index in active:
+            self._push(self.vehicles[vehicle_index], tick)
+        if not active: # nobody left to wait for
+            self.barrier.complete = True
+            self._complete()
+        return ecloud.Empty()
+
+    async def Server_GetVehicleUpdates(self, request, context):
+        response = ecloud.EcloudResponse()
+        for payload in self.pending_replies:
+            response.vehicle_update.add().ParseFromString(payload)
+        self.pending_replies = []
+        return response
+
+    async def Server_EndScenario(self, request, context):
+        self.command = ecloud.Command.END
+        logger.info("pushing END")
+        tick = ecloud.Tick(tick_id=TICK_ID_INVALID, command=ecloud.Command.END)
+        await asyncio.gather(*[vehicle.PushTick(tick)
+                               for vehicle in self.vehicles])
+        return ecloud.Empty()
+
+
+async def serve(port, shard_id=0, num_shards=1):
+    server = grpc.aio.server()
+    ecloud_rpc.add_EcloudServicer_to_server(
+        NullEcloudServer(shard_id, num_shards), server)
+    server.add_insecure_port(f"[::]:{port}")
+    logger.info(f"null ecloud server listening on port {port}")
+    await server.start()
+    await server.wait_for_termination()
+
+
+if __name__ == '__main__':
+    # same flags as the ecloud server binary
+    parser = argparse.ArgumentParser(description="eCloud null server.")
+    parser.add_argument("--port", type=int, default=ECLOUD_BASE_PORT)
+    parser.add_argument("--shard_id", type=int, default=0)
+    parser.add_argument("--num_shards", type=int, default=1)
+    parser.add_argument("--minloglevel", type=int, default=0)
+    opt = parser.parse_args()
+    # absl severities: 0 info, 1 warning, 2 error
+    logging.basicConfig(level=(logging.INFO, logging.WARNING,
+                               logging.ERROR)[min(opt.minloglevel, 2)])
+    asyncio.get_event_loop().run_until_complete(serve(
+        opt.port, opt.shard_id, opt.num_shards))
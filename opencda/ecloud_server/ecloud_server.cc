@@ -11,6 +11,8 @@
 #include <csignal>
 #include <unistd.h>
 #include <chrono>
+#include <map>
+#include <algorithm>
 
 #include "absl/flags/flag.h"
 #include "absl/flags/parse.h"
@@ -39,12 +41,16 @@
 #define MAX_CARS 512
 #define INVALID_TIME 0
 #define TICK_ID_INVALID -1
+#define EVICTED_PUSH_DEADLINE_MS 5000 // evicted vehicles may be gone for good - don't wait on them longer
 #define VEHICLE_UPDATE_BATCH_SIZE 32
+#define MAX_MESSAGE_BYTES ( 64 * 1024 * 1024 ) // debug replies carry timings & spans - same as ecloud_comms.ECLOUD_MAX_MESSAGE_BYTES
 
 #define ECLOUD_PUSH_BASE_PORT 50101
 #define ECLOUD_PUSH_API_PORT 50061
 
 ABSL_FLAG(uint16_t, port, 50051, "Sim API server port for the service");
+ABSL_FLAG(uint16_t, shard_id, 0, "Shard of this server, it serves the vehicles with index % num_shards == shard_id");
+ABSL_FLAG(uint16_t, num_shards, 1, "Number of server shards the fleet is split over");
 ABSL_FLAG(uint16_t, minloglevel, static_cast<uint16_t>(absl::LogSeverityAtLeast::kInfo),
           "Messages logged at a lower level than this don't actually "
           "get logged anywhere");
@@ -78,14 +84,42 @@ using ecloud::ClientDebugHelper;
 using ecloud::Timestamps;
 using ecloud::WaypointRequest;
 using ecloud::EdgeWaypoints;
+using ecloud::WaypointDelta;
+using ecloud::VehicleSpawn;
+using ecloud::VehicleLateness;
 
 volatile std::atomic<int16_t> numCompletedVehicles_;
 volatile std::atomic<int16_t> numRepliedVehicles_;
 volatile std::atomic<int32_t> tickId_;
+volatile std::atomic<int64_t> tickStartNS_; // Server_DoTick receipt - reported back to the sim for tracing
 
-bool repliedCars_[MAX_CARS];
+bool repliedCars_[MAX_CARS]; // guarded by mu_, like the rest of the per-vehicle barrier state
 std::string carNames_[MAX_CARS];
 
+// tick barrier deadlines - same as tick_barrier.TickBarrier
+volatile std::atomic<int16_t> numEvictedVehicles_;
+volatile std::atomic<int16_t> deadlinesPassed_; // deadlines passed in the current tick
+std::atomic<bool> tickComplete_; // the current tick was pushed to the sim
+int32_t tickDeadlineMS_; // 0: wait forever
+int16_t maxMissedTicks_; // consecutive missed deadlines before a vehicle is evicted
+// guarded by mu_: a reply and the watchdog decide under it whether a vehicle replied or is evicted
+bool evictedCars_[MAX_CARS];
+bool doneCars_[MAX_CARS];
+int16_t missedDeadlines_[MAX_CARS];
+
+// asynchronous ticks - same as tick_barrier.StalenessBarrier
+bool asyncTicks_;
+int16_t stalenessBound_; // ticks a vehicle's last reply may lag behind
+std::atomic<bool> stalenessWaiting_; // the sim waits for a vehicle to catch up
+volatile std::atomic<int32_t> lastReplyTick_[MAX_CARS];
+
+// sharding - same as ecloud_shards: vehicle i is served by shard i % numShards_, per-vehicle state is indexed locally
+int16_t shardId_;
+int16_t numShards_;
+
+int16_t globalIndex(int16_t localIdx) { return shardId_ + numShards_ * localIdx; }
+int16_t localIndex(int16_t vehicleIdx) { return vehicleIdx / numShards_; }
+
 bool init_;
 bool isEdge_;
 int16_t numCars_;
@@ -99,11 +133,45 @@ VehicleState vehState_;
 Command command_;
 
 std::vector<std::pair<int16_t, std::string>> serializedEdgeWaypoints_; // vehicleIdx, serializedWPBuffer
+std::vector<VehicleSpawn> vehicleSpawns_; // indexed by vehicleIdx, spawned by the sim - empty if the clients spawn
+
+#define WAYPOINT_POINT_SIZE 13 // packed waypoint_delta.POINT_FIELDS
+
+struct EdgeWaypointState
+{
+    uint32_t version = 0;
+    std::vector<float> points; // packed points
+    WaypointBuffer last; // last versioned push: full, delta or unchanged
+};
+
+std::map<int16_t, EdgeWaypointState> edgeWaypointStates_; // vehicleIdx, versioned buffer
+
+// same as waypoint_delta.apply_delta
+void applyWaypointDelta(std::vector<float> &points, const WaypointDelta &delta)
+{
+    const size_t baseLength = points.size() / WAYPOINT_POINT_SIZE;
+    const size_t dropped = std::min<size_t>(delta.dropped(), baseLength);
+    const size_t kept = std::min<size_t>(baseLength - dropped, delta.length());
+
+    std::vector<float> next(delta.length() * WAYPOINT_POINT_SIZE);
+    std::copy(points.begin() + dropped * WAYPOINT_POINT_SIZE,
+              points.begin() + ( dropped + kept ) * WAYPOINT_POINT_SIZE, next.begin());
+    for ( int i = 0; i < delta.changed_index_size(); i++ )
+    {
+        for ( int c = 0; c < WAYPOINT_POINT_SIZE; c++ )
+            next[delta.changed_index(i) * WAYPOINT_POINT_SIZE + c] = delta.changed_points(i * WAYPOINT_POINT_SIZE + c);
+    }
+    std::copy(delta.appended_points().begin(), delta.appended_points().end(),
+              next.begin() + kept * WAYPOINT_POINT_SIZE);
+    points.swap(next);
+}
 
 absl::Mutex mu_;
 
 volatile std::atomic<int16_t> numRegisteredVehicles_ ABSL_GUARDED_BY(mu_);
 std::vector<std::string> pendingReplies_ ABSL_GUARDED_BY(mu_); // TODO: Move to a hashmap serialized protobuf allows differing message types in same vector
+std::vector<int16_t> newEvictions_ ABSL_GUARDED_BY(mu_); // evicted since the last tick pushed to the sim
+std::vector<VehicleLateness> lateReplies_ ABSL_GUARDED_BY(mu_); // replies after the deadline in the current tick
 
 class PushClient
 {
@@ -111,18 +179,27 @@ class PushClient
         explicit PushClient( std::shared_ptr<grpc::Channel> channel, std::string connection ) :
                             stub_(Ecloud::NewStub(channel)), connection_(connection) {}
 
-        bool PushTick(int32_t tickId, Command command, int64_t lastClientDurationNS)
+        bool PushTick(int32_t tickId, Command command, int64_t lastClientDurationNS, int64_t tickStartNS=INVALID_TIME, int64_t tickEndNS=INVALID_TIME)
         {
             Tick tick;
             tick.set_tick_id(tickId);
             tick.set_command(command);
+            tick.set_server_tick_start_ns(tickStartNS);
+            tick.set_server_tick_end_ns(tickEndNS);
 
             LOG_IF(INFO, command == Command::END) << "pushing END";
 
             tick.set_last_client_duration_ns(lastClientDurationNS);
 
+            return Push(tick);
+        }
+
+        bool Push(const Tick &tick, int64_t deadlineMS=0)
+        {
             grpc::ClientContext context;
             Empty empty;
+            if ( deadlineMS > 0 )
+                context.set_deadline(std::chrono::system_clock::now() + std::chrono::milliseconds(deadlineMS));
 
             // The actual RPC.
             std::mutex mu;
@@ -166,12 +243,21 @@ public:
             numCompletedVehicles_.store(0);
             numRepliedVehicles_.store(0);
             numRegisteredVehicles_.store(0);
+            numEvictedVehicles_.store(0);
+            deadlinesPassed_.store(0);
+            tickComplete_.store(false);
+            stalenessWaiting_.store(false);
             tickId_.store(0);
+            tickStartNS_.store(INVALID_TIME);
 
             vehState_ = VehicleState::REGISTERING;
             command_ = Command::TICK;
 
             numCars_ = 0;
+            tickDeadlineMS_ = 0;
+            maxMissedTicks_ = 0;
+            asyncTicks_ = false;
+            stalenessBound_ = 0;
             configYaml_ = "";
             isEdge_ = false;
 
@@ -182,6 +268,16 @@ public:
 
             vehicleClients_.clear();
             pendingReplies_.clear();
+            vehicleSpawns_.clear();
+            newEvictions_.clear();
+            lateReplies_.clear();
+            for ( int i = 0; i < MAX_CARS; i++ )
+            {
+                evictedCars_[i] = false;
+                doneCars_[i] = false;
+                missedDeadlines_[i] = 0;
+                lastReplyTick_[i].store(0);
+            }
 
             init_ = true;
         }
@@ -220,6 +316,43 @@ public:
                                const VehicleUpdate* request,
                                Empty* empty) override {
 
+        const int16_t vehicleIdx = localIndex(request->vehicle_index());
+        // either the watchdog evicted the vehicle first, or it sees the reply and leaves the vehicle alone - never both
+        mu_.Lock();
+        const bool evicted = evictedCars_[vehicleIdx];
+        if ( !evicted )
+        {
+            if ( deadlinesPassed_.load() > 0 )
+            {
+                VehicleLateness lateness;
+                lateness.set_vehicle_index(request->vehicle_index());
+                lateness.set_reply_ms(( nowNS() - tickStartNS_.load() ) / 1e6);
+                lateness.set_missed_deadlines(missedDeadlines_[vehicleIdx]);
+                lateReplies_.push_back(lateness);
+            }
+            else
+            {
+                missedDeadlines_[vehicleIdx] = 0;
+            }
+            repliedCars_[vehicleIdx] = true;
+            if ( request->vehicle_state() == VehicleState::TICK_DONE )
+                doneCars_[vehicleIdx] = true;
+        }
+        mu_.Unlock();
+
+        if ( evicted )
+        {
+            // evicted vehicles left the barrier - drop what they still send
+            LOG(WARNING) << "Client_SendUpdate - dropping update of evicted vehicle " << request->vehicle_index() << " for tick " << request->tick_id();
+            ServerUnaryReactor* reactor = context->DefaultReactor();
+            reactor->Finish(Status::OK);
+            return reactor;
+        }
+
+        // async ticks: vehicles reply to the latest tick they acted on
+        int32_t lastReplyTick = lastReplyTick_[vehicleIdx].load();
+        while ( request->tick_id() > lastReplyTick && !lastReplyTick_[vehicleIdx].compare_exchange_weak(lastReplyTick, request->tick_id()) ) {}
+
         if ( isEdge_ || request->vehicle_index() == SPECTATOR_INDEX || request->vehicle_state() == VehicleState::TICK_DONE || request->vehicle_state() == VehicleState::DEBUG_INFO_UPDATE )
         {
             std::string msg;
@@ -238,8 +371,6 @@ public:
             }
         }
 
-        repliedCars_[request->vehicle_index()] = true;
-
         DLOG(INFO) << "Client_SendUpdate - received reply from vehicle " << request->vehicle_index() << " for tick id:" << request->tick_id();
 
         if ( request->vehicle_state() == VehicleState::TICK_DONE )
@@ -258,15 +389,10 @@ public:
         }
 
         // BEGIN PUSH
-        const int16_t replies_ = numRepliedVehicles_.load();
-        const int16_t completions_ = numCompletedVehicles_.load();
-        const bool complete_ = ( replies_ + completions_ ) == numCars_;
-
-        LOG_IF(INFO, complete_ ) << "tick " << request->tick_id() << " COMPLETE";
-        if ( complete_ )
+        if ( !tickComplete_.load() && barrierComplete() )
         {
-            const int64_t lastClientDurationNS = request->duration_ns();
-            simAPIClient_->PushTick( request->tick_id(), command_, lastClientDurationNS );
+            LOG(INFO) << "tick " << request->tick_id() << " COMPLETE";
+            pushTickComplete( asyncTicks_ ? tickId_.load() : request->tick_id(), request->duration_ns() );
         }
 
         ServerUnaryReactor* reactor = context->DefaultReactor();
@@ -279,20 +405,36 @@ public:
                                const WaypointRequest* request,
                                WaypointBuffer* buffer) override {
 
-        for ( int i = 0; i < serializedEdgeWaypoints_.size(); i++ )
+        const auto state = edgeWaypointStates_.find(request->vehicle_index());
+        if ( state != edgeWaypointStates_.end() )
+        {
+            // versioned buffer: send what brings the client's version up to date
+            buffer->set_vehicle_index(request->vehicle_index());
+            buffer->set_version(state->second.version);
+            if ( request->version() == state->second.version )
+                buffer->set_unchanged(true);
+            else if ( state->second.last.has_delta() && request->version() == state->second.last.delta().base_version() )
+                buffer->mutable_delta()->CopyFrom(state->second.last.delta());
+            else
+                buffer->mutable_points()->Add(state->second.points.begin(), state->second.points.end());
+        }
+        else
         {
-            const std::pair<int16_t, std::string > wpPair = serializedEdgeWaypoints_[i];
-            if ( wpPair.first == request->vehicle_index() )
+            for ( int i = 0; i < serializedEdgeWaypoints_.size(); i++ )
             {
-                buffer->set_vehicle_index(request->vehicle_index());
-                WaypointBuffer *wpBuf;
-                wpBuf->ParseFromString(wpPair.second);
-                for ( Waypoint wp : wpBuf->waypoint_buffer())
+                const std::pair<int16_t, std::string > wpPair = serializedEdgeWaypoints_[i];
+                if ( wpPair.first == request->vehicle_index() )
                 {
-                    Waypoint *p = buffer->add_waypoint_buffer();
-                    p->CopyFrom(wp);
+                    buffer->set_vehicle_index(request->vehicle_index());
+                    WaypointBuffer wpBuf;
+                    wpBuf.ParseFromString(wpPair.second);
+                    for ( Waypoint wp : wpBuf.waypoint_buffer())
+                    {
+                        Waypoint *p = buffer->add_waypoint_buffer();
+                        p->CopyFrom(wp);
+                    }
+                    break;
                 }
-                break;
             }
         }
 
@@ -312,8 +454,11 @@ public:
             DLOG(INFO) << "got a registration update";
 
             mu_.Lock();
-            reply->set_vehicle_index(numRegisteredVehicles_.load());
-            const std::string connection = absl::StrFormat("%s:%d", request->vehicle_ip(), ECLOUD_PUSH_BASE_PORT + numRegisteredVehicles_.load() );
+            const int16_t vehicleIdx = numRegisteredVehicles_.load();
+            reply->set_vehicle_index(globalIndex(vehicleIdx));
+            // multi-vehicle client processes listen on the push ports assigned by launch_vehicles.py
+            const int pushPort = request->push_port() > 0 ? request->push_port() : ECLOUD_PUSH_BASE_PORT + reply->vehicle_index();
+            const std::string connection = absl::StrFormat("%s:%d", request->vehicle_ip(), pushPort );
             PushClient *vehicleClient = new PushClient(grpc::CreateChannel(connection, grpc::InsecureChannelCredentials()), connection);
             vehicleClients_.push_back(std::move(vehicleClient));
             numRegisteredVehicles_++;
@@ -322,9 +467,11 @@ public:
             reply->set_test_scenario(configYaml_);
             reply->set_application(application_);
             reply->set_version(version_);
+            if ( reply->vehicle_index() < vehicleSpawns_.size() )
+                reply->add_spawns()->CopyFrom(vehicleSpawns_[reply->vehicle_index()]);
 
             DLOG(INFO) << "RegisterVehicle - REGISTERING - container " << request->container_name() << " got vehicle id: " << reply->vehicle_index();
-            carNames_[reply->vehicle_index()] = request->container_name();
+            carNames_[vehicleIdx] = request->container_name();
         }
         else if ( request->vehicle_state() == VehicleState::CARLA_UPDATE )
         {
@@ -364,26 +511,61 @@ public:
     ServerUnaryReactor* Server_DoTick(CallbackServerContext* context,
                                const Tick* request,
                                Empty* empty) override {
+        std::vector<bool> evicted(vehicleClients_.size());
+        const auto now = std::chrono::system_clock::now();
+        const int64_t tickStartNS = std::chrono::duration_cast<std::chrono::nanoseconds>(now.time_since_epoch()).count();
+        mu_.Lock();
         for ( int i = 0; i < numCars_; i++ )
             repliedCars_[i] = false;
-
+        for ( int i = 0; i < vehicleClients_.size(); i++ )
+            evicted[i] = evictedCars_[i];
         numRepliedVehicles_ = 0;
+        deadlinesPassed_ = 0;
+        tickComplete_ = false;
+        lateReplies_.clear();
+        // with the reset: a watchdog of the last tick must not see the new tick's state under its tick id
         assert(tickId_ == request->tick_id() - 1);
         tickId_++;
+        tickStartNS_.store(tickStartNS);
+        mu_.Unlock();
         command_ = request->command();
 
-        const auto now = std::chrono::system_clock::now();
         DLOG(INFO) << "received new tick " << request->tick_id() << " at " << std::chrono::duration_cast<std::chrono::milliseconds>(
             now.time_since_epoch()).count();
 
         const int32_t tickId = request->tick_id();
         for ( int i = 0; i < vehicleClients_.size(); i++ )
         {
+            if ( evicted[i] )
+                continue;
             PushClient *v = vehicleClients_[i];
-            std::thread t( &PushClient::PushTick, v, tickId, command_, INVALID_TIME );
+            std::thread t( &PushClient::PushTick, v, tickId, command_, INVALID_TIME, INVALID_TIME, INVALID_TIME );
             t.detach();
         }
 
+        if ( asyncTicks_ && command_ != Command::REQUEST_DEBUG_INFO )
+        {
+            // the sim goes on right away unless a vehicle fell too far behind
+            if ( withinStalenessBound() )
+                pushTickComplete( tickId, INVALID_TIME );
+            else
+            {
+                stalenessWaiting_ = true;
+                LOG(INFO) << "tick " << tickId << " waits for vehicles more than " << stalenessBound_ << " ticks behind";
+                if ( barrierComplete() ) // caught up in the meantime
+                    pushTickComplete( tickId, INVALID_TIME );
+            }
+        }
+
+        if ( numCars_ == 0 ) // a shard without vehicles completes every tick right away
+            pushTickComplete( tickId, INVALID_TIME );
+
+        if ( tickDeadlineMS_ > 0 )
+        {
+            std::thread watchdog( &EcloudServiceImpl::watchTick, this, tickId, tickStartNS );
+            watchdog.detach();
+        }
+
         ServerUnaryReactor* reactor = context->DefaultReactor();
         reactor->Finish(Status::OK);
         return reactor;
@@ -395,7 +577,33 @@ public:
         serializedEdgeWaypoints_.clear();
 
         for ( WaypointBuffer wpBuf : edgeWaypoints->all_waypoint_buffers() )
-        {   std::string serializedWPs;
+        {
+            if ( wpBuf.version() != 0 )
+            {
+                EdgeWaypointState &state = edgeWaypointStates_[wpBuf.vehicle_index()];
+                if ( wpBuf.unchanged() )
+                    continue;
+
+                if ( wpBuf.has_delta() )
+                {
+                    if ( wpBuf.delta().base_version() != state.version )
+                    {
+                        LOG(ERROR) << "waypoint delta for vehicle " << wpBuf.vehicle_index() << " is based on version "
+                                   << wpBuf.delta().base_version() << ", holding " << state.version;
+                        continue;
+                    }
+                    applyWaypointDelta(state.points, wpBuf.delta());
+                }
+                else
+                {
+                    state.points.assign(wpBuf.points().begin(), wpBuf.points().end());
+                }
+                state.version = wpBuf.version();
+                state.last = wpBuf;
+                continue;
+            }
+
+            std::string serializedWPs;
             wpBuf.SerializeToString(&serializedWPs);
             const std::pair< int16_t, std::string > wpPair = std::make_pair( wpBuf.vehicle_index(), serializedWPs );
             serializedEdgeWaypoints_.push_back(wpPair);
@@ -414,12 +622,20 @@ public:
         configYaml_ = request->test_scenario();
         application_ = request->application();
         version_ = request->version();
-        numCars_ = request->vehicle_index(); // bit of a hack to use vindex as count
+        numCars_ = ( request->vehicle_index() - shardId_ + numShards_ - 1 ) / numShards_; // bit of a hack to use vindex as count - of the whole fleet, this shard serves every numShards_-th vehicle
         isEdge_ = request->is_edge();
+        vehicleSpawns_.assign(request->spawns().begin(), request->spawns().end());
+        tickDeadlineMS_ = request->tick_deadline_ms();
+        maxMissedTicks_ = request->max_missed_ticks();
+        asyncTicks_ = request->async_ticks();
+        stalenessBound_ = request->staleness_bound();
         // TODO: simIP_ = // always localhost for now
 
         assert( numCars_ <= MAX_CARS );
-        DLOG(INFO) << "numCars_: " << numCars_;
+        DLOG(INFO) << "numCars_: " << numCars_ << " (shard " << shardId_ << "/" << numShards_ << ")";
+
+        if ( numCars_ == 0 ) // nothing to register
+            simAPIClient_->PushTick( TICK_ID_INVALID, command_, INVALID_TIME);
 
         ServerUnaryReactor* reactor = context->DefaultReactor();
         reactor->Finish(Status::OK);
@@ -432,8 +648,18 @@ public:
         command_ = Command::END;
 
         LOG(INFO) << "pushing END";
+        std::vector<bool> evicted(vehicleClients_.size());
+        mu_.Lock();
+        for ( int i = 0; i < vehicleClients_.size(); i++ )
+            evicted[i] = evictedCars_[i];
+        mu_.Unlock();
         for ( int i = 0; i < vehicleClients_.size(); i++ )
-            vehicleClients_[i]->PushTick(TICK_ID_INVALID, Command::END, INVALID_TIME); // don't thread --> block
+        {
+            if ( evicted[i] ) // a hung vehicle would block END forever - a slow one still has to exit
+                pushDetached( i, Command::END );
+            else
+                vehicleClients_[i]->PushTick(TICK_ID_INVALID, Command::END, INVALID_TIME); // don't thread --> block
+        }
 
         ServerUnaryReactor* reactor = context->DefaultReactor();
         reactor->Finish(Status::OK);
@@ -442,6 +668,118 @@ public:
 
     private:
 
+        // push to a vehicle that left the barrier: it may only be slow, or gone - never wait on it
+        void pushDetached(int16_t vehicleIdx, Command command)
+        {
+            Tick tick;
+            tick.set_tick_id(TICK_ID_INVALID);
+            tick.set_command(command);
+            std::thread t( &PushClient::Push, vehicleClients_[vehicleIdx], tick, EVICTED_PUSH_DEADLINE_MS );
+            t.detach();
+        }
+
+        static int64_t nowNS()
+        {
+            return std::chrono::duration_cast<std::chrono::nanoseconds>(
+                std::chrono::system_clock::now().time_since_epoch()).count();
+        }
+
+        bool withinStalenessBound()
+        {
+            const int32_t tickId = tickId_.load();
+            absl::MutexLock lock(&mu_);
+            for ( int i = 0; i < numCars_; i++ )
+            {
+                if ( evictedCars_[i] || doneCars_[i] )
+                    continue;
+                if ( tickId - lastReplyTick_[i].load() > stalenessBound_ )
+                    return false;
+            }
+            return true;
+        }
+
+        bool barrierComplete()
+        {
+            if ( asyncTicks_ )
+            {
+                // debug requests wait for every vehicle, stale TICK_OK replies don't count
+                if ( command_ == Command::REQUEST_DEBUG_INFO )
+                    return ( numCompletedVehicles_.load() + numEvictedVehicles_.load() ) >= numCars_;
+                return withinStalenessBound();
+            }
+            return ( numRepliedVehicles_.load() + numCompletedVehicles_.load() + numEvictedVehicles_.load() ) >= numCars_;
+        }
+
+        // push the completed tick to the sim, once per tick - replies and the watchdog race for it
+        void pushTickComplete(int32_t tickId, int64_t lastClientDurationNS)
+        {
+            if ( tickComplete_.exchange(true) )
+                return;
+
+            Tick tick;
+            tick.set_tick_id(tickId);
+            tick.set_command(command_);
+            tick.set_last_client_duration_ns(lastClientDurationNS);
+            tick.set_server_tick_start_ns(tickStartNS_.load());
+            tick.set_server_tick_end_ns(nowNS());
+            tick.set_staleness_barrier(stalenessWaiting_.exchange(false));
+            mu_.Lock();
+            for ( const int16_t vehicleIdx : newEvictions_ )
+                tick.add_evicted_vehicles(vehicleIdx);
+            newEvictions_.clear();
+            for ( const VehicleLateness &lateness : lateReplies_ )
+                tick.add_late_vehicles()->CopyFrom(lateness);
+            mu_.Unlock();
+            simAPIClient_->Push(tick);
+        }
+
+        // counts missed deadlines of the vehicles that did not reply and evicts the ones that missed maxMissedTicks_ in a row
+        void watchTick(int32_t tickId, int64_t tickStartNS)
+        {
+            int16_t deadlinesPassed = 0;
+            while ( true )
+            {
+                const int64_t deadlineNS = tickStartNS + ( deadlinesPassed + 1 ) * int64_t(tickDeadlineMS_) * 1000000;
+                std::this_thread::sleep_for(std::chrono::nanoseconds(std::max<int64_t>(0, deadlineNS - nowNS())));
+                if ( tickComplete_.load() || tickId_.load() != tickId )
+                    return;
+
+                mu_.Lock();
+                // Server_DoTick may have started the next tick since the check above
+                if ( tickComplete_.load() || tickId_.load() != tickId )
+                {
+                    mu_.Unlock();
+                    return;
+                }
+                deadlinesPassed = ++deadlinesPassed_;
+                for ( int i = 0; i < numCars_; i++ )
+                {
+                    if ( repliedCars_[i] || evictedCars_[i] || doneCars_[i] )
+                        continue;
+
+                    missedDeadlines_[i]++;
+                    LOG(WARNING) << "vehicle " << globalIndex(i) << " (" << carNames_[i] << ") missed deadline " << missedDeadlines_[i] << " of tick " << tickId;
+                    if ( missedDeadlines_[i] >= maxMissedTicks_ )
+                    {
+                        LOG(ERROR) << "evicting vehicle " << globalIndex(i) << " (" << carNames_[i] << ") after " << missedDeadlines_[i] << " missed deadlines";
+                        evictedCars_[i] = true;
+                        newEvictions_.push_back(globalIndex(i));
+                        numEvictedVehicles_++;
+                        // a slow vehicle leaves the scenario instead of waiting for ticks forever - and holding up its host's fleet step
+                        pushDetached( i, Command::EVICTED );
+                    }
+                }
+                mu_.Unlock();
+
+                if ( tickId_.load() == tickId && barrierComplete() )
+                {
+                    LOG(INFO) << "tick " << tickId << " COMPLETE after evictions";
+                    pushTickComplete( tickId, INVALID_TIME );
+                    return;
+                }
+            }
+        }
+
         std::vector< PushClient * > vehicleClients_;
         PushClient * simAPIClient_;
 };
@@ -459,6 +797,8 @@ void RunServer(uint16_t port) {
     // Register "service" as the instance through which we'll communicate with
     // clients. In this case it corresponds to an *synchronous* service.
     builder.RegisterService(&service);
+    builder.SetMaxReceiveMessageSize(MAX_MESSAGE_BYTES);
+    builder.SetMaxSendMessageSize(MAX_MESSAGE_BYTES);
     // Sample way of setting keepalive arguments on the server. Here, we are
     // configuring the server to send keepalive pings at a period of 10 minutes
     // with a timeout of 20 seconds. Additionally, pings will be sent even if
@@ -489,6 +829,10 @@ int main(int argc, char* argv[]) {
     absl::ParseCommandLine(argc, argv);
     //absl::InitializeLog();
 
+    shardId_ = absl::GetFlag(FLAGS_shard_id);
+    numShards_ = absl::GetFlag(FLAGS_num_shards);
+    assert( numShards_ > 0 && shardId_ < numShards_ );
+
     std::thread server = std::thread(&RunServer,absl::GetFlag(FLAGS_port));
     
     absl::SetMinLogLevel(static_cast<absl::LogSeverityAtLeast>(absl::GetFlag(FLAGS_minloglevel)));
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+Sharding the ecloud server over several processes.
+
+One ecloud server runs the tick barrier of the whole fleet, so its reply
+handling is the bottleneck at a few hundred vehicles. With N shards,
+vehicle i is served by shard i % N - a separate ecloud_server process
+listening on base_port + shard id. Every shard runs the barrier of its own
+vehicles and pushes its completion to the ShardCoordinator, which notifies
+the sim once every shard completed the tick. ShardedEcloudStub lets the
+sim talk to the shards as if they were one server: commands fan out to
+every shard and the per-shard update batches are merged on retrieval.
+
+Vehicles pick their shard before registration from their ordinal in the
+fleet, so shard s registers exactly shard_vehicle_count(total, s, N)
+vehicles and hands them the global indices s, s + N, s + 2N, ...
+
+run_null_fleet and benchmark_shards measure the tick barrier of N local
+shards with null vehicles that only acknowledge ticks, see
+shard_benchmark.py.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import asyncio
+import logging
+import subprocess
+import sys
+import time
+
+import grpc
+import numpy as np
+
+import ecloud_pb2 as ecloud
+import ecloud_pb2_grpc as ecloud_rpc
+
+from opencda.ecloud_server.ecloud_comms import ecloud_run_push_server
+
+logger = logging.getLogger(__name__)
+
+ECLOUD_BASE_PORT = 50051 # port of shard 0, shard s listens on ECLOUD_BASE_PORT + s
+ECLOUD_PUSH_API_PORT = 50061 # the sim's push port, where the coordinator listens
+ECLOUD_SERVER_BINARY = './opencda/ecloud_server/ecloud_server'
+NULL_SERVER = (sys.executable, '-m', 'opencda.ecloud_server.ecloud_null_server') # the binary's Python stand-in
+BENCH_PUSH_BASE_PORT = 51101 # null vehicles, clear of the launcher's push ports
+NSEC_TO_MSEC = 1e-6
+
+
+def shard_of(vehicle_index, num_shards):
+    """
+    Shard serving a vehicle - by global index, or by its ordinal in the
+    fleet before it registered.
+    """
+    return vehicle_index % num_shards
+
+
+def shard_port(shard_id, base_port=ECLOUD_BASE_PORT):
+    return base_port + shard_id
+
+
+def shard_vehicle_count(num_vehicles, shard_id, num_shards):
+    """
+    Vehicles registering with a shard, same as the ecloud server's numCars_.
+    """
+    return max(0, (num_vehicles - shard_id + num_shards - 1) // num_shards)
+
+
+def merge_ticks(ticks):
+    """
+    Merge the completions every shard pushed for one tick.
+
+    The barrier started with the first shard and completed with the last,
+    the last client duration is that of the last shard to complete.
+
+    Parameters
+    ----------
+    ticks : list
+        ecloud.Tick of every shard.
+
+    Returns
+    -------
+    tick : ecloud.Tick
+    """
+    tick = ecloud.Tick()
+    tick.tick_id = ticks[0].tick_id
+    tick.command = ticks[0].command
+
+    last = max(ticks, key=lambda t: t.server_tick_end_ns)
+    tick.last_client_duration_ns = last.last_client_duration_ns
+    tick.server_tick_end_ns = last.server_tick_end_ns
+    starts = [t.server_tick_start_ns for t in ticks if t.server_tick_start_ns]
+    tick.server_tick_start_ns = min(starts) if starts else 0
+
+    for t in ticks:
+        tick.evicted_vehicles.extend(t.evicted_vehicles)
+        tick.late_vehicles.extend(t.late_vehicles)
+    tick.staleness_barrier = any(t.staleness_barrier for t in ticks)
+    return tick
+
+
+def merge_updates(responses):
+    """
+    Merge the vehicle update batches of every shard, ordered by vehicle.
+
+    Returns
+    -------
+    response : ecloud.EcloudResponse
+    """
+    response = ecloud.EcloudResponse()
+    updates = [update for r in responses for update in r.vehicle_update]
+    response.vehicle_update.extend(sorted(updates,
+                                          key=lambda u: u.vehicle_index))
+    if responses:
+        response.tick_id = max(r.tick_id for r in responses)
+    return response
+
+
+def split_edge_waypoints(edge_waypoints, num_shards):
+    """
+    The edge waypoint buffers of each shard's vehicles.
+
+    Returns
+    -------
+    shard_waypoints : list
+        ecloud.EdgeWaypoints per shard.
+    """
+    shard_waypoints = [ecloud.EdgeWaypoints() for _ in range(num_shards)]
+    for buffer in edge_waypoints.all_waypoint_buffers:
+        shard = shard_of(buffer.vehicle_index, num_shards)
+        shard_waypoints[shard].all_waypoint_buffers.append(buffer)
+    return shard_waypoints
+
+
+class ShardedEcloudStub(object):
+    """
+    The sim side calls of EcloudStub, fanned out to every shard.
+
+    Parameters
+    ----------
+    stubs : list
+        EcloudStub of every shard, in shard order.
+    """
+
+    def __init__(self, stubs):
+        self.stubs = stubs
+
+    @property
+    def num_shards(self):
+        return len(self.stubs)
+
+    async def Server_StartScenario(self, request):
+        # every shard gets the fleet size and works out its own share
+        await asyncio.gather(*[stub.Server_StartScenario(request)
+                               for stub in self.stubs])
+        return ecloud.Empty()
+
+    async def Server_DoTick(self, request):
+        await asyncio.gather(*[stub.Server_DoTick(request)
+                               for stub in self.stubs])
+        return ecloud.Empty()
+
+    async def Server_GetVehicleUpdates(self, request):
+        responses = await asyncio.gather(
+            *[stub.Server_GetVehicleUpdates(request) for stub in self.stubs])
+        return merge_updates(responses)
+
+    async def Server_PushEdgeWaypoints(self, request):
+        shard_waypoints = split_edge_waypoints(request, self.num_shards)
+        await asyncio.gather(*[stub.Server_PushEdgeWaypoints(waypoints)
+                               for stub, waypoints
+                               in zip(self.stubs, shard_waypoints)])
+        return ecloud.Empty()
+
+    async def Server_EndScenario(self, request):
+        await asyncio.gather(*[stub.Server_EndScenario(request)
+                               for stub in self.stubs])
+        return ecloud.Empty()
+
+
+class ShardCoordinator(ecloud_rpc.EcloudServicer):
+    """
+    Push server of the sim when the ecloud server is sharded: collects the
+    completion of every shard and queues one merged tick per tick.
+
+    Parameters
+    ----------
+    q : asyncio.Queue
+        The sim's push queue.
+
+    num_shards : int
+
+    Attributes
+    ----------
+    shard_barrier_ms : list
+        Per merged tick, every shard's barrier time in ms.
+    """
+
+    def __init__(self, q, num_shards):
+        self.q = q
+        self.num_shards = num_shards
+        self.pending = {} # tick id -> completions pushed so far
+        self.shard_barrier_ms = []
+
+    def add(self, tick):
+        """
+        A shard's completion.
+
+        Returns
+        -------
+        tick : ecloud.Tick
+            The merged tick once every shard completed it, otherwise None.
+        """
+        ticks = self.pending.setdefault(tick.tick_id, [])
+        completion = ecloud.Tick()
+        completion.CopyFrom(tick)
+        ticks.append(completion)
+        if len(ticks) < self.num_shards:
+            return None
+
+        del self.pending[tick.tick_id]
+        self.shard_barrier_ms.append(
+            [(t.server_tick_end_ns - t.server_tick_start_ns) * NSEC_TO_MSEC
+             for t in ticks if t.server_tick_start_ns])
+        return merge_ticks(ticks)
+
+    async def PushTick(self, tick, context):
+        merged = self.add(tick)
+        if merged is not None:
+            self.q.put_nowait(merged)
+        return ecloud.Empty()
+
+
+async def ecloud_run_shard_coordinator(port, q, num_shards, ready=None):
+    """
+    Run the coordinator's push server; ready is set once it accepts
+    connections.
+    """
+    server = grpc.aio.server()
+    ecloud_rpc.add_EcloudServicer_to_server(ShardCoordinator(q, num_shards),
+                                            server)
+    server.add_insecure_port(f"[::]:{port}")
+    logger.info(f"starting shard coordinator for {num_shards} shards on "
+                f"port {port}")
+
+    await server.start()
+    if ready is not None:
+        ready.set()
+    await server.wait_for_termination()
+
+
+def ecloud_server_command(shard_id, num_shards, base_port=ECLOUD_BASE_PORT,
+                          log_level=2, binary=ECLOUD_SERVER_BINARY):
+    # the binary's path, or a command like NULL_SERVER
+    command = [binary] if isinstance(binary, str) else list(binary)
+    return command + [f'--minloglevel={log_level}',
+                      f'--port={shard_port(shard_id, base_port)}',
+                      f'--shard_id={shard_id}', f'--num_shards={num_shards}']
+
+
+def shard_stubs(ip, num_shards, base_port=ECLOUD_BASE_PORT, options=None):
+    """
+    EcloudStub of every shard, a ShardedEcloudStub for more than one.
+    """
+    stubs = [ecloud_rpc.EcloudStub(grpc.aio.insecure_channel(
+                 target=f"{ip}:{shard_port(s, base_port)}", options=options))
+             for s in range(num_shards)]
+    return stubs[0] if num_shards == 1 else ShardedEcloudStub(stubs)
+
+
+async def run_null_vehicle(stub, push_port, name):
+    """
+    Register a vehicle without CARLA and acknowledge every tick until END
+    or its eviction.
+    """
+    push_q = asyncio.Queue()
+    push_ready = asyncio.Event()
+    push_server = asyncio.create_task(
+        ecloud_run_push_server(push_port, push_q, push_ready))
+    await push_ready.wait()
+
+    request = ecloud.RegistrationInfo()
+    request.vehicle_state = ecloud.VehicleState.REGISTERING
+    request.container_name = name
+    request.vehicle_ip = 'localhost'
+    request.push_port = push_port
+    sim_info = await stub.Client_RegisterVehicle(request)
+
+    update = ecloud.RegistrationInfo()
+    update.vehicle_state = ecloud.VehicleState.CARLA_UPDATE
+    update.vehicle_index = sim_info.vehicle_index
+    await stub.Client_RegisterVehicle(update)
+
+    while True:
+        tick = await push_q.get()
+        if tick.command in (ecloud.Command.END, ecloud.Command.EVICTED):
+            break
+        reply = ecloud.VehicleUpdate()
+        reply.tick_id = tick.tick_id
+        reply.vehicle_index = sim_info.vehicle_index
+        reply.vehicle_state = ecloud.VehicleState.TICK_OK
+        await stub.Client_SendUpdate(reply)
+
+    push_server.cancel()
+
+
+async def run_null_fleet(first_vehicle, num_vehicles, num_shards,
+                         push_port=BENCH_PUSH_BASE_PORT,
+                         base_port=ECLOUD_BASE_PORT):
+    """
+    Run vehicles first_vehicle .. first_vehicle + num_vehicles - 1 of a null
+    fleet in one process, each registering with its shard.
+    """
+    stubs = [ecloud_rpc.EcloudStub(grpc.aio.insecure_channel(
+                 f"localhost:{shard_port(s, base_port)}"))
+             for s in range(num_shards)]
+    await asyncio.gather(*[
+        run_null_vehicle(stubs[shard_of(ordinal, num_shards)],
+                         push_port + ordinal, f"null_vehicle_{ordinal}")
+        for ordinal in range(first_vehicle, first_vehicle + num_vehicles)])
+
+
+def null_fleet_command(first_vehicle, num_vehicles, num_shards,
+                       push_port=BENCH_PUSH_BASE_PORT,
+                       base_port=ECLOUD_BASE_PORT):
+    return [sys.executable, '-m', __name__,
+            '--first_vehicle', str(first_vehicle),
+            '--num_vehicles', str(num_vehicles),
+            '--num_shards', str(num_shards),
+            '--push_port', str(push_port),
+            '--port', str(base_port)]
+
+
+async def benchmark_shards(num_vehicles, num_shards, num_ticks=50,
+                           num_processes=8, binary=ECLOUD_SERVER_BINARY,
+                           base_port=ECLOUD_BASE_PORT):
+    """
+    Tick barrier latency of num_vehicles null vehicles on num_shards local
+    ecloud server shards.
+
+    Returns
+    -------
+    stats : dict
+        Tick and registration times in ms.
+    """
+    shards = [subprocess.Popen(ecloud_server_command(s, num_shards, base_port,
+                                                     binary=binary))
+              for s in range(num_shards)]
+    push_q = asyncio.Queue()
+    coordinator = ShardCoordinator(push_q, num_shards)
+    coordinator_server = grpc.aio.server()
+    ecloud_rpc.add_EcloudServicer_to_server(coordinator, coordinator_server)
+    coordinator_server.add_insecure_port(f"[::]:{ECLOUD_PUSH_API_PORT}")
+    await coordinator_server.start()
+    channels = [grpc.aio.insecure_channel(f"localhost:{shard_port(s, base_port)}")
+                for s in range(num_shards)]
+    stub = ShardedEcloudStub([ecloud_rpc.EcloudStub(channel)
+                              for channel in channels])
+
+    fleet = []
+    try:
+        request = ecloud.SimulationInfo()
+        request.test_scenario = '{}'
+        request.application = 'single'
+        request.vehicle_index = num_vehicles # fleet size
+        for channel in channels:
+            await channel.channel_ready()
+        await stub.Server_StartScenario(request)
+
+        registration_start_ns = time.time_ns()
+        per_process = -(-num_vehicles // num_processes)
+        for first in range(0, num_vehicles, per_process):
+            fleet.append(subprocess.Popen(null_fleet_command(
+                first, min(per_process, num_vehicles - first), num_shards,
+                base_port=base_port)))
+        await push_q.get()
+        registration_ms = (time.time_ns() - registration_start_ns) * \
+            NSEC_TO_MSEC
+        await stub.Server_GetVehicleUpdates(ecloud.Empty())
+
+        tick_ms = []
+        for tick_id in range(1, num_ticks + 1):
+            tick = ecloud.Tick()
+            tick.tick_id = tick_id
+            tick.command = ecloud.Command.TICK
+            start_ns = time.time_ns()
+            await stub.Server_DoTick(tick)
+            await push_q.get()
+            tick_ms.append((time.time_ns() - start_ns) * NSEC_TO_MSEC)
+            await stub.Server_GetVehicleUpdates(ecloud.Empty())
+
+        await stub.Server_EndScenario(ecloud.Empty())
+        for process in fleet:
+            process.wait()
+    finally:
+        for process in fleet + shards:
+            if process.poll() is None:
+                process.terminate()
+        await coordinator_server.stop(None)
+
+    slowest_shard_ms = [max(ms) for ms in coordinator.shard_barrier_ms[1:]
+                        if ms]
+    return {'registration_ms': registration_ms,
+            'tick_ms': {'mean': np.mean(tick_ms),
+                        'p95': np.percentile(tick_ms, 95)},
+            'slowest_shard_ms': np.mean(slowest_shard_ms)
+            if slowest_shard_ms else 0.0}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="eCloud null vehicle fleet.")
+    parser.add_argument("--first_vehicle", type=int, required=True)
+    parser.add_argument("--num_vehicles", type=int, required=True)
+    parser.add_argument("--num_shards", type=int, default=1)
+    parser.add_argument("--push_port", type=int, default=BENCH_PUSH_BASE_PORT)
+    parser.add_argument("--port", type=int, default=ECLOUD_BASE_PORT)
+    opt = parser.parse_args()
+    logging.getLogger('opencda.ecloud_server.ecloud_comms').setLevel(
+        logging.WARNING)
+    asyncio.get_event_loop().run_until_complete(run_null_fleet(
+        opt.first_vehicle, opt.num_vehicles, opt.num_shards, opt.push_port,
+        opt.port))
+    sys.exit(0) # the push servers' threads would keep the loop from closing
@@ -0,0 +1,917 @@
+# -*- coding: utf-8 -*-
+"""
+Shared-memory transport for runs with the sim and every vehicle on one
+machine.
+
+Over gRPC every tick crosses loopback twice per vehicle - the server's push
+and the vehicle's reply - with protobuf serialization on both ends. With
+the shm transport the sim hosts the server itself (ShmEcloudServer) and the
+per-tick traffic goes through a shared memory segment instead:
+
+- the tick is a single fixed-layout record the sim writes under a sequence
+  lock, every vehicle is woken through its own eventfd;
+- every vehicle has a single-producer ring of fixed-layout update records
+  (transform, velocity, state flags, timing), one eventfd shared by the
+  fleet wakes the sim.
+
+Registration, debug info, TICK_DONE updates and edge waypoints don't fit a
+fixed layout; they stay protobufs, framed on a unix socket per vehicle -
+which also hands the vehicle its eventfds. ShmEcloudServer and
+ShmEcloudClient offer the calls of EcloudStub on either side, so the sim
+and vehiclesim.py run unchanged on top; the tick barrier is
+tick_barrier.TickBarrier, deadlines and evictions included. Only the
+synchronous tick mode with one server shard is supported.
+
+Rings are lock free with one writer per index: the vehicle only writes its
+head, the sim only its tail, a record is complete before the head moves
+past it. That relies on the stores landing in program order, as they do
+on x86.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import ecloud_pb2 as ecloud
+
+from opencda.core.common.tick_barrier import TickBarrier
+from opencda.core.common.waypoint_delta import apply_delta, unpack_points
+
+logger = logging.getLogger(__name__)
+
+SHM_NAME = 'ecloud_shm'
+SHM_MAX_CARS = 512
+RING_CAPACITY = 8 # records per vehicle; a full ring falls back to the socket
+CACHE_LINE = 64
+TICK_ID_INVALID = -1
+NSEC_TO_MSEC = 1e-6
+
+TICK_RECORD = np.dtype([('seq', '<u8'), # odd while the sim writes
+                        ('tick_id', '<i4'),
+                        ('command', '<i4'),
+                        ('server_tick_start_ns', '<i8'),
+                        ('max_cars', '<u4'), # layout, written once by the sim
+                        ('capacity', '<u4')])
+
+UPDATE_RECORD = np.dtype([('tick_id', '<i4'),
+                          ('vehicle_index', '<i4'),
+                          ('vehicle_state', '<i4'),
+                          ('flags', '<u4'),
+                          ('transform', '<f8', (6,)), # x, y, z, roll, pitch, yaw
+                          ('velocity', '<f8', (3,)),
+                          ('duration_ns', '<i8')])
+
+HAS_TRANSFORM = 1
+
+# framed protobufs on a vehicle's socket: length, message type
+FRAME_HEADER = struct.Struct('<IB')
+MSG_REGISTER = 0 # RegistrationInfo
+MSG_SIM_INFO = 1 # SimulationInfo, with the eventfds
+MSG_UPDATE = 2 # VehicleUpdate
+MSG_WAYPOINT_REQUEST = 3 # WaypointRequest
+MSG_WAYPOINT_BUFFER = 4 # WaypointBuffer
+
+
+def socket_path(name=SHM_NAME):
+    return os.path.join(tempfile.gettempdir(), f"{name}.sock")
+
+
+def _aligned(size):
+    return -(-size // CACHE_LINE) * CACHE_LINE
+
+
+class ShmLayout(object):
+    """
+    Views of the transport's shared memory segment: the tick record, the
+    ring heads & tails, the eviction flags and the rings.
+    """
+
+    def __init__(self, buf, max_cars=SHM_MAX_CARS, capacity=RING_CAPACITY):
+        self.max_cars = max_cars
+        self.capacity = capacity
+        offset = 0
+        self.tick = np.ndarray((1,), TICK_RECORD, buf, offset)
+        offset += _aligned(TICK_RECORD.itemsize)
+        self.heads = np.ndarray((max_cars,), '<u8', buf, offset)
+        offset += _aligned(self.heads.nbytes)
+        self.tails = np.ndarray((max_cars,), '<u8', buf, offset)
+        offset += _aligned(self.tails.nbytes)
+        self.evicted = np.ndarray((max_cars,), 'u1', buf, offset) # set by the sim
+        offset += _aligned(self.evicted.nbytes)
+        self.rings = np.ndarray((max_cars, capacity), UPDATE_RECORD, buf, offset)
+
+    @classmethod
+    def create(cls, buf, max_cars=SHM_MAX_CARS, capacity=RING_CAPACITY):
+        layout = cls(buf, max_cars, capacity)
+        layout.tick['max_cars'] = max_cars
+        layout.tick['capacity'] = capacity
+        return layout
+
+    @classmethod
+    def attach(cls, buf):
+        """
+        Views of a segment the sim created, with its layout.
+        """
+        tick = np.ndarray((1,), TICK_RECORD, buf, 0)
+        return cls(buf, int(tick['max_cars'][0]), int(tick['capacity'][0]))
+
+    @staticmethod
+    def size(max_cars=SHM_MAX_CARS, capacity=RING_CAPACITY):
+        return _aligned(TICK_RECORD.itemsize) + \
+            2 * _aligned(max_cars * 8) + _aligned(max_cars) + \
+            max_cars * capacity * UPDATE_RECORD.itemsize
+
+    def write_tick(self, tick_id, command, start_ns):
+        tick = self.tick
+        tick['seq'] += 1
+        tick['tick_id'] = tick_id
+        tick['command'] = command
+        tick['server_tick_start_ns'] = start_ns
+        tick['seq'] += 1
+
+    def read_tick(self):
+        """
+        Returns
+        -------
+        tick : tuple
+            seq, tick id, command and start time of the current tick.
+        """
+        while True:
+            seq = int(self.tick['seq'][0])
+            record = self.tick[0].copy()
+            if seq % 2 == 0 and seq == int(self.tick['seq'][0]):
+                return seq, int(record['tick_id']), int(record['command']), \
+                    int(record['server_tick_start_ns'])
+
+    def push(self, vehicle_index, update):
+        """
+        Append a VehicleUpdate to the vehicle's ring.
+
+        Returns
+        -------
+        pushed : bool
+            False if the ring is full.
+        """
+        head = int(self.heads[vehicle_index])
+        if head - int(self.tails[vehicle_index]) >= self.capacity:
+            return False
+
+        record = self.rings[vehicle_index, head % self.capacity]
+        record['tick_id'] = update.tick_id
+        record['vehicle_index'] = vehicle_index
+        record['vehicle_state'] = update.vehicle_state
+        record['duration_ns'] = update.duration_ns
+        if update.HasField('transform'):
+            location = update.transform.location
+            rotation = update.transform.rotation
+            record['transform'] = (location.x, location.y, location.z,
+                                   rotation.roll, rotation.pitch, rotation.yaw)
+            record['velocity'] = (update.velocity.x, update.velocity.y,
+                                  update.velocity.z)
+            record['flags'] = HAS_TRANSFORM
+        else:
+            record['flags'] = 0
+        self.heads[vehicle_index] = head + 1 # publish
+        return True
+
+    def drain(self, num_cars):
+        """
+        Take every record the vehicles pushed since the last drain.
+
+        Returns
+        -------
+        records : list
+            Copies of the records, in ring order per vehicle.
+        """
+        records = []
+        heads = self.heads[:num_cars].copy()
+        for vehicle_index in np.nonzero(heads != self.tails[:num_cars])[0]:
+            head = int(heads[vehicle_index])
+            for i in range(int(self.tails[vehicle_index]), head):
+                records.append(self.rings[vehicle_index,
+                                          i % self.capacity].copy())
+            self.tails[vehicle_index] = head
+        return records
+
+
+def record_to_update(record):
+    update = ecloud.VehicleUpdate()
+    update.tick_id = int(record['tick_id'])
+    update.vehicle_index = int(record['vehicle_index'])
+    update.vehicle_state = int(record['vehicle_state'])
+    update.duration_ns = int(record['duration_ns'])
+    if record['flags'] & HAS_TRANSFORM:
+        x, y, z, roll, pitch, yaw = (float(v) for v in record['transform'])
+        update.transform.location.x = x
+        update.transform.location.y = y
+        update.transform.location.z = z
+        update.transform.rotation.roll = roll
+        update.transform.rotation.pitch = pitch
+        update.transform.rotation.yaw = yaw
+        vx, vy, vz = (float(v) for v in record['velocity'])
+        update.velocity.x = vx
+        update.velocity.y = vy
+        update.velocity.z = vz
+    return update
+
+
+def frame(msg_type, message):
+    payload = message.SerializeToString()
+    return FRAME_HEADER.pack(len(payload), msg_type) + payload
+
+
+async def read_frame(sock, rx):
+    """
+    Next frame of a socket; rx buffers what was read past it.
+
+    Returns
+    -------
+    frame : tuple
+        Message type and payload, None once the peer closed the socket.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        if len(rx) >= FRAME_HEADER.size:
+            length, msg_type = FRAME_HEADER.unpack_from(rx)
+            if len(rx) >= FRAME_HEADER.size + length:
+                payload = bytes(rx[FRAME_HEADER.size:FRAME_HEADER.size + length])
+                del rx[:FRAME_HEADER.size + length]
+                return msg_type, payload
+        data = await loop.sock_recv(sock, 65536)
+        if not data:
+            return None
+        rx.extend(data)
+
+
+_created = set() # segments this process created and unlinks itself
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    if name not in _created:
+        # the sim owns the segment - keep this process' tracker from unlinking it at exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE,
+                           (hard if hard == resource.RLIM_INFINITY
+                            else min(needed, hard), hard))
+
+
+class ShmEcloudServer(object):
+    """
+    The ecloud server's calls, hosted in the sim.
+
+    Completed ticks are put on the push queue like the ecloud server's
+    pushes, so the sim waits for them the same way.
+
+    Parameters
+    ----------
+    name : str
+        Shared memory segment and socket name.
+
+    Attributes
+    ----------
+    barrier : TickBarrier
+        Barrier of the current scenario.
+
+    socket_updates : int
+        Ticks replies that did not fit the ring.
+    """
+
+    def __init__(self, name=SHM_NAME, max_cars=SHM_MAX_CARS,
+                 capacity=RING_CAPACITY):
+        self.name = name
+        self.path = socket_path(name)
+        self.max_cars = max_cars
+        self.capacity = capacity
+        self.shm = None
+        self.layout = None
+        self.q = None
+        self.listener = None
+        self.accept_task = None
+        self.update_efd = None
+        self.connections = {} # socket -> serving task
+        self.tick_efds = {} # vehicle index -> eventfd
+
+        self.sim_info = ecloud.SimulationInfo()
+        self.num_cars = 0
+        self.is_edge = False
+        self.barrier = None
+        self.command = ecloud.Command.TICK
+        self.tick_start_ns = 0
+        self.last_duration_ns = 0
+        self.late_replies = []
+        self.num_registered = 0
+        self.num_carla_updates = 0
+        self.pending_replies = [] # serialized, parsed as VehicleUpdate like the ecloud server's
+        self.pending_records = []
+        self.edge_waypoints = {} # vehicle index -> unversioned WaypointBuffer
+        self.edge_waypoint_states = {} # vehicle index -> (version, points, last versioned buffer)
+        self.socket_updates = 0
+
+    async def start(self, q):
+        """
+        Create the segment and accept vehicles.
+        """
+        self.q = q
+        try:
+            shared_memory.SharedMemory(name=self.name).unlink() # stale run
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(
+            name=self.name, create=True,
+            size=ShmLayout.size(self.max_cars, self.capacity))
+        _created.add(self.name)
+        self.layout = ShmLayout.create(self.shm.buf, self.max_cars, self.capacity) # zero filled
+
+        # a socket and an eventfd per vehicle
+        _raise_fd_limit(2 * self.max_cars + 256)
+        loop = asyncio.get_running_loop()
+        self.update_efd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        loop.add_reader(self.update_efd, self._on_updates)
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        self.listener.listen(self.max_cars)
+        self.listener.setblocking(False)
+        self.accept_task = asyncio.create_task(self._accept())
+        logger.info(f"shm transport listening on {self.path}")
+
+    async def _accept(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            conn, _ = await loop.sock_accept(self.listener)
+            conn.setblocking(False)
+            self.connections[conn] = asyncio.create_task(self._serve(conn))
+
+    async def _serve(self, conn):
+        loop = asyncio.get_running_loop()
+        rx = bytearray()
+        while True:
+            msg = await read_frame(conn, rx)
+            if msg is None:
+                return
+            msg_type, payload = msg
+            if msg_type == MSG_REGISTER:
+                request = ecloud.RegistrationInfo()
+                request.ParseFromString(payload)
+                await self._register(conn, request)
+            elif msg_type == MSG_UPDATE:
+                update = ecloud.VehicleUpdate()
+                update.ParseFromString(payload)
+                self.socket_updates += 1
+                if update.vehicle_index not in self.barrier.evicted:
+                    self.pending_replies.append(payload)
+                self._reply(update.vehicle_index, update.vehicle_state,
+                            update.duration_ns)
+            elif msg_type == MSG_WAYPOINT_REQUEST:
+                request = ecloud.WaypointRequest()
+                request.ParseFromString(payload)
+                await loop.sock_sendall(conn, frame(MSG_WAYPOINT_BUFFER,
+                                                    self._waypoints(request)))
+            else:
+                logger.error(f"unknown shm message type {msg_type}")
+
+    async def _register(self, conn, request):
+        if request.vehicle_state == ecloud.VehicleState.CARLA_UPDATE:
+            self.pending_replies.append(request.SerializeToString())
+            self.num_carla_updates += 1
+            if self.num_carla_updates == self.num_cars:
+                logger.info("REGISTRATION COMPLETE")
+                self.q.put_nowait(ecloud.Tick(tick_id=TICK_ID_INVALID,
+                                              command=self.command))
+            return
+
+        assert self.sim_info.test_scenario != ''
+        vehicle_index = self.num_registered
+        self.num_registered += 1
+        tick_efd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        self.tick_efds[vehicle_index] = tick_efd
+
+        reply = ecloud.SimulationInfo()
+        reply.vehicle_index = vehicle_index
+        reply.test_scenario = self.sim_info.test_scenario
+        reply.application = self.sim_info.application
+        reply.version = self.sim_info.version
+        if vehicle_index < len(self.sim_info.spawns):
+            reply.spawns.append(self.sim_info.spawns[vehicle_index])
+        logger.debug(f"{request.container_name} got vehicle id {vehicle_index}")
+
+        # the eventfds ride along with the first bytes
+        data = frame(MSG_SIM_INFO, reply)
+        sent = socket.send_fds(conn, [data], [tick_efd, self.update_efd])
+        await asyncio.get_running_loop().sock_sendall(conn, data[sent:])
+
+    def _on_updates(self):
+        try:
+            os.eventfd_read(self.update_efd)
+        except BlockingIOError:
+            return
+        for record in self.layout.drain(self.num_cars):
+            vehicle_index = int(record['vehicle_index'])
+            if vehicle_index in self.barrier.evicted:
+                continue
+            if self.is_edge or vehicle_index == 0: # the spectator
+                self.pending_records.append(record)
+            self._reply(vehicle_index, int(record['vehicle_state']),
+                        int(record['duration_ns']))
+
+    def _reply(self, vehicle_index, vehicle_state, duration_ns):
+        barrier = self.barrier
+        if vehicle_index in barrier.evicted:
+            # evicted vehicles left the barrier - drop what they still send
+            logger.warning(f"dropping update of evicted vehicle {vehicle_index}")
+            return
+
+        now_ns = time.time_ns()
+        if barrier.deadlines_passed > 0 and vehicle_index not in barrier.replied:
+            lateness = ecloud.VehicleLateness()
+            lateness.vehicle_index = vehicle_index
+            lateness.reply_ms = (now_ns - barrier.tick_start_ns) * NSEC_TO_MSEC
+            lateness.missed_deadlines = barrier.missed[vehicle_index]
+            self.late_replies.append(lateness)
+
+        self.last_duration_ns = duration_ns
+        done = vehicle_state in (ecloud.VehicleState.TICK_DONE,
+                                 ecloud.VehicleState.DEBUG_INFO_UPDATE)
+        if barrier.reply(vehicle_index, now_ns, done):
+            self._complete()
+
+    def _complete(self):
+        tick = ecloud.Tick()
+        tick.tick_id = self.barrier.tick_id
+        tick.command = self.command
+        tick.last_client_duration_ns = self.last_duration_ns
+        tick.server_tick_start_ns = self.tick_start_ns
+        tick.server_tick_end_ns = time.time_ns()
+        tick.evicted_vehicles.extend(self.barrier.pop_evictions())
+        tick.late_vehicles.extend(self.late_replies)
+        self.late_replies = []
+        self.q.put_nowait(tick)
+
+    def _check_deadline(self, tick_id):
+        barrier = self.barrier
+        if barrier.tick_id != tick_id or barrier.complete:
+            return
+        num_evictions = len(barrier.new_evictions)
+        complete = barrier.check_deadline(time.time_ns())
+        for vehicle_index in barrier.new_evictions[num_evictions:]:
+            logger.error(f"evicting vehicle {vehicle_index} after "
+                         f"{barrier.missed[vehicle_index]} missed deadlines")
+            self._evict(vehicle_index)
+        if complete:
+            logger.info(f"tick {tick_id} COMPLETE after evictions")
+            self._complete()
+            return
+        self._schedule_deadline(tick_id)
+
+    def _schedule_deadline(self, tick_id):
+        deadline_ns = self.barrier.next_deadline_ns()
+        if deadline_ns is None:
+            return
+        asyncio.get_running_loop().call_later(
+            max(0, deadline_ns - time.time_ns()) * 1e-9,
+            self._check_deadline, tick_id)
+
+    def _evict(self, vehicle_index):
+        # a slow vehicle leaves the scenario instead of waiting for ticks
+        # forever - and holding up its host's fleet step
+        self.layout.evicted[vehicle_index] = 1
+        os.eventfd_write(self.tick_efds[vehicle_index], 1)
+
+    def _signal(self, evicted=False):
+        for vehicle_index, tick_efd in self.tick_efds.items():
+            if evicted or vehicle_index not in self.barrier.evicted:
+                os.eventfd_write(tick_efd, 1)
+
+    def _waypoints(self, request):
+        # same as the ecloud server's Client_GetWaypoints
+        buffer = ecloud.WaypointBuffer()
+        buffer.vehicle_index = request.vehicle_index
+        state = self.edge_waypoint_states.get(request.vehicle_index)
+        if state is not None:
+            version, points, last = state
+            buffer.version = version
+            if request.version == version:
+                buffer.unchanged = True
+            elif last.HasField('delta') and \
+                    request.version == last.delta.base_version:
+                buffer.delta.CopyFrom(last.delta)
+            else:
+                buffer.points.extend(points.ravel().tolist())
+        elif request.vehicle_index in self.edge_waypoints:
+            buffer.waypoint_buffer.extend(
+                self.edge_waypoints[request.vehicle_index].waypoint_buffer)
+        return buffer
+
+    async def Server_StartScenario(self, request):
+        assert not request.async_ticks, "the shm transport ticks synchronously"
+        assert request.vehicle_index <= self.max_cars
+        self.sim_info.CopyFrom(request)
+        self.num_cars = request.vehicle_index # bit of a hack to use vindex as count
+        self.is_edge = request.is_edge
+        self.barrier = TickBarrier(self.num_cars, request.tick_deadline_ms,
+                                   request.max_missed_ticks)
+        return ecloud.Empty()
+
+    async def Server_DoTick(self, request):
+        self.command = request.command
+        self.tick_start_ns = time.time_ns()
+        self.late_replies = []
+        active = self.barrier.start_tick(request.tick_id, self.tick_start_ns)
+        self.layout.write_tick(request.tick_id, request.command,
+                               self.tick_start_ns)
+        self._signal()
+        if not active: # nobody left to wait for
+            self.barrier.complete = True
+            self._complete()
+        else:
+            self._schedule_deadline(request.tick_id)
+        return ecloud.Empty()
+
+    async def Server_GetVehicleUpdates(self, request):
+        response = ecloud.EcloudResponse()
+        for payload in self.pending_replies:
+            response.vehicle_update.add().ParseFromString(payload)
+        for record in self.pending_records:
+            response.vehicle_update.append(record_to_update(record))
+        self.pending_replies = []
+        self.pending_records = []
+        return response
+
+    async def Server_PushEdgeWaypoints(self, request):
+        self.edge_waypoints = {}
+        for buffer in request.all_waypoint_buffers:
+            if buffer.version == 0:
+                self.edge_waypoints[buffer.vehicle_index] = buffer
+                continue
+            version, points, _ = self.edge_waypoint_states.get(
+                buffer.vehicle_index, (0, np.empty((0, 0)), None))
+            if buffer.unchanged:
+                continue
+            if buffer.HasField('delta'):
+                if buffer.delta.base_version != version:
+                    logger.error(f"waypoint delta for vehicle {buffer.vehicle_index} is based on version "
+                                 f"{buffer.delta.base_version}, holding {version}")
+                    continue
+                points, _ = apply_delta(points, buffer.delta)
+            else:
+                points = unpack_points(buffer.points)
+            self.edge_waypoint_states[buffer.vehicle_index] = \
+                (buffer.version, points, buffer)
+        return ecloud.Empty()
+
+    async def Server_EndScenario(self, request):
+        self.command = ecloud.Command.END
+        logger.info("pushing END")
+        self.layout.write_tick(TICK_ID_INVALID, ecloud.Command.END, 0)
+        self._signal(evicted=True) # evicted vehicles may only be slow
+        return ecloud.Empty()
+
+    def close(self):
+        if self.layout is None:
+            return
+        # unregister every fd before closing it, the numbers are reused right away
+        loop = asyncio.get_event_loop()
+        loop.remove_reader(self.update_efd)
+        self.accept_task.cancel()
+        loop.remove_reader(self.listener.fileno())
+        for conn, task in self.connections.items():
+            task.cancel()
+            loop.remove_reader(conn.fileno())
+            conn.close()
+        self.connections = {}
+        self.listener.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        for fd in list(self.tick_efds.values()) + [self.update_efd]:
+            os.close(fd)
+        self.layout = None # drop the views before closing the segment
+        self.shm.close()
+        self.shm.unlink()
+        _created.discard(self.name)
+
+
+class ShmEcloudClient(object):
+    """
+    A vehicle's calls of EcloudStub over the shm transport, plus
+    run_push to receive ticks - one per vehicle.
+
+    Attributes
+    ----------
+    socket_updates : int
+        Tick replies that did not fit the ring.
+    """
+
+    def __init__(self, name=SHM_NAME):
+        self.name = name
+        self.path = socket_path(name)
+        self.sock = None
+        self.rx = bytearray()
+        self.shm = None
+        self.layout = None
+        self.vehicle_index = None
+        self.tick_efd = None
+        self.update_efd = None
+        self.last_seq = 0
+        self.evicted = False
+        self.socket_updates = 0
+
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        await loop.sock_connect(self.sock, self.path)
+
+    async def _recv_fds(self):
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        loop.add_reader(self.sock, readable.set_result, None)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(self.sock)
+        data, fds, _, _ = socket.recv_fds(self.sock, 65536, 2)
+        self.rx.extend(data)
+        return fds
+
+    async def Client_RegisterVehicle(self, request):
+        loop = asyncio.get_running_loop()
+        if request.vehicle_state != ecloud.VehicleState.REGISTERING:
+            await loop.sock_sendall(self.sock, frame(MSG_REGISTER, request))
+            return ecloud.SimulationInfo(vehicle_index=request.vehicle_index)
+
+        await self._connect()
+        await loop.sock_sendall(self.sock, frame(MSG_REGISTER, request))
+        self.tick_efd, self.update_efd = await self._recv_fds()
+        msg_type, payload = await read_frame(self.sock, self.rx)
+        assert msg_type == MSG_SIM_INFO
+        sim_info = ecloud.SimulationInfo()
+        sim_info.ParseFromString(payload)
+
+        self.vehicle_index = sim_info.vehicle_index
+        self.shm = _attach(self.name)
+        self.layout = ShmLayout.attach(self.shm.buf)
+        self.last_seq = self.layout.read_tick()[0]
+        return sim_info
+
+    async def Client_SendUpdate(self, update):
+        if update.vehicle_state == ecloud.VehicleState.TICK_OK and \
+                self.layout.push(self.vehicle_index, update):
+            os.eventfd_write(self.update_efd, 1)
+        else:
+            self.socket_updates += update.vehicle_state == \
+                ecloud.VehicleState.TICK_OK
+            await asyncio.get_running_loop().sock_sendall(
+                self.sock, frame(MSG_UPDATE, update))
+        return ecloud.Empty()
+
+    async def Client_GetWaypoints(self, request):
+        await asyncio.get_running_loop().sock_sendall(
+            self.sock, frame(MSG_WAYPOINT_REQUEST, request))
+        msg_type, payload = await read_frame(self.sock, self.rx)
+        assert msg_type == MSG_WAYPOINT_BUFFER
+        buffer = ecloud.WaypointBuffer()
+        buffer.ParseFromString(payload)
+        return buffer
+
+    def _on_tick(self, q):
+        try:
+            os.eventfd_read(self.tick_efd)
+        except BlockingIOError:
+            return
+        if not self.evicted and self.layout.evicted[self.vehicle_index]:
+            self.evicted = True
+            q.put_nowait(ecloud.Tick(tick_id=TICK_ID_INVALID,
+                                     command=ecloud.Command.EVICTED))
+        seq, tick_id, command, start_ns = self.layout.read_tick()
+        if seq == self.last_seq:
+            return
+        self.last_seq = seq
+        q.put_nowait(ecloud.Tick(tick_id=tick_id, command=command,
+                                 server_tick_start_ns=start_ns))
+
+    async def run_push(self, q, ready=None):
+        """
+        Queue every tick the sim writes, like ecloud_run_push_server.
+        """
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.tick_efd, self._on_tick, q)
+        if ready is not None:
+            ready.set()
+        try:
+            await loop.create_future() # until cancelled
+        finally:
+            loop.remove_reader(self.tick_efd)
+            self.close()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        for fd in (self.tick_efd, self.update_efd):
+            if fd is not None:
+                os.close(fd)
+        self.tick_efd = self.update_efd = None
+        if self.shm is not None:
+            self.layout = None
+            self.shm.close()
+            self.shm = None
+
+
+async def run_null_vehicle(name, ordinal):
+    """
+    Register a vehicle without CARLA and acknowledge every tick until END
+    or its eviction.
+    """
+    client = ShmEcloudClient(name)
+    request = ecloud.RegistrationInfo()
+    request.vehicle_state = ecloud.VehicleState.REGISTERING
+    request.container_name = f"null_vehicle_{ordinal}"
+    sim_info = await client.Client_RegisterVehicle(request)
+
+    push_q = asyncio.Queue()
+    push_ready = asyncio.Event()
+    push = asyncio.create_task(client.run_push(push_q, push_ready))
+    await push_ready.wait()
+
+    update = ecloud.RegistrationInfo()
+    update.vehicle_state = ecloud.VehicleState.CARLA_UPDATE
+    update.vehicle_index = sim_info.vehicle_index
+    await client.Client_RegisterVehicle(update)
+
+    while True:
+        tick = await push_q.get()
+        if tick.command in (ecloud.Command.END, ecloud.Command.EVICTED):
+            break
+        reply = ecloud.VehicleUpdate()
+        reply.tick_id = tick.tick_id
+        reply.vehicle_index = sim_info.vehicle_index
+        reply.vehicle_state = ecloud.VehicleState.TICK_OK
+        await client.Client_SendUpdate(reply)
+
+    push.cancel()
+    try:
+        await push
+    except asyncio.CancelledError:
+        pass
+
+
+async def run_null_fleet(name, first_vehicle, num_vehicles):
+    await asyncio.gather(*[run_null_vehicle(name, ordinal) for ordinal
+                           in range(first_vehicle, first_vehicle + num_vehicles)])
+
+
+async def run_null_sim(test_scenario, num_vehicles, num_ticks, name=SHM_NAME,
+                       ready=None, timeout_s=60.0, tick_deadline_ms=0,
+                       max_missed_ticks=3):
+    """
+    Stand-in sim for null client hosts (vehiclesim.py --null_world): serves
+    test_scenario, ticks num_ticks times once the fleet registered and ends
+    the scenario.
+
+    Parameters
+    ----------
+    test_scenario : str
+        The scenario yaml as json, like ScenarioManager sends it.
+
+    ready : asyncio.Event
+        Set once vehicles can register.
+
+    timeout_s : float
+        Longest wait for the registration or a tick.
+
+    tick_deadline_ms : int
+
+    max_missed_ticks : int
+        Tick deadline and consecutive missed deadlines before a vehicle is
+        evicted, see tick_barrier.TickBarrier. 0 waits forever.
+
+    Returns
+    -------
+    responses : list
+        EcloudResponse of the registration and of every tick.
+    """
+    push_q = asyncio.Queue()
+    server = ShmEcloudServer(name)
+    await server.start(push_q)
+
+    responses = []
+    try:
+        request = ecloud.SimulationInfo()
+        request.test_scenario = test_scenario
+        request.application = 'single'
+        request.version = '0.9.12'
+        request.vehicle_index = num_vehicles # fleet size
+        request.tick_deadline_ms = tick_deadline_ms
+        request.max_missed_ticks = max_missed_ticks
+        await server.Server_StartScenario(request)
+        if ready is not None:
+            ready.set()
+
+        await asyncio.wait_for(push_q.get(), timeout_s) # registered
+        responses.append(await server.Server_GetVehicleUpdates(ecloud.Empty()))
+        for tick_id in range(1, num_ticks + 1):
+            tick = ecloud.Tick()
+            tick.tick_id = tick_id
+            tick.command = ecloud.Command.TICK
+            await server.Server_DoTick(tick)
+            await asyncio.wait_for(push_q.get(), timeout_s)
+            responses.append(
+                await server.Server_GetVehicleUpdates(ecloud.Empty()))
+
+        await server.Server_EndScenario(ecloud.Empty())
+    finally:
+        server.close()
+
+    return responses
+
+
+async def benchmark_shm(num_vehicles, num_ticks=50, num_processes=8,
+                        name=SHM_NAME):
+    """
+    Tick barrier latency of num_vehicles null vehicles over the shm
+    transport, same measurement as ecloud_shards.benchmark_shards.
+
+    Returns
+    -------
+    stats : dict
+        Tick and registration times in ms.
+    """
+    push_q = asyncio.Queue()
+    server = ShmEcloudServer(name)
+    await server.start(push_q)
+
+    fleet = []
+    try:
+        request = ecloud.SimulationInfo()
+        request.test_scenario = '{}'
+        request.application = 'single'
+        request.vehicle_index = num_vehicles # fleet size
+        await server.Server_StartScenario(request)
+
+        registration_start_ns = time.time_ns()
+        per_process = -(-num_vehicles // num_processes)
+        for first in range(0, num_vehicles, per_process):
+            fleet.append(subprocess.Popen(
+                [sys.executable, '-m', __name__, '--name', name,
+                 '--first_vehicle', str(first),
+                 '--num_vehicles', str(min(per_process, num_vehicles - first))]))
+        await push_q.get()
+        registration_ms = (time.time_ns() - registration_start_ns) * \
+            NSEC_TO_MSEC
+        await server.Server_GetVehicleUpdates(ecloud.Empty())
+
+        tick_ms = []
+        for tick_id in range(1, num_ticks + 1):
+            tick = ecloud.Tick()
+            tick.tick_id = tick_id
+            tick.command = ecloud.Command.TICK
+            start_ns = time.time_ns()
+            await server.Server_DoTick(tick)
+            await push_q.get()
+            tick_ms.append((time.time_ns() - start_ns) * NSEC_TO_MSEC)
+            await server.Server_GetVehicleUpdates(ecloud.Empty())
+
+        await server.Server_EndScenario(ecloud.Empty())
+        for process in fleet:
+            process.wait()
+    finally:
+        for process in fleet:
+            if process.poll() is None:
+                process.terminate()
+        server.close()
+
+    return {'registration_ms': registration_ms,
+            'tick_ms': {'mean': np.mean(tick_ms),
+                        'p95': np.percentile(tick_ms, 95)},
+            'socket_updates': server.socket_updates}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="eCloud null vehicle fleet over shared memory.")
+    parser.add_argument("--name", type=str, default=SHM_NAME)
+    parser.add_argument("--first_vehicle", type=int, required=True)
+    parser.add_argument("--num_vehicles", type=int, required=True)
+    opt = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(run_null_fleet(
+        opt.name, opt.first_vehicle, opt.num_vehicles))
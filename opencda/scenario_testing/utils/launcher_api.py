@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Launching and supervising the vehicle client processes.
+
+Instead of one container per vehicle, the fleet is split over K client
+hosts - local processes or containers - that each run many vehicles in one
+vehiclesim.py event loop. plan_hosts deterministically assigns every host its
+vehicle count, a contiguous range of push ports and a GPU, and
+ClientLauncher starts the hosts with one of the backends and supervises
+them: hosts that crash are restarted up to max_restarts times and reported
+otherwise.
+
+The null backend runs the hosts' vehicles on NullVehicleManager - no CARLA,
+sensors or map - against ecloud_shm.run_null_sim, a stand-in sim on the shm
+transport, so the hosts and the launcher can be exercised end to end
+locally.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from opencda.ecloud_server.ecloud_shm import run_null_sim
+
+logger = logging.getLogger(__name__)
+
+PUSH_BASE_PORT = 50101 # ECLOUD_PUSH_BASE_PORT of vehiclesim.py & the ecloud server
+MAX_PUSH_PORT = 50512 # last push port exposed by the Dockerfile
+BACKENDS = ('process', 'docker', 'null')
+DOCKER_IMAGE = 'vehicle-sim'
+
+
+def gpu_count():
+    """
+    Number of GPUs nvidia-smi lists, 0 without nvidia-smi.
+    """
+    try:
+        output = subprocess.check_output(['nvidia-smi', '-L'],
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return 0
+    return len(output.decode().strip().splitlines())
+
+
+class HostSpec(object):
+    """
+    Vehicles, push ports and GPU of one client host.
+
+    Parameters
+    ----------
+    host_id : int
+
+    num_vehicles : int
+
+    push_port : int
+        Push port of the first vehicle, vehicle n of the host listens on
+        push_port + n.
+
+    gpu : int
+        GPU the host is pinned to, None to run without one.
+
+    first_vehicle : int
+        Fleet ordinal of the host's first vehicle, which picks the ecloud
+        server shard of each vehicle.
+    """
+
+    def __init__(self, host_id, num_vehicles, push_port, gpu=None,
+                 first_vehicle=0):
+        self.host_id = host_id
+        self.num_vehicles = num_vehicles
+        self.push_port = push_port
+        self.gpu = gpu
+        self.first_vehicle = first_vehicle
+
+    @property
+    def push_ports(self):
+        return range(self.push_port, self.push_port + self.num_vehicles)
+
+    @property
+    def name(self):
+        return f"vehicle_host_{self.host_id}"
+
+    def __repr__(self):
+        return f"HostSpec({self.name}, vehicles={self.num_vehicles}, " \
+               f"push_ports={self.push_ports.start}-" \
+               f"{self.push_ports.stop - 1}, gpu={self.gpu})"
+
+
+def plan_hosts(num_vehicles, num_hosts, push_base_port=PUSH_BASE_PORT,
+               num_gpus=0):
+    """
+    Split the fleet over the client hosts.
+
+    The first num_vehicles % num_hosts hosts run one vehicle more, push
+    ports are handed out in host order and GPUs round robin.
+
+    Returns
+    -------
+    hosts : list
+        HostSpec of every host with at least one vehicle.
+    """
+    assert num_hosts > 0
+    if push_base_port + num_vehicles - 1 > MAX_PUSH_PORT:
+        raise ValueError(f"{num_vehicles} vehicles need push ports up to "
+                         f"{push_base_port + num_vehicles - 1}, past "
+                         f"{MAX_PUSH_PORT}")
+
+    hosts = []
+    push_port = push_base_port
+    for host_id in range(min(num_hosts, num_vehicles)):
+        host_vehicles = num_vehicles // num_hosts + \
+            (1 if host_id < num_vehicles % num_hosts else 0)
+        gpu = host_id % num_gpus if num_gpus > 0 else None
+        hosts.append(HostSpec(host_id, host_vehicles, push_port, gpu,
+                              push_port - push_base_port))
+        push_port += host_vehicles
+    return hosts
+
+
+def host_command(host, backend, ecloud_port=50051, apply_ml=False,
+                 docker_cmd='docker', num_shards=1, transport='grpc',
+                 shm_name=None):
+    """
+    Command and environment that start a client host. Null hosts run
+    vehiclesim.py --null_world, usually with transport shm.
+
+    Returns
+    -------
+    command : list
+
+    env : dict
+        Environment of the host process.
+    """
+    assert backend in BACKENDS
+    env = dict(os.environ, HOSTNAME=host.name)
+    vehiclesim_args = ['--num_vehicles', str(host.num_vehicles),
+                       '--push_port', str(host.push_port),
+                       '--host_id', str(host.host_id),
+                       '--port', str(ecloud_port),
+                       '--first_vehicle', str(host.first_vehicle),
+                       '--num_shards', str(num_shards),
+                       '--transport', transport]
+    if apply_ml:
+        vehiclesim_args.append('--apply_ml')
+    if shm_name is not None:
+        vehiclesim_args += ['--shm_name', shm_name]
+
+    if backend == 'process':
+        if host.gpu is not None:
+            env['CUDA_VISIBLE_DEVICES'] = str(host.gpu)
+        return [sys.executable, 'vehiclesim.py'] + vehiclesim_args, env
+
+    if backend == 'docker':
+        command = docker_cmd.split() + [
+            'run', '--rm', '--network=host', f'--name={host.name}',
+            '-e', f'HOSTNAME={host.name}']
+        if transport == 'shm':
+            # the shm segment, the eventfds' unix socket & the sim all live on the host
+            command += ['--ipc=host', '-v', '/tmp:/tmp']
+        if apply_ml and host.gpu is not None:
+            command += ['--runtime=nvidia', '--gpus', f'device={host.gpu}',
+                        '-v', '/tmp/.X11-unix:/tmp/.X11-unix',
+                        '-e', f"DISPLAY={os.environ.get('DISPLAY', '')}"]
+        return command + [DOCKER_IMAGE] + vehiclesim_args, env
+
+    return [sys.executable, 'vehiclesim.py', '--null_world'] + \
+        vehiclesim_args, env
+
+
+class ClientLauncher(object):
+    """
+    Starts the client hosts and supervises them.
+
+    Restarting only makes sense for hosts that die before their vehicles
+    registered - a restarted host registers its vehicles again - so by
+    default crashed hosts are only reported.
+
+    Parameters
+    ----------
+    hosts : list
+        HostSpec of every host.
+
+    backend : str
+        process, docker or null.
+
+    max_restarts : int
+        Restarts of a crashed host before it is reported as failed.
+
+    command_kwargs : dict
+        Passed on to host_command.
+
+    Attributes
+    ----------
+    restarts : dict
+        Restarts per host id.
+
+    failed : dict
+        Exit code of every host that failed for good.
+
+    finished : set
+        Ids of the hosts that exited cleanly.
+    """
+
+    def __init__(self, hosts, backend='process', max_restarts=0,
+                 cwd=None, **command_kwargs):
+        self.hosts = {host.host_id: host for host in hosts}
+        self.backend = backend
+        self.max_restarts = max_restarts
+        self.cwd = cwd
+        self.command_kwargs = command_kwargs
+        self.processes = {}
+        self.restarts = {host_id: 0 for host_id in self.hosts}
+        self.failed = {}
+        self.finished = set()
+
+    def start_host(self, host_id):
+        command, env = host_command(self.hosts[host_id], self.backend,
+                                    **self.command_kwargs)
+        logger.info(f"starting {self.hosts[host_id]}")
+        logger.debug(' '.join(command))
+        self.processes[host_id] = subprocess.Popen(command, env=env,
+                                                   cwd=self.cwd)
+
+    def start(self):
+        for host_id in self.hosts:
+            self.start_host(host_id)
+
+    def running(self):
+        return [host_id for host_id in self.processes
+                if host_id not in self.finished and
+                host_id not in self.failed]
+
+    def poll(self):
+        """
+        Check every running host once, restarting or reporting crashes.
+
+        Returns
+        -------
+        running : int
+            Hosts still running.
+        """
+        for host_id in self.running():
+            returncode = self.processes[host_id].poll()
+            if returncode is None:
+                continue
+
+            if returncode == 0:
+                logger.info(f"{self.hosts[host_id].name} finished")
+                self.finished.add(host_id)
+            elif self.restarts[host_id] < self.max_restarts:
+                self.restarts[host_id] += 1
+                logger.warning(f"{self.hosts[host_id].name} exited with "
+                               f"{returncode} - restart "
+                               f"{self.restarts[host_id]}/"
+                               f"{self.max_restarts}")
+                self.start_host(host_id)
+            else:
+                logger.error(f"{self.hosts[host_id].name} failed with "
+                             f"{returncode}, its vehicles "
+                             f"{list(self.hosts[host_id].push_ports)} "
+                             f"(push ports) are gone")
+                self.failed[host_id] = returncode
+        return len(self.running())
+
+    def supervise(self, poll_s=1.0, timeout_s=None):
+        """
+        Poll until every host exited or timeout_s passed.
+
+        Returns
+        -------
+        ok : bool
+            Whether every host finished cleanly.
+        """
+        start_time = time.time()
+        while self.poll() > 0:
+            if timeout_s is not None and time.time() - start_time > timeout_s:
+                logger.error(f"hosts {self.running()} still running after "
+                             f"{timeout_s}s")
+                return False
+            time.sleep(poll_s)
+        return not self.failed
+
+    def stop(self, timeout_s=10):
+        for host_id in self.running():
+            process = self.processes[host_id]
+            process.terminate()
+            try:
+                process.wait(timeout_s)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def report(self):
+        """
+        Summary of the hosts, e.g. for the launcher's exit log.
+        """
+        return {'hosts': len(self.hosts),
+                'vehicles': sum(host.num_vehicles
+                                for host in self.hosts.values()),
+                'finished': sorted(self.finished),
+                'failed': dict(self.failed),
+                'restarts': {host_id: count for host_id, count
+                             in self.restarts.items() if count}}
+
+
+async def run_null_scenario(launcher, test_scenario, num_ticks,
+                            shm_name=None, poll_s=1.0, timeout_s=None):
+    """
+    Run the launcher's null hosts through num_ticks ticks of a stand-in
+    sim, see ecloud_shm.run_null_sim.
+
+    Parameters
+    ----------
+    launcher : ClientLauncher
+        With the null backend and transport shm, not started yet.
+
+    test_scenario : str
+        The scenario yaml as json.
+
+    Returns
+    -------
+    ok : bool
+        Whether every host finished cleanly.
+
+    responses : list
+        EcloudResponse of the registration and of every tick, None if a
+        host failed.
+    """
+    num_vehicles = sum(host.num_vehicles for host in launcher.hosts.values())
+    sim_kwargs = {} if shm_name is None else {'name': shm_name}
+    ready = asyncio.Event()
+    sim = asyncio.create_task(run_null_sim(test_scenario, num_vehicles,
+                                           num_ticks, ready=ready,
+                                           **sim_kwargs))
+    ready_wait = asyncio.create_task(ready.wait())
+    await asyncio.wait([sim, ready_wait], return_when=asyncio.FIRST_COMPLETED)
+    if not ready.is_set():
+        ready_wait.cancel()
+        await sim # the sim failed to start, raises
+
+    launcher.start()
+    ok = await asyncio.get_running_loop().run_in_executor(
+        None, launcher.supervise, poll_s, timeout_s)
+    if not ok:
+        # the sim still waits for the vehicles of the failed hosts
+        sim.cancel()
+        try:
+            await sim
+        except asyncio.CancelledError:
+            pass
+        return ok, None
+
+    return ok, await sim
@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+"""
+Offline replayers for recordings made by opencda.core.common.replay.
+
+Each replayer rebuilds one component from the recorded setup event and
+then consumes the recorded per-tick events in order. Nothing here talks to
+a CARLA server: the HD map is rebuilt from the recorded OpenDRIVE content
+and the ego vehicle / obstacles are replaced by small stand-ins exposing
+the attributes the planning stack reads.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import time
+
+import numpy as np
+
+import carla
+
+from opencda.core.actuation.control_manager import ControlManager
+from opencda.core.application.edge.astar_test_groupcaps_transform import \
+    generate_limits_grid, get_slices_clustered, AStarPlanner
+from opencda.core.application.edge.edge_manager import plan_edge_step
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+from opencda.core.application.edge.slice_partitioner import \
+    get_partitioner, intra_slice_distance
+from opencda.core.application.edge.road_model import DEFAULT_MAP_LENGTH
+from opencda.core.application.edge.edge_sharding import ShardedEdgePlanner
+from opencda.core.application.edge.plan_cache import PlanCache
+from opencda.core.common.replay import ReplayHarness, location_to_tuple, \
+    control_to_tuple, split_component
+from opencda.core.plan.behavior_agent import BehaviorAgent
+from opencda.core.plan.local_planner_behavior import RoadOption
+
+import ecloud_pb2 as ecloud
+
+EDGE_MAP_LENGTH = DEFAULT_MAP_LENGTH
+
+
+def tuple_to_location(t):
+    """
+    Convert an (x, y, z) tuple to carla.Location.
+    """
+    return carla.Location(x=t[0], y=t[1], z=t[2])
+
+
+def tuple_to_vector(t):
+    """
+    Convert an (x, y, z) tuple to carla.Vector3D.
+    """
+    return carla.Vector3D(x=t[0], y=t[1], z=t[2])
+
+
+def tuple_to_transform(t):
+    """
+    Convert an (x, y, z, roll, pitch, yaw) tuple to carla.Transform.
+    """
+    return carla.Transform(carla.Location(x=t[0], y=t[1], z=t[2]),
+                           carla.Rotation(roll=t[3], pitch=t[4], yaw=t[5]))
+
+
+def tuple_to_bounding_box(t):
+    """
+    Convert a ((x, y, z), (ext_x, ext_y, ext_z)) tuple to carla.BoundingBox.
+    """
+    return carla.BoundingBox(tuple_to_location(t[0]), tuple_to_vector(t[1]))
+
+
+class _ReplayDebug(object):
+    """
+    Swallows world.debug.draw_* calls.
+    """
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ReplayWorld(object):
+    """
+    Minimal carla.World stand-in holding an offline map.
+    """
+
+    def __init__(self, carla_map):
+        self._map = carla_map
+        self.debug = _ReplayDebug()
+
+    def get_map(self):
+        return self._map
+
+
+class ReplayVehicle(object):
+    """
+    Minimal carla.Vehicle stand-in for the ego vehicle of a BehaviorAgent.
+    """
+
+    def __init__(self, vehicle_id, bounding_box, world):
+        self.id = vehicle_id
+        self.bounding_box = bounding_box
+        self.light_state = "Green"
+        self._world = world
+
+    def get_world(self):
+        return self._world
+
+    def get_traffic_light_state(self):
+        return self.light_state
+
+    def get_traffic_light(self):
+        return None
+
+
+class ReplayObstacle(object):
+    """
+    ObstacleVehicle stand-in rebuilt from replay.obstacle_to_dict.
+    """
+
+    def __init__(self, obstacle):
+        self.carla_id = obstacle['id']
+        self.id = obstacle['id']
+        self.location = tuple_to_location(obstacle['location'])
+        self.transform = tuple_to_transform(obstacle['transform']) \
+            if obstacle['transform'] is not None else None
+        self.velocity = tuple_to_vector(obstacle['velocity'])
+        self.bounding_box = tuple_to_bounding_box(obstacle['bounding_box'])
+
+    def get_location(self):
+        return self.location
+
+    def get_transform(self):
+        return self.transform
+
+    def get_velocity(self):
+        return self.velocity
+
+
+class AgentReplay(object):
+    """
+    Replays BehaviorAgent destination, update, waypoint override and step
+    events. Step outputs are (target_speed, target_pos).
+    """
+
+    def __init__(self):
+        self.agent = None
+        self.vehicle = None
+        self.carla_map = None
+
+    def replay(self, event, tick_id, inputs):
+        if event == "setup":
+            self.carla_map = carla.Map(inputs['map_name'], inputs['opendrive'])
+            self.vehicle = ReplayVehicle(
+                inputs['vehicle_id'],
+                tuple_to_bounding_box(inputs['bounding_box']),
+                ReplayWorld(self.carla_map))
+            self.agent = BehaviorAgent(self.vehicle, self.carla_map,
+                                       inputs['config'],
+                                       is_dist=inputs['is_dist'])
+
+        elif event == "destination":
+            self.agent.set_destination(tuple_to_location(inputs['start']),
+                                       tuple_to_location(inputs['end']),
+                                       inputs['clean'], inputs['end_reset'])
+
+        elif event == "update":
+            self.vehicle.light_state = inputs['light_state']
+            objects = {'vehicles': [ReplayObstacle(o)
+                                    for o in inputs['obstacles']],
+                       'traffic_lights': []}
+            self.agent.update_information(
+                tuple_to_transform(inputs['ego_pos']), inputs['ego_spd'],
+                objects)
+
+        elif event == "override":
+            waypoint_buffer = \
+                self.agent.get_local_planner().get_waypoint_buffer()
+            waypoint_buffer.clear()
+            for location in inputs['locations']:
+                waypoint_buffer.append(
+                    (self.carla_map.get_waypoint(tuple_to_location(location)),
+                     RoadOption.STRAIGHT))
+
+        elif event == "step":
+            # mirrors the fallback in VehicleManager.run_step
+            try:
+                target_speed, target_pos = \
+                    self.agent.run_step(inputs['target_speed'])
+            except Exception:
+                target_speed = 0
+                target_pos = self.agent._ego_pos.location
+            return {"target_speed": target_speed,
+                    "target_pos": location_to_tuple(target_pos)}
+
+        return None
+
+
+class ControllerReplay(object):
+    """
+    Replays ControlManager update and step events. Step outputs are the
+    control tuple from replay.control_to_tuple.
+    """
+
+    def __init__(self):
+        self.controller = None
+
+    def replay(self, event, tick_id, inputs):
+        if event == "setup":
+            self.controller = ControlManager(inputs['config'])
+
+        elif event == "update":
+            self.controller.update_info(tuple_to_transform(inputs['ego_pos']),
+                                        inputs['ego_spd'])
+
+        elif event == "step":
+            target_pos = tuple_to_location(inputs['target_pos']) \
+                if inputs['target_pos'] is not None else None
+            return control_to_tuple(
+                self.controller.run_step(inputs['target_speed'], target_pos))
+
+        return None
+
+
+class EdgeReplay(object):
+    """
+    Replays the edge traffic tracker construction and planning step.
+    """
+
+    def __init__(self):
+        self.ov, self.oy = generate_limits_grid()
+        self.traffic = None
+        self.inputs = None
+        self.partitioner = None
+        self.sharded_planner = None
+        self.plan_cache = None
+
+    def replay(self, event, tick_id, inputs):
+        if event == "update":
+            self.inputs = inputs
+            if self.traffic is None:
+                self.traffic = TrafficTracker(
+                    inputs['search_dt'], inputs['numlanes'],
+                    map_length=inputs.get('map_length', EDGE_MAP_LENGTH))
+                self.ov, self.oy = generate_limits_grid(
+                    lane_num=inputs['numlanes'])
+                self.partitioner = get_partitioner(
+                    inputs.get('slice_partitioner'))
+                if inputs.get('plan_cache_size', 0) > 0:
+                    self.plan_cache = PlanCache(
+                        inputs['plan_cache_size'],
+                        inputs.get('plan_warm_start', True))
+                if inputs.get('num_shards', 1) > 1:
+                    self.sharded_planner = ShardedEdgePlanner(
+                        inputs['search_dt'], inputs['numlanes'],
+                        self.traffic.map_length, inputs['num_shards'],
+                        inputs['shard_overlap'],
+                        inputs.get('slice_partitioner'),
+                        grid_size=inputs['grid_size'],
+                        robot_radius=inputs['robot_radius'],
+                        astar_args=inputs.get('astar_args'),
+                        plan_cache_size=inputs.get('plan_cache_size', 0),
+                        plan_warm_start=inputs.get('plan_warm_start', True))
+            if self.sharded_planner is not None:
+                self.sharded_planner.update(
+                    range(inputs['numcars']), inputs['x'], inputs['y'],
+                    inputs['v'], inputs['traffic_velocity'])
+                return None
+            self.traffic.update(range(inputs['numcars']), inputs['x'],
+                                inputs['y'], inputs['v'])
+            for car in self.traffic.cars_on_road:
+                car.target_velocity = inputs['traffic_velocity']
+
+        elif event == "plan":
+            if self.sharded_planner is not None:
+                x_states, y_states, tv, v = self.sharded_planner.step()
+                return {"x_states": x_states, "y_states": y_states,
+                        "tv": tv, "v": v}
+            x_states, y_states, tv, v = plan_edge_step(
+                self.traffic, self.inputs['numcars'], self.ov, self.oy,
+                self.inputs['grid_size'], self.inputs['robot_radius'],
+                self.partitioner, self.inputs.get('astar_args'),
+                plan_cache=self.plan_cache)
+            return {"x_states": x_states, "y_states": y_states,
+                    "tv": tv, "v": v}
+
+        return None
+
+
+class CommsReplay(object):
+    """
+    Replays the protobuf decode / encode cost of the recorded messages.
+    """
+
+    message_types = {"tick": ecloud.Tick,
+                     "waypoints": ecloud.WaypointBuffer,
+                     "update": ecloud.VehicleUpdate}
+
+    def replay(self, event, tick_id, inputs):
+        self.message_types[event].FromString(inputs).SerializeToString()
+        return None
+
+
+def build_replay_harness(recording, atol=1e-6, components=None):
+    """
+    Create a ReplayHarness with a replayer for every recorded component.
+
+    Parameters
+    ----------
+    recording : dict
+        A recording returned by replay.load_recording.
+
+    atol : float
+        Largest absolute output difference still counted as a match.
+
+    components : list
+        Restrict the replay to these components; default all recorded.
+        Every vehicle of a multi-vehicle host is replayed separately.
+
+    Returns
+    -------
+    harness : ReplayHarness
+    """
+    replayers = {"agent": AgentReplay,
+                 "controller": ControllerReplay,
+                 "edge": EdgeReplay,
+                 "comms": CommsReplay}
+
+    harness = ReplayHarness(recording, atol)
+    for key in recording['events']:
+        component, _ = split_component(key)
+        if components is not None and component not in components and \
+                key not in components:
+            continue
+        if component in replayers:
+            harness.add_component(key, replayers[component]())
+
+    return harness
+
+
+def compare_partitioners(recording, names):
+    """
+    Partition the recorded edge traffic snapshots with several slice
+    partitioners and compare their wall time and partition quality.
+
+    Parameters
+    ----------
+    recording : dict
+        A recording returned by replay.load_recording.
+
+    names : list
+        Partitioner names, see slice_partitioner.PARTITIONERS.
+
+    Returns
+    -------
+    report : dict
+        name -> {'snapshots', 'partition_ms', 'intra_distance',
+        'plan_cost'}; partition_ms holds the mean, 95th percentile and
+        total time, intra_distance and plan_cost the mean per snapshot.
+    """
+    snapshots = [inputs for _, event, inputs, _ in
+                 recording['events'].get('edge', []) if event == "update"]
+
+    report = {}
+    for name in names:
+        partitioner = get_partitioner(name)
+        traffic = None
+        times, distances, costs = [], [], []
+
+        for inputs in snapshots:
+            if traffic is None:
+                traffic = TrafficTracker(
+                    inputs['search_dt'], inputs['numlanes'],
+                    map_length=inputs.get('map_length', EDGE_MAP_LENGTH))
+                ov, oy = generate_limits_grid(lane_num=inputs['numlanes'])
+            traffic.update(range(inputs['numcars']), inputs['x'],
+                           inputs['y'], inputs['v'])
+            for car in traffic.cars_on_road:
+                car.target_velocity = inputs['traffic_velocity']
+
+            start_time = time.perf_counter()
+            slice_list, _, _ = get_slices_clustered(
+                traffic, inputs['numcars'], partitioner)
+            times.append((time.perf_counter() - start_time) * 1000)
+
+            features = [[car.pos_x, car.lane] for car in traffic.cars_on_road]
+            distances.append(intra_slice_distance(
+                features, [car.slice for car in traffic.cars_on_road]))
+
+            cost = 0.0
+            for i, cars in enumerate(slice_list):
+                if len(cars) >= 2:
+                    a_star = AStarPlanner(cars, ov, oy, inputs['grid_size'],
+                                          inputs['robot_radius'],
+                                          traffic.cars_on_road, i)
+                    a_star.planning()
+                    cost += a_star.path_cost
+            costs.append(cost)
+
+        report[name] = {
+            'snapshots': len(snapshots),
+            'partition_ms': {
+                'mean': float(np.mean(times)) if times else 0.0,
+                'p95': float(np.percentile(times, 95)) if times else 0.0,
+                'total': float(np.sum(times))},
+            'intra_distance': float(np.mean(distances)) if distances
+            else 0.0,
+            'plan_cost': float(np.mean(costs)) if costs else 0.0}
+
+    return report
+
+
+def benchmark_sharding(num_cars, num_shards, steps=20, snapshots=None,
+                       executor='serial', slice_partitioner=None,
+                       numlanes=4, map_length=EDGE_MAP_LENGTH, seed=0):
+    """
+    Time the sharded edge planner without a simulator.
+
+    With snapshots, every step plans one recorded edge update. Otherwise
+    num_cars random cars are spawned on the grid and the planned states are
+    fed back as the next inputs (a null world).
+
+    Parameters
+    ----------
+    num_cars : int
+        Number of cars of the null world; ignored with snapshots.
+
+    num_shards : int
+        Number of shards.
+
+    steps : int
+        Number of null world steps.
+
+    snapshots : list
+        Recorded edge update inputs, see compare_partitioners.
+
+    Returns
+    -------
+    stats : dict
+        'step_ms' (mean, p95, total of the whole edge step), 'max_shard_ms'
+        (mean of the slowest shard per step), 'handoffs' and 'conflicts'.
+    """
+    if snapshots:
+        numlanes = snapshots[0]['numlanes']
+        map_length = snapshots[0].get('map_length', EDGE_MAP_LENGTH)
+        search_dt = snapshots[0]['search_dt']
+        inputs = [(range(s['numcars']), s['x'], s['y'], s['v'],
+                   s['traffic_velocity']) for s in snapshots]
+    else:
+        rng = np.random.default_rng(seed)
+        search_dt = 2.0
+        # evenly spread cars, the spawn repair fixes the rest
+        x = (np.arange(num_cars) * (map_length - 1) / num_cars +
+             rng.uniform(0, 1, num_cars))
+        inputs = [(range(num_cars), x, rng.integers(0, numlanes, num_cars),
+                   rng.uniform(5, 15, num_cars), 15.0)]
+
+    planner = ShardedEdgePlanner(search_dt, numlanes, map_length,
+                                 num_shards, executor=executor,
+                                 slice_partitioner=slice_partitioner)
+    times = []
+    try:
+        for step in range(len(inputs) if snapshots else steps):
+            vehicle_ids, x, y, v, target_velocity = \
+                inputs[step] if snapshots else inputs[0]
+            start_time = time.perf_counter()
+            planner.update(vehicle_ids, x, y, v, target_velocity)
+            x_states, y_states, _, v_states = planner.step()
+            times.append((time.perf_counter() - start_time) * 1000)
+            if not snapshots:
+                inputs[0] = (vehicle_ids, x_states[:, 0], y_states[:, 0],
+                             v_states[:, 0], target_velocity)
+    finally:
+        planner.close()
+
+    return {'step_ms': {'mean': float(np.mean(times)),
+                        'p95': float(np.percentile(times, 95)),
+                        'total': float(np.sum(times))},
+            'max_shard_ms': float(np.mean([max(shard_times) for shard_times
+                                           in planner.shard_ms])),
+            'handoffs': planner.handoffs,
+            'conflicts': planner.conflicts}
@@ -31,6 +31,7 @@ import time
 from typing import Iterable
 from queue import Queue
 import heapq
+import psutil
 from google.protobuf.timestamp_pb2 import Timestamp
 
 from google.protobuf.json_format import MessageToJson
@@ -62,8 +63,19 @@ from opencda.scenario_testing.utils.yaml_utils import load_yaml
 import opencda.core.plan.drive_profile_plotting as open_plt
 
 # TODO: make base ecloud folder
-from opencda.core.common.ecloud_config import EcloudConfig
+from opencda.core.common.ecloud_config import EcloudConfig, eTickMode, eTransport
+from opencda.core.common.tracing import configure_tracer, merge_traces
+from opencda.core.common.replay import configure_recorder
+from opencda.core.common.resource_monitor import SAMPLE_FIELDS, configure_resource_collector
+from opencda.core.common.waypoint_delta import WaypointDeltaEncoder
+from opencda.core.common.tick_barrier import sim_tick_timeout_s
+from opencda.core.common.wait_points import SIM_ASYNC_PACING, SIM_REGISTRATION, \
+    SIM_TICK_BARRIER, wait_breakdown, waiting
+from opencda.scenario_testing.utils.spawn_api import CavSpawnPlanner, \
+    SpawnPointCache, sample_spawn_order, candidate_transform, spawn_batch
 from opencda.ecloud_server.ecloud_comms import EcloudClient, EcloudPushServer, ecloud_run_push_server
+from opencda.ecloud_server.ecloud_shards import ecloud_server_command, ecloud_run_shard_coordinator, shard_stubs
+from opencda.ecloud_server.ecloud_shm import ShmEcloudServer
 
 logger = logging.getLogger(__name__)
 coloredlogs.install(level='DEBUG', logger=logger)
@@ -201,6 +213,7 @@ class ScenarioManager:
     vehicle_managers = {}
     vehicles = {} # vehicle_index -> tuple (actor_id, vid)
     vehicle_count = 0
+    comms_start_ns = 0
 
     carla_version = None
     application = ['single']
@@ -216,6 +229,7 @@ class ScenarioManager:
     async def server_unpack_debug_data(self, stub_):
         logger.info("fetching vehicle updates")
         vehicle_updates_list = []
+        # every debug reply is in once the barrier completed - page through them back to back
         while True:
             ecloud_update = await stub_.Server_GetVehicleUpdates(ecloud.Empty())
             if len(ecloud_update.vehicle_update) == 0:
@@ -224,7 +238,6 @@ class ScenarioManager:
                 u = ecloud.VehicleUpdate()
                 u.CopyFrom(v)
                 vehicle_updates_list.append(u)
-            await asyncio.sleep(0.1)
         #logger.debug(f"{ecloud_update}")
         for vehicle_update in vehicle_updates_list:
             vehicle_manager_proxy = self.vehicle_managers[ vehicle_update.vehicle_index ]
@@ -256,7 +269,8 @@ class ScenarioManager:
 
     async def server_unpack_vehicle_updates(self, stub_):
         logger.debug("getting vehicle updates")
-        ecloud_update = await stub_.Server_GetVehicleUpdates(ecloud.Empty())
+        with self.tracer.span("sim.get_vehicle_updates"):
+            ecloud_update = await stub_.Server_GetVehicleUpdates(ecloud.Empty())
         logger.debug("unpacking vehicle updates")
         try:
             for vehicle_update in ecloud_update.vehicle_update:
@@ -297,13 +311,37 @@ class ScenarioManager:
         empty = await stub_.Server_DoTick(update_)
 
         assert(self.push_q.empty())
-        tick = await self.push_q.get()
+        try:
+            # the server evicts hung vehicles, so the barrier should always complete - this only catches a hung server
+            with waiting(self.debug_helper.wait_time_list, SIM_TICK_BARRIER, update_.tick_id):
+                tick = await asyncio.wait_for(self.push_q.get(), self.tick_timeout_s)
+        except asyncio.TimeoutError:
+            logger.error(f"tick {update_.tick_id} barrier did not complete within {self.tick_timeout_s}s")
+            raise RuntimeError(f"ecloud server did not complete tick {update_.tick_id}")
         snapshot_t = time.time_ns()
         self.push_q.task_done()
 
+        for vehicle_index in tick.evicted_vehicles:
+            logger.error(f"vehicle {vehicle_index} was evicted from the tick barrier at tick {tick.tick_id} - the fleet continues without it")
+            self.debug_helper.update_evicted_vehicle(vehicle_index, tick.tick_id)
+        if tick.staleness_barrier:
+            logger.info(f"tick {tick.tick_id} waited for vehicles more than {self.ecloud_config.get_staleness_bound()} ticks behind")
+            self.debug_helper.staleness_barrier_list.append(tick.tick_id)
+        for lateness in tick.late_vehicles:
+            logger.warning(f"vehicle {lateness.vehicle_index} replied {round(lateness.reply_ms, 2)}ms into tick {tick.tick_id}, "
+                           f"{lateness.missed_deadlines} missed deadlines")
+            self.debug_helper.update_late_reply(lateness.vehicle_index, tick.tick_id, lateness.reply_ms, lateness.missed_deadlines)
+
+        if tick.server_tick_start_ns:
+            self.server_trace_spans.append(("server.barrier", tick.tick_id, tick.server_tick_start_ns,
+                                            tick.server_tick_end_ns - tick.server_tick_start_ns, 0))
+
         # the first tick time is dramatically slower due to startup, so we don't want it to skew runtime data
         if self.tick_id == 1:
             self.debug_helper.startup_time_ms = ( snapshot_t - self.sm_start_tstamp.ToNanoseconds() ) * NSEC_TO_MSEC
+            self.debug_helper.time_to_first_tick_ms = ( snapshot_t - self.comms_start_ns ) * NSEC_TO_MSEC
+            logger.info(f"time to first tick for {self.vehicle_count} cars: {round(self.debug_helper.time_to_first_tick_ms, 2)}ms | "
+                        f"spawn: {round(self.debug_helper.spawn_time_ms, 2)}ms | registration: {round(self.debug_helper.registration_time_ms, 2)}ms")
             return empty
 
         overall_step_time_ms = ( snapshot_t - self.sm_start_tstamp.ToNanoseconds() ) * NSEC_TO_MSEC # barrier sync means this is the same for ALL vehicles per tick
@@ -327,7 +365,8 @@ class ScenarioManager:
         print(f"start {self.vehicle_count} vehicle containers")
 
         assert(self.push_q.empty())
-        await self.push_q.get()
+        with waiting(self.debug_helper.wait_time_list, SIM_REGISTRATION):
+            await self.push_q.get()
         self.push_q.task_done()
 
         logger.info(f"vehicle registration complete")
@@ -357,6 +396,21 @@ class ScenarioManager:
 
         self.config_file = config_file
         self.ecloud_config = EcloudConfig(load_yaml(self.config_file), logger)
+        self.tracer = configure_tracer("sim", self.ecloud_config.get_trace_enabled(), self.ecloud_config.get_trace_buffer_size())
+        self.server_trace_spans = [] # barrier spans reported back by the ecloud server on each tick
+        self.recorder = configure_recorder("sim", self.ecloud_config.get_record_enabled(), self.ecloud_config.get_record_folder())
+        self.resource_collector = configure_resource_collector("sim", self.ecloud_config.get_resource_telemetry_enabled(),
+                                                               self.ecloud_config.get_resource_sample_period_s())
+        self.resource_collector.start()
+        self.waypoint_encoder = WaypointDeltaEncoder() if self.ecloud_config.get_waypoint_delta_enabled() else None
+        self.spawn_point_cache = SpawnPointCache(self.ecloud_config.get_spawn_cache_folder())
+        self.tick_timeout_s = sim_tick_timeout_s(self.ecloud_config.get_tick_deadline_ms(), self.ecloud_config.get_max_missed_ticks())
+        self.async_ticks = self.ecloud_config.get_tick_mode() == eTickMode.ASYNC
+        self.num_shards = self.ecloud_config.get_num_shards()
+        self.shm_transport = self.ecloud_config.get_transport() == eTransport.SHM
+        if self.shm_transport and ( self.async_ticks or self.num_shards > 1 ):
+            sys.exit('ERROR: the shm transport only supports sync ticks on a single server shard')
+        self.next_tick_time = None
         self.sm_start_tstamp.GetCurrentTime()
         self.scenario_params = scenario_params
         self.carla_version = carla_version
@@ -365,7 +419,7 @@ class ScenarioManager:
         simulation_config = scenario_params['world']
 
         self.run_distributed = distributed
-        if distributed and ( ECLOUD_IP == 'localhost' or ECLOUD_IP == CARLA_IP ):
+        if distributed and not self.shm_transport and ( ECLOUD_IP == 'localhost' or ECLOUD_IP == CARLA_IP ):
             server_log_level = 0 if logger.getEffectiveLevel() == logging.DEBUG else \
                                 1 if logger.getEffectiveLevel() == logging.WARNING else 2 # 1: WARNING | 2: ERROR
             try:
@@ -378,7 +432,9 @@ class ScenarioManager:
                 logger.info(f'killing existing ecloud gRPC server process')
                 subprocess.run(['pkill','-9','ecloud_server'])
 
-            self.ecloud_server_process = subprocess.Popen(['./opencda/ecloud_server/ecloud_server',f'--minloglevel={server_log_level}'], stderr=sys.stdout.buffer)
+            # one server process per shard, all on this host
+            self.ecloud_server_processes = [subprocess.Popen(ecloud_server_command(shard_id, self.num_shards, log_level=server_log_level), stderr=sys.stdout.buffer)
+                                            for shard_id in range(self.num_shards)]
 
         cav_world.update_scenario_manager(self)
 
@@ -421,6 +477,9 @@ class ScenarioManager:
 
         self.world.apply_settings(new_settings)
 
+        # async ticks are paced at a fixed wall-clock rate, by default real time
+        self.async_tick_period_s = self.ecloud_config.get_async_tick_period_s() or simulation_config['fixed_delta_seconds']
+
         # set weather
         weather = self.set_weather(simulation_config['weather'])
         self.world.set_weather(weather)
@@ -452,15 +511,18 @@ class ScenarioManager:
             if apply_ml == True:
                 assert( False, "ML should only be run on the distributed clients")
 
-            channel = grpc.aio.insecure_channel(
-            target=f"{ECLOUD_IP}:50051",
-            options=[
-                ("grpc.lb_policy_name", "pick_first"),
-                ("grpc.enable_retries", 1),
-                ("grpc.keepalive_timeout_ms", TIMEOUT_MS),
-                ("grpc.service_config", EcloudClient.retry_opts)],
-            )
-            self.ecloud_server = ecloud_rpc.EcloudStub(channel)
+            if self.shm_transport:
+                # co-located vehicles: the sim hosts the server on shared memory
+                self.ecloud_server = ShmEcloudServer()
+            else:
+                # a sharded server is driven through a stub that fans out to every shard
+                self.ecloud_server = shard_stubs(ECLOUD_IP, self.num_shards,
+                options=[
+                    ("grpc.lb_policy_name", "pick_first"),
+                    ("grpc.enable_retries", 1),
+                    ("grpc.keepalive_timeout_ms", TIMEOUT_MS),
+                    ("grpc.service_config", EcloudClient.retry_opts)] + EcloudClient.message_size_opts,
+                )
 
             self.debug_helper.update_sim_start_timestamp(time.time())
 
@@ -473,12 +535,32 @@ class ScenarioManager:
             self.debug_helper.update_sim_start_timestamp(time.time())
 
     async def run_comms(self):
+        self.comms_start_ns = time.time_ns()
         self.push_q = asyncio.Queue()
-        self.push_server = asyncio.create_task(ecloud_run_push_server(ECLOUD_PUSH_API_PORT, self.push_q))
+        self.resource_collector.add_queue("push_q", self.push_q)
+        push_ready = asyncio.Event()
+        if self.shm_transport:
+            # completed ticks land in the push queue straight from the shm server
+            await self.ecloud_server.start(self.push_q)
+            push_ready.set()
+        elif self.num_shards > 1:
+            # the coordinator queues a tick once every shard completed it
+            self.push_server = asyncio.create_task(ecloud_run_shard_coordinator(ECLOUD_PUSH_API_PORT, self.push_q, self.num_shards, push_ready))
+        else:
+            self.push_server = asyncio.create_task(ecloud_run_push_server(ECLOUD_PUSH_API_PORT, self.push_q, push_ready))
         #self.push_server = threading.Thread(target=ecloud_run_push_server, args=(ECLOUD_PUSH_API_PORT, self.push_q,))
         #self.push_server.start()
 
-        await asyncio.sleep(1) # this yields CPU to allow the PushServer to start
+        # spawn the whole fleet in one batch while the push server starts; the registration replies hand out the actors
+        spawn_planner = CavSpawnPlanner(self.scenario_params, self.carla_map, self.ecloud_config.get_location_type())
+        spawns = []
+        if spawn_planner.supported(self.vehicle_count):
+            spawns = spawn_planner.spawn_all(self.client, self.world, self.vehicle_count, self.carla_version)
+            self.debug_helper.spawn_time_ms = spawn_planner.spawn_time_ms
+            for spawn in spawns:
+                self.vehicles[f"vehicle_{spawn.vehicle_index}"] = (spawn.actor_id, None)
+
+        await push_ready.wait()
 
         server_request = ecloud.SimulationInfo()
         server_request.test_scenario = self.scenario
@@ -487,8 +569,15 @@ class ScenarioManager:
         server_request.vehicle_index = self.vehicle_count # bit of a hack to use vindex as count here
         server_request.is_edge = self.is_edge
         server_request.vehicle_machine_ip = VEHICLE_IP
+        server_request.spawns.extend(spawns)
+        server_request.tick_deadline_ms = self.ecloud_config.get_tick_deadline_ms()
+        server_request.max_missed_ticks = self.ecloud_config.get_max_missed_ticks()
+        server_request.async_ticks = self.async_ticks
+        server_request.staleness_bound = self.ecloud_config.get_staleness_bound()
 
+        registration_start_ns = time.time_ns()
         await self.server_start_scenario(self.ecloud_server, server_request)
+        self.debug_helper.registration_time_ms = ( time.time_ns() - registration_start_ns ) * NSEC_TO_MSEC
 
         self.world.tick()
 
@@ -728,6 +817,7 @@ class ScenarioManager:
         bg_list : list
             Update traffic list.
         """
+        start_time = time.time()
         blueprint_library = self.world.get_blueprint_library()
 
         ego_vehicle_random_list = car_blueprint_filter(blueprint_library,
@@ -736,64 +826,49 @@ class ScenarioManager:
         default_model = 'vehicle.lincoln.mkz2017' \
             if self.carla_version == '0.9.11' else 'vehicle.lincoln.mkz_2017'
         ego_vehicle_bp = blueprint_library.find(default_model)
+        ego_vehicle_bp.set_attribute('color', '0, 255, 0')
 
         spawn_ranges = traffic_config['range']
-        spawn_set = set()
-        spawn_num = 0
-
-        for spawn_range in spawn_ranges:
-            spawn_num += spawn_range[6]
-            x_min, x_max, y_min, y_max = \
-                math.floor(spawn_range[0]), math.ceil(spawn_range[1]), \
-                math.floor(spawn_range[2]), math.ceil(spawn_range[3])
-
-            for x in range(x_min, x_max, int(spawn_range[4])):
-                for y in range(y_min, y_max, int(spawn_range[5])):
-                    location = carla.Location(x=x, y=y, z=0.3)
-                    way_point = self.carla_map.get_waypoint(location).transform
-
-                    spawn_set.add((way_point.location.x,
-                                   way_point.location.y,
-                                   way_point.location.z,
-                                   way_point.rotation.roll,
-                                   way_point.rotation.yaw,
-                                   way_point.rotation.pitch))
-        count = 0
-        spawn_list = list(spawn_set)
-        shuffle(spawn_list)
-
-        while count < spawn_num:
-            if len(spawn_list) == 0:
-                break
-
-            coordinates = spawn_list[0]
-            spawn_list.pop(0)
-
-            spawn_transform = carla.Transform(carla.Location(x=coordinates[0],
-                                                             y=coordinates[1],
-                                                             z=coordinates[
-                                                                   2] + 0.3),
-                                              carla.Rotation(
-                                                  roll=coordinates[3],
-                                                  yaw=coordinates[4],
-                                                  pitch=coordinates[5]))
-            if not traffic_config['random']:
-                ego_vehicle_bp.set_attribute('color', '0, 255, 0')
-
-            else:
-                ego_vehicle_bp = random.choice(ego_vehicle_random_list)
-
-                color = random.choice(
-                    ego_vehicle_bp.get_attribute('color').recommended_values)
-                ego_vehicle_bp.set_attribute('color', color)
-
-            vehicle = \
-                self.world.try_spawn_actor(ego_vehicle_bp, spawn_transform)
-
-            if not vehicle:
-                continue
-
-            vehicle.set_autopilot(True, 8000)
+        spawn_num = int(sum(spawn_range[6] for spawn_range in spawn_ranges))
+        candidates = \
+            self.spawn_point_cache.candidates(self.carla_map, spawn_ranges)
+
+        # same seed, same background traffic
+        seed = traffic_config.get('seed',
+                                  self.scenario_params['world'].get('seed'))
+        rng = random.Random(seed)
+        spawn_order = sample_spawn_order(len(candidates), seed)
+
+        actor_ids = []
+        failures = 0
+        rounds = 0
+        while len(actor_ids) < spawn_num and spawn_order:
+            # failed spawns are replaced by the next candidates
+            batch_size = min(spawn_num - len(actor_ids), len(spawn_order))
+            batch, spawn_order = spawn_order[:batch_size], \
+                spawn_order[batch_size:]
+
+            blueprints = []
+            for _ in batch:
+                if traffic_config['random']:
+                    blueprint = rng.choice(ego_vehicle_random_list)
+                    blueprint.set_attribute('color', rng.choice(
+                        blueprint.get_attribute('color').recommended_values))
+                else:
+                    blueprint = ego_vehicle_bp
+                blueprints.append(blueprint)
+
+            batch_ids, errors = spawn_batch(
+                self.client, blueprints,
+                [candidate_transform(candidates[i]) for i in batch],
+                tm.get_port())
+            actor_ids.extend(i for i in batch_ids if i is not None)
+            failures += len(errors)
+            rounds += 1
+            for error in set(errors):
+                logger.debug(f"background spawn failed: {error}")
+
+        for vehicle in self.world.get_actors(actor_ids):
             tm.auto_lane_change(vehicle, traffic_config['auto_lane_change'])
 
             if 'ignore_lights_percentage' in traffic_config:
@@ -804,10 +879,18 @@ class ScenarioManager:
             # each vehicle have slight different speed
             tm.vehicle_percentage_speed_difference(
                 vehicle,
-                traffic_config['global_speed_perc'] + random.randint(-30, 30))
+                traffic_config['global_speed_perc'] + rng.randint(-30, 30))
 
             bg_list.append(vehicle)
-            count += 1
+
+        if len(actor_ids) < spawn_num:
+            logger.warning(f"spawned {len(actor_ids)} of {spawn_num} "
+                           f"background vehicles from {len(candidates)} "
+                           f"candidates")
+        logger.info(f"spawned {len(actor_ids)} background vehicles in "
+                    f"{round((time.time() - start_time) * 1000, 2)}ms - "
+                    f"{rounds} batches, {failures} failed spawns, "
+                    f"spawn point cache hits: {self.spawn_point_cache.hits}")
 
         return bg_list
 
@@ -896,6 +979,8 @@ class ScenarioManager:
         """
         logger.info('Creating single CAVs.')
         single_cav_list = []
+        setup_start_time = time.time()
+        setup_start_rss = psutil.Process().memory_info().rss
 
         config_yaml = load_yaml(self.config_file)
         for vehicle_index in range(self.vehicle_count):
@@ -922,6 +1007,8 @@ class ScenarioManager:
             single_cav_list.append(vehicle_manager_proxy)
             self.vehicle_managers[vehicle_index] = vehicle_manager_proxy
 
+        logger.info(f"created {self.vehicle_count} vehicle manager proxies in {round((time.time() - setup_start_time) * 1000, 2)}ms, "
+                    f"sim RSS +{round((psutil.Process().memory_info().rss - setup_start_rss) / 2 ** 20, 2)}MB")
         self.tick_world()
         logger.info("Finished creating vehicle managers and returning cav list")
         return single_cav_list
@@ -982,7 +1069,7 @@ class ScenarioManager:
 
                 logger.debug(f"starting vehicle {vehicle_index} | actor_id: {actor_id} | vid: {vid}")
 
-                vehicle_manager.start_vehicle(actor_id, vid)
+                vehicle_manager.start_vehicle()
                 vehicle_manager.v2x_manager.set_platoon(None)
 
                 # add the vehicle manager to platoon
@@ -1004,8 +1091,11 @@ class ScenarioManager:
         """
         Tick the server; just a pass-through to broadcast_tick to preserve backwards compatibility for now...
         """
+        # the world step produces the tick about to be broadcast
+        self.tracer.set_tick(self.tick_id + 1)
         pre_world_tick_time = time.time()
-        self.world.tick()
+        with self.tracer.span("sim.world_tick"):
+            self.world.tick()
         post_world_tick_time = time.time()
         logger.info("World tick completion time: %s" %(post_world_tick_time - pre_world_tick_time))
         self.debug_helper.update_world_tick((post_world_tick_time - pre_world_tick_time)*1000)
@@ -1026,8 +1116,19 @@ class ScenarioManager:
 
         returns bool
         """
+        if self.async_ticks and command == ecloud.Command.TICK:
+            # fixed rate: only the staleness bound makes the sim wait for the fleet
+            now = time.time()
+            if self.next_tick_time is not None and now < self.next_tick_time:
+                with waiting(self.debug_helper.wait_time_list, SIM_ASYNC_PACING, self.tick_id + 1):
+                    time.sleep(self.next_tick_time - now)
+            self.next_tick_time = max(self.next_tick_time or now, now) + self.async_tick_period_s
+
         pre_client_tick_time = time.time()
         self.tick_id = self.tick_id + 1
+        self.tracer.set_tick(self.tick_id)
+        self.recorder.set_tick(self.tick_id)
+        self.resource_collector.set_tick(self.tick_id)
 
         if command == ecloud.Command.REQUEST_DEBUG_INFO:
             self.vehicle_state = ecloud.VehicleState.DEBUG_INFO_UPDATE
@@ -1040,7 +1141,8 @@ class ScenarioManager:
         self.sm_start_tstamp.GetCurrentTime()
         logger.debug(f"Added Timestamp")
 
-        asyncio.get_event_loop().run_until_complete(self.server_do_tick(self.ecloud_server, tick))
+        with self.tracer.span("sim.client_tick"):
+            asyncio.get_event_loop().run_until_complete(self.server_do_tick(self.ecloud_server, tick))
 
         post_client_tick_time = time.time()
         logger.info("Client tick completion time: %s" %(post_client_tick_time - pre_client_tick_time))
@@ -1067,12 +1169,18 @@ class ScenarioManager:
 
         returns bool
         """
+        if self.waypoint_encoder is not None:
+            waypoint_buffer = self.waypoint_encoder.encode_all(waypoint_buffer)
+            full_bytes, sent_bytes = self.waypoint_encoder.step_bytes[-1]
+            logger.debug(f"edge waypoints: {sent_bytes} bytes pushed, {full_bytes} bytes unencoded")
+
         edge_wp = ecloud.EdgeWaypoints()
         for wpb_proto in waypoint_buffer:
             #logger.debug(waypoint_buffer_proto.SerializeToString())
             edge_wp.all_waypoint_buffers.extend([wpb_proto])
 
-        asyncio.get_event_loop().run_until_complete(self.server_push_waypoints(self.ecloud_server, edge_wp))
+        with self.tracer.span("sim.push_waypoints"):
+            asyncio.get_event_loop().run_until_complete(self.server_push_waypoints(self.ecloud_server, edge_wp))
 
         return True
 
@@ -1086,8 +1194,15 @@ class ScenarioManager:
 
         logger.info(f"pushed END")
 
-        if self.run_distributed and ( ECLOUD_IP == 'localhost' or ECLOUD_IP == CARLA_IP ):
-            os.kill(self.ecloud_server_process.pid, signal.SIGTERM)
+        if self.waypoint_encoder is not None and self.waypoint_encoder.step_bytes:
+            full_bytes, sent_bytes = np.sum(self.waypoint_encoder.step_bytes, axis=0)
+            logger.info(f"edge waypoints: {sent_bytes} bytes pushed, {full_bytes} bytes unencoded over {len(self.waypoint_encoder.step_bytes)} pushes")
+
+        if self.run_distributed and self.shm_transport:
+            self.ecloud_server.close()
+        elif self.run_distributed and ( ECLOUD_IP == 'localhost' or ECLOUD_IP == CARLA_IP ):
+            for ecloud_server_process in self.ecloud_server_processes:
+                os.kill(ecloud_server_process.pid, signal.SIGTERM)
         
         self.debug_helper.shutdown_time_ms = time.time() - start_time
 
@@ -1181,6 +1296,92 @@ class ScenarioManager:
         data_key = f"client_individual_step_time"
         self.do_pickling(data_key, all_client_data_list_flat, cumulative_stats_folder_path)
 
+    def evaluate_barrier_data(self, cumulative_stats_folder_path):
+        late_reply_list = [reply_ms for late_replies in self.debug_helper.late_reply_dict.values()
+                           for _, reply_ms, _ in late_replies]
+        if late_reply_list:
+            data_key = f"late_reply"
+            self.do_pickling(data_key, np.array(late_reply_list), cumulative_stats_folder_path)
+
+    def evaluate_staleness_data(self, cumulative_stats_folder_path):
+        """
+        Per-vehicle distributions of the ticks skipped in the async tick mode.
+        """
+        records = [{"num_cars": self.vehicle_count, "vehicle_index": vehicle_index, "staleness_ticks": staleness}
+                   for vehicle_index, vehicle_manager_proxy in self.vehicle_managers.items()
+                   for staleness in vehicle_manager_proxy.debug_helper.staleness_list]
+        if not records:
+            return
+
+        staleness_df = pd.DataFrame.from_records(records)
+        staleness_df['run_timestamp'] = pd.Timestamp.today().strftime('%Y-%m-%d %X')
+        logger.info(f"staleness per vehicle (ticks):\n{staleness_df.groupby('vehicle_index')['staleness_ticks'].describe()}")
+
+        data_df_path = f'./{cumulative_stats_folder_path}/df_client_staleness'
+        if os.path.exists(data_df_path):
+            with open(data_df_path, 'rb') as picklefile:
+                staleness_df = pd.concat([pickle.load(picklefile), staleness_df], axis=0, ignore_index=True)
+        with open(data_df_path, 'wb') as picklefile:
+            pickle.dump(staleness_df, picklefile)
+
+    def evaluate_wait_data(self, cumulative_stats_folder_path):
+        """
+        Time the sim and the vehicles spent at each wait point.
+
+        Returns
+        -------
+        breakdown : dict
+            See wait_points.wait_breakdown.
+        """
+        records = [{"num_cars": self.vehicle_count, "process": "sim", "wait_point": name, "tick_id": tick_id, "wait_ms": wait_ms}
+                   for name, tick_id, wait_ms in self.debug_helper.wait_time_list]
+        for vehicle_index, vehicle_manager_proxy in self.vehicle_managers.items():
+            records.extend({"num_cars": self.vehicle_count, "process": f"vehicle_{vehicle_index}", "wait_point": name,
+                            "tick_id": tick_id, "wait_ms": wait_ms}
+                           for name, tick_id, wait_ms in vehicle_manager_proxy.debug_helper.wait_time_list)
+        if not records:
+            return {}
+
+        breakdown = wait_breakdown([(r["wait_point"], r["tick_id"], r["wait_ms"]) for r in records])
+        logger.info("idle time per wait point:\n" + "\n".join(
+            f"{name}: {round(stats['total_ms'], 2)}ms total ({round(100 * stats['share'], 1)}%), mean {round(stats['mean_ms'], 2)}ms, "
+            f"p95 {round(stats['p95_ms'], 2)}ms over {stats['count']}" for name, stats in breakdown.items()))
+
+        wait_df = pd.DataFrame.from_records(records)
+        wait_df['run_timestamp'] = pd.Timestamp.today().strftime('%Y-%m-%d %X')
+        data_df_path = f'./{cumulative_stats_folder_path}/df_wait_points'
+        if os.path.exists(data_df_path):
+            with open(data_df_path, 'rb') as picklefile:
+                wait_df = pd.concat([pickle.load(picklefile), wait_df], axis=0, ignore_index=True)
+        with open(data_df_path, 'wb') as picklefile:
+            pickle.dump(wait_df, picklefile)
+        return breakdown
+
+    def evaluate_resource_data(self, cumulative_stats_folder_path):
+        """
+        Resource samples of the sim and of every client host, by tick.
+        """
+        self.resource_collector.stop()
+        records = [dict(zip(SAMPLE_FIELDS, sample), process="sim", role="sim") for sample in self.resource_collector.samples()]
+        for vehicle_manager_proxy in self.vehicle_managers.values():
+            # only the first vehicle of a host reports the host's samples
+            records.extend(dict(zip(SAMPLE_FIELDS, sample), process=vehicle_manager_proxy.debug_helper.process_name, role="client")
+                           for sample in vehicle_manager_proxy.debug_helper.resource_samples_list)
+        if not records:
+            return
+
+        resource_df = pd.DataFrame.from_records(records)
+        resource_df['num_cars'] = self.vehicle_count
+        resource_df['run_timestamp'] = pd.Timestamp.today().strftime('%Y-%m-%d %X')
+        logger.info(f"resource use per process:\n{resource_df.groupby('process')[['cpu_percent', 'rss_mb', 'num_threads', 'queue_depth']].mean()}")
+
+        data_df_path = f'./{cumulative_stats_folder_path}/df_resource_usage'
+        if os.path.exists(data_df_path):
+            with open(data_df_path, 'rb') as picklefile:
+                resource_df = pd.concat([pickle.load(picklefile), resource_df], axis=0, ignore_index=True)
+        with open(data_df_path, 'wb') as picklefile:
+            pickle.dump(resource_df, picklefile)
+
     def evaluate_client_data(self, client_data_key, cumulative_stats_folder_path):
         all_client_data_list = []
         for _, vehicle_manager_proxy in self.vehicle_managers.items():
@@ -1196,6 +1397,20 @@ class ScenarioManager:
             all_client_data_list_flat = all_client_data_list_flat.flatten()
         self.do_pickling(client_data_key, all_client_data_list_flat, cumulative_stats_folder_path)
 
+    def evaluate_trace_data(self, cumulative_stats_folder_path):
+        """
+        Merge the sim, ecloud server and client spans into one Chrome trace.
+
+        The trace can be opened in chrome://tracing or ui.perfetto.dev.
+        """
+        span_sets = {"sim": self.tracer.spans(), "ecloud_server": self.server_trace_spans}
+        for vehicle_index, vehicle_manager_proxy in self.vehicle_managers.items():
+            span_sets[f"vehicle_{vehicle_index}"] = vehicle_manager_proxy.debug_helper.trace_spans_list
+
+        trace_path = f'./{cumulative_stats_folder_path}/traces/trace_{self.vehicle_count}_cars_{pd.Timestamp.today().strftime("%Y_%m_%d_%H_%M_%S")}.json'
+        merge_traces(span_sets, trace_path)
+        logger.info(f"saved trace with {sum(len(spans) for spans in span_sets.values())} spans to {trace_path}")
+
     def evaluate(self, excludes_list = None):
             """
             Used to save all members' statistics.
@@ -1233,6 +1448,11 @@ class ScenarioManager:
               self.evaluate_idle_data(cumulative_stats_folder_path)
               self.evaluate_client_process_data(cumulative_stats_folder_path)
               self.evaluate_individual_client_data(cumulative_stats_folder_path)
+              self.evaluate_barrier_data(cumulative_stats_folder_path)
+              if self.async_ticks:
+                  self.evaluate_staleness_data(cumulative_stats_folder_path)
+              wait_breakdown_dict = self.evaluate_wait_data(cumulative_stats_folder_path)
+            self.evaluate_resource_data(cumulative_stats_folder_path)
 
             client_helper = ClientDebugHelper(0)
             debug_data_lists = client_helper.get_debug_data().keys()
@@ -1241,6 +1461,12 @@ class ScenarioManager:
                     continue
                 self.evaluate_client_data(list_name, cumulative_stats_folder_path)
 
+            if self.tracer.enabled:
+                self.evaluate_trace_data(cumulative_stats_folder_path)
+
+            if self.recorder.enabled:
+                logger.info(f"saved recording to {self.recorder.save()}")
+
             # ___________Client Step time__________________________________
             client_tick_time_list = self.debug_helper.client_tick_time_list
             client_tick_time_list_flat = np.concatenate(client_tick_time_list)
@@ -1265,7 +1491,14 @@ class ScenarioManager:
             sim_start_time = self.debug_helper.sim_start_timestamp
             sim_end_time = time.time()
             total_sim_time = (sim_end_time - sim_start_time) # total time in seconds
-            perform_txt += f"Total Simulation Time: {total_sim_time} \n\t Registration Time: {self.debug_helper.startup_time_ms}ms \n\t Shutdown Time: {self.debug_helper.shutdown_time_ms}ms"
+            perform_txt += f"Total Simulation Time: {total_sim_time} \n\t Registration Time: {self.debug_helper.startup_time_ms}ms \n\t Time to First Tick: {self.debug_helper.time_to_first_tick_ms}ms \n\t Shutdown Time: {self.debug_helper.shutdown_time_ms}ms"
+            if self.async_ticks:
+                perform_txt += f"\n\t Staleness Barriers: {len(self.debug_helper.staleness_barrier_list)} of {self.tick_id} ticks"
+            if self.debug_helper.evicted_vehicle_dict:
+                perform_txt += f"\n\t Evicted Vehicles (vehicle: tick): {self.debug_helper.evicted_vehicle_dict}"
+            if self.run_distributed:
+                for name, stats in wait_breakdown_dict.items():
+                    perform_txt += f"\n\t Wait {name}: {round(stats['total_ms'], 2)}ms ({round(100 * stats['share'], 1)}%)"
 
             sim_time_df_path = f'./{cumulative_stats_folder_path}/df_total_sim_time'
             try:
@@ -1273,13 +1506,14 @@ class ScenarioManager:
                 sim_time_df = pickle.load(picklefile)  #unpickle the dataframe
             except:
                 picklefile = open(sim_time_df_path, 'wb+')
-                sim_time_df = pd.DataFrame(columns=['num_cars', 'time_s', 'startup_time_ms', 'shutdown_time_ms', 'run_timestamp'])
+                sim_time_df = pd.DataFrame(columns=['num_cars', 'time_s', 'startup_time_ms', 'time_to_first_tick_ms', 'shutdown_time_ms', 'run_timestamp'])
 
             picklefile = open(sim_time_df_path, 'wb+')
             sim_time_df = pd.concat([sim_time_df, pd.DataFrame.from_records \
                 ([{"num_cars": self.vehicle_count, \
                     "time_s": total_sim_time, \
                     "startup_time_ms": self.debug_helper.startup_time_ms, \
+                    "time_to_first_tick_ms": self.debug_helper.time_to_first_tick_ms, \
                     "shutdown_time_ms": self.debug_helper.shutdown_time_ms, \
                     "run_timestamp": pd.Timestamp.today().strftime('%Y-%m-%d %X') }])], \
                     ignore_index=True)
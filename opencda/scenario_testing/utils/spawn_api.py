@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+Batched spawning of the distributed CAVs.
+
+Instead of every vehicle container spawning its own actor, the sim plans
+the spawn transform and destination of every vehicle up front, spawns all
+actors in one apply_batch_sync and hands (actor id, transform, destination)
+to the containers with their registration reply, see ecloud.VehicleSpawn.
+The containers then attach to their existing actor.
+
+Spawns are planned like VehicleManager does it: explicit positions from
+the scenario yaml, or random spawn points seeded with the world seed plus
+the vehicle index. Random spawns that collide are redrawn and retried in
+the next batch.
+
+Background traffic spawned by range (carla_traffic_manager.range) snaps a
+grid of every range to the lanes of the map. SpawnPointCache computes these
+candidates once per map and range spec and keeps them on disk,
+sample_spawn_order draws them reproducibly from a seed and spawn_batch
+spawns them with autopilot in one apply_batch_sync.
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import time
+
+import carla
+import numpy as np
+
+import ecloud_pb2 as ecloud
+
+from opencda.core.common.ecloud_config import EcloudConfig, eLocationType
+from opencda.core.common.spawn_utils import COLLISION_ERROR, cav_blueprint, \
+    transform_to_proto, proto_to_transform
+
+logger = logging.getLogger(__name__)
+
+MAX_SPAWN_ROUNDS = 20
+SEC_TO_MSEC = 1000
+GRID_Z = 0.3 # lookup height of the range grid and spawn height above the lane
+
+
+class CavSpawnPlanner(object):
+    """
+    Plans and spawns the CAVs of a distributed scenario.
+
+    Parameters
+    ----------
+    scenario_params : dict
+        The scenario yaml.
+
+    carla_map : carla.Map
+        The map, for the spawn points of random spawns.
+
+    location_type : eLocationType
+        Explicit or random spawns and destinations.
+
+    Attributes
+    ----------
+    spawn_time_ms : float
+        Duration of the last spawn_all.
+
+    rounds : int
+        Batches needed by the last spawn_all.
+
+    min_destination_distance_m : float
+        How far random destinations are drawn from the spawn at first.
+    """
+
+    def __init__(self, scenario_params, carla_map, location_type):
+        self.scenario_params = scenario_params
+        self.carla_map = carla_map
+        self.location_type = location_type
+        self.is_edge = 'edge_list' in scenario_params['scenario']
+        self.seed = scenario_params['world'].get('seed', time.time())
+        self.min_destination_distance_m = \
+            EcloudConfig(scenario_params, logger).get_min_destination_distance_m()
+        self._spawn_points = None
+        self._rngs = {}
+        self.spawn_time_ms = 0.0
+        self.rounds = 0
+
+    def cav_config(self, vehicle_index):
+        if self.is_edge:
+            # TODO: support multiple edges...
+            return self.scenario_params['scenario']['edge_list'][0][
+                'members'][vehicle_index]
+        cav_list = self.scenario_params['scenario']['single_cav_list']
+        return cav_list[vehicle_index] \
+            if self.location_type == eLocationType.EXPLICIT else cav_list[0]
+
+    def supported(self, vehicle_count):
+        """
+        Whether every vehicle can be planned here, spawn_special needs the
+        scenario's map helper and is left to the containers.
+        """
+        return self.location_type in (eLocationType.EXPLICIT,
+                                      eLocationType.RANDOM) and \
+            not any('spawn_special' in self.cav_config(i)
+                    for i in range(vehicle_count))
+
+    def spawn_points(self):
+        if self._spawn_points is None:
+            self._spawn_points = self.carla_map.get_spawn_points()
+        return self._spawn_points
+
+    def plan(self, vehicle_index):
+        """
+        Spawn transform and destination of one vehicle. Random spawns draw
+        a new spawn point on every call.
+
+        Returns
+        -------
+        spawn : ecloud.VehicleSpawn
+            Without actor id.
+        """
+        spawn = ecloud.VehicleSpawn()
+        spawn.vehicle_index = vehicle_index
+
+        if self.location_type == eLocationType.RANDOM:
+            rng = self._rngs.setdefault(vehicle_index,
+                                        random.Random(self.seed +
+                                                      vehicle_index))
+            spawn_points = self.spawn_points()
+            transform = spawn_points[rng.randint(0, len(spawn_points) - 1)]
+            destination = self.random_destination(rng, transform.location)
+        else:
+            cav_config = self.cav_config(vehicle_index)
+            position = cav_config['spawn_position']
+            transform = carla.Transform(
+                carla.Location(x=position[0], y=position[1], z=position[2]),
+                carla.Rotation(pitch=position[5], yaw=position[4],
+                               roll=position[3]))
+            edge = self.scenario_params['scenario']['edge_list'][0] \
+                if self.is_edge else {}
+            destination = carla.Location(
+                *(edge['destination'] if edge.get('edge_sets_destination')
+                  else cav_config['destination'])[:3])
+
+        transform_to_proto(transform, spawn.transform)
+        spawn.destination.x = destination.x
+        spawn.destination.y = destination.y
+        spawn.destination.z = destination.z
+        return spawn
+
+    def random_destination(self, rng, spawn_location):
+        # like VehicleManager: at least min_destination_distance_m away,
+        # halving the distance every 10 draws
+        spawn_points = self.spawn_points()
+        dist = 0
+        min_dist = self.min_destination_distance_m
+        count = 0
+        while dist < min_dist:
+            destination = \
+                spawn_points[rng.randint(0, len(spawn_points) - 1)].location
+            dist = destination.distance(spawn_location)
+            count += 1
+            if count % 10 == 0:
+                min_dist = min_dist / 2
+        return destination
+
+    def spawn_all(self, client, world, vehicle_count, carla_version):
+        """
+        Spawn every CAV, one apply_batch_sync per round.
+
+        Parameters
+        ----------
+        client : carla.Client
+
+        world : carla.World
+
+        vehicle_count : int
+
+        carla_version : str
+
+        Returns
+        -------
+        spawns : list
+            ecloud.VehicleSpawn with actor id of every vehicle.
+        """
+        start_time = time.time()
+        blueprint = cav_blueprint(world, carla_version)
+        spawns = [self.plan(i) for i in range(vehicle_count)]
+        pending = list(range(vehicle_count))
+
+        self.rounds = 0
+        while pending:
+            self.rounds += 1
+            batch = [carla.command.SpawnActor(
+                blueprint, proto_to_transform(spawns[i].transform))
+                for i in pending]
+            responses = client.apply_batch_sync(batch, True)
+
+            failed = []
+            for i, response in zip(pending, responses):
+                if not response.error:
+                    spawns[i].actor_id = response.actor_id
+                    continue
+                if COLLISION_ERROR not in response.error or \
+                        self.location_type != eLocationType.RANDOM or \
+                        self.rounds == MAX_SPAWN_ROUNDS:
+                    raise RuntimeError(f"failed to spawn vehicle {i} at "
+                                       f"{spawns[i].transform}: "
+                                       f"{response.error}")
+                spawns[i] = self.plan(i)
+                failed.append(i)
+
+            if failed:
+                logger.info(f"spawn round {self.rounds}: {len(failed)} "
+                            f"collisions, redrawing")
+            pending = failed
+
+        self.spawn_time_ms = (time.time() - start_time) * SEC_TO_MSEC
+        logger.info(f"spawned {vehicle_count} vehicles in {self.rounds} "
+                    f"batches, {round(self.spawn_time_ms, 2)}ms")
+        return spawns
+
+
+def grid_spawn_candidates(carla_map, spawn_ranges):
+    """
+    Lane snapped spawn candidates of the grids of spawn ranges.
+
+    Parameters
+    ----------
+    carla_map : carla.Map
+
+    spawn_ranges : list
+        [x_min, x_max, y_min, y_max, x_step, y_step, count] per range.
+
+    Returns
+    -------
+    candidates : np.ndarray
+        (N,6) unique, sorted x, y, z, roll, yaw, pitch of the waypoints.
+    """
+    candidates = set()
+    for spawn_range in spawn_ranges:
+        x_min, x_max, y_min, y_max = \
+            math.floor(spawn_range[0]), math.ceil(spawn_range[1]), \
+            math.floor(spawn_range[2]), math.ceil(spawn_range[3])
+
+        for x in range(x_min, x_max, int(spawn_range[4])):
+            for y in range(y_min, y_max, int(spawn_range[5])):
+                transform = carla_map.get_waypoint(
+                    carla.Location(x=x, y=y, z=GRID_Z)).transform
+                candidates.add((transform.location.x, transform.location.y,
+                                transform.location.z,
+                                transform.rotation.roll,
+                                transform.rotation.yaw,
+                                transform.rotation.pitch))
+    return np.array(sorted(candidates), dtype=float).reshape(-1, 6)
+
+
+def candidate_transform(candidate):
+    """
+    Spawn transform of a candidate, GRID_Z above the lane.
+    """
+    return carla.Transform(
+        carla.Location(x=candidate[0], y=candidate[1],
+                       z=candidate[2] + GRID_Z),
+        carla.Rotation(roll=candidate[3], yaw=candidate[4],
+                       pitch=candidate[5]))
+
+
+class SpawnPointCache(object):
+    """
+    On disk cache of grid_spawn_candidates.
+
+    Parameters
+    ----------
+    folder : str
+        Cache folder, None to only cache in memory.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Lookups served from the cache / computed.
+
+    compute_ms : float
+        Time spent computing candidates.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self._candidates = {}
+        self.hits = 0
+        self.misses = 0
+        self.compute_ms = 0.0
+
+    @staticmethod
+    def key(carla_map, spawn_ranges):
+        """
+        Cache key of a map and range spec: the map name plus hashes of its
+        OpenDRIVE content and of the ranges.
+        """
+        opendrive = hashlib.sha1(
+            carla_map.to_opendrive().encode()).hexdigest()[:12]
+        ranges = hashlib.sha1(json.dumps(
+            [[float(v) for v in r] for r in spawn_ranges]).encode()) \
+            .hexdigest()[:12]
+        name = os.path.basename(carla_map.name)
+        return f"{name}_{opendrive}_{ranges}"
+
+    def path(self, key):
+        return os.path.join(self.folder, f"spawn_points_{key}.npy")
+
+    def candidates(self, carla_map, spawn_ranges):
+        """
+        Spawn candidates of the ranges, see grid_spawn_candidates.
+        """
+        key = self.key(carla_map, spawn_ranges)
+        if key in self._candidates:
+            self.hits += 1
+            return self._candidates[key]
+
+        if self.folder is not None and os.path.exists(self.path(key)):
+            self.hits += 1
+            candidates = np.load(self.path(key))
+        else:
+            self.misses += 1
+            start_time = time.time()
+            candidates = grid_spawn_candidates(carla_map, spawn_ranges)
+            self.compute_ms += (time.time() - start_time) * SEC_TO_MSEC
+            if self.folder is not None:
+                os.makedirs(self.folder, exist_ok=True)
+                np.save(self.path(key), candidates)
+            logger.info(f"computed {len(candidates)} spawn candidates "
+                        f"for {key}")
+
+        self._candidates[key] = candidates
+        return candidates
+
+
+def sample_spawn_order(num_candidates, seed=None):
+    """
+    Reproducible order in which the candidates are tried.
+
+    Returns
+    -------
+    order : list
+        Shuffled candidate indices.
+    """
+    order = list(range(num_candidates))
+    random.Random(seed).shuffle(order)
+    return order
+
+
+def spawn_batch(client, blueprints, transforms, tm_port):
+    """
+    Spawn autopilot vehicles in one apply_batch_sync.
+
+    Parameters
+    ----------
+    client : carla.Client
+
+    blueprints, transforms : list
+        Blueprint and spawn transform of every vehicle.
+
+    tm_port : int
+        Traffic manager port of the autopilot.
+
+    Returns
+    -------
+    actor_ids : list
+        Actor id of every vehicle, None if it failed.
+
+    errors : list
+        Error message of every failed spawn.
+    """
+    batch = [carla.command.SpawnActor(blueprint, transform).then(
+                 carla.command.SetAutopilot(carla.command.FutureActor, True,
+                                            tm_port))
+             for blueprint, transform in zip(blueprints, transforms)]
+    actor_ids, errors = [], []
+    for response in client.apply_batch_sync(batch, True):
+        if response.error:
+            actor_ids.append(None)
+            errors.append(response.error)
+        else:
+            actor_ids.append(response.actor_id)
+    return actor_ids, errors
@@ -33,6 +33,9 @@ class SimDebugHelper(PlanDebugHelper):
         self.client_tick_time_list = [[]]
         self.sim_start_timestamp = None
         self.startup_time_ms = 0
+        self.spawn_time_ms = 0 # batched fleet spawn
+        self.registration_time_ms = 0 # scenario start until every vehicle is ready
+        self.time_to_first_tick_ms = 0 # comms start until the first tick barrier completed
         self.shutdown_time_ms = 0
         self.network_time_dict = {}
         self.client_tick_time_dict = {}
@@ -40,6 +43,10 @@ class SimDebugHelper(PlanDebugHelper):
         self.client_tick_time_dict_per_client = {}   
         self.idle_time_dict = {}
         self.client_process_time_dict = {}    
+        self.evicted_vehicle_dict = {} # vehicle_index -> tick it was evicted from the barrier
+        self.late_reply_dict = {} # vehicle_index -> [(tick_id, reply_ms, missed_deadlines)]
+        self.staleness_barrier_list = [] # async ticks: ticks that waited for a vehicle beyond the staleness bound
+        self.wait_time_list = [] # the sim's (wait point, tick_id, wait_ms), see wait_points.py
 
     def update_world_tick(self, tick_time_step=None):
         self.world_tick_time_list[0].append(tick_time_step)
@@ -71,6 +78,14 @@ class SimDebugHelper(PlanDebugHelper):
           self.idle_time_dict[vehicle_index] = []
         self.idle_time_dict[vehicle_index].append(time_step)
 
+    def update_evicted_vehicle(self, vehicle_index, tick_id):
+        self.evicted_vehicle_dict[vehicle_index] = tick_id
+
+    def update_late_reply(self, vehicle_index, tick_id, reply_ms, missed_deadlines):
+        if vehicle_index not in self.late_reply_dict:
+          self.late_reply_dict[vehicle_index] = []
+        self.late_reply_dict[vehicle_index].append((tick_id, reply_ms, missed_deadlines))
+
     def update_client_process_time_timestamp(self, vehicle_index, time_step=None):
         if vehicle_index not in self.client_process_time_dict:
           self.client_process_time_dict[vehicle_index] = []
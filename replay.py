@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Script to replay recorded eCloud runs offline.
+
+Feeds the per-tick inputs recorded with ecloud.record_enabled back into the
+agent, controller, edge and comms components, diffs their outputs against
+the recording and prints per-component timing.
+"""
+
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import sys
+
+import coloredlogs, logging
+
+from opencda.core.common.replay import load_recording, format_report
+from opencda.scenario_testing.utils.replay_api import build_replay_harness, \
+    compare_partitioners
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger)
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="eCloud offline replay.")
+    parser.add_argument("recordings", nargs='+', type=str,
+                        help="Recording files written by TickRecorder.save "
+                             "(e.g. evaluation_outputs/recordings/vehicle_0_*.pkl)")
+    parser.add_argument("-c", "--components", nargs='+', type=str, default=None,
+                        help="Only replay these components: agent, controller, edge, comms, "
+                             "or the component of one vehicle, e.g. agent/3")
+    parser.add_argument("--atol", type=float, default=1e-6,
+                        help="Largest absolute output difference counted as a match")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="Number of times to replay each recording")
+    parser.add_argument("-p", "--partitioners", nargs='+', type=str, default=None,
+                        help="Instead of replaying, compare these edge slice partitioners "
+                             "(kmeans_constrained, sweep, kmeans_warm) on the recorded traffic")
+    opt = parser.parse_args()
+    return opt
+
+
+def main():
+    opt = arg_parse()
+
+    mismatched = False
+    for file_path in opt.recordings:
+        recording = load_recording(file_path)
+        if opt.partitioners is not None:
+            report = compare_partitioners(recording, opt.partitioners)
+            for name, stats in report.items():
+                logger.info(f"{name} ({file_path}) - {stats['snapshots']} snapshots, "
+                            f"partition {stats['partition_ms']['mean']:.2f}ms mean / "
+                            f"{stats['partition_ms']['p95']:.2f}ms p95, "
+                            f"intra-slice distance {stats['intra_distance']:.2f}, "
+                            f"plan cost {stats['plan_cost']:.2f}")
+            continue
+
+        for run in range(opt.repeat):
+            harness = build_replay_harness(recording, opt.atol, opt.components)
+            report = harness.run()
+            logger.info(f"{recording['process_name']} ({file_path}) - run {run + 1}/{opt.repeat}\n{format_report(report)}")
+            mismatched = mismatched or any(stats['mismatches'] for stats in report.values())
+
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info(' - Exited by user.')
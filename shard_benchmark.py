@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Script to benchmark the sharded ecloud server without a simulator.
+
+Starts every shard count's ecloud server shards on localhost, registers a
+fleet of null vehicles that only acknowledge ticks, and prints the tick
+barrier latency as the sim sees it - through the shard coordinator.
+"""
+
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import asyncio
+import logging
+import subprocess
+
+import coloredlogs
+
+from opencda.ecloud_server.ecloud_shards import ECLOUD_SERVER_BINARY, \
+    benchmark_shards
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger)
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="eCloud server sharding benchmark.")
+    parser.add_argument("-n", "--vehicles", nargs='+', type=int, default=[512],
+                        help="Fleet sizes")
+    parser.add_argument("-s", "--shards", nargs='+', type=int, default=[1, 2, 4],
+                        help="Shard counts to compare")
+    parser.add_argument("--ticks", type=int, default=50,
+                        help="Ticks per run")
+    parser.add_argument("--processes", type=int, default=8,
+                        help="Processes the null vehicles are split over")
+    parser.add_argument("--binary", type=str, default=ECLOUD_SERVER_BINARY,
+                        help="ecloud server binary")
+    opt = parser.parse_args()
+    return opt
+
+
+def main():
+    opt = arg_parse()
+
+    for num_vehicles in opt.vehicles:
+        for num_shards in opt.shards:
+            subprocess.run(['pkill', '-9', 'ecloud_server'])
+            stats = asyncio.get_event_loop().run_until_complete(benchmark_shards(
+                num_vehicles, num_shards, opt.ticks,
+                opt.processes, opt.binary))
+            logger.info(f"{num_vehicles} vehicles, {num_shards} shard(s): tick barrier "
+                        f"{stats['tick_ms']['mean']:.1f}ms mean / {stats['tick_ms']['p95']:.1f}ms p95, "
+                        f"slowest shard {stats['slowest_shard_ms']:.1f}ms, "
+                        f"registration {stats['registration_ms']:.0f}ms")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info(' - Exited by user.')
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the budgeted anytime A* search of the edge
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.astar_test_groupcaps_transform import \
+    AStarPlanner, generate_limits_grid, get_slices_clustered
+from opencda.core.application.edge.edge_debug_helper import EdgeDebugHelper
+from opencda.core.application.edge.edge_manager import plan_edge_step
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+
+class testAnytimeAStar(unittest.TestCase):
+    def setUp(self):
+        self.ov, self.oy = generate_limits_grid()
+
+    def traffic(self):
+        traffic = TrafficTracker(2.0, 4, 200)
+        traffic.update(range(8), [10, 14, 60, 64, 100, 104, 150, 154],
+                       [0, 1, 2, 2, 0, 1, 1, 2], [8, 9, 10, 7, 10, 12, 6, 9])
+        for car in traffic.cars_on_road:
+            car.target_velocity = 15.0
+        return traffic
+
+    def planner(self, **astar_args):
+        traffic = self.traffic()
+        slice_list, _, _ = get_slices_clustered(traffic, 8)
+        cars = max(slice_list, key=len)
+        return cars, AStarPlanner(cars, self.ov, self.oy, 1.0, 1.0,
+                                  traffic.cars_on_road, 0, **astar_args)
+
+    def test_unlimited_budget(self):
+        ov, oy = self.ov, self.oy
+        expected = plan_edge_step(self.traffic(), 8, ov, oy, 1.0, 1.0)
+        debug_helper = EdgeDebugHelper(0)
+        result = plan_edge_step(self.traffic(), 8, ov, oy, 1.0, 1.0,
+                                astar_args={'expansion_budget': 10 ** 6},
+                                debug_helper=debug_helper)
+        for expected_state, state in zip(expected, result):
+            np.testing.assert_array_equal(state, expected_state)
+
+        self.assertGreater(debug_helper.search_count, 0)
+        self.assertEqual(debug_helper.budget_hit_count, 0)
+        self.assertTrue(all(length >= 4 for length
+                            in debug_helper.path_length_list))
+
+    def test_fallback(self):
+        cars, a_star = self.planner(expansion_budget=0)
+        rv, ry, rx = a_star.planning()
+        stats = a_star.search_stats()
+        self.assertTrue(stats['budget_hit'])
+        self.assertTrue(stats['fallback'])
+        # keep lane, hold velocity
+        np.testing.assert_array_equal(ry[-2], [car.lane for car in cars])
+        np.testing.assert_array_equal(rv[-2], [car.v for car in cars])
+
+    def test_partial_plan(self):
+        _, full = self.planner()
+        full.planning()
+        self.assertFalse(full.search_stats()['budget_hit'])
+
+        budget = full.expansions // 2
+        _, partial = self.planner(expansion_budget=budget)
+        rv, ry, rx = partial.planning()
+        stats = partial.search_stats()
+        self.assertTrue(stats['budget_hit'])
+        self.assertFalse(stats['fallback'])
+        self.assertEqual(stats['expansions'], budget)
+        self.assertGreaterEqual(stats['path_length'], 2)
+        self.assertEqual(len(ry), stats['path_length'])
+
+    def test_time_budget(self):
+        _, a_star = self.planner(time_budget=0.0)
+        a_star.planning()
+        self.assertTrue(a_star.search_stats()['fallback'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+End to end test of the ecloud server binary's tick barrier
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import grpc
+
+import ecloud_pb2 as ecloud
+import ecloud_pb2_grpc as ecloud_rpc
+
+from opencda.ecloud_server.ecloud_comms import EcloudPushServer
+from opencda.ecloud_server.ecloud_shards import ECLOUD_PUSH_API_PORT, \
+    ECLOUD_SERVER_BINARY, ShardCoordinator, ShardedEcloudStub, \
+    ecloud_server_command, shard_of, shard_port
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BINARY = os.path.join(ROOT, ECLOUD_SERVER_BINARY)
+BASE_PORT = 50651
+PUSH_PORT = 51301
+STEP_S = (0.1, 0.5, 0.1) # vehicle 1 replies last
+STALENESS_BOUND = 2
+NUM_SHARDS = 2
+
+
+async def start_push_server(port, servicer):
+    # stopped explicitly, cancelled aio servers keep the loop from closing
+    server = grpc.aio.server()
+    ecloud_rpc.add_EcloudServicer_to_server(servicer, server)
+    server.add_insecure_port(f"[::]:{port}")
+    await server.start()
+    return server
+
+
+async def null_vehicle(stub, push_port, name, registered, live_ticks=None,
+                       step_s=0.1):
+    """
+    Null vehicle that acknowledges ticks after step_s and is killed - stops
+    replying and takes its push server down - after live_ticks ticks.
+    Returns the command it left on, None when killed.
+    """
+    push_q = asyncio.Queue()
+    push_server = await start_push_server(push_port, EcloudPushServer(push_q))
+
+    request = ecloud.RegistrationInfo()
+    request.vehicle_state = ecloud.VehicleState.REGISTERING
+    request.container_name = name
+    request.vehicle_ip = 'localhost'
+    request.push_port = push_port
+    sim_info = await stub.Client_RegisterVehicle(request)
+    registered[name] = sim_info.vehicle_index
+
+    update = ecloud.RegistrationInfo()
+    update.vehicle_state = ecloud.VehicleState.CARLA_UPDATE
+    update.vehicle_index = sim_info.vehicle_index
+    await stub.Client_RegisterVehicle(update)
+
+    ticks = 0
+    command = None
+    while live_ticks is None or ticks < live_ticks:
+        tick = await push_q.get()
+        if tick.command in (ecloud.Command.END, ecloud.Command.EVICTED):
+            command = tick.command
+            break
+        await asyncio.sleep(step_s)
+        await stub.Client_SendUpdate(tick_ok(tick.tick_id,
+                                             sim_info.vehicle_index))
+        ticks += 1
+
+    await push_server.stop(None)
+    return command
+
+
+async def connect(num_shards=1):
+    """
+    The sim's push server - the shard coordinator for more than one shard -
+    and the channel of every shard.
+    """
+    sim_q = asyncio.Queue()
+    sim_push = EcloudPushServer(sim_q) if num_shards == 1 else \
+        ShardCoordinator(sim_q, num_shards)
+    sim_server = await start_push_server(ECLOUD_PUSH_API_PORT, sim_push)
+    channels = [grpc.aio.insecure_channel(
+                    f"localhost:{shard_port(s, BASE_PORT)}")
+                for s in range(num_shards)]
+    for channel in channels:
+        await asyncio.wait_for(channel.channel_ready(), 10)
+    return sim_server, sim_push, channels
+
+
+async def start_scenario(stub, sim_q, registered, live_ticks, step_s,
+                         shards=None, **scenario):
+    """
+    Start a scenario with a null vehicle per live_ticks entry and wait for
+    their registration. Vehicle n registers with shard n % len(shards).
+    """
+    request = ecloud.SimulationInfo()
+    request.test_scenario = '{}'
+    request.application = 'single'
+    request.vehicle_index = len(live_ticks) # fleet size
+    for field, value in scenario.items():
+        setattr(request, field, value)
+    await stub.Server_StartScenario(request)
+
+    shards = shards or [stub]
+    vehicles = [asyncio.create_task(null_vehicle(
+                    shards[shard_of(n, len(shards))], PUSH_PORT + n,
+                    f"vehicle_{n}", registered,
+                    live_ticks=live_ticks[n], step_s=step_s[n]))
+                for n in range(len(live_ticks))]
+    await asyncio.wait_for(sim_q.get(), 10) # registration complete
+    await stub.Server_GetVehicleUpdates(ecloud.Empty())
+    return vehicles
+
+
+def do_tick(tick_id):
+    tick = ecloud.Tick()
+    tick.tick_id = tick_id
+    tick.command = ecloud.Command.TICK
+    return tick
+
+
+def tick_ok(tick_id, vehicle_index):
+    reply = ecloud.VehicleUpdate()
+    reply.tick_id = tick_id
+    reply.vehicle_index = vehicle_index
+    reply.vehicle_state = ecloud.VehicleState.TICK_OK
+    return reply
+
+
+class testEcloudServer(unittest.TestCase):
+    def setUp(self):
+        if not os.path.exists(BINARY):
+            self.skipTest(f"{ECLOUD_SERVER_BINARY} is not built")
+        self.processes = []
+
+    def tearDown(self):
+        for process in self.processes:
+            process.terminate()
+            process.wait()
+
+    def start_shard(self, shard_id=0, num_shards=1):
+        self.processes.append(subprocess.Popen(
+            ecloud_server_command(shard_id, num_shards, BASE_PORT,
+                                  binary=BINARY),
+            cwd=ROOT, stdout=subprocess.DEVNULL))
+
+    def test_evict_killed_client(self):
+        self.start_shard()
+
+        async def run():
+            sim_server, sim_push, (channel,) = await connect()
+            sim_q, stub = sim_push.q, ecloud_rpc.EcloudStub(channel)
+            registered = {}
+            vehicles = await start_scenario(
+                stub, sim_q, registered, [None, None, 1], STEP_S,
+                tick_deadline_ms=1000, max_missed_ticks=1)
+            killed = registered['vehicle_2']
+
+            completions = []
+            for tick_id in range(1, 4):
+                start_s = time.time()
+                await stub.Server_DoTick(do_tick(tick_id))
+                if tick_id == 3:
+                    # the killed vehicle's stale reply must not count for the tick
+                    await stub.Client_SendUpdate(tick_ok(2, killed))
+                completion = await asyncio.wait_for(sim_q.get(), 10)
+                completions.append((completion, time.time() - start_s))
+                await stub.Server_GetVehicleUpdates(ecloud.Empty())
+
+            await stub.Server_EndScenario(ecloud.Empty())
+            await asyncio.wait_for(asyncio.gather(*vehicles), 10)
+            await channel.close()
+            await sim_server.stop(None)
+            return killed, completions
+
+        killed, completions = asyncio.run(run())
+
+        self.assertEqual([c.tick_id for c, _ in completions], [1, 2, 3])
+        self.assertEqual(list(completions[0][0].evicted_vehicles), [])
+        # tick 2 completes at the deadline, without the killed vehicle
+        tick_2, tick_2_s = completions[1]
+        self.assertEqual(list(tick_2.evicted_vehicles), [killed])
+        self.assertGreaterEqual(tick_2_s, 1.0)
+        # tick 3 waits for the slower live vehicle, the evicted one's reply is dropped
+        tick_3, tick_3_s = completions[2]
+        self.assertEqual(list(tick_3.evicted_vehicles), [])
+        self.assertGreaterEqual(tick_3_s, STEP_S[1])
+        self.assertLess(tick_3_s, 1.0)
+
+    def test_push_evicted(self):
+        self.start_shard()
+
+        async def run():
+            sim_server, sim_push, (channel,) = await connect()
+            sim_q, stub = sim_push.q, ecloud_rpc.EcloudStub(channel)
+            registered = {}
+            # vehicle 1 is slow, not dead: evicted during its first tick
+            vehicles = await start_scenario(
+                stub, sim_q, registered, [None, None], (0.0, 1.5),
+                tick_deadline_ms=1000, max_missed_ticks=1)
+
+            completions = []
+            for tick_id in range(1, 3):
+                await stub.Server_DoTick(do_tick(tick_id))
+                completions.append(await asyncio.wait_for(sim_q.get(), 10))
+                await stub.Server_GetVehicleUpdates(ecloud.Empty())
+
+            # the evicted vehicle left on its own, before the scenario ends
+            commands = {}
+            commands['vehicle_1'] = await asyncio.wait_for(vehicles[1], 10)
+            await stub.Server_EndScenario(ecloud.Empty())
+            commands['vehicle_0'] = await asyncio.wait_for(vehicles[0], 10)
+            await channel.close()
+            await sim_server.stop(None)
+            return registered, completions, commands
+
+        registered, completions, commands = asyncio.run(run())
+
+        self.assertEqual(list(completions[0].evicted_vehicles),
+                         [registered['vehicle_1']])
+        self.assertEqual(commands, {'vehicle_0': ecloud.Command.END,
+                                    'vehicle_1': ecloud.Command.EVICTED})
+
+    def test_async_ticks(self):
+        self.start_shard()
+
+        async def run():
+            sim_server, sim_push, (channel,) = await connect()
+            sim_q, stub = sim_push.q, ecloud_rpc.EcloudStub(channel)
+            registered = {}
+            # vehicle 1 never acts on a push, the test replies for it
+            vehicles = await start_scenario(
+                stub, sim_q, registered, [None, 0], (0.0, 0.0),
+                async_ticks=True, staleness_bound=STALENESS_BOUND)
+            slow = registered['vehicle_1']
+
+            completions = []
+            for tick_id in range(1, STALENESS_BOUND + 1):
+                await stub.Server_DoTick(do_tick(tick_id))
+                completions.append(await asyncio.wait_for(sim_q.get(), 10))
+
+            # one tick past the bound the sim waits for the slow vehicle
+            await stub.Server_DoTick(do_tick(STALENESS_BOUND + 1))
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(sim_q.get(), 0.5)
+            await stub.Client_SendUpdate(tick_ok(1, slow))
+            completions.append(await asyncio.wait_for(sim_q.get(), 10))
+
+            await stub.Server_EndScenario(ecloud.Empty())
+            await asyncio.wait_for(asyncio.gather(*vehicles), 10)
+            await channel.close()
+            await sim_server.stop(None)
+            return completions
+
+        completions = asyncio.run(run())
+
+        self.assertEqual([c.tick_id for c in completions],
+                         list(range(1, STALENESS_BOUND + 2)))
+        self.assertEqual([c.staleness_barrier for c in completions],
+                         [False] * STALENESS_BOUND + [True])
+
+    def test_shards(self):
+        for shard_id in range(NUM_SHARDS):
+            self.start_shard(shard_id, NUM_SHARDS)
+
+        async def run():
+            sim_server, coordinator, channels = await connect(NUM_SHARDS)
+            shards = [ecloud_rpc.EcloudStub(channel) for channel in channels]
+            stub = ShardedEcloudStub(shards)
+            registered = {}
+            # vehicle 3 of shard 1 is killed after the first tick
+            vehicles = await start_scenario(
+                stub, coordinator.q, registered, [None, None, None, 1],
+                (0.0,) * 4, shards, tick_deadline_ms=1000, max_missed_ticks=1)
+
+            completions = []
+            for tick_id in range(1, 3):
+                await stub.Server_DoTick(do_tick(tick_id))
+                completions.append(await asyncio.wait_for(coordinator.q.get(), 10))
+                await stub.Server_GetVehicleUpdates(ecloud.Empty())
+
+            await stub.Server_EndScenario(ecloud.Empty())
+            await asyncio.wait_for(asyncio.gather(*vehicles), 10)
+            for channel in channels:
+                await channel.close()
+            await sim_server.stop(None)
+            return registered, completions, coordinator.shard_barrier_ms
+
+        registered, completions, shard_barrier_ms = asyncio.run(run())
+
+        # shard s hands out the global indices s, s + N, ...
+        for shard_id in range(NUM_SHARDS):
+            self.assertEqual(
+                sorted(registered[f"vehicle_{n}"] for n in range(4)
+                       if shard_of(n, NUM_SHARDS) == shard_id),
+                [shard_id, shard_id + NUM_SHARDS])
+        # one merged completion per tick, evictions by global index
+        self.assertEqual([c.tick_id for c in completions], [1, 2])
+        self.assertEqual(list(completions[0].evicted_vehicles), [])
+        self.assertEqual(list(completions[1].evicted_vehicles),
+                         [registered['vehicle_3']])
+        self.assertEqual([len(ms) for ms in shard_barrier_ms[1:]],
+                         [NUM_SHARDS] * 2) # after the registration
+
+
+if __name__ == '__main__':
+    unittest.main()
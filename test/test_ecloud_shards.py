@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the sharded ecloud server's coordinator and fan out
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import asyncio
+import os
+import sys
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ecloud_pb2 as ecloud
+
+from opencda.ecloud_server.ecloud_shards import NULL_SERVER, \
+    ShardCoordinator, ShardedEcloudStub, benchmark_shards, shard_of, \
+    shard_vehicle_count
+
+NULL_SERVER_PORT = 50751
+
+
+def completion(tick_id, start_ns, end_ns, evicted=()):
+    tick = ecloud.Tick()
+    tick.tick_id = tick_id
+    tick.server_tick_start_ns = start_ns
+    tick.server_tick_end_ns = end_ns
+    tick.last_client_duration_ns = end_ns - start_ns
+    tick.evicted_vehicles.extend(evicted)
+    return tick
+
+
+class ShardStub(object):
+    """
+    Stand-in for one shard's EcloudStub.
+    """
+
+    def __init__(self, vehicle_indices):
+        self.vehicle_indices = vehicle_indices
+        self.waypoints = None
+        self.ticks = []
+
+    async def Server_DoTick(self, request):
+        self.ticks.append(request.tick_id)
+        return ecloud.Empty()
+
+    async def Server_GetVehicleUpdates(self, request):
+        response = ecloud.EcloudResponse()
+        for vehicle_index in self.vehicle_indices:
+            response.vehicle_update.add(vehicle_index=vehicle_index)
+        return response
+
+    async def Server_PushEdgeWaypoints(self, request):
+        self.waypoints = [b.vehicle_index for b in request.all_waypoint_buffers]
+        return ecloud.Empty()
+
+
+class testEcloudShards(unittest.TestCase):
+    def test_vehicle_assignment(self):
+        # registration by fleet ordinal fills every shard to its count
+        for num_vehicles in (1, 7, 512):
+            for num_shards in (1, 2, 4):
+                for shard_id in range(num_shards):
+                    ordinals = [i for i in range(num_vehicles)
+                                if shard_of(i, num_shards) == shard_id]
+                    self.assertEqual(len(ordinals), shard_vehicle_count(
+                        num_vehicles, shard_id, num_shards))
+
+    def test_coordinator_merges_completions(self):
+        q = asyncio.Queue()
+        coordinator = ShardCoordinator(q, 2)
+        self.assertIsNone(coordinator.add(completion(1, 100, 300, [4])))
+        # the next tick of a fast shard doesn't mix into the current one
+        self.assertIsNone(coordinator.add(completion(2, 400, 500)))
+        tick = coordinator.add(completion(1, 90, 450, [3]))
+
+        self.assertEqual(tick.tick_id, 1)
+        self.assertEqual((tick.server_tick_start_ns, tick.server_tick_end_ns),
+                         (90, 450))
+        self.assertEqual(tick.last_client_duration_ns, 360)
+        self.assertEqual(sorted(tick.evicted_vehicles), [3, 4])
+        self.assertEqual(list(coordinator.pending), [2])
+
+    def test_sharded_stub(self):
+        stubs = [ShardStub([0, 2]), ShardStub([1])]
+        stub = ShardedEcloudStub(stubs)
+
+        async def run():
+            tick = ecloud.Tick()
+            tick.tick_id = 1
+            await stub.Server_DoTick(tick)
+
+            waypoints = ecloud.EdgeWaypoints()
+            for vehicle_index in range(3):
+                waypoints.all_waypoint_buffers.add(vehicle_index=vehicle_index)
+            await stub.Server_PushEdgeWaypoints(waypoints)
+            return await stub.Server_GetVehicleUpdates(ecloud.Empty())
+
+        response = asyncio.run(run())
+        self.assertEqual([s.ticks for s in stubs], [[1], [1]])
+        self.assertEqual([s.waypoints for s in stubs], [[0, 2], [1]])
+        self.assertEqual([u.vehicle_index for u in response.vehicle_update],
+                         [0, 1, 2])
+
+    def test_null_server_benchmark(self):
+        # the binary's Python stand-in serves the benchmark, sharded too
+        stats = asyncio.run(benchmark_shards(8, 2, num_ticks=3,
+                                             num_processes=2,
+                                             binary=NULL_SERVER,
+                                             base_port=NULL_SERVER_PORT))
+        self.assertGreater(stats['tick_ms']['mean'], 0)
+        self.assertGreater(stats['slowest_shard_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
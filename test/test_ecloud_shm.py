@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the shared-memory transport
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import asyncio
+import os
+import sys
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ecloud_pb2 as ecloud
+
+from opencda.ecloud_server.ecloud_shm import ShmEcloudServer, ShmLayout, \
+    record_to_update, run_null_vehicle
+
+
+class testEcloudShm(unittest.TestCase):
+    def test_layout(self):
+        layout = ShmLayout.create(bytearray(ShmLayout.size(4, 2)), 4, 2)
+        self.assertEqual(ShmLayout.attach(layout.tick.base).rings.shape, (4, 2))
+        layout.write_tick(7, ecloud.Command.TICK, 123)
+        self.assertEqual(layout.read_tick(), (2, 7, ecloud.Command.TICK, 123))
+
+        update = ecloud.VehicleUpdate(tick_id=7, vehicle_state=ecloud.VehicleState.TICK_OK)
+        update.transform.location.x = 1.5
+        update.transform.rotation.yaw = 90.0
+        update.velocity.z = -2.0
+        self.assertTrue(layout.push(3, update))
+        self.assertTrue(layout.push(3, ecloud.VehicleUpdate(tick_id=8)))
+        # a full ring refuses, the client falls back to the socket
+        self.assertFalse(layout.push(3, ecloud.VehicleUpdate(tick_id=9)))
+
+        updates = [record_to_update(r) for r in layout.drain(4)]
+        self.assertEqual([u.tick_id for u in updates], [7, 8])
+        self.assertEqual(updates[0].vehicle_index, 3)
+        self.assertEqual(updates[0].transform.location.x, 1.5)
+        self.assertEqual(updates[0].transform.rotation.yaw, 90.0)
+        self.assertEqual(updates[0].velocity.z, -2.0)
+        self.assertFalse(updates[1].HasField('transform'))
+        self.assertEqual(layout.drain(4), [])
+        self.assertTrue(layout.push(3, ecloud.VehicleUpdate(tick_id=9)))
+
+    def test_tick_round_trip(self):
+        name = f"ecloud_shm_test_{os.getpid()}"
+
+        async def run():
+            q = asyncio.Queue()
+            server = ShmEcloudServer(name, max_cars=4)
+            await server.start(q)
+            try:
+                await server.Server_StartScenario(ecloud.SimulationInfo(
+                    test_scenario='{}', vehicle_index=2)) # fleet size
+                vehicles = [asyncio.create_task(run_null_vehicle(name, i))
+                            for i in range(2)]
+                await asyncio.wait_for(q.get(), 10) # registered
+                await server.Server_GetVehicleUpdates(ecloud.Empty())
+
+                completed = []
+                for tick_id in range(1, 4):
+                    await server.Server_DoTick(ecloud.Tick(tick_id=tick_id))
+                    completed.append((await asyncio.wait_for(q.get(), 10)).tick_id)
+                    response = await server.Server_GetVehicleUpdates(ecloud.Empty())
+                    # outside edge mode only the spectator's updates reach the sim
+                    self.assertEqual([(u.vehicle_index, u.tick_id) for u in response.vehicle_update],
+                                     [(0, tick_id)])
+
+                await server.Server_EndScenario(ecloud.Empty())
+                await asyncio.wait_for(asyncio.gather(*vehicles), 10)
+                return completed
+            finally:
+                server.close()
+
+        self.assertEqual(asyncio.run(run()), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
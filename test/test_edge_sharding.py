@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the sharded edge planner
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.astar_test_groupcaps_transform import \
+    generate_limits_grid
+from opencda.core.application.edge.edge_manager import plan_edge_step
+from opencda.core.application.edge.edge_sharding import ShardedEdgePlanner
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+
+class testEdgeSharding(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.numcars = 12
+        self.x = np.arange(self.numcars) * 16.0 + rng.uniform(0, 1, 12)
+        self.y = rng.integers(0, 4, self.numcars)
+        self.v = rng.uniform(5, 15, self.numcars)
+
+    def test_single_shard_matches_edge(self):
+        tracker = TrafficTracker(2.0, 4, 200)
+        planner = ShardedEdgePlanner(2.0, 4, 200, num_shards=1)
+        ov, oy = generate_limits_grid()
+        x, y, v = self.x, self.y, self.v
+
+        for step in range(3):
+            tracker.update(range(self.numcars), x, y, v)
+            for car in tracker.cars_on_road:
+                car.target_velocity = 15.0
+            planner.update(range(self.numcars), x, y, v, 15.0)
+
+            expected = plan_edge_step(tracker, self.numcars, ov, oy, 1.0, 1.0)
+            result = planner.step()
+            for expected_state, state in zip(expected, result):
+                np.testing.assert_array_equal(state, expected_state)
+            x, y, v = expected[0][:, 0], expected[1][:, 0], expected[3][:, 0]
+
+    def test_handoff(self):
+        planner = ShardedEdgePlanner(2.0, 4, 200, num_shards=2)
+        np.testing.assert_array_equal(planner.owner_of([0, 99.5, 100, 199]),
+                                      [0, 0, 1, 1])
+
+        planner.update(['a', 'b'], [90, 150], [0, 1], [10, 10], 10.0)
+        self.assertEqual(planner.handoffs, 0)
+        # 'a' crosses into the second segment, 'b' wraps around to the first
+        planner.update(['a', 'b'], [101, 5], [0, 1], [10, 10], 10.0)
+        self.assertEqual(planner.handoffs, 2)
+        np.testing.assert_array_equal(planner.snapshot['owner'], [1, 0])
+        with self.assertRaises(ValueError):
+            planner.snapshot['x'][0] = 0
+
+    def test_neighbours_are_obstacles(self):
+        planner = ShardedEdgePlanner(2.0, 4, 200, num_shards=2, overlap=20)
+        shard = planner.shards[0]
+        np.testing.assert_array_equal(
+            shard.near(np.array([5, 110, 119, 121, 185, 179])),
+            [True, True, True, False, True, False])
+
+        planner.update(range(self.numcars), self.x, self.y, self.v, 15.0)
+        planner.step()
+        owned = np.sum(planner.snapshot['owner'] == 0)
+        self.assertGreater(len(shard.tracker.cars_on_road), owned)
+
+    def test_executors(self):
+        results = []
+        for executor in ('serial', 'thread'):
+            planner = ShardedEdgePlanner(2.0, 4, 200, num_shards=2,
+                                         executor=executor)
+            planner.update(range(self.numcars), self.x, self.y, self.v, 15.0)
+            results.append(planner.step())
+            planner.close()
+        for serial, threaded in zip(*results):
+            np.testing.assert_array_equal(serial, threaded)
+
+    def test_resolve_conflicts(self):
+        planner = ShardedEdgePlanner(2.0, 4, 200, num_shards=2)
+        planner.update(['a', 'b'], [98, 101], [0, 1], [10, 10], 10.0)
+        # 'a' changed into lane 1 and ends up in the cell of 'b'
+        x_states = np.array([[120.0], [120.0]])
+        y_states = np.array([[1.0], [1.0]])
+        planner.resolve_conflicts(x_states, y_states)
+        np.testing.assert_array_equal(y_states[:, 0], [0, 1])
+        self.assertEqual(planner.conflicts, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the batched fleet Kalman Filter
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.sensing.localization.kalman_filter import KalmanFilter
+from opencda.core.sensing.localization.fleet_kalman_filter import \
+    FleetKalmanFilter
+
+
+class testFleetKalmanFilter(unittest.TestCase):
+    def setUp(self):
+        self.dt = 0.25
+        self.num_vehicles = 5
+        self.rng = np.random.default_rng(0)
+        # small capacity so the slot arrays have to grow
+        self.fleet = FleetKalmanFilter(self.dt, capacity=2)
+        self.views = [self.fleet.view() for _ in range(self.num_vehicles)]
+        self.kfs = [KalmanFilter(self.dt) for _ in range(self.num_vehicles)]
+
+        for i in range(self.num_vehicles):
+            init = self.rng.normal(size=4) * 10
+            self.kfs[i].run_step_init(*init)
+            self.views[i].run_step_init(*init)
+
+    def test_parameters(self):
+        assert self.fleet.xEst.shape[1:] == (4,)
+        assert self.fleet.PEst.shape[1:] == (4, 4)
+        assert len(self.fleet.xEst) >= self.num_vehicles
+        assert [view.index for view in self.views] == \
+            list(range(self.num_vehicles))
+        assert self.views[0].xEst.shape == (4, 1)
+
+    def test_batched_matches_single(self):
+        for _ in range(20):
+            measurements = self.rng.normal(size=(self.num_vehicles, 5))
+            expected = [self.kfs[i].run_step(*measurements[i])
+                        for i in range(self.num_vehicles)]
+
+            for i in range(self.num_vehicles):
+                self.views[i].stage(*measurements[i])
+            stepped = self.fleet.run_step()
+
+            assert len(stepped) == self.num_vehicles
+            for i in range(self.num_vehicles):
+                np.testing.assert_allclose(self.views[i].get_estimate(),
+                                           expected[i], atol=1e-9)
+                np.testing.assert_allclose(self.views[i].PEst,
+                                           self.kfs[i].PEst, atol=1e-9)
+
+    def test_view_run_step(self):
+        expected = self.kfs[1].run_step(10, 10, 1, 10, 0.3)
+        result = self.views[1].run_step(10, 10, 1, 10, 0.3)
+        np.testing.assert_allclose(result, expected, atol=1e-9)
+        # only the stepped vehicle changed
+        np.testing.assert_allclose(self.views[0].PEst, np.eye(4))
+
+    def test_slot_reuse(self):
+        self.views[2].release()
+        assert self.fleet.add_vehicle() == 2
+        np.testing.assert_allclose(self.fleet.PEst[2], np.eye(4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the vectorized fleet PID controller
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+import carla
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.actuation.pid_controller import Controller as PIDController
+from opencda.core.actuation.fleet_pid_controller import FleetController, \
+    Controller, get_fleet_controller
+from opencda.core.actuation.control_manager import ControlManager
+
+
+class testFleetController(unittest.TestCase):
+    def setUp(self):
+        self.args = {'lat': {'k_p': 0.75, 'k_d': 0.02, 'k_i': 0.4},
+                     'lon': {'k_p': 0.37, 'k_d': 0.024, 'k_i': 0.032},
+                     'dynamic': False,
+                     'dt': 0.05,
+                     'max_brake': 1.0,
+                     'max_throttle': 1.0,
+                     'max_steering': 0.3}
+        self.num_vehicles = 8
+        self.rng = np.random.default_rng(0)
+        # small capacity so the slot arrays have to grow
+        self.fleet = FleetController(capacity=2)
+        self.views = [Controller(self.args, self.fleet)
+                      for _ in range(self.num_vehicles)]
+        self.pids = [PIDController(self.args)
+                     for _ in range(self.num_vehicles)]
+
+    def random_inputs(self):
+        ego_pos = carla.Transform(
+            carla.Location(*(self.rng.normal(size=2) * 50), 0),
+            carla.Rotation(yaw=self.rng.uniform(-180, 180)))
+        waypoint = carla.Location(*(self.rng.normal(size=2) * 50), 0)
+        return ego_pos, self.rng.uniform(0, 100), \
+            self.rng.uniform(1, 100), waypoint
+
+    def test_matches_pid_controller(self):
+        # 15 steps so the error ring buffers wrap around
+        for step in range(15):
+            inputs = [self.random_inputs()
+                      for _ in range(self.num_vehicles)]
+            # exercise both emergency stop conditions
+            inputs[0] = inputs[0][:2] + (0, inputs[0][3])
+            inputs[1] = inputs[1][:3] + (None,)
+
+            expected = []
+            for pid, (ego_pos, ego_spd, target_speed, waypoint) in \
+                    zip(self.pids, inputs):
+                pid.update_info(ego_pos, ego_spd)
+                expected.append(pid.run_step(target_speed, waypoint))
+
+            for view, (ego_pos, ego_spd, target_speed, waypoint) in \
+                    zip(self.views, inputs):
+                view.update_info(ego_pos, ego_spd)
+                view.stage(target_speed, waypoint)
+            stepped = self.fleet.run_step()
+            self.assertEqual(len(stepped), self.num_vehicles)
+
+            for view, control in zip(self.views, expected):
+                result = view.get_control()
+                self.assertAlmostEqual(result.throttle, control.throttle,
+                                       places=4)
+                self.assertAlmostEqual(result.steer, control.steer, places=4)
+                self.assertAlmostEqual(result.brake, control.brake, places=4)
+                self.assertEqual(result.hand_brake, control.hand_brake)
+
+        self.assertEqual(self.views[0].get_control().brake, 1.0)
+        self.assertEqual(self.views[1].get_control().steer, 0.0)
+
+    def test_steering_rate_limit(self):
+        ego_pos = carla.Transform(carla.Location(0, 0, 0), carla.Rotation())
+        self.views[0].update_info(ego_pos, 10)
+        # target straight to the left
+        control = self.views[0].run_step(20, carla.Location(0, 10, 0))
+        self.assertAlmostEqual(control.steer, 0.2, places=5)
+        control = self.views[0].run_step(20, carla.Location(0, 10, 0))
+        self.assertAlmostEqual(control.steer, 0.3, places=5)
+
+    def test_slot_reuse(self):
+        self.views[3].release()
+        self.assertEqual(self.fleet.add_vehicle(self.args), 3)
+        self.assertEqual(self.fleet.past_steering[3], 0.0)
+
+    def test_get_control_steps_unstepped(self):
+        ego_pos = carla.Transform(carla.Location(0, 0, 0), carla.Rotation())
+        self.views[0].update_info(ego_pos, 10)
+        self.views[0].stage(20, carla.Location(0, 10, 0))
+        self.assertAlmostEqual(self.views[0].get_control().steer, 0.2,
+                               places=5)
+        self.assertTrue(np.isnan(self.fleet.target_speed[0]))
+
+    def test_control_manager_batched(self):
+        fleet = get_fleet_controller()
+        managers = [ControlManager({'type': 'fleet_pid_controller',
+                                    'args': self.args})
+                    for _ in range(3)]
+        for manager in managers:
+            manager.update_info(
+                carla.Transform(carla.Location(0, 0, 0), carla.Rotation()),
+                10)
+            manager.stage(20, carla.Location(0, 10, 0))
+        stepped = fleet.run_step()
+        self.assertEqual(sorted(stepped),
+                         sorted(m.controller.index for m in managers))
+        for manager in managers:
+            self.assertAlmostEqual(manager.get_control().steer, 0.2, places=5)
+
+        # destroyed vehicles free their slot of the process wide fleet
+        for manager in managers:
+            manager.destroy()
+        self.assertFalse(fleet._used[[m.controller.index
+                                      for m in managers]].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
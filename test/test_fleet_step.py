@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the per tick batched fleet step of multi-vehicle hosts
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import time
+import asyncio
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.common.fleet_step import FleetBarrier, HostFleet
+from opencda.core.sensing.localization.kalman_filter import KalmanFilter
+
+
+class testFleetStep(unittest.TestCase):
+    def setUp(self):
+        self.dt = 0.25
+        self.num_vehicles = 4
+        self.num_ticks = 5
+        self.rng = np.random.default_rng(0)
+        self.measurements = self.rng.normal(
+            size=(self.num_ticks, self.num_vehicles, 5))
+
+    def test_one_step_per_tick(self):
+        host_fleet = HostFleet()
+        fleet_filter = host_fleet.get_fleet_filter(self.dt)
+        assert host_fleet.get_fleet_filter(self.dt) is fleet_filter
+        stepped = []
+        run_step = fleet_filter.run_step
+        fleet_filter.run_step = lambda: stepped.append(run_step())
+
+        kfs = [KalmanFilter(self.dt) for _ in range(self.num_vehicles)]
+        views = [fleet_filter.view() for _ in range(self.num_vehicles)]
+        for kf, view in zip(kfs, views):
+            kf.run_step_init(0, 0, 0, 0)
+            view.run_step_init(0, 0, 0, 0)
+
+        async def vehicle(i):
+            for tick in range(self.num_ticks):
+                views[i].stage(*self.measurements[tick, i])
+                await host_fleet.localize.arrive()
+                np.testing.assert_allclose(
+                    views[i].get_estimate(),
+                    kfs[i].run_step(*self.measurements[tick, i]), atol=1e-9)
+                await asyncio.sleep(0) # the next tick arrives
+            host_fleet.leave()
+
+        async def host():
+            for _ in range(self.num_vehicles):
+                host_fleet.join()
+            await asyncio.gather(*[vehicle(i)
+                                   for i in range(self.num_vehicles)])
+
+        asyncio.run(host())
+
+        assert host_fleet.localize.steps == self.num_ticks
+        assert [len(indices) for indices in stepped] == \
+            [self.num_vehicles] * self.num_ticks
+
+    def test_vehicles_without_target_arrive(self):
+        host_fleet = HostFleet()
+        steps = []
+        host_fleet.control.run_step = lambda: steps.append(True)
+
+        async def vehicle():
+            for _ in range(self.num_ticks):
+                # e.g. an edge vehicle still waiting for its waypoints
+                await host_fleet.control.arrive()
+            host_fleet.leave()
+
+        async def host():
+            host_fleet.join()
+            host_fleet.join()
+            await asyncio.gather(vehicle(), vehicle())
+
+        asyncio.run(host())
+
+        assert len(steps) == self.num_ticks
+        assert host_fleet.control.members == 0
+
+    def test_leave_releases_waiting(self):
+        steps = []
+        barrier = FleetBarrier(lambda: steps.append(True))
+        barrier.join()
+        barrier.join()
+
+        async def waiting():
+            await barrier.arrive()
+
+        async def leaving():
+            await asyncio.sleep(0)
+            barrier.leave()
+
+        async def host():
+            await asyncio.gather(waiting(), leaving())
+
+        asyncio.run(host())
+
+        assert steps == [True]
+        assert barrier.members == 1
+
+    def test_step_time_shared(self):
+        # the batched step is the vehicles' controller time, split among them
+        barrier = FleetBarrier(lambda: time.sleep(0.02))
+        for _ in range(self.num_vehicles):
+            barrier.join()
+
+        async def host():
+            await asyncio.gather(*[barrier.arrive()
+                                   for _ in range(self.num_vehicles)])
+
+        asyncio.run(host())
+
+        assert barrier.step_ms >= 20
+        assert barrier.share_ms == barrier.step_ms / self.num_vehicles
+
+
+if __name__ == '__main__':
+    unittest.main()
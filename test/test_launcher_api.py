@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the vehicle client launcher
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.scenario_testing.utils.launcher_api import ClientLauncher, \
+    HostSpec, host_command, plan_hosts, run_null_scenario
+from opencda.scenario_testing.utils.yaml_utils import load_yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TEST_PUSH_PORT = 50401
+# random locations: the null vehicles drive in lanes of their own
+SCENARIO = os.path.join(ROOT, 'opencda/scenario_testing/config_yaml/'
+                              'ecloud_4lane_scenario_dist_config.yaml')
+
+
+class testLauncherApi(unittest.TestCase):
+    def test_plan_hosts(self):
+        hosts = plan_hosts(10, 4, 50101, num_gpus=3)
+        self.assertEqual([host.num_vehicles for host in hosts], [3, 3, 2, 2])
+        self.assertEqual([host.push_port for host in hosts],
+                         [50101, 50104, 50107, 50109])
+        self.assertEqual([host.gpu for host in hosts], [0, 1, 2, 0])
+        self.assertEqual(repr(hosts), repr(plan_hosts(10, 4, 50101, 3)))
+
+        self.assertEqual(len(plan_hosts(2, 4)), 2)
+        with self.assertRaises(ValueError):
+            plan_hosts(500, 4)
+
+    def test_commands(self):
+        host = HostSpec(1, 16, 50117, gpu=1)
+        command, env = host_command(host, 'process', apply_ml=True)
+        self.assertEqual(command[1:8], ['vehiclesim.py', '--num_vehicles',
+                                        '16', '--push_port', '50117',
+                                        '--host_id', '1'])
+        self.assertEqual(env['CUDA_VISIBLE_DEVICES'], '1')
+        self.assertEqual(env['HOSTNAME'], 'vehicle_host_1')
+
+        command, _ = host_command(host, 'docker', apply_ml=True,
+                                  docker_cmd='sudo docker')
+        self.assertEqual(command[:3], ['sudo', 'docker', 'run'])
+        self.assertIn('device=1', command)
+
+        command, _ = host_command(host, 'null', transport='shm',
+                                  shm_name='ecloud_shm_test')
+        self.assertEqual(command[1:3], ['vehiclesim.py', '--null_world'])
+        self.assertEqual(command[-4:], ['--transport', 'shm',
+                                        '--shm_name', 'ecloud_shm_test'])
+
+    def test_null_hosts(self):
+        shm_name = f"ecloud_shm_launcher_{os.getpid()}"
+        hosts = plan_hosts(6, 3, TEST_PUSH_PORT)
+        launcher = ClientLauncher(hosts, 'null', cwd=ROOT, transport='shm',
+                                  shm_name=shm_name)
+        try:
+            ok, responses = asyncio.run(run_null_scenario(
+                launcher, json.dumps(load_yaml(SCENARIO)), 20, shm_name,
+                poll_s=0.1, timeout_s=60))
+        finally:
+            launcher.stop()
+        self.assertTrue(ok)
+        self.assertEqual(launcher.report()['finished'], [0, 1, 2])
+        # every vehicle reported in, the spectator's update every tick
+        self.assertEqual(len(responses[0].vehicle_update), 6)
+        self.assertEqual([len(response.vehicle_update)
+                          for response in responses[1:]], [1] * 20)
+
+    def test_crashed_host(self):
+        # no sim to register with
+        launcher = ClientLauncher(plan_hosts(2, 1, TEST_PUSH_PORT), 'null',
+                                  max_restarts=1, cwd=ROOT, transport='shm',
+                                  shm_name=f"ecloud_shm_missing_{os.getpid()}")
+        launcher.start()
+        self.assertFalse(launcher.supervise(poll_s=0.1, timeout_s=60))
+        report = launcher.report()
+        self.assertEqual(report['restarts'], {0: 1})
+        self.assertEqual(report['failed'], {0: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
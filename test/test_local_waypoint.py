@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the lightweight client waypoints of the edge buffers
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import carla
+import ecloud_pb2 as ecloud
+
+from opencda.core.application.edge.transform_utils import serialize_waypoint
+from opencda.core.common.local_waypoint import LocalWaypointResolver
+from opencda.core.common.waypoint_delta import WaypointDeltaEncoder, \
+    WaypointDeltaDecoder
+
+XODR = os.path.join(os.path.dirname(__file__), '..', 'opencda', 'assets',
+                    '2lane_freeway_simplified',
+                    '2lane_freeway_simplified.xodr')
+
+
+class testLocalWaypoint(unittest.TestCase):
+    def setUp(self):
+        with open(XODR) as f:
+            self.carla_map = carla.Map('2lane_freeway_simplified', f.read())
+        self.resolver = LocalWaypointResolver(self.carla_map)
+        self.map_waypoints = self.carla_map.generate_waypoints(20)[:10]
+
+    def buffer(self, waypoints):
+        buffer = ecloud.WaypointBuffer()
+        buffer.vehicle_index = 0
+        buffer.waypoint_buffer.extend([serialize_waypoint(wp)
+                                       for wp in waypoints])
+        return buffer
+
+    def assert_same(self, local, expected):
+        self.assertAlmostEqual(
+            local.transform.location.distance(expected.transform.location),
+            0.0, places=2)
+        self.assertAlmostEqual(local.transform.rotation.yaw,
+                               expected.transform.rotation.yaw, places=2)
+        for name in ('road_id', 'section_id', 'lane_id', 'is_junction',
+                     'lane_change'):
+            self.assertEqual(getattr(local, name), getattr(expected, name))
+        self.assertAlmostEqual(local.lane_width, expected.lane_width,
+                               places=4)
+
+    def test_decoded_without_lookups(self):
+        encoder = WaypointDeltaEncoder()
+        decoder = WaypointDeltaDecoder(self.resolver.from_point)
+        for start in range(3):
+            window = self.map_waypoints[start:start + 5]
+            waypoints = decoder.decode(encoder.encode(self.buffer(window)))
+            for local, expected in zip(waypoints, window):
+                self.assert_same(local, expected)
+        self.assertEqual(self.resolver.map_lookups, 0)
+
+    def test_map_fallback(self):
+        expected = self.map_waypoints[0]
+        local = self.resolver.from_proto(serialize_waypoint(expected))
+        self.assert_same(local, expected)
+
+        # anything not carried locally is looked up once
+        self.assertEqual(local.lane_type, expected.lane_type)
+        next_waypoint = local.next(2.0)[0]
+        self.assertEqual(next_waypoint.lane_id, expected.lane_id)
+        self.assertEqual(self.resolver.map_lookups, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
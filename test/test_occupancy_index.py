@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the per-lane occupancy index, checked against the grid scans
+of collab_sandbox.Traffic on seeded random roads
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.collab_sandbox import Traffic
+from opencda.core.application.edge.occupancy_index import OccupancyIndex, \
+    ObstacleIndex
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+
+def verify_node_loop(cars_on_road, slicenum, node_y, node_x):
+    # the loop AStarPlanner.verify_node used before the index
+    for i in range(len(node_y)):
+        for j in cars_on_road:
+            if j.slice != slicenum:
+                if node_y[i] == j.lane and abs(node_x[i] - j.pos_x) <= 10:
+                    return False
+                if (j.intentions == "Lane Change -1" and
+                        node_y[i] == j.lane - 1) and \
+                        abs(node_x[i] - j.pos_x) <= 10:
+                    return False
+                if (j.intentions == "Lane Change 1" and
+                        node_y[i] == j.lane + 1) and \
+                        abs(node_x[i] - j.pos_x) <= 10:
+                    return False
+    return True
+
+
+class testOccupancyIndex(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(3)
+        self.map_length = 200
+
+    def random_traffic(self, num_cars, numlanes=4):
+        traffic = TrafficTracker(2.0, numlanes, self.map_length)
+        # bias positions towards both ends of the map to exercise the wrap
+        x = np.where(self.rng.random(num_cars) < 0.5,
+                     self.rng.uniform(0, self.map_length - 1, num_cars),
+                     self.rng.choice([2, 8, 185, 192, 198], num_cars) +
+                     self.rng.uniform(0, 1, num_cars))
+        y = self.rng.integers(0, numlanes, num_cars)
+        v = self.rng.uniform(5, 15, num_cars)
+        traffic.update(range(num_cars), x, y, v)
+        # query from off-grid positions too, like cars during time_tick
+        for car in traffic.cars_on_road:
+            car.pos_x = (car.pos_x + self.rng.uniform(0, 1)) % \
+                self.map_length
+        return traffic
+
+    def test_vehicles_ahead(self):
+        for trial in range(50):
+            traffic = self.random_traffic(int(self.rng.integers(1, 60)),
+                                          int(self.rng.integers(1, 5)))
+            index = OccupancyIndex(traffic.lane_vehicles)
+            pos_x = [car.pos_x for car in traffic.cars_on_road]
+            lanes = [car.lane for car in traffic.cars_on_road]
+
+            for margin in (10, 15):
+                ahead = index.vehicles_ahead(pos_x, lanes, margin)
+                for carnum, car in enumerate(traffic.cars_on_road):
+                    expected = traffic.check_ahead(car, margin)
+                    self.assertEqual(
+                        expected, None if ahead[carnum] < 0
+                        else ahead[carnum])
+
+    def test_adjacent_occupancies(self):
+        for trial in range(50):
+            traffic = self.random_traffic(int(self.rng.integers(1, 60)),
+                                          int(self.rng.integers(1, 5)))
+            index = OccupancyIndex(traffic.lane_vehicles)
+            below, above = index.adjacent_occupancies(
+                [car.pos_x for car in traffic.cars_on_road],
+                [car.lane for car in traffic.cars_on_road])
+
+            for carnum, car in enumerate(traffic.cars_on_road):
+                self.assertEqual(traffic.check_adjacent_occupancies(car),
+                                 (below[carnum], above[carnum]))
+
+    def test_obstacles(self):
+        intentions = ['None', 'Lane Change 1', 'Lane Change -1']
+        for trial in range(50):
+            traffic = self.random_traffic(int(self.rng.integers(1, 40)))
+            for car in traffic.cars_on_road:
+                car.slice = int(self.rng.integers(0, 3))
+                car.intentions = intentions[self.rng.integers(0, 3)]
+
+            obstacles = ObstacleIndex(traffic.cars_on_road, 1)
+            for query in range(20):
+                node_y = self.rng.integers(0, 4, 3)
+                node_x = self.rng.uniform(0, self.map_length, 3)
+                self.assertEqual(
+                    not obstacles.blocked(node_y, node_x),
+                    verify_node_loop(traffic.cars_on_road, 1, node_y,
+                                     node_x))
+
+    def test_time_tick(self):
+        # time_tick uses the index; the result must not depend on it
+        x = [5, 30, 60, 100, 150, 195, 20, 198]
+        y = [0, 0, 1, 1, 2, 2, 3, 3]
+        v = [10, 5, 12, 8, 10, 15, 6, 9]
+        traffic = Traffic(0.2, 4, numcars=len(x),
+                          map_length=self.map_length,
+                          x_initial=x, y_initial=y, v_initial=v)
+        traffic.cars_on_road[0].target_lane = 1
+
+        for step in range(30):
+            expected = []
+            for car in traffic.cars_on_road:
+                ahead = traffic.check_ahead(car)
+                expected.append(
+                    (ahead, traffic.check_adjacent_occupancies(car)))
+            index = OccupancyIndex(traffic.lane_vehicles)
+            pos_x = [car.pos_x for car in traffic.cars_on_road]
+            lanes = [car.lane for car in traffic.cars_on_road]
+            ahead = index.vehicles_ahead(pos_x, lanes)
+            below, above = index.adjacent_occupancies(pos_x, lanes)
+            for carnum in range(len(x)):
+                self.assertEqual(
+                    expected[carnum],
+                    (None if ahead[carnum] < 0 else ahead[carnum],
+                     (below[carnum], above[carnum])))
+
+            traffic.time_tick(mode='Manual')
+
+
+if __name__ == '__main__':
+    unittest.main()
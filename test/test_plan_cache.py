@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the edge plan cache and warm starts
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import copy
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.astar_test_groupcaps_transform import \
+    AStarPlanner, generate_limits_grid, get_slices_clustered
+from opencda.core.application.edge.edge_debug_helper import EdgeDebugHelper
+from opencda.core.application.edge.edge_manager import plan_edge_step
+from opencda.core.application.edge.plan_cache import PlanCache
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+
+class testPlanCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.numcars = 12
+        self.x = np.sort(rng.choice(190, self.numcars, replace=False)) \
+            .astype(float)
+        self.y = rng.integers(0, 4, self.numcars)
+        self.v = rng.uniform(5, 15, self.numcars)
+        self.ov, self.oy = generate_limits_grid()
+
+    def run_steps(self, steps, plan_cache=None, debug_helper=None):
+        traffic = TrafficTracker(2.0, 4, 200)
+        x, y, v = self.x, self.y, self.v
+        results = []
+        for step in range(steps):
+            traffic.update(range(self.numcars), x, y, v)
+            for car in traffic.cars_on_road:
+                car.target_velocity = 15.0
+            result = plan_edge_step(traffic, self.numcars, self.ov, self.oy,
+                                    1.0, 1.0, debug_helper=debug_helper,
+                                    plan_cache=plan_cache)
+            results.append(result)
+            x, y, v = result[0][:, 0], result[1][:, 0], result[3][:, 0]
+        return traffic, results
+
+    def test_matches_uncached(self):
+        _, expected = self.run_steps(10)
+        debug_helper = EdgeDebugHelper(0)
+        _, results = self.run_steps(10, PlanCache(warm_start=False),
+                                    debug_helper)
+        for expected_states, states in zip(expected, results):
+            for expected_state, state in zip(expected_states, states):
+                np.testing.assert_array_equal(state, expected_state)
+
+        self.assertGreater(debug_helper.plan_cache_stats['hits'], 0)
+        self.assertEqual(debug_helper.plan_cache_stats['warm_starts'], 0)
+        self.assertGreater(debug_helper.plan_cache_hit_rate(), 0.0)
+        self.assertEqual(len(debug_helper.plan_cache_hit_list), 10)
+
+    def test_cached_plans_collision_free(self):
+        plan_cache = PlanCache(warm_start=False)
+        traffic, _ = self.run_steps(5, plan_cache)
+        slice_list, _, _ = get_slices_clustered(traffic, self.numcars)
+        plan_cache.new_step()
+
+        checked = 0
+        for i, cars in enumerate(slice_list):
+            if len(cars) < 2:
+                continue
+            a_star = AStarPlanner(cars, self.ov, self.oy, 1.0, 1.0,
+                                  traffic.cars_on_road, i)
+            key, order = plan_cache.key(a_star, cars)
+            if key not in plan_cache._plans:
+                continue
+            seed, context = plan_cache.lookup(a_star, cars)
+            self.assertEqual(context[2], 'cache')
+            nodes = a_star.follow_plan(a_star.start_node(), seed)
+            self.assertEqual(len(nodes), len(seed))
+            for node in nodes:
+                self.assertFalse(a_star.obstacles.blocked(node.y,
+                                                          node.x_tracked))
+            checked += 1
+
+            # a cached plan that keeps every car in its lane is valid until
+            # a car of another slice shows up on it - only the collision
+            # check against the other slices rejects it then
+            start = a_star.start_node()
+            keep_lane = [(a_star.calc_grid_position(start.v, a_star.min_v),
+                          a_star.calc_grid_position(start.y, a_star.min_y))
+                         for _ in range(len(seed))]
+            nodes = a_star.follow_plan(start, keep_lane)
+            self.assertEqual(len(nodes), len(keep_lane))
+            obstacle = copy.copy(next(car for car in traffic.cars_on_road
+                                      if car.slice != i))
+            obstacle.lane = int(nodes[-1].y[0])
+            obstacle.pos_x = float(nodes[-1].x_tracked[0])
+            obstacle.intentions = None
+            blocked_star = AStarPlanner(cars, self.ov, self.oy, 1.0, 1.0,
+                                        traffic.cars_on_road + [obstacle], i)
+            blocked_key, order = plan_cache.key(blocked_star, cars)
+            self.assertNotEqual(blocked_key, key)
+            plan_cache._plans[blocked_key] = [(v[order], y[order])
+                                              for v, y in keep_lane]
+            blocked_nodes = blocked_star.follow_plan(
+                blocked_star.start_node(), keep_lane)
+            self.assertLess(len(blocked_nodes), len(keep_lane))
+            self.assertTrue(blocked_star.obstacles.blocked(
+                nodes[len(blocked_nodes)].y,
+                nodes[len(blocked_nodes)].x_tracked))
+            seed, context = plan_cache.lookup(blocked_star, cars)
+            self.assertNotEqual(context[2], 'cache')
+            self.assertEqual(plan_cache.step_stats['rejected'], 1)
+            break
+        self.assertEqual(checked, 1)
+
+    def test_warm_start(self):
+        # without cache entries only the warm starts remain
+        plan_cache = PlanCache(max_size=0)
+        debug_helper = EdgeDebugHelper(0)
+        self.run_steps(6, plan_cache, debug_helper)
+        self.assertEqual(len(plan_cache), 0)
+        self.assertEqual(debug_helper.plan_cache_stats['hits'], 0)
+        self.assertGreater(debug_helper.plan_cache_stats['warm_starts'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for tick record/replay
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+import carla
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.actuation.control_manager import ControlManager
+from opencda.core.common.replay import TickRecorder, ReplayHarness, \
+    load_recording, diff_outputs, format_report, transform_to_tuple, \
+    location_to_tuple, control_to_tuple, split_component
+from opencda.scenario_testing.utils.replay_api import build_replay_harness
+
+
+class AccumulatorReplay(object):
+    """
+    Sums the recorded inputs; used as a deterministic component.
+    """
+
+    def __init__(self, offset=0.0):
+        self.total = 0.0
+        self.offset = offset
+
+    def replay(self, event, tick_id, inputs):
+        if event == "update":
+            self.total += inputs
+        elif event == "step":
+            return {"total": self.total + self.offset}
+        return None
+
+
+class testReplay(unittest.TestCase):
+    def setUp(self):
+        self.recorder = TickRecorder('vehicle_0', enabled=True)
+        total = 0.0
+        for tick in range(5):
+            self.recorder.set_tick(tick)
+            self.recorder.record('agent', 'update', inputs=float(tick))
+            total += tick
+            self.recorder.record('agent', 'step', outputs={"total": total})
+
+    def test_disabled(self):
+        recorder = TickRecorder('vehicle_0', enabled=False)
+        recorder.record('agent', 'update', inputs=1.0)
+        self.assertEqual(recorder.events, {})
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = self.recorder.save(
+                os.path.join(folder, 'recordings', 'vehicle_0.pkl'))
+            recording = load_recording(path)
+
+        self.assertEqual(recording['process_name'], 'vehicle_0')
+        self.assertEqual(len(recording['events']['agent']), 10)
+        self.assertEqual(recording['events']['agent'][2],
+                         (1, 'update', 1.0, None))
+
+    def test_diff_outputs(self):
+        self.assertEqual(diff_outputs({"a": (1.0, 2.0)}, {"a": (1.0, 2.5)}),
+                         0.5)
+        self.assertEqual(diff_outputs([np.zeros(3)], [np.ones(3)]), 1.0)
+        self.assertEqual(diff_outputs(float('nan'), float('nan')), 0.0)
+        self.assertEqual(diff_outputs({"a": 1}, {"b": 1}), math.inf)
+        self.assertEqual(diff_outputs([1, 2], [1, 2, 3]), math.inf)
+        self.assertEqual(diff_outputs(None, 0.0), math.inf)
+
+    def test_harness_match(self):
+        harness = ReplayHarness({'events': self.recorder.events})
+        harness.add_component('agent', AccumulatorReplay())
+        report = harness.run()
+
+        self.assertEqual(report['agent']['events'], 10)
+        self.assertEqual(report['agent']['compared'], 5)
+        self.assertEqual(report['agent']['mismatches'], 0)
+        self.assertIsNone(report['agent']['first_mismatch_tick'])
+        self.assertEqual(set(report['agent']['timing_ms']),
+                         {'update', 'step'})
+        self.assertIn('agent: 10 events', format_report(report))
+
+    def test_harness_mismatch(self):
+        harness = ReplayHarness({'events': self.recorder.events}, atol=0.1)
+        harness.add_component('agent', AccumulatorReplay(offset=1.0))
+        report = harness.run()
+
+        self.assertEqual(report['agent']['mismatches'], 5)
+        self.assertEqual(report['agent']['max_diff'], 1.0)
+        self.assertEqual(report['agent']['first_mismatch_tick'], 0)
+
+    def test_multi_vehicle_host(self):
+        # two vehicles of one host share the recorder, one a tick behind
+        config = {'type': 'pid_controller',
+                  'args': {'lat': {'k_p': 0.75, 'k_d': 0.02, 'k_i': 0.4},
+                           'lon': {'k_p': 0.37, 'k_d': 0.024, 'k_i': 0.032},
+                           'dynamic': False, 'dt': 0.05, 'max_brake': 1.0,
+                           'max_throttle': 1.0, 'max_steering': 0.3}}
+        recorder = TickRecorder('host_0', enabled=True)
+        controllers = {}
+        for vehicle_index in (3, 7):
+            controllers[vehicle_index] = ControlManager(config)
+            recorder.record('controller', 'setup', inputs={'config': config},
+                            vehicle_index=vehicle_index)
+        for tick in range(6):
+            for vehicle_index, controller in controllers.items():
+                recorder.set_tick(tick - (vehicle_index == 7), vehicle_index)
+                ego_pos = carla.Transform(
+                    carla.Location(x=tick * vehicle_index, y=vehicle_index),
+                    carla.Rotation(yaw=10.0 * vehicle_index))
+                target = carla.Location(x=tick * vehicle_index + 10, y=0)
+                controller.update_info(ego_pos, 5.0 * vehicle_index)
+                recorder.record('controller', 'update', inputs={
+                    'ego_pos': transform_to_tuple(ego_pos),
+                    'ego_spd': 5.0 * vehicle_index},
+                    vehicle_index=vehicle_index)
+                recorder.record('controller', 'step',
+                                inputs={'target_speed': 30.0,
+                                        'target_pos': location_to_tuple(target)},
+                                outputs=control_to_tuple(
+                                    controller.run_step(30.0, target)),
+                                vehicle_index=vehicle_index)
+
+        self.assertEqual(set(recorder.events),
+                         {'controller/3', 'controller/7'})
+        self.assertEqual(split_component('controller/7'), ('controller', 7))
+        self.assertEqual(split_component('edge'), ('edge', None))
+        self.assertEqual(recorder.events['controller/7'][-1][0], 4)
+        self.assertEqual(recorder.events['controller/3'][-1][0], 5)
+
+        report = build_replay_harness({'events': recorder.events}).run()
+        self.assertEqual(set(report), {'controller/3', 'controller/7'})
+        for stats in report.values():
+            self.assertEqual(stats['compared'], 6)
+            self.assertEqual(stats['mismatches'], 0)
+
+        only = build_replay_harness({'events': recorder.events},
+                                    components=['controller/7'])
+        self.assertEqual(set(only.replayers), {'controller/7'})
+
+
+if __name__ == '__main__':
+    unittest.main()
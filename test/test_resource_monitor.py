@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the resource collector
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ecloud_pb2 as ecloud
+
+from opencda.client_debug_helper import ClientDebugHelper
+from opencda.core.common.resource_monitor import SAMPLE_FIELDS, \
+    GpuMemoryProbe, ResourceCollector
+
+
+class testResourceMonitor(unittest.TestCase):
+    def test_sample(self):
+        collector = ResourceCollector('host_0', enabled=True)
+        q = asyncio.Queue()
+        q.put_nowait(ecloud.Tick())
+        collector.add_queue('push_q_0', q)
+        collector.set_tick(7)
+
+        sample = dict(zip(SAMPLE_FIELDS, collector.sample()))
+        self.assertEqual(sample['tick_id'], 7)
+        self.assertEqual(sample['queue_depth'], 1)
+        self.assertGreater(sample['rss_mb'], 0)
+        self.assertGreaterEqual(sample['num_threads'], 1)
+        if not GpuMemoryProbe().available:
+            self.assertIsNone(sample['gpu_mem_mb'])
+
+    def test_start_stop(self):
+        disabled = ResourceCollector(period_s=0.001)
+        disabled.start()
+        self.assertIsNone(disabled._thread)
+
+        collector = ResourceCollector(period_s=0.001, enabled=True)
+        collector.start()
+        time.sleep(0.05)
+        collector.stop()
+        count = len(collector.samples())
+        self.assertGreater(count, 0)
+        time.sleep(0.01)
+        self.assertEqual(len(collector.samples()), count)
+
+    def test_debug_helper_round_trip(self):
+        samples = [(1, 100, 12.5, 300.0, 9, None, 0), (2, 200, 50.0, 310.0, 9, 1024.0, 3)]
+        helper = ClientDebugHelper(0)
+        helper.update_resource_samples('host_1', samples)
+        msg = ecloud.ClientDebugHelper()
+        helper.serialize_debug_info(msg)
+
+        received = ClientDebugHelper(0)
+        received.deserialize_debug_info(msg)
+        self.assertEqual(received.process_name, 'host_1')
+        self.assertEqual(received.resource_samples_list, samples)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the data driven edge road model
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import carla
+
+from opencda.core.application.edge.road_model import RoadModel, \
+    get_road_model
+
+XODR = os.path.join(os.path.dirname(__file__), '..', 'opencda', 'assets',
+                    '2lane_freeway_simplified',
+                    '2lane_freeway_simplified.xodr')
+
+
+def curved_lanes(numlanes=3, length=150, radius=80.0, width=3.5):
+    # concentric arcs sampled every meter along each lane
+    lanes = []
+    for lane in range(numlanes):
+        lane_radius = radius + lane * width
+        angles = np.arange(length) / lane_radius
+        lanes.append(np.stack([lane_radius * np.cos(angles),
+                               lane_radius * np.sin(angles)], axis=1))
+    return lanes
+
+
+class testRoadModel(unittest.TestCase):
+    def setUp(self):
+        self.road = RoadModel(curved_lanes())
+
+    def test_forward(self):
+        self.assertEqual((self.road.numlanes, self.road.map_length), (3, 150))
+        cells = np.array([0, 10, 75, 149])
+        for lane in range(3):
+            points = self.road.table[lane, cells] + 0.3
+            processed = self.road.process_waypoints_forward(points)
+            np.testing.assert_array_equal(processed[:, 0], cells)
+            np.testing.assert_array_equal(processed[:, 1], lane)
+
+        self.assertEqual(self.road.process_single_waypoint_forward(
+            *self.road.table[2, 40]), (40, 2))
+
+    def test_back(self):
+        np.testing.assert_allclose(
+            self.road.process_back_batch([[40, 1], [41, 1]]),
+            self.road.table[1, [40, 41]])
+        # halfway between cells and lanes, and wrapping around
+        np.testing.assert_allclose(
+            self.road.process_back_batch([[40.5, 0.5]])[0],
+            self.road.table[:2, 40:42].mean(axis=(0, 1)))
+        np.testing.assert_allclose(
+            self.road.process_back_batch([[152, 0]])[0],
+            self.road.table[0, 2])
+
+        xcars = np.array([[10, 11, 12], [50, 52, 54]])
+        ycars = np.array([[0, 0, 1], [2, 2, 2]])
+        trajectories = self.road.process_trajectories_back(xcars, ycars)
+        self.assertEqual(trajectories.shape, (2, 2, 3))
+        np.testing.assert_allclose(trajectories[0, :, 2],
+                                   self.road.table[1, 12])
+        back = self.road.process_back([np.array([[54], [2]])])
+        np.testing.assert_allclose(back[0][:, 0], trajectories[1, :, 2])
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, 'road.npz')
+            self.road.save(file_path)
+            road = get_road_model(None, {'cache': file_path})
+        np.testing.assert_array_equal(road.table, self.road.table)
+        self.assertEqual(road.waypoints[1]['x'][5], self.road.table[0, 5, 0])
+
+    def test_from_carla_map(self):
+        with open(XODR) as f:
+            carla_map = carla.Map('2lane_freeway_simplified', f.read())
+        start = carla_map.generate_waypoints(50)[0].transform.location
+
+        road = RoadModel.from_carla_map(carla_map, start, length=300,
+                                        resolution=1.0)
+        self.assertEqual((road.numlanes, road.map_length), (2, 300))
+        steps = np.linalg.norm(np.diff(road.table, axis=1), axis=2)
+        np.testing.assert_allclose(steps, 1.0, atol=1e-3)
+
+        single = RoadModel.from_carla_map(carla_map, start, length=300,
+                                          num_lanes=1)
+        np.testing.assert_array_equal(single.table[0], road.table[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
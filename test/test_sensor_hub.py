@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the event driven sensor hub
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.sensing.perception.sensor_hub import SensorHub
+
+
+class FakeSensor(threading.Thread):
+    """
+    Emits one frame per period from a background thread, like a CARLA
+    sensor callback.
+    """
+
+    def __init__(self, ring, frames, period=0.005, shape=(4, 6, 3)):
+        super(FakeSensor, self).__init__(daemon=True)
+        self.ring = ring
+        self.frames = frames
+        self.period = period
+        self.shape = shape
+
+    def run(self):
+        for frame in self.frames:
+            time.sleep(self.period)
+            self.ring.put(frame, frame * 0.05,
+                          np.full(self.shape, frame % 256, dtype=np.uint8))
+
+
+class testSensorHub(unittest.TestCase):
+    def setUp(self):
+        self.hub = SensorHub(timeout=1.0)
+        self.camera = self.hub.add_sensor('camera_0', capacity=4,
+                                          shape=(4, 6, 3), dtype=np.uint8)
+        self.lidar = self.hub.add_sensor('lidar', capacity=4)
+
+    def test_wait_for_frame(self):
+        sensor = FakeSensor(self.camera, range(1, 6))
+        self.hub.set_frame(3)
+        sensor.start()
+
+        frame, timestamp, data = self.hub.wait('camera_0')
+        self.assertEqual(frame, 3)
+        self.assertAlmostEqual(timestamp, 0.15)
+        self.assertTrue(np.all(data == 3))
+        sensor.join()
+
+        stats = self.hub.stats()['camera_0']
+        self.assertEqual(stats['received'], 5)
+        self.assertEqual(stats['timeouts'], 0)
+        self.assertGreater(stats['latency_ms']['max'], 0.0)
+
+    def test_newer_frame(self):
+        for frame in (10, 11, 12):
+            self.lidar.put(frame, 0.0, np.zeros((frame, 4)))
+        self.hub.set_frame(5)
+        frame, _, data = self.hub.wait('lidar')
+        # the oldest frame at or after the requested one
+        self.assertEqual(frame, 10)
+        self.assertEqual(data.shape, (10, 4))
+
+    def test_timeout_and_dropped(self):
+        for frame in range(1, 7):
+            self.camera.put(frame, 0.0,
+                            np.full((4, 6, 3), frame, dtype=np.uint8))
+        # frames 1 and 2 were overwritten before anybody read them
+        self.assertEqual(self.camera.dropped, 2)
+
+        self.hub.set_frame(100)
+        frame, _, data = self.hub.wait('camera_0', timeout=0.01)
+        # falls back to the latest frame
+        self.assertEqual(frame, 6)
+        self.assertTrue(np.all(data == 6))
+        self.assertEqual(self.camera.timeouts, 1)
+
+    def test_wait_data(self):
+        self.hub.set_frame(None)
+        frame, _, data = self.lidar.wait(None, timeout=0.01)
+        self.assertIsNone(data)
+
+        sensor = FakeSensor(self.lidar, [1], period=0.05)
+        sensor.start()
+        data = self.hub.wait_data('lidar')
+        self.assertEqual(data.shape, (4, 6, 3))
+        sensor.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the edge slice partitioners
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.astar_test_groupcaps_transform import \
+    get_slices_clustered
+from opencda.core.application.edge.slice_partitioner import get_partitioner, \
+    num_slices, intra_slice_distance, PARTITIONERS
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+
+class testSlicePartitioner(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def random_features(self, numcars):
+        return np.stack([self.rng.uniform(0, 190, numcars),
+                         self.rng.integers(0, 4, numcars)], axis=1)
+
+    def test_valid_partitions(self):
+        for name in PARTITIONERS:
+            partitioner = get_partitioner(name)
+            for numcars in (2, 3, 8, 17, 32):
+                features = self.random_features(numcars)
+                labels = partitioner.partition(features, num_slices(numcars))
+                self.assertEqual(len(labels), numcars)
+                self.assertLess(np.max(labels), num_slices(numcars))
+                self.assertLessEqual(np.max(np.bincount(labels)), 2)
+
+    def test_sweep_pairs_neighbours(self):
+        features = np.array([[10, 0], [100, 2], [12, 0], [103, 2],
+                             [50, 1], [150, 3]])
+        labels = get_partitioner('sweep').partition(features, 4)
+        self.assertEqual(labels[0], labels[2])
+        self.assertEqual(labels[1], labels[3])
+        self.assertEqual(len(np.unique(labels)), 4)
+
+    def test_sweep_quality(self):
+        # the sweep should not group cars much worse than the solver
+        features = self.random_features(16)
+        exact = get_partitioner().partition(features, num_slices(16))
+        sweep = get_partitioner('sweep').partition(features, num_slices(16))
+        self.assertLess(intra_slice_distance(features, sweep),
+                        1.5 * intra_slice_distance(features, exact))
+
+    def test_warm_start(self):
+        partitioner = get_partitioner('kmeans_warm')
+        features = self.random_features(16)
+        labels = partitioner.partition(features, num_slices(16))
+        iterations = partitioner.iterations
+
+        # unchanged traffic converges right away to the same slices
+        np.testing.assert_array_equal(
+            partitioner.partition(features + 0.1, num_slices(16)), labels)
+        self.assertEqual(partitioner.iterations, iterations + 1)
+
+        partitioner.reset()
+        self.assertIsNone(partitioner.labels)
+
+    def test_get_slices_clustered(self):
+        traffic = TrafficTracker(2.0, 4, 200)
+        traffic.update(range(8), [10, 14, 60, 64, 100, 120, 150, 180],
+                       [0, 1, 2, 2, 0, 3, 1, 1], [10] * 8)
+        for name in PARTITIONERS:
+            slice_list, vel_array, lanechange_command = get_slices_clustered(
+                traffic, 8, get_partitioner(name))
+            self.assertEqual(sum(len(cars) for cars in slice_list), 8)
+            self.assertEqual(len(vel_array), len(slice_list))
+            for i, cars in enumerate(slice_list):
+                for car in cars:
+                    self.assertEqual(car.slice, i)
+
+    def test_unknown_partitioner(self):
+        with self.assertRaises(ValueError):
+            get_partitioner('metis')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the batched CAV spawn planning
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import tempfile
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import carla
+
+from opencda.core.common.ecloud_config import eLocationType
+from opencda.core.common.spawn_utils import proto_to_transform, \
+    proto_to_location
+from opencda.scenario_testing.utils.spawn_api import CavSpawnPlanner, \
+    SpawnPointCache, sample_spawn_order, candidate_transform
+
+XODR = os.path.join(os.path.dirname(__file__), '..', 'opencda', 'assets',
+                    '2lane_freeway_simplified',
+                    '2lane_freeway_simplified.xodr')
+
+
+class SpawnPointMap(object):
+    def get_spawn_points(self):
+        return [carla.Transform(carla.Location(x=100.0 * i, y=2.0 * i),
+                                carla.Rotation(yaw=90.0))
+                for i in range(20)]
+
+
+def scenario(**world):
+    cav = {'spawn_position': [10.0, 20.0, 0.5, 0.0, 180.0, 0.0],
+           'destination': [500.0, 20.0, 0.5]}
+    return {'world': dict(world),
+            'scenario': {'single_cav_list': [cav, dict(cav, spawn_position=[
+                30.0, 20.0, 0.5, 0.0, 180.0, 0.0])]}}
+
+
+class testSpawnApi(unittest.TestCase):
+    def test_explicit(self):
+        planner = CavSpawnPlanner(scenario(), SpawnPointMap(),
+                                  eLocationType.EXPLICIT)
+        self.assertTrue(planner.supported(2))
+        spawn = planner.plan(1)
+        transform = proto_to_transform(spawn.transform)
+        self.assertEqual((transform.location.x, transform.rotation.yaw),
+                         (30.0, 180.0))
+        self.assertEqual(proto_to_location(spawn.destination).x, 500.0)
+        self.assertEqual(spawn.actor_id, 0)
+
+    def test_random_reproducible(self):
+        def plans(planner):
+            return [(spawn.transform.location.x, spawn.destination.x)
+                    for spawn in (planner.plan(i) for i in range(4))]
+
+        first = plans(CavSpawnPlanner(scenario(seed=7), SpawnPointMap(),
+                                      eLocationType.RANDOM))
+        second = plans(CavSpawnPlanner(scenario(seed=7), SpawnPointMap(),
+                                       eLocationType.RANDOM))
+        self.assertEqual(first, second)
+        for spawn_x, destination_x in first:
+            self.assertGreaterEqual(abs(destination_x - spawn_x), 500.0)
+
+        # a redraw for a collision picks the next draw of the vehicle
+        planner = CavSpawnPlanner(scenario(seed=7), SpawnPointMap(),
+                                  eLocationType.RANDOM)
+        planner.plan(0)
+        self.assertNotEqual(planner.plan(0).transform.location.x,
+                            first[0][0])
+
+    def test_min_destination_distance(self):
+        params = scenario(seed=7)
+        params['scenario']['ecloud'] = {'min_destination_distance_m': 800}
+        planner = CavSpawnPlanner(params, SpawnPointMap(),
+                                  eLocationType.RANDOM)
+        self.assertEqual(planner.min_destination_distance_m, 800)
+        for i in range(4):
+            spawn = planner.plan(i)
+            self.assertGreaterEqual(
+                abs(spawn.destination.x - spawn.transform.location.x), 800.0)
+
+    def test_spawn_special_unsupported(self):
+        params = scenario()
+        params['scenario']['single_cav_list'][1]['spawn_special'] = [0.5]
+        planner = CavSpawnPlanner(params, SpawnPointMap(),
+                                  eLocationType.EXPLICIT)
+        self.assertFalse(planner.supported(2))
+
+
+class testSpawnPointCache(unittest.TestCase):
+    def setUp(self):
+        with open(XODR) as f:
+            self.carla_map = carla.Map('2lane_freeway_simplified', f.read())
+        self.spawn_ranges = [[0, 200, -10, 10, 10, 4, 5]]
+
+    def test_candidates_cached_on_disk(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SpawnPointCache(folder)
+            candidates = cache.candidates(self.carla_map, self.spawn_ranges)
+            self.assertEqual(candidates.shape[1], 6)
+            self.assertGreater(len(candidates), 0)
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+            # a new run loads them instead of snapping the grid again
+            cache = SpawnPointCache(folder)
+            cached = cache.candidates(self.carla_map, self.spawn_ranges)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            self.assertTrue((cached == candidates).all())
+
+            # lane snapped, spawned above the lane
+            transform = candidate_transform(candidates[0])
+            waypoint = self.carla_map.get_waypoint(transform.location)
+            self.assertLess(waypoint.transform.location.distance(
+                transform.location), 0.5)
+
+            cache.candidates(self.carla_map, [[0, 100, -10, 10, 10, 4, 5]])
+            self.assertEqual(cache.misses, 1)
+
+    def test_sample_reproducible(self):
+        self.assertEqual(sample_spawn_order(50, 3), sample_spawn_order(50, 3))
+        self.assertNotEqual(sample_spawn_order(50, 3),
+                            sample_spawn_order(50, 4))
+        self.assertEqual(sorted(sample_spawn_order(50, 3)), list(range(50)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the tick barrier deadlines and straggler eviction
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+from multiprocessing.connection import wait
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ecloud_pb2 as ecloud
+
+from opencda.core.common.tick_barrier import TickBarrier, MSEC_TO_NSEC, \
+    StalenessBarrier, latest_tick, sim_tick_timeout_s
+
+
+def vehicle_client(vehicle_index, conn, step_s):
+    # replies to every tick after a short step
+    while True:
+        tick_id = conn.recv()
+        time.sleep(step_s)
+        conn.send((vehicle_index, tick_id))
+
+
+class testTickBarrier(unittest.TestCase):
+    def test_late_reply_resets(self):
+        barrier = TickBarrier(2, deadline_ms=10, max_missed=2)
+        barrier.start_tick(1, 0)
+        self.assertFalse(barrier.reply(0, 5 * MSEC_TO_NSEC))
+        self.assertFalse(barrier.check_deadline(10 * MSEC_TO_NSEC))
+        self.assertTrue(barrier.reply(1, 12 * MSEC_TO_NSEC))
+        self.assertEqual(barrier.late_replies[1], [12.0])
+        self.assertEqual(barrier.missed[1], 1)
+
+        # on time again: not consecutive
+        barrier.start_tick(2, 100 * MSEC_TO_NSEC)
+        barrier.reply(1, 101 * MSEC_TO_NSEC)
+        self.assertEqual(barrier.missed[1], 0)
+        self.assertTrue(barrier.reply(0, 102 * MSEC_TO_NSEC, done=True))
+
+        # done vehicles no longer reply
+        self.assertEqual(barrier.start_tick(3, 200 * MSEC_TO_NSEC), [1])
+        self.assertTrue(barrier.reply(1, 201 * MSEC_TO_NSEC))
+        self.assertEqual(barrier.evicted, {})
+
+    def test_no_deadline(self):
+        barrier = TickBarrier(1)
+        barrier.start_tick(1, 0)
+        self.assertIsNone(barrier.next_deadline_ns())
+        self.assertFalse(barrier.check_deadline(10 ** 12))
+        self.assertIsNone(sim_tick_timeout_s(0, 3))
+        self.assertEqual(sim_tick_timeout_s(1000, 3, slack_s=1), 4)
+
+    def test_killed_client(self):
+        num_vehicles, num_ticks, kill_tick, deadline_ms = 4, 12, 5, 50
+        barrier = TickBarrier(num_vehicles, deadline_ms, max_missed=3)
+        conns, clients = [], []
+        for i in range(num_vehicles):
+            conn, client_conn = multiprocessing.Pipe()
+            client = multiprocessing.Process(target=vehicle_client,
+                                             args=(i, client_conn, 0.005),
+                                             daemon=True)
+            client.start()
+            conns.append(conn)
+            clients.append(client)
+
+        try:
+            tick_ms = []
+            for tick_id in range(1, num_ticks + 1):
+                if tick_id == kill_tick:
+                    clients[2].kill()
+
+                start_ns = time.monotonic_ns()
+                for i in barrier.start_tick(tick_id, start_ns):
+                    try:
+                        conns[i].send(tick_id)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass # like a failed push, the deadline catches it
+
+                complete = False
+                while not complete:
+                    timeout_s = max(0.0, (barrier.next_deadline_ns() -
+                                          time.monotonic_ns()) / 1e9)
+                    ready = wait([conns[i] for i in barrier.active()],
+                                 timeout_s)
+                    for conn in ready:
+                        try:
+                            vehicle_index, reply_tick = conn.recv()
+                        except (EOFError, ConnectionResetError):
+                            continue # the killed client, the deadline catches it
+                        self.assertEqual(reply_tick, tick_id)
+                        complete = barrier.reply(vehicle_index,
+                                                 time.monotonic_ns()) or \
+                            complete
+                    complete = barrier.check_deadline(time.monotonic_ns()) \
+                        or complete
+                tick_ms.append((time.monotonic_ns() - start_ns) / 1e6)
+
+            # the killed client was evicted in the tick it died, the rest
+            # of the fleet ran every tick
+            self.assertEqual(barrier.evicted, {2: kill_tick})
+            self.assertEqual(barrier.pop_evictions(), [2])
+            for i in (0, 1, 3):
+                self.assertEqual(len(barrier.reply_ms[i]), num_ticks)
+            self.assertEqual(len(barrier.reply_ms[2]), kill_tick - 1)
+            self.assertGreaterEqual(tick_ms[kill_tick - 1], 3 * deadline_ms)
+            self.assertLess(max(tick_ms[kill_tick:]), deadline_ms)
+        finally:
+            for client in clients:
+                client.kill()
+
+
+    def test_staleness_bound(self):
+        barrier = StalenessBarrier(3, staleness_bound=2)
+        self.assertTrue(barrier.start_tick(1))
+        barrier.reply(0, 1)
+        barrier.reply(2, 1, done=True)
+        self.assertTrue(barrier.start_tick(2))
+        # vehicle 1 is 3 ticks behind: the sim waits for it
+        self.assertFalse(barrier.start_tick(3))
+        self.assertEqual(barrier.forced, 1)
+        self.assertFalse(barrier.reply(0, 3))
+        self.assertTrue(barrier.reply(1, 2))
+        self.assertEqual(barrier.staleness(), {0: 0, 1: 1})
+        # an old reply never moves a vehicle back
+        barrier.reply(1, 1)
+        self.assertEqual(barrier.last_reply[1], 2)
+
+    def test_staleness_eviction(self):
+        barrier = StalenessBarrier(3, staleness_bound=1)
+        barrier.start_tick(1)
+        barrier.reply(0, 1)
+        barrier.reply(1, 1)
+        # vehicle 2 hangs: the sim waits for it until it is evicted
+        self.assertFalse(barrier.start_tick(2))
+        self.assertFalse(barrier.reply(0, 2))
+        self.assertTrue(barrier.evict(2))
+        self.assertEqual(barrier.staleness(), {0: 0, 1: 1})
+        # evicted vehicles no longer hold the sim back
+        barrier.reply(1, 2)
+        self.assertTrue(barrier.start_tick(3))
+        self.assertFalse(barrier.evict(1)) # nothing waiting to release
+
+    def test_latest_tick(self):
+        def ticks(*commands):
+            return [ecloud.Tick(tick_id=i + 1, command=command)
+                    for i, command in enumerate(commands)]
+
+        tick, skipped = latest_tick(ticks(ecloud.Command.TICK,
+                                          ecloud.Command.TICK,
+                                          ecloud.Command.TICK))
+        self.assertEqual((tick.tick_id, skipped), (3, 2))
+
+        tick, _ = latest_tick(ticks(ecloud.Command.PULL_WAYPOINTS_AND_TICK,
+                                    ecloud.Command.TICK))
+        self.assertEqual((tick.tick_id, tick.command),
+                         (2, ecloud.Command.PULL_WAYPOINTS_AND_TICK))
+
+        tick, _ = latest_tick(ticks(ecloud.Command.TICK,
+                                    ecloud.Command.END,
+                                    ecloud.Command.REQUEST_DEBUG_INFO))
+        self.assertEqual(tick.command, ecloud.Command.END)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for span tracing
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ecloud_pb2 as ecloud
+
+from opencda.client_debug_helper import ClientDebugHelper
+from opencda.core.common.tracing import Tracer, NULL_SPAN, merge_traces, \
+    DEFAULT_TRACE_BUFFER_SIZE, DEFAULT_TRACE_REPORT_SIZE
+
+
+class testTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer('vehicle_0', capacity=4, enabled=True)
+
+    def test_disabled(self):
+        tracer = Tracer('vehicle_0', enabled=False)
+        self.assertIs(tracer.span('client.run_step'), NULL_SPAN)
+        with tracer.span('client.run_step'):
+            pass
+        tracer.record('client.run_step', 0, 1)
+        self.assertEqual(tracer.spans(), [])
+
+    def test_span(self):
+        self.tracer.set_tick(7)
+        with self.tracer.span('client.update_info'):
+            pass
+        with self.tracer.span('client.run_step', tick_id=8):
+            pass
+
+        spans = self.tracer.spans()
+        self.assertEqual(len(spans), 2)
+        self.assertEqual(spans[0][0], 'client.update_info')
+        self.assertEqual(spans[0][1], 7)
+        self.assertEqual(spans[1][1], 8)
+        self.assertGreaterEqual(spans[0][3], 0)
+
+    def test_ring_buffer(self):
+        for i in range(6):
+            self.tracer.record('client.run_step', i, 1, tick_id=i)
+
+        spans = self.tracer.spans()
+        self.assertEqual([span[1] for span in spans], [2, 3, 4, 5])
+        self.assertEqual(self.tracer.dropped, 2)
+
+        self.assertEqual([span[1] for span in self.tracer.spans(3)], [3, 4, 5])
+        self.assertEqual(len(self.tracer.spans(10)), 4)
+
+        self.tracer.clear()
+        self.assertEqual(self.tracer.spans(), [])
+
+    def test_report_size(self):
+        # a full default buffer, capped the way a client reports it, fits gRPC's default 4MB
+        tracer = Tracer('host_0', enabled=True)
+        for i in range(DEFAULT_TRACE_BUFFER_SIZE):
+            tracer.record('client.localization', 1700000000000000000 + i * 1000000, 250000, tick_id=i,
+                          thread_id=140000000000000)
+
+        helper = ClientDebugHelper(0)
+        helper.update_trace_spans(tracer.spans(DEFAULT_TRACE_REPORT_SIZE))
+        msg = ecloud.ClientDebugHelper()
+        helper.serialize_debug_info(msg)
+        self.assertEqual(len(msg.trace_spans), DEFAULT_TRACE_REPORT_SIZE)
+        self.assertEqual(msg.trace_spans[-1].tick_id, DEFAULT_TRACE_BUFFER_SIZE - 1)
+        self.assertLess(msg.ByteSize(), 4 * 1024 * 1024)
+
+    def test_merge(self):
+        self.tracer.record('client.run_step', 2000, 1000, tick_id=1)
+        sim_spans = [('sim.world_tick', 1, 1000, 500, 1)]
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'traces', 'trace.json')
+            merge_traces({'sim': sim_spans,
+                          'vehicle_0': self.tracer.spans()}, path)
+            with open(path) as f:
+                trace = json.load(f)
+
+        events = trace['traceEvents']
+        spans = [e for e in events if e['ph'] == 'X']
+        names = [e['args']['name'] for e in events if e['ph'] == 'M']
+        self.assertEqual(names, ['sim', 'vehicle_0'])
+        self.assertEqual(len(spans), 2)
+        self.assertEqual(spans[0]['pid'], 1)
+        self.assertEqual(spans[1]['pid'], 2)
+        self.assertEqual(spans[1]['ts'], 2.0)
+        self.assertEqual(spans[1]['dur'], 1.0)
+        self.assertEqual(spans[1]['args']['tick_id'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
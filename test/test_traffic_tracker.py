@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the incremental edge traffic tracker
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.collab_sandbox import Traffic
+from opencda.core.application.edge.traffic_tracker import TrafficTracker
+
+
+def car_states(traffic):
+    return [(car.pos_x, car.lane, car.v, car.target_velocity, car.intentions,
+             car.target_lane, car.scrolled, car.slice)
+            for car in traffic.cars_on_road]
+
+
+class testTrafficTracker(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.map_length = 200
+        self.tracker = TrafficTracker(2.0, 4, self.map_length)
+
+    def assert_same_as_rebuild(self, x, y, v):
+        traffic = Traffic(2.0, 4, numcars=len(x), map_length=self.map_length,
+                          x_initial=list(x), y_initial=list(y),
+                          v_initial=list(v))
+        self.assertEqual(car_states(self.tracker), car_states(traffic))
+        np.testing.assert_array_equal(self.tracker.lane_vehicles,
+                                      traffic.lane_vehicles)
+
+    def test_matches_rebuild(self):
+        num_cars = 48
+        vehicle_ids = list(range(num_cars))
+        x = self.rng.uniform(0, 190, num_cars)
+        y = self.rng.integers(0, 4, num_cars)
+        v = self.rng.uniform(5, 15, num_cars)
+
+        for step in range(10):
+            if step == 5:
+                # two vehicles leave, two join
+                vehicle_ids = vehicle_ids[:-2] + ['a', 'b']
+            x = (x + v * 0.2) % (self.map_length - 1)
+            if step % 3 == 0:
+                y = self.rng.integers(0, 4, num_cars)
+
+            self.tracker.update(vehicle_ids, x, y, v)
+            self.assert_same_as_rebuild(x, y, v)
+
+            # the planner moves the cars around before the next update
+            self.tracker.time_tick(mode='Graph')
+
+        self.assertGreater(self.tracker.repairs, 0)
+
+    def test_cars_persist(self):
+        self.tracker.update([7, 8], [10, 50], [0, 1], [10, 10])
+        car = self.tracker.cars_on_road[0]
+        self.tracker.update([7, 8], [12, 52], [0, 1], [10, 10])
+        self.assertIs(self.tracker.cars_on_road[0], car)
+        self.assertEqual(self.tracker.repairs, 0)
+        self.assertEqual(self.tracker.lane_vehicles[12, 0], 1)
+        self.assertEqual(self.tracker.lane_vehicles[10, 0], 0)
+
+        self.tracker.update([8], [52], [1], [10])
+        self.assertEqual(self.tracker.numcars, 1)
+        self.assertEqual(self.tracker.car_ids, [8])
+        self.assertEqual(np.count_nonzero(self.tracker.lane_vehicles), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the batched edge coordinate transforms
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import pickle
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.application.edge.transform_utils import transform_processor
+
+WAYPOINTS = os.path.join(os.path.dirname(__file__), '..', 'opencda', 'core',
+                         'application', 'edge', 'obj', 'waypoints.pkl')
+
+
+class testTransformUtils(unittest.TestCase):
+    def setUp(self):
+        with open(WAYPOINTS, 'rb') as f:
+            self.waypoints = pickle.load(f)
+        self.processor = transform_processor(self.waypoints)
+        self.rng = np.random.default_rng(0)
+
+    def test_forward(self):
+        points = np.concatenate(
+            [np.stack([self.waypoints[lane]['x'], self.waypoints[lane]['y']],
+                      axis=1) for lane in self.waypoints])
+        points = np.concatenate([points, points + self.rng.normal(
+            0, 2, points.shape)])
+
+        processed = self.processor.process_waypoints_forward(points)
+        expected = [self.processor.process_single_waypoint_forward(x, y)
+                    for x, y in points]
+        np.testing.assert_array_equal(processed, expected)
+
+    def test_back(self):
+        xcars = self.rng.integers(0, 200, (8, 5)).astype(float)
+        ycars = self.rng.integers(0, 4, (8, 5)).astype(float)
+
+        trajectories = self.processor.process_trajectories_back(xcars, ycars)
+        self.assertEqual(trajectories.shape, (8, 2, 5))
+        for step in range(xcars.shape[1]):
+            back = self.processor.process_back(
+                [np.array([[xcars[j, step]], [ycars[j, step]]])
+                 for j in range(xcars.shape[0])])
+            for j in range(xcars.shape[0]):
+                np.testing.assert_allclose(trajectories[j, :, step],
+                                           back[j][:, 0], rtol=0,
+                                           atol=1e-9)
+
+    def test_back_keeps_input(self):
+        points = np.array([[10.0, 2.0], [20.0, 0.0]])
+        self.processor.process_back_batch(points)
+        np.testing.assert_array_equal(points, [[10.0, 2.0], [20.0, 0.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the slim sim side vehicle proxies
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+import carla
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.common.cav_world import CavWorld
+from opencda.core.common.vehicle_manager_proxy import VehicleManagerProxy, \
+    LocalizerProxy, AgentProxy, requires_full_stack
+
+
+class testVehicleManagerProxy(unittest.TestCase):
+    def setUp(self):
+        cav_config = {
+            'sensing': {'localization': {'debug_helper': {
+                'show_animation': False, 'x_scale': 1.0, 'y_scale': 100.0}}},
+            'v2x': {'enabled': True, 'communication_range': 35,
+                    'loc_noise': 0.0, 'yaw_noise': 0.0, 'speed_noise': 0.0,
+                    'lag': 0}}
+        self.config_yaml = {'scenario': {'single_cav_list': [cav_config] * 2}}
+        self.cav_world = CavWorld()
+
+    def build(self, application):
+        proxy = VehicleManagerProxy(1, self.config_yaml, application, None,
+                                    self.cav_world, '0.9.12')
+        proxy.start_vehicle()
+        return proxy
+
+    def test_requires_full_stack(self):
+        self.assertTrue(requires_full_stack(['platooning']))
+        self.assertTrue(requires_full_stack('platooning'))
+        self.assertFalse(requires_full_stack(['single']))
+        self.assertFalse(requires_full_stack(['edge']))
+
+    def test_slim_proxy(self):
+        proxy = self.build(['single'])
+
+        self.assertIsInstance(proxy.localizer, LocalizerProxy)
+        self.assertIsInstance(proxy.agent, AgentProxy)
+        self.assertIsNone(proxy.perception_manager)
+        self.assertIsNone(proxy.controller)
+        self.assertIs(self.cav_world.get_vehicle_managers()[proxy.vid], proxy)
+
+        # pose and speed come from the latest VehicleUpdate
+        transform = carla.Transform(carla.Location(x=10, y=2, z=0),
+                                    carla.Rotation(yaw=90))
+        proxy.vehicle.set_transform(transform)
+        proxy.vehicle.set_velocity(carla.Vector3D(x=3, y=4, z=0))
+        self.assertEqual(proxy.localizer.get_ego_pos().location.x, 10)
+        self.assertAlmostEqual(proxy.localizer.get_ego_spd(), 18.0)
+        self.assertEqual(proxy.localizer.debug_helper.actor_id, 1)
+
+    def test_full_stack_proxy(self):
+        # the full stack itself needs open3d and a world for its sensors
+        with mock.patch.object(VehicleManagerProxy,
+                               'start_full_stack') as start_full_stack:
+            self.build(['platooning'])
+            start_full_stack.assert_called_once()
+            self.build(['single'])
+            start_full_stack.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+End to end test of a multi-vehicle vehiclesim.py host on null vehicles
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import vehiclesim
+from opencda.core.common.fleet_step import HostFleet
+from opencda.ecloud_server.ecloud_shm import run_null_sim
+from opencda.scenario_testing.utils.yaml_utils import load_yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCENARIO = os.path.join(ROOT, 'opencda/scenario_testing/config_yaml/'
+                              'ecloud_4lane_dist_2_car.yaml')
+NUM_TICKS = 40
+TICK_DEADLINE_MS = 300
+MAX_MISSED_TICKS = 2
+SLOW_VEHICLE = 1
+SLOW_TICK = 10
+SLOW_S = 0.7 # evicted after 0.6s, its peer waits on it well within a deadline
+
+
+class testVehiclesimNull(unittest.TestCase):
+    def setUp(self):
+        self.scenario = load_yaml(SCENARIO)
+        for cav_config in self.scenario['scenario']['single_cav_list']:
+            cav_config['controller'] = dict(cav_config['controller'],
+                                            type='fleet_pid_controller')
+        self.num_vehicles = len(self.scenario['scenario']['single_cav_list'])
+        self.opt = argparse.Namespace(
+            num_vehicles=self.num_vehicles, push_port=0, host_id=0,
+            first_vehicle=0, num_shards=1, port=50051, transport='shm',
+            shm_name=f"ecloud_shm_null_{os.getpid()}", null_world=True,
+            apply_ml=False)
+
+    def test_null_host(self):
+        host_fleets = []
+
+        class RecordingHostFleet(HostFleet):
+            def __init__(self):
+                super(RecordingHostFleet, self).__init__()
+                host_fleets.append(self)
+
+        async def run():
+            ready = asyncio.Event()
+            sim = asyncio.create_task(run_null_sim(
+                json.dumps(self.scenario), self.num_vehicles, NUM_TICKS,
+                self.opt.shm_name, ready, timeout_s=30))
+            await ready.wait()
+            await asyncio.wait_for(vehiclesim.run_host(self.opt), 60)
+            return await sim
+
+        with mock.patch.object(vehiclesim, 'HostFleet', RecordingHostFleet):
+            responses = asyncio.run(run())
+
+        # every vehicle reported in, then the spectator's pose every tick
+        self.assertEqual(len(responses), NUM_TICKS + 1)
+        self.assertEqual(len(responses[0].vehicle_update), self.num_vehicles)
+        spectator_x = [response.vehicle_update[0].transform.location.x
+                       for response in responses[1:]]
+        self.assertEqual(len(spectator_x), NUM_TICKS)
+        self.assertGreater(spectator_x[-1], spectator_x[0])
+
+        # one batched localization & control step per tick for the host
+        host_fleet, = host_fleets
+        self.assertEqual(host_fleet.localize.steps, NUM_TICKS)
+        self.assertEqual(host_fleet.control.steps, NUM_TICKS)
+        self.assertEqual(host_fleet.localize.members, 0)
+        self.assertFalse(host_fleet.fleet_filter._used.any()) # slots released
+
+    def test_evicted_vehicle_leaves_host(self):
+        host_fleets = []
+        sent_ticks = {i: [] for i in range(self.num_vehicles)}
+        send_vehicle_update = vehiclesim.send_vehicle_update
+
+        class RecordingHostFleet(HostFleet):
+            def __init__(self):
+                super(RecordingHostFleet, self).__init__()
+                host_fleets.append(self)
+
+        async def slow_send(stub, vehicle_update):
+            # one vehicle stalls past its deadlines once, it is slow - not dead
+            sent_ticks[vehicle_update.vehicle_index].append(vehicle_update.tick_id)
+            if vehicle_update.vehicle_index == SLOW_VEHICLE and \
+                    vehicle_update.tick_id == SLOW_TICK:
+                await asyncio.sleep(SLOW_S)
+            return await send_vehicle_update(stub, vehicle_update)
+
+        async def run():
+            ready = asyncio.Event()
+            sim = asyncio.create_task(run_null_sim(
+                json.dumps(self.scenario), self.num_vehicles, NUM_TICKS,
+                self.opt.shm_name, ready, timeout_s=30,
+                tick_deadline_ms=TICK_DEADLINE_MS,
+                max_missed_ticks=MAX_MISSED_TICKS))
+            await ready.wait()
+            # the host exits: the evicted vehicle left, its peer got END
+            await asyncio.wait_for(vehiclesim.run_host(self.opt), 30)
+            return await sim
+
+        with mock.patch.object(vehiclesim, 'HostFleet', RecordingHostFleet), \
+                mock.patch.object(vehiclesim, 'send_vehicle_update', slow_send):
+            responses = asyncio.run(run())
+
+        # the spectator kept ticking to the end
+        self.assertEqual(len(responses), NUM_TICKS + 1)
+        self.assertEqual(len(sent_ticks[0]), NUM_TICKS)
+        self.assertEqual(sent_ticks[0][-1], NUM_TICKS)
+        # the slow vehicle's late reply was its last, then it left the fleet step
+        self.assertEqual(sent_ticks[SLOW_VEHICLE][-1], SLOW_TICK)
+        self.assertEqual(sent_ticks[SLOW_VEHICLE], sent_ticks[0][:len(sent_ticks[SLOW_VEHICLE])])
+        host_fleet, = host_fleets
+        self.assertEqual(host_fleet.localize.steps, NUM_TICKS)
+        self.assertEqual(host_fleet.localize.members, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
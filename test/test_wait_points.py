@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the wait point records and the adaptive backoff
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from opencda.core.common.wait_points import AdaptiveBackoff, \
+    wait_breakdown, wait_until, waiting
+
+
+class FakeWorld(object):
+    """
+    A world whose actor shows up after visible_s.
+    """
+
+    def __init__(self, visible_s):
+        self.visible_at = time.time() + visible_s
+
+    def get_actor(self, actor_id):
+        return 'actor' if time.time() >= self.visible_at else None
+
+
+class testWaitPoints(unittest.TestCase):
+    def test_backoff(self):
+        backoff = AdaptiveBackoff(0.01, 0.05)
+        self.assertEqual([backoff.next_delay() for _ in range(5)],
+                         [0.01, 0.02, 0.04, 0.05, 0.05])
+        backoff.reset()
+        self.assertEqual((backoff.next_delay(), backoff.polls), (0.01, 1))
+
+    def test_wait_until(self):
+        results = iter([None, None, 'actor'])
+        backoff = AdaptiveBackoff(0.001, 0.002)
+        self.assertEqual(asyncio.run(wait_until(lambda: next(results), backoff, 5.0)), 'actor')
+        self.assertEqual(backoff.polls, 2)
+        # gives up once the timeout passed
+        self.assertIsNone(asyncio.run(wait_until(lambda: None, AdaptiveBackoff(0.001, 0.002), 0.01)))
+
+    def test_wait_until_shares_loop(self):
+        # two vehicles of a host: one still polls for its actor, the other keeps stepping
+        world = FakeWorld(0.1)
+        steps = []
+
+        async def attach():
+            return await wait_until(lambda: world.get_actor(1), AdaptiveBackoff(0.01, 0.05), 5.0)
+
+        async def step():
+            while world.get_actor(1) is None:
+                steps.append(time.time())
+                await asyncio.sleep(0.005)
+
+        async def run():
+            return await asyncio.gather(attach(), step())
+
+        actor, _ = asyncio.run(run())
+        self.assertEqual(actor, 'actor')
+        self.assertGreater(len(steps), 5)
+        self.assertLess(max(b - a for a, b in zip(steps, steps[1:])), 0.05)
+
+    def test_breakdown(self):
+        wait_list = []
+        with waiting(wait_list, "client.tick", 3):
+            pass
+        self.assertEqual(wait_list[0][:2], ("client.tick", 3))
+        self.assertGreaterEqual(wait_list[0][2], 0)
+
+        breakdown = wait_breakdown([("sim.tick_barrier", 1, 30.0), ("client.tick", 1, 5.0),
+                                    ("client.tick", 2, 5.0)])
+        self.assertEqual(list(breakdown), ["client.tick", "sim.tick_barrier"])
+        self.assertEqual(breakdown["client.tick"]["count"], 2)
+        self.assertEqual(breakdown["client.tick"]["total_ms"], 10.0)
+        self.assertAlmostEqual(breakdown["sim.tick_barrier"]["share"], 0.75)
+        self.assertEqual(wait_breakdown([]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
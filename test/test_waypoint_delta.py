@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the delta encoded edge waypoint buffers
+"""
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: MIT
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ecloud_pb2 as ecloud
+
+from opencda.core.common.waypoint_delta import WaypointDeltaEncoder, \
+    WaypointDeltaDecoder
+
+
+def full_buffer(vehicle_index, points):
+    buffer = ecloud.WaypointBuffer()
+    buffer.vehicle_index = vehicle_index
+    for x, y, z in points:
+        waypoint = buffer.waypoint_buffer.add()
+        waypoint.id = '1234567890'
+        waypoint.transform.location.x = x
+        waypoint.transform.location.y = y
+        waypoint.transform.location.z = z
+        waypoint.transform.rotation.yaw = 90.0
+        waypoint.lane_width = 3.5
+    return buffer
+
+
+class testWaypointDelta(unittest.TestCase):
+    def setUp(self):
+        self.resolved = []
+        self.decoder = WaypointDeltaDecoder(self.resolve)
+        self.encoder = WaypointDeltaEncoder()
+
+    def resolve(self, x, y, z, *fields):
+        self.resolved.append((x, y, z))
+        return (x, y, z)
+
+    def route(self, start, length):
+        return [(float(i), 2.0 * i, 0.5) for i in range(start, start + length)]
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        start = 0
+        for step in range(30):
+            start += int(rng.integers(0, 3))
+            points = self.route(start, 10 + int(rng.integers(-2, 3)))
+            if step % 7 == 3:
+                points[4] = (points[4][0], points[4][1] + 1.0, 0.5)
+            encoded = self.encoder.encode(full_buffer(1, points))
+            waypoints = self.decoder.decode(encoded)
+            np.testing.assert_allclose(waypoints, points, rtol=1e-6)
+            self.assertEqual(self.decoder.version, encoded.version)
+
+        # only the new points were resolved
+        self.assertLess(len(self.resolved), 30 * 10 / 2)
+
+    def test_unchanged(self):
+        points = self.route(0, 10)
+        first = self.encoder.encode(full_buffer(1, points))
+        self.decoder.decode(first)
+        resolved = len(self.resolved)
+
+        again = self.encoder.encode(full_buffer(1, points))
+        self.assertTrue(again.unchanged)
+        self.assertEqual(again.version, first.version)
+        self.assertEqual(self.decoder.decode(again), points)
+        self.assertEqual(len(self.resolved), resolved)
+
+    def test_bytes(self):
+        buffers = [[full_buffer(i, self.route(step + i, 10)) for i in range(8)]
+                   for step in range(10)]
+        for step_buffers in buffers:
+            self.encoder.encode_all(step_buffers)
+        full_bytes, sent_bytes = np.sum(self.encoder.step_bytes[1:], axis=0)
+        self.assertLess(sent_bytes, full_bytes / 4)
+
+    def test_version_mismatch(self):
+        self.encoder.encode(full_buffer(1, self.route(0, 10)))
+        delta = self.encoder.encode(full_buffer(1, self.route(1, 10)))
+        self.assertTrue(delta.HasField('delta'))
+        # the client missed the first version
+        self.assertIsNone(self.decoder.decode(delta))
+        self.assertEqual(self.decoder.version, 0)
+
+    def test_unversioned(self):
+        points = self.route(0, 3)
+        self.assertEqual(self.decoder.decode(full_buffer(1, points)), points)
+        self.assertEqual(self.decoder.version, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
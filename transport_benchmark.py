@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Script to compare the tick barrier over gRPC and over the shm transport.
+
+Runs a fleet of null vehicles that only acknowledge ticks against a single
+ecloud server - the C++ server over loopback gRPC (grpc), its Python
+stand-in over loopback gRPC (grpc_py) and the sim-hosted shared-memory
+server (shm) - and prints the tick barrier latency as the sim sees it.
+grpc_py and shm run the same Python barrier, so they compare the
+transports alone.
+"""
+
+# Author: Jordan Rapp <jrapp7@gatech.edu>
+# License: TDG-Attribution-NonCommercial-NoDistrib
+
+import argparse
+import asyncio
+import logging
+import subprocess
+
+import coloredlogs
+
+from opencda.ecloud_server.ecloud_shards import ECLOUD_SERVER_BINARY, \
+    NULL_SERVER, benchmark_shards
+from opencda.ecloud_server.ecloud_shm import benchmark_shm
+
+logger = logging.getLogger(__name__)
+coloredlogs.install(level='INFO', logger=logger)
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="eCloud transport benchmark.")
+    parser.add_argument("-n", "--vehicles", nargs='+', type=int, default=[32, 64, 128, 256, 512],
+                        help="Fleet sizes")
+    parser.add_argument("-t", "--transports", nargs='+', type=str, default=['grpc', 'grpc_py', 'shm'],
+                        choices=['grpc', 'grpc_py', 'shm'], help="Transports to compare")
+    parser.add_argument("--ticks", type=int, default=50,
+                        help="Ticks per run")
+    parser.add_argument("--processes", type=int, default=8,
+                        help="Processes the null vehicles are split over")
+    parser.add_argument("--binary", type=str, default=ECLOUD_SERVER_BINARY,
+                        help="ecloud server binary (grpc)")
+    opt = parser.parse_args()
+    return opt
+
+
+def main():
+    opt = arg_parse()
+
+    loop = asyncio.get_event_loop()
+    for num_vehicles in opt.vehicles:
+        for transport in opt.transports:
+            if transport == 'grpc':
+                subprocess.run(['pkill', '-9', 'ecloud_server'])
+                stats = loop.run_until_complete(benchmark_shards(
+                    num_vehicles, 1, opt.ticks, opt.processes, opt.binary))
+            elif transport == 'grpc_py':
+                stats = loop.run_until_complete(benchmark_shards(
+                    num_vehicles, 1, opt.ticks, opt.processes, NULL_SERVER))
+            else:
+                stats = loop.run_until_complete(benchmark_shm(
+                    num_vehicles, opt.ticks, opt.processes))
+            logger.info(f"{num_vehicles} vehicles, {transport}: tick barrier "
+                        f"{stats['tick_ms']['mean']:.1f}ms mean / {stats['tick_ms']['p95']:.1f}ms p95, "
+                        f"registration {stats['registration_ms']:.0f}ms")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info(' - Exited by user.')
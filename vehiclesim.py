@@ -23,15 +23,25 @@ import coloredlogs
 
 from opencda.version import __version__
 from opencda.core.common.cav_world import CavWorld
-from opencda.core.common.vehicle_manager import VehicleManager
 from opencda.core.application.edge.transform_utils import *
 from opencda.core.plan.local_planner_behavior import RoadOption
 from opencda.core.plan.global_route_planner import GlobalRoutePlanner
 from opencda.core.plan.global_route_planner_dao import GlobalRoutePlannerDAO
 from opencda.scenario_testing.utils.yaml_utils import load_yaml
 
-from opencda.core.common.ecloud_config import EcloudConfig, eDoneBehavior
+from opencda.core.common.ecloud_config import EcloudConfig, eDoneBehavior, eTickMode
+from opencda.core.common.tick_barrier import latest_tick
+from opencda.core.common.fleet_step import HostFleet
+from opencda.core.common.tracing import configure_tracer, get_tracer
+from opencda.core.common.resource_monitor import configure_resource_collector, get_resource_collector
+from opencda.core.common.wait_points import CLIENT_READINESS, CLIENT_TICK, CLIENT_WAYPOINTS, \
+    AdaptiveBackoff, waiting
+from opencda.core.common.replay import configure_recorder, get_recorder, location_to_tuple
+from opencda.core.common.waypoint_delta import WaypointDeltaDecoder
+from opencda.core.common.local_waypoint import LocalWaypointResolver
 from opencda.ecloud_server.ecloud_comms import EcloudClient, EcloudPushServer, ecloud_run_push_server
+from opencda.ecloud_server.ecloud_shards import shard_of
+from opencda.ecloud_server.ecloud_shm import SHM_NAME, ShmEcloudClient
 
 import grpc
 from google.protobuf.json_format import MessageToJson
@@ -59,7 +69,7 @@ elif cloud_config["log_level"] == "info":
     logger.setLevel(logging.INFO)
 
 #TODO: move to eCloudClient
-def serialize_debug_info(vehicle_update, vehicle_manager) -> None:
+def serialize_debug_info(vehicle_update, vehicle_manager, report_spans=True, trace_report_size=None) -> None:
     planer_debug_helper = vehicle_manager.agent.debug_helper
     planer_debug_helper_msg = ecloud.PlanerDebugHelper()
     planer_debug_helper.serialize_debug_info(planer_debug_helper_msg)
@@ -71,21 +81,32 @@ def serialize_debug_info(vehicle_update, vehicle_manager) -> None:
     vehicle_update.loc_debug_helper.CopyFrom( loc_debug_helper_msg )
 
     client_debug_helper = vehicle_manager.debug_helper
+    if report_spans: # the tracer & resource collector are per process - one vehicle of a multi-vehicle host reports them
+        tracer = get_tracer()
+        spans = tracer.spans(trace_report_size)
+        if tracer.enabled and len(spans) < len(tracer.spans()):
+            logger.warning(f"reporting the newest {len(spans)} of {len(tracer.spans())} spans - raise ecloud.trace_report_size for more")
+        client_debug_helper.update_trace_spans(spans)
+        resource_collector = get_resource_collector()
+        client_debug_helper.update_resource_samples(resource_collector.process_name, resource_collector.samples())
     #logger.debug(vehicle_manager.debug_helper.perception_time_list)
     client_debug_helper_msg = ecloud.ClientDebugHelper()
     client_debug_helper.serialize_debug_info(client_debug_helper_msg)
     vehicle_update.client_debug_helper.CopyFrom(client_debug_helper_msg)
 
 #TODO: move to eCloudClient
-async def send_registration_to_ecloud_server(stub_) -> ecloud.SimulationInfo:
+async def send_registration_to_ecloud_server(stub_, push_port=0, slot=None) -> ecloud.SimulationInfo:
     request = ecloud.RegistrationInfo()
     request.vehicle_state = ecloud.VehicleState.REGISTERING
     try:
         request.container_name = os.environ["HOSTNAME"]
     except Exception as e:
         request.container_name = f"vehiclesim.py"
+    if slot is not None:
+        request.container_name = f"{request.container_name}_{slot}"
 
     request.vehicle_ip = VEHICLE_IP
+    request.push_port = push_port # 0: the server uses ECLOUD_PUSH_BASE_PORT + vehicle index
     
     sim_info = await stub_.Client_RegisterVehicle(request)
 
@@ -128,6 +149,24 @@ def arg_parse():
                         help="Specifies the ip address of the server to connect to. [Default: localhost]")
     parser.add_argument('-p', "--port", type=int, default=50051,
                         help="Specifies the port to connect to. [Default: 50051]")
+    parser.add_argument('-n', "--num_vehicles", type=int, default=1,
+                        help="Number of vehicles this process runs. [Default: 1]")
+    parser.add_argument("--push_port", type=int, default=0,
+                        help="First push port of this process' vehicles, vehicle n listens on push_port + n. "
+                             "[Default: 0 - ECLOUD_PUSH_BASE_PORT + vehicle index]")
+    parser.add_argument("--host_id", type=int, default=None,
+                        help="Index of this process, set by launch_vehicles.py")
+    parser.add_argument("--first_vehicle", type=int, default=0,
+                        help="Fleet ordinal of this process' first vehicle, set by launch_vehicles.py. [Default: 0]")
+    parser.add_argument("--num_shards", type=int, default=1,
+                        help="Number of ecloud server shards, vehicle n connects to port + ( first_vehicle + n ) % num_shards. "
+                             "[Default: 1]")
+    parser.add_argument("--transport", type=str, default="grpc", choices=["grpc", "shm"],
+                        help="grpc, or shm when the sim runs on this machine with ecloud.transport: shm. [Default: grpc]")
+    parser.add_argument("--shm_name", type=str, default=SHM_NAME,
+                        help=f"Shared memory segment of the shm transport. [Default: {SHM_NAME}]")
+    parser.add_argument("--null_world", action="store_true",
+                        help="Run null vehicles without CARLA - point masses instead of actors, no sensors or map")
     parser.add_argument('-v', "--verbose", action="store_true",
                             help="Make more noise")
     parser.add_argument('-q', "--quiet", action="store_true",
@@ -136,7 +175,58 @@ def arg_parse():
     opt = parser.parse_args()
     return opt
 
-async def main():
+def vehicle_manager_class(null_world):
+    """
+    NullVehicleManager for null hosts, VehicleManager otherwise. We import
+    in this way so null hosts run without CARLA's sensors & open3d.
+    """
+    if null_world:
+        from opencda.core.common.null_vehicle_manager import NullVehicleManager
+        return NullVehicleManager
+
+    from opencda.core.common.vehicle_manager import VehicleManager
+    return VehicleManager
+
+async def register_vehicle(opt, ecloud_server, slot):
+    """
+    Register one vehicle with the ecloud server.
+
+    Returns
+    -------
+    registration : tuple
+        (ecloud.SimulationInfo, push queue, push ready event, push server
+        task or None if the push server starts once the index is known).
+    """
+    push_q = asyncio.Queue()
+    push_server = None
+
+    # with an assigned push port, listen before registering so the server can dial us right away
+    push_port = opt.push_port + slot if opt.push_port and opt.transport != "shm" else 0
+    push_ready = asyncio.Event()
+    if push_port:
+        push_server = asyncio.create_task(ecloud_run_push_server(push_port, push_q, push_ready))
+        await push_ready.wait()
+
+    ecloud_update = await send_registration_to_ecloud_server(ecloud_server, push_port, slot if opt.num_vehicles > 1 else None)
+
+    return ecloud_update, push_q, push_ready, push_server
+
+def configure_process(opt, vehicle_index, ecloud_config):
+    """
+    Configure the tracer, recorder & resource collector of this process -
+    one for all the vehicles of a multi-vehicle host.
+    """
+    process_name = f"host_{opt.host_id if opt.host_id is not None else os.getpid()}" if opt.num_vehicles > 1 else f"vehicle_{vehicle_index}"
+    configure_tracer(process_name, ecloud_config.get_trace_enabled(), ecloud_config.get_trace_buffer_size())
+    configure_recorder(process_name, ecloud_config.get_record_enabled(), ecloud_config.get_record_folder())
+    configure_resource_collector(process_name, ecloud_config.get_resource_telemetry_enabled(),
+                                 ecloud_config.get_resource_sample_period_s()).start()
+
+async def run_vehicle(opt, ecloud_server, cav_world, slot, registration, host_fleet=None):
+    """
+    Run one registered vehicle until the scenario ends. A process runs
+    opt.num_vehicles of these on one event loop, sharing host_fleet.
+    """
     #TODO: move to eCloudConfig
     # default params which can be over-written from the simulation controller
     SPECTATOR_INDEX = 0
@@ -145,29 +235,9 @@ async def main():
     version = "0.9.12"
     tick_id = 0
     reported_done = False
-    push_q = asyncio.Queue()
-
-    opt = arg_parse()
-    if opt.verbose:
-        logger.setLevel(logging.DEBUG)
-    elif opt.quiet:
-        logger.setLevel(logging.WARNING)
-    logger.info(f"OpenCDA Version: {version}")
+    shm_transport = opt.transport == "shm"
 
-    logging.basicConfig()
-
-    # TODO: move to eCloudClient
-    channel = grpc.aio.insecure_channel(
-        target=f"{ECLOUD_IP}:{opt.port}",
-        options=[
-            ("grpc.lb_policy_name", "pick_first"),
-            ("grpc.enable_retries", 1),
-            ("grpc.keepalive_timeout_ms", 10000),
-            ("grpc.service_config", EcloudClient.retry_opts),],
-        )
-    
-    ecloud_server = ecloud_rpc.EcloudStub(channel)
-    ecloud_update = await send_registration_to_ecloud_server(ecloud_server)
+    ecloud_update, push_q, push_ready, push_server = registration
     vehicle_index = ecloud_update.vehicle_index
     assert( vehicle_index != None )
 
@@ -178,9 +248,6 @@ async def main():
     logger.debug(f"main - application: {application}")
     logger.debug(f"main - version: {version}")
 
-    # create CAV world
-    cav_world = CavWorld(opt.apply_ml)
-
     logger.info(f"eCloud debug: creating VehicleManager vehicle_index: {vehicle_index}")
 
     scenario_yaml = json.loads(test_scenario) #load_yaml(test_scenario)
@@ -188,20 +255,30 @@ async def main():
         logger.debug(f"main - test_scenario: {test_scenario}") # VERY verbose
 
     # spawn push server
-    push_port = ECLOUD_PUSH_BASE_PORT + vehicle_index
-    push_server = asyncio.create_task(ecloud_run_push_server(push_port, push_q))
-
-    await asyncio.sleep(1)
+    if shm_transport:
+        # ticks arrive through shared memory, the client queues them like the push server
+        push_server = asyncio.create_task(ecloud_server.run_push(push_q, push_ready))
+    elif push_server is None:
+        push_port = ECLOUD_PUSH_BASE_PORT + vehicle_index
+        push_server = asyncio.create_task(ecloud_run_push_server(push_port, push_q, push_ready))
 
     ecloud_config = EcloudConfig(scenario_yaml, logger)
-    SPAWN_SLEEP_TIME = ecloud_config.get_client_spawn_ping_time_s()
-    TICK_SLEEP_TIME = ecloud_config.get_client_tick_ping_time_s()
-    WORLD_TIME_SLEEP_FACTOR = ecloud_config.get_client_world_tick_factor()
+    # ticks are pushed - only looking up the sim's actor still polls, backing off between the ping times
+    attach_backoff = AdaptiveBackoff(ecloud_config.get_client_tick_ping_time_s(), ecloud_config.get_client_spawn_ping_time_s())
     NUM_SERVERS = ecloud_config.get_num_servers()
     NUM_PORTS = ecloud_config.get_num_ports()
+    # tracer & recorder are per process, main configured them before the vehicles started
+    tracer = get_tracer()
+    recorder = get_recorder()
+    resource_collector = get_resource_collector()
+    resource_collector.add_queue(f"push_q_{vehicle_index}", push_q)
 
     location_type = ecloud_config.get_location_type()
     done_behavior = ecloud_config.get_done_behavior()
+    # async: the world does not wait for us - act on the latest tick, the last control stays applied in between
+    async_ticks = ecloud_config.get_tick_mode() == eTickMode.ASYNC
+    # sync: the host's vehicles all run the same tick, so they step the fleet filter & controller once together
+    fleet_step = host_fleet is not None and not async_ticks
 
     target_speed = None
     edge_sets_destination = False
@@ -213,19 +290,24 @@ async def main():
         edge_sets_destination = scenario_yaml['scenario']['edge_list'][0]['edge_sets_destination'] \
             if 'edge_sets_destination' in scenario_yaml['scenario']['edge_list'][0] else False
 
-    if opt.apply_ml:
-        await asyncio.sleep(vehicle_index + 1)
+    # the sim spawned our actor with the rest of the fleet - attach to it
+    spawn = ecloud_update.spawns[0] if len(ecloud_update.spawns) else None
 
-    vehicle_manager = VehicleManager(vehicle_index=vehicle_index, config_yaml=scenario_yaml, application=application, cav_world=cav_world, \
-                                     carla_version=version, location_type=location_type, run_distributed=True, is_edge=is_edge)
+    vehicle_manager = await vehicle_manager_class(opt.null_world).create(vehicle_index=vehicle_index, config_yaml=scenario_yaml, application=application, cav_world=cav_world, \
+                                     carla_version=version, location_type=location_type, run_distributed=True, is_edge=is_edge, spawn=spawn, \
+                                     attach_backoff=attach_backoff, host_fleet=host_fleet)
+    wait_time_list = vehicle_manager.debug_helper.wait_time_list
 
     actor_id = vehicle_manager.vehicle.id
     vid = vehicle_manager.vid
 
-    await send_carla_data_to_opencda(ecloud_server, vehicle_index, actor_id, vid)
+    # readiness barrier: the server pushes the first tick once every vehicle reported in
+    with waiting(wait_time_list, CLIENT_READINESS):
+        await push_ready.wait()
+        await send_carla_data_to_opencda(ecloud_server, vehicle_index, actor_id, vid)
 
-    assert(push_q.empty())
-    pong = await push_q.get()
+        assert(push_q.empty())
+        pong = await push_q.get()
     push_q.task_done()
 
     vehicle_manager.update_info()
@@ -236,6 +318,12 @@ async def main():
 
     logger.info(f"vehicle {vehicle_index} beginning scenario tick flow")
     waypoint_proto = None
+    waypoint_decoder = None
+    waypoint_resolver = None
+    if is_edge:
+        # one map handle per vehicle, edge points become LocalWaypoints without map lookups
+        waypoint_resolver = LocalWaypointResolver(vehicle_manager.carla_map, 2)
+        waypoint_decoder = WaypointDeltaDecoder(waypoint_resolver.from_point)
     while pong.command != ecloud.Command.END:   
         
         vehicle_update = ecloud.VehicleUpdate()
@@ -245,15 +333,24 @@ async def main():
         # HANDLE DEBUG DATA REQUEST
         if pong.command == ecloud.Command.REQUEST_DEBUG_INFO:
             vehicle_update.vehicle_state = ecloud.VehicleState.DEBUG_INFO_UPDATE            
-            serialize_debug_info(vehicle_update, vehicle_manager)
+            serialize_debug_info(vehicle_update, vehicle_manager, slot == 0, ecloud_config.get_trace_report_size())
   
         # HANDLE TICK
         elif pong.command == ecloud.Command.TICK:
+            tracer.set_tick(tick_id)
+            recorder.set_tick(tick_id, vehicle_index)
+            resource_collector.set_tick(tick_id)
+            recorder.record("comms", "tick", inputs=pong.SerializeToString(), vehicle_index=vehicle_index)
             client_start_timestamp = Timestamp()
             client_start_timestamp.GetCurrentTime()
+            if fleet_step:
+                vehicle_manager.localize_collect()
+                with tracer.span("client.fleet_localize"):
+                    await host_fleet.localize.arrive()
             # update info runs BEFORE waypoint injection
             update_info_start_time = time.time()
-            vehicle_manager.update_info()
+            with tracer.span("client.update_info"):
+                vehicle_manager.update_info(collected=fleet_step)
             update_info_end_time = time.time()
             vehicle_manager.debug_helper.update_update_info_time((update_info_end_time-update_info_start_time)*1000)
             logger.debug("update_info complete")
@@ -267,12 +364,12 @@ async def main():
                     self._dao = GlobalRoutePlannerDAO(world.get_map(), 2)
                     location = self._dao.get_waypoint(carla.Location(x=car_array[0][i], y=car_array[1][i], z=0.0))
                     '''
-                    world = vehicle_manager.vehicle.get_world()
-                    dao = GlobalRoutePlannerDAO(world.get_map(), 2)
-                    for swp in waypoint_proto.waypoint_buffer:
-                        #logger.debug(swp.SerializeToString())
-                        logger.debug(f"Override Waypoint x:{swp.transform.location.x}, y:{swp.transform.location.y}, z:{swp.transform.location.z}, rl:{swp.transform.rotation.roll}, pt:{swp.transform.rotation.pitch}, yw:{swp.transform.rotation.yaw}")
-                        wp = deserialize_waypoint(swp, dao)
+                    edge_waypoints_start_ns = time.time_ns()
+                    recorder.record("comms", "waypoints", inputs=waypoint_proto.SerializeToString(), vehicle_index=vehicle_index)
+                    override_locations = []
+                    # only new points of a delta encoded buffer are rebuilt
+                    override_waypoints = waypoint_decoder.decode(waypoint_proto) or []
+                    for wp in override_waypoints:
                         logger.debug(f"DAO Waypoint x:{wp.transform.location.x}, y:{wp.transform.location.y}, z:{wp.transform.location.z}, rl:{wp.transform.rotation.roll}, pt:{wp.transform.rotation.pitch}, yw:{wp.transform.rotation.yaw}")
                         is_wp_valid = vehicle_manager.agent.get_local_planner().is_waypoint_valid(waypoint=wp)
                         
@@ -294,8 +391,13 @@ async def main():
                                     waypoint_buffer.clear() #EDIT MADE
                                     has_not_cleared_buffer = False
                                 waypoint_buffer.append((wp, RoadOption.STRAIGHT))
+                                override_locations.append(location_to_tuple(wp.transform.location))
+
+                    if override_locations:
+                        recorder.record("agent", "override", inputs={"locations": override_locations}, vehicle_index=vehicle_index)
 
                     waypoint_proto = None
+                    tracer.record("client.edge_waypoints", edge_waypoints_start_ns, time.time_ns() - edge_waypoints_start_ns)
 
                 cur_location = vehicle_manager.vehicle.get_location()
                 logger.debug(f"location for vehicle_{vehicle_index} - is - x: {cur_location.x}, y: {cur_location.y}")
@@ -315,8 +417,19 @@ async def main():
             if should_run_step:
                 if reported_done:
                    target_speed = 0 
-                control = vehicle_manager.run_step(target_speed=target_speed)
+                if fleet_step:
+                    # the host's fleet controller steps every staged vehicle at once
+                    with tracer.span("client.run_step"):
+                        staged = vehicle_manager.stage_step(target_speed=target_speed)
+                    with tracer.span("client.fleet_control"):
+                        await host_fleet.control.arrive()
+                    control = vehicle_manager.finish_step(host_fleet.control.share_ms) if staged else None
+                else:
+                    with tracer.span("client.run_step"):
+                        control = vehicle_manager.run_step(target_speed=target_speed)
                 logger.debug("run_step complete")
+            elif fleet_step:
+                await host_fleet.control.arrive() # nothing staged, the rest of the host still waits for us
 
             vehicle_update.tick_id = tick_id
             
@@ -324,13 +437,14 @@ async def main():
                 if control is None or vehicle_manager.is_close_to_scenario_destination():
                     vehicle_update.vehicle_state = ecloud.VehicleState.TICK_DONE
                     if not reported_done:
-                        serialize_debug_info(vehicle_update, vehicle_manager)
+                        serialize_debug_info(vehicle_update, vehicle_manager, slot == 0, ecloud_config.get_trace_report_size())
 
                     if control is not None and done_behavior == eDoneBehavior.CONTROL:
                         vehicle_manager.apply_control(control)
 
                 else:
-                    vehicle_manager.apply_control(control)
+                    with tracer.span("client.apply_control"):
+                        vehicle_manager.apply_control(control)
                     logger.debug("apply_control complete")
                     
                     step_timestamps = ecloud.Timestamps()
@@ -373,7 +487,9 @@ async def main():
                 vehicle_update.tick_id = tick_id
                 vehicle_update.vehicle_index = vehicle_index
                 logger.debug(f'VEHICLE_UPDATE_DBG: \n vehicle_index: {vehicle_index} \n tick_id: {tick_id} \n {vehicle_update}')
-                ecloud_update = await send_vehicle_update(ecloud_server, vehicle_update)
+                recorder.record("comms", "update", inputs=vehicle_update.SerializeToString(), vehicle_index=vehicle_index)
+                with tracer.span("client.send_update"):
+                    ecloud_update = await send_vehicle_update(ecloud_server, vehicle_update)
 
             if vehicle_update.vehicle_state == ecloud.VehicleState.TICK_DONE or vehicle_update.vehicle_state == ecloud.VehicleState.DEBUG_INFO_UPDATE:
                 if vehicle_update.vehicle_state == ecloud.VehicleState.DEBUG_INFO_UPDATE and pong.command == ecloud.Command.REQUEST_DEBUG_INFO:
@@ -384,30 +500,114 @@ async def main():
                 reported_done = True
                 logger.info(f"reported_done")
 
-            assert(push_q.empty())
-            pong = await push_q.get()
+            if not async_ticks:
+                # only the eviction notice can come in while a vehicle steps
+                assert(push_q.qsize() <= 1)
+            with tracer.span("client.wait_tick"), waiting(wait_time_list, CLIENT_TICK, tick_id):
+                pong = await push_q.get()
             push_q.task_done()
+            if async_ticks:
+                await asyncio.sleep(0) # let the pushes that arrived during the step land in the queue
+                ticks = [pong]
+                while not push_q.empty():
+                    ticks.append(push_q.get_nowait())
+                    push_q.task_done()
+                pong, skipped = latest_tick(ticks)
+                vehicle_manager.debug_helper.update_staleness(skipped)
             assert( pong.tick_id != tick_id )
             tick_id = pong.tick_id
 
             if pong.command == ecloud.Command.PULL_WAYPOINTS_AND_TICK:
                 wp_request = ecloud.WaypointRequest()
                 wp_request.vehicle_index = vehicle_index
-                waypoint_proto = await ecloud_server.Client_GetWaypoints(wp_request)
+                wp_request.version = waypoint_decoder.version if waypoint_decoder is not None else 0
+                with waiting(wait_time_list, CLIENT_WAYPOINTS, pong.tick_id):
+                    waypoint_proto = await ecloud_server.Client_GetWaypoints(wp_request)
                 pong.command = ecloud.Command.TICK    
             
             # HANDLE END
             elif pong.command == ecloud.Command.END:
                 logger.critical("END received")
                 break
+
+            # the server evicted us - leave, so the host's other vehicles no longer wait on our fleet steps
+            elif pong.command == ecloud.Command.EVICTED:
+                logger.error(f"vehicle {vehicle_index} evicted")
+                break
                 
         else: # done
             logger.info("EXIT destroy-on-done vehicle actor")
             break
 
     # end while    
+    if waypoint_decoder is not None and waypoint_decoder.decode_ms:
+        logger.info(f"edge waypoints: {waypoint_decoder.bytes_received} bytes received, decode mean {np.mean(waypoint_decoder.decode_ms)} ms over {len(waypoint_decoder.decode_ms)} buffers, {waypoint_resolver.map_lookups} map lookups")
+
+    if host_fleet is not None:
+        host_fleet.leave()
     vehicle_manager.destroy()
     push_server.cancel() 
+    logger.info(f"vehicle {vehicle_index} scenario complete.")
+
+async def run_host(opt):
+    """
+    Register and run the opt.num_vehicles vehicles of this process until
+    the scenario ends.
+    """
+    # TODO: move to eCloudClient
+    # with a sharded server every vehicle registers with the shard its fleet ordinal maps to
+    ecloud_servers = []
+    for shard_id in range(opt.num_shards if opt.transport == "grpc" else 0):
+        channel = grpc.aio.insecure_channel(
+            target=f"{ECLOUD_IP}:{opt.port + shard_id}",
+            options=[
+                ("grpc.lb_policy_name", "pick_first"),
+                ("grpc.enable_retries", 1),
+                ("grpc.keepalive_timeout_ms", 10000),
+                ("grpc.service_config", EcloudClient.retry_opts),] + EcloudClient.message_size_opts,
+            )
+        ecloud_servers.append(ecloud_rpc.EcloudStub(channel))
+
+    # create CAV world - shared by the vehicles of this process, so ML models load once
+    cav_world = CavWorld(opt.apply_ml)
+    # the vehicles of a multi-vehicle host localize in one shared, batched filter
+    host_fleet = HostFleet() if opt.num_vehicles > 1 else None
+
+    # over shm every vehicle has its own connection to the sim
+    vehicle_servers = [ShmEcloudClient(opt.shm_name) if opt.transport == "shm" else
+                       ecloud_servers[shard_of(opt.first_vehicle + slot, opt.num_shards)]
+                       for slot in range(opt.num_vehicles)]
+    registrations = await asyncio.gather(*[register_vehicle(opt, vehicle_servers[slot], slot)
+                                           for slot in range(opt.num_vehicles)])
+
+    # every vehicle of the scenario gets the same config - set up the process before any of them records
+    first_update = registrations[0][0]
+    configure_process(opt, first_update.vehicle_index, EcloudConfig(json.loads(first_update.test_scenario), logger))
+    if host_fleet is not None:
+        for _ in range(opt.num_vehicles):
+            host_fleet.join()
+
+    # any vehicle failing takes the process down so launch_vehicles.py sees it
+    await asyncio.gather(*[run_vehicle(opt, vehicle_servers[slot], cav_world, slot, registrations[slot], host_fleet)
+                           for slot in range(opt.num_vehicles)])
+    get_resource_collector().stop()
+
+    recorder = get_recorder()
+    if recorder.enabled:
+        logger.info(f"saved recording to {recorder.save()}")
+
+async def main():
+    opt = arg_parse()
+    if opt.verbose:
+        logger.setLevel(logging.DEBUG)
+    elif opt.quiet:
+        logger.setLevel(logging.WARNING)
+    logger.info(f"OpenCDA Version: {__version__}")
+
+    logging.basicConfig()
+
+    await run_host(opt)
+
     logger.info("scenario complete. exiting.")
     sys.exit(0)
 